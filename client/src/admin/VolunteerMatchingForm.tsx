@@ -38,6 +38,8 @@ const VolunteerMatchingForm: React.FC = () => {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState("");
   const [success, setSuccess] = useState("");
+  const [cursor, setCursor] = useState<string | null>(null);
+  const [hasMore, setHasMore] = useState(false);
 
   useEffect(() => {
     if (user?.id) {
@@ -45,50 +47,26 @@ const VolunteerMatchingForm: React.FC = () => {
     }
   }, [user?.id]);
 
-  const loadData = async () => {
+  const loadData = async (after: string | null = null) => {
     setLoading(true);
     try {
       if (!user?.id) {
         setError("User not authenticated");
         return;
       }
-      
-      const [volRes, evtRes] = await Promise.all([
-        fetch(`${API}/volunteers`),
-        fetch(`${API}/events`),
-      ]);
 
-      if (!volRes.ok || !evtRes.ok) {
+      // Upcoming events owned by this admin plus one page of candidates
+      const query = after ? `&cursor=${encodeURIComponent(after)}` : "";
+      const res = await fetch(`${API}/bundles/matching-form?user_id=${user.id}${query}`);
+      if (!res.ok) {
         throw new Error("Failed to load data");
       }
+      const bundle = await res.json();
 
-      const vols = await volRes.json();
-      const evts = await evtRes.json();
-
-      // Filter events: only upcoming events created by this admin
-      const today = new Date();
-      today.setHours(0, 0, 0, 0);
-      
-      // Get admin's user_id (owner_id) from admins table
-      const adminRes = await fetch(`http://localhost:5000/api/admin/user/${user.id}`);
-      let adminUserId = user.id;
-      
-      if (adminRes.ok) {
-        const adminData = await adminRes.json();
-        adminUserId = adminData.user_id || user.id;
-      }
-
-
-      const filteredEvents = evts.filter((evt: Event) => {
-        const eventDate = new Date(evt.time_label || evt.date);
-        const isUpcoming = eventDate >= today;
-        const isOwnedByAdmin = evt.ownerid?.toString() === adminUserId.toString();
-        return isUpcoming && isOwnedByAdmin;
-      });
-
-
-      setVolunteers(vols);
-      setEvents(filteredEvents);
+      setVolunteers(prevVols => after ? [...prevVols, ...bundle.candidates] : bundle.candidates);
+      setEvents(bundle.events);
+      setCursor(bundle.next_cursor);
+      setHasMore(bundle.has_more);
     } catch (err) {
       console.error(err);
       setError("Could not connect to the server.");
@@ -266,6 +244,16 @@ const VolunteerMatchingForm: React.FC = () => {
               </option>
             ))}
           </select>
+          {hasMore && (
+            <button
+              type="button"
+              className="reset-btn"
+              onClick={() => loadData(cursor)}
+              disabled={loading}
+            >
+              Load more volunteers
+            </button>
+          )}
         </div>
 
         <div className="form-group">
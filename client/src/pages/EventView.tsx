@@ -67,40 +67,32 @@ export default function EventView() {
     setRegistering(eventId);
     try {
       if (isUnregistering) {
-        // Find the volunteer_id first
-        const volunteerResponse = await fetch(`http://127.0.0.1:5000/api/volunteers`);
-        if (!volunteerResponse.ok) {
-          throw new Error("Failed to fetch volunteer data");
+        // One request for the caller's registration on this event
+        const bundleResponse = await fetch(`/api/bundles/event-view/${eventId}?user_id=${user.id}`);
+        if (!bundleResponse.ok) {
+          throw new Error("Failed to fetch registration");
         }
-        const volunteers = await volunteerResponse.json();
-        const currentVolunteer = volunteers.find((v: any) => v.user_id === user.id);
-        
-        if (!currentVolunteer) {
+        const bundle = await bundleResponse.json();
+
+        if (!bundle.volunteer_id) {
           alert("Volunteer profile not found");
           return;
         }
 
-        // Find the match and delete it
-        const matchResponse = await fetch(`http://127.0.0.1:5000/api/matches/event/${eventId}`);
-        if (matchResponse.ok) {
-          const matches = await matchResponse.json();
-          const userMatch = matches.find((m: any) => m.volunteer_id === currentVolunteer.id);
-          
-          if (userMatch) {
-            const deleteResponse = await fetch(`http://127.0.0.1:5000/api/matches/${userMatch.id}`, {
-              method: "DELETE",
-            });
-            
-            if (deleteResponse.ok) {
-              alert("Successfully unregistered from the event!");
-              // Update local state
-              setEvents(events.map(e => 
-                e.id === eventId ? { ...e, is_registered: false, current_volunteers: e.current_volunteers - 1 } : e
-              ));
-            } else {
-              const error = await deleteResponse.json();
-              alert(error.error || error.message || "Failed to unregister from event");
-            }
+        if (bundle.registration) {
+          const deleteResponse = await fetch(`http://127.0.0.1:5000/api/matches/${bundle.registration.match_id}`, {
+            method: "DELETE",
+          });
+
+          if (deleteResponse.ok) {
+            alert("Successfully unregistered from the event!");
+            // Update local state
+            setEvents(events.map(e => 
+              e.id === eventId ? { ...e, is_registered: false, current_volunteers: e.current_volunteers - 1 } : e
+            ));
+          } else {
+            const error = await deleteResponse.json();
+            alert(error.error || error.message || "Failed to unregister from event");
           }
         }
       } else {
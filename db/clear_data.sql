@@ -10,6 +10,10 @@ SET FOREIGN_KEY_CHECKS = 0;
 
 -- Truncate all tables (removes all data but keeps structure)
 -- Order matters: child tables first, then parent tables
+TRUNCATE TABLE `cache_versions`;
+TRUNCATE TABLE `volunteer_recommendation_state`;
+TRUNCATE TABLE `volunteer_recommendations`;
+TRUNCATE TABLE `scoring_weights`;
 TRUNCATE TABLE `history_tasks`;
 TRUNCATE TABLE `volunteer_history`;
 TRUNCATE TABLE `matches`;
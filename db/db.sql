@@ -11,7 +11,8 @@ CREATE TABLE IF NOT EXISTS users (
   state           CHAR(2)         NULL,                   -- from signup
   created_at      TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (id),
-  UNIQUE KEY uq_users_email (email)
+  UNIQUE KEY uq_users_email (email),
+  KEY idx_users_name (name)
 );
 
 CREATE TABLE IF NOT EXISTS skills (
@@ -99,7 +100,8 @@ CREATE TABLE IF NOT EXISTS events (
   time_label       VARCHAR(160)    NULL,           -- the pretty "Sat, Nov 2 · 8:00 AM - 11:00 AM"
   created_at       TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (id),
-  KEY idx_events_date (date, urgency)
+  KEY idx_events_date (date, urgency),
+  KEY idx_events_owner_date (ownerid, date, urgency)
 );
 
 CREATE TABLE IF NOT EXISTS event_requirements (
@@ -130,6 +132,7 @@ CREATE TABLE IF NOT EXISTS volunteer_history (
   created_at  TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (id),
   KEY (volunteer_id, created_at),
+  KEY idx_volunteer_history_event (event_id, volunteer_id),
   FOREIGN KEY (volunteer_id) REFERENCES volunteers(id) ON DELETE CASCADE
 );
 
@@ -143,7 +146,49 @@ CREATE TABLE IF NOT EXISTS history_tasks (
   score        INT             NULL,
   PRIMARY KEY (id),
   KEY (history_id),
+  KEY idx_history_tasks_volunteer (volunteer_id, completed, score),
+  KEY idx_history_tasks_event_volunteer (event_id, volunteer_id),
   FOREIGN KEY (history_id) REFERENCES volunteer_history(id) ON DELETE CASCADE,
   FOREIGN KEY (volunteer_id) REFERENCES users(id) ON DELETE SET NULL,
   FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE SET NULL
 );
+
+CREATE TABLE IF NOT EXISTS scoring_weights (
+  owner_id   BIGINT UNSIGNED NOT NULL,             -- admin user whose events use these weights
+  scorer     VARCHAR(40)     NOT NULL,             -- 'skills','urgency','availability','distance',...
+  weight     DOUBLE          NOT NULL,
+  updated_at TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (owner_id, scorer),
+  CONSTRAINT fk_scoring_weights_owner FOREIGN KEY (owner_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS volunteer_recommendations (
+  volunteer_id BIGINT UNSIGNED   NOT NULL,
+  slot         SMALLINT UNSIGNED NOT NULL,         -- 0-based rank within the volunteer's top-N
+  event_id     BIGINT UNSIGNED   NOT NULL,
+  score        DOUBLE            NOT NULL,
+  refreshed_at TIMESTAMP         NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (volunteer_id, slot),
+  KEY idx_recommendations_event (event_id),
+  CONSTRAINT fk_recommendations_volunteer FOREIGN KEY (volunteer_id) REFERENCES volunteers(id) ON DELETE CASCADE,
+  CONSTRAINT fk_recommendations_event     FOREIGN KEY (event_id)     REFERENCES events(id)     ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS volunteer_recommendation_state (
+  volunteer_id BIGINT UNSIGNED NOT NULL,
+  refreshed_at TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP,  -- last materialization, even if it found nothing
+  PRIMARY KEY (volunteer_id),
+  CONSTRAINT fk_recommendation_state_volunteer FOREIGN KEY (volunteer_id) REFERENCES volunteers(id) ON DELETE CASCADE
+);
+
+-- ==========================
+-- Cache invalidation log (cross-worker bus, polled by id)
+-- ==========================
+CREATE TABLE IF NOT EXISTS cache_versions (
+  id         BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,   -- monotonic version
+  origin     VARCHAR(64)     NOT NULL,                  -- publishing worker
+  tags       TEXT            NOT NULL,                  -- newline-separated tags
+  created_at TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id),
+  KEY idx_cache_versions_created (created_at)
+);
@@ -0,0 +1,181 @@
+-- SQLite equivalent of db.sql for the embedded backend (DB_BACKEND=sqlite).
+-- server/db.py runs this once on an empty file; connection-level settings
+-- (foreign keys, mmap, cache, busy timeout) are applied per connection there.
+--
+-- Differences from MySQL:
+--   BIGINT AUTO_INCREMENT ids    -> INTEGER PRIMARY KEY (the rowid)
+--   ENUM(...)                    -> TEXT with a CHECK constraint
+--   ON UPDATE CURRENT_TIMESTAMP  -> AFTER UPDATE triggers
+--   DATETIME                     -> TIMESTAMP, so rows come back as datetime
+--   CURRENT_TIMESTAMP is UTC
+
+PRAGMA journal_mode = WAL;          -- persistent: readers don't block the writer
+
+CREATE TABLE IF NOT EXISTS users (
+  id              INTEGER PRIMARY KEY,
+  name            VARCHAR(100)    NOT NULL,
+  email           VARCHAR(255)    NOT NULL UNIQUE,
+  password_hash   VARCHAR(255)    NOT NULL,
+  state           CHAR(2)         NULL,
+  created_at      TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_users_name ON users (name);
+
+CREATE TABLE IF NOT EXISTS skills (
+  id    INTEGER PRIMARY KEY,
+  name  VARCHAR(100)    NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS user_skills (
+  user_id  INTEGER NOT NULL REFERENCES users(id)  ON DELETE CASCADE,
+  skill_id INTEGER NOT NULL REFERENCES skills(id) ON DELETE CASCADE,
+  PRIMARY KEY (user_id, skill_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS profiles (
+  user_id      INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+  full_name    VARCHAR(120)    NOT NULL,
+  address1     VARCHAR(255)    NOT NULL,
+  address2     VARCHAR(255)    NULL,
+  city         VARCHAR(100)    NOT NULL,
+  state        CHAR(2)         NOT NULL,
+  zip          VARCHAR(20)     NOT NULL,
+  preferences  TEXT            NULL,
+  availability TEXT            NULL CHECK (availability IS NULL OR json_valid(availability)),
+  updated_at   TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_profiles_updated_at AFTER UPDATE ON profiles
+WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+  UPDATE profiles SET updated_at = CURRENT_TIMESTAMP WHERE user_id = NEW.user_id;
+END;
+
+CREATE TABLE IF NOT EXISTS notifications (
+  id         INTEGER PRIMARY KEY,
+  user_id    INTEGER         NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  type       TEXT            NOT NULL DEFAULT 'info' CHECK (type IN ('info','success','warning','error')),
+  message    TEXT            NOT NULL,
+  is_read    BOOLEAN         NOT NULL DEFAULT FALSE,
+  created_at TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_notifications_user ON notifications (user_id, is_read, created_at);
+
+CREATE TABLE IF NOT EXISTS volunteers (
+  id           INTEGER PRIMARY KEY,
+  user_id      INTEGER         NULL REFERENCES users(id) ON DELETE SET NULL,
+  phone        VARCHAR(40)     NULL,
+  availability VARCHAR(100)    NOT NULL,
+  created_at   TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_volunteers_user ON volunteers (user_id);
+
+CREATE TABLE IF NOT EXISTS admins (
+  id           INTEGER PRIMARY KEY,
+  user_id      INTEGER         NULL REFERENCES users(id) ON DELETE SET NULL,
+  phone        VARCHAR(40)     NULL,
+  created_at   TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_admins_user ON admins (user_id);
+
+CREATE TABLE IF NOT EXISTS volunteer_skills (
+  volunteer_id INTEGER NOT NULL REFERENCES volunteers(id) ON DELETE CASCADE,
+  skill_id     INTEGER NOT NULL REFERENCES skills(id)     ON DELETE CASCADE,
+  PRIMARY KEY (volunteer_id, skill_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS events (
+  id               INTEGER PRIMARY KEY,
+  ownerid          INTEGER         NOT NULL,
+  name             VARCHAR(160)    NOT NULL,
+  description      TEXT            NULL,
+  date             DATE            NOT NULL,
+  location         VARCHAR(255)    NULL,
+  max_volunteers   INTEGER         NOT NULL DEFAULT 10 CHECK (max_volunteers >= 0),
+  urgency          TEXT            NOT NULL DEFAULT 'low' CHECK (urgency IN ('low','medium','high')),
+  img              VARCHAR(255)    NULL,
+  time_label       VARCHAR(160)    NULL,
+  created_at       TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_events_date ON events (date, urgency);
+CREATE INDEX IF NOT EXISTS idx_events_owner_date ON events (ownerid, date, urgency);
+
+CREATE TABLE IF NOT EXISTS event_requirements (
+  event_id INTEGER NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+  skill_id INTEGER NOT NULL REFERENCES skills(id) ON DELETE CASCADE,
+  PRIMARY KEY (event_id, skill_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS matches (
+  id            INTEGER PRIMARY KEY,
+  volunteer_id  INTEGER         NOT NULL REFERENCES volunteers(id) ON DELETE CASCADE,
+  event_id      INTEGER         NOT NULL REFERENCES events(id)     ON DELETE CASCADE,
+  status        TEXT            NOT NULL DEFAULT 'confirmed' CHECK (status IN ('pending','confirmed','cancelled')),
+  matched_at    TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE (volunteer_id, event_id)
+);
+CREATE INDEX IF NOT EXISTS idx_matches_event ON matches (event_id, status);
+
+CREATE TABLE IF NOT EXISTS volunteer_history (
+  id           INTEGER PRIMARY KEY,
+  volunteer_id INTEGER         NOT NULL REFERENCES volunteers(id) ON DELETE CASCADE,
+  event_id     INTEGER         NOT NULL,
+  created_at   TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_volunteer_history_volunteer ON volunteer_history (volunteer_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_volunteer_history_event ON volunteer_history (event_id, volunteer_id);
+
+CREATE TABLE IF NOT EXISTS history_tasks (
+  id           INTEGER PRIMARY KEY,
+  history_id   INTEGER         DEFAULT NULL REFERENCES volunteer_history(id) ON DELETE CASCADE,
+  name         VARCHAR(160)    NOT NULL,
+  completed    BOOLEAN         NOT NULL DEFAULT FALSE,
+  volunteer_id INTEGER         DEFAULT NULL REFERENCES users(id) ON DELETE SET NULL,
+  event_id     INTEGER         DEFAULT NULL REFERENCES events(id) ON DELETE SET NULL,
+  score        INTEGER         NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_tasks_history ON history_tasks (history_id);
+CREATE INDEX IF NOT EXISTS idx_history_tasks_volunteer ON history_tasks (volunteer_id, completed, score);
+CREATE INDEX IF NOT EXISTS idx_history_tasks_event_volunteer ON history_tasks (event_id, volunteer_id);
+
+CREATE TABLE IF NOT EXISTS scoring_weights (
+  owner_id   INTEGER         NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  scorer     VARCHAR(40)     NOT NULL,
+  weight     DOUBLE          NOT NULL,
+  updated_at TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (owner_id, scorer)
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_scoring_weights_updated_at AFTER UPDATE ON scoring_weights
+WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+  UPDATE scoring_weights SET updated_at = CURRENT_TIMESTAMP
+  WHERE owner_id = NEW.owner_id AND scorer = NEW.scorer;
+END;
+
+CREATE TABLE IF NOT EXISTS volunteer_recommendations (
+  volunteer_id INTEGER   NOT NULL REFERENCES volunteers(id) ON DELETE CASCADE,
+  slot         INTEGER   NOT NULL,
+  event_id     INTEGER   NOT NULL REFERENCES events(id)     ON DELETE CASCADE,
+  score        DOUBLE    NOT NULL,
+  refreshed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (volunteer_id, slot)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_recommendations_event ON volunteer_recommendations (event_id);
+
+CREATE TABLE IF NOT EXISTS volunteer_recommendation_state (
+  volunteer_id INTEGER   NOT NULL PRIMARY KEY REFERENCES volunteers(id) ON DELETE CASCADE,
+  refreshed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Cache invalidation log (cross-worker bus, polled by id). AUTOINCREMENT so
+-- ids are never reused after pruning, as with MySQL's AUTO_INCREMENT.
+CREATE TABLE IF NOT EXISTS cache_versions (
+  id         INTEGER PRIMARY KEY AUTOINCREMENT,
+  origin     VARCHAR(64)     NOT NULL,
+  tags       TEXT            NOT NULL,
+  created_at TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_cache_versions_created ON cache_versions (created_at);
+
+PRAGMA optimize;
@@ -2,6 +2,10 @@
 -- This script creates all required tables in the correct order
 
 -- Drop tables in reverse order of dependencies
+DROP TABLE IF EXISTS cache_versions;
+DROP TABLE IF EXISTS volunteer_recommendation_state;
+DROP TABLE IF EXISTS volunteer_recommendations;
+DROP TABLE IF EXISTS scoring_weights;
 DROP TABLE IF EXISTS history_tasks;
 DROP TABLE IF EXISTS volunteer_history;
 DROP TABLE IF EXISTS matches;
@@ -25,7 +29,8 @@ CREATE TABLE users (
   state           CHAR(2)         NULL,
   created_at      TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (id),
-  UNIQUE KEY uq_users_email (email)
+  UNIQUE KEY uq_users_email (email),
+  KEY idx_users_name (name)
 );
 
 -- Create skills table
@@ -122,7 +127,8 @@ CREATE TABLE events (
   time_label       VARCHAR(160)    NULL,
   created_at       TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (id),
-  KEY idx_events_date (date, urgency)
+  KEY idx_events_date (date, urgency),
+  KEY idx_events_owner_date (ownerid, date, urgency)
 );
 
 -- Create event_requirements table
@@ -156,19 +162,65 @@ CREATE TABLE volunteer_history (
   created_at   TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (id),
   KEY (volunteer_id, created_at),
+  KEY idx_volunteer_history_event (event_id, volunteer_id),
   FOREIGN KEY (volunteer_id) REFERENCES volunteers(id) ON DELETE CASCADE
 );
 
 -- Create history_tasks table
 CREATE TABLE history_tasks (
   id           BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
-  history_id   BIGINT UNSIGNED NOT NULL,
+  history_id   BIGINT UNSIGNED DEFAULT NULL,
   name         VARCHAR(160)    NOT NULL,
   completed    BOOLEAN         NOT NULL DEFAULT FALSE,
   volunteer_id BIGINT UNSIGNED DEFAULT NULL,
+  event_id     BIGINT UNSIGNED DEFAULT NULL,
   score        INT             NULL,
   PRIMARY KEY (id),
   KEY (history_id),
+  KEY idx_history_tasks_volunteer (volunteer_id, completed, score),
+  KEY idx_history_tasks_event_volunteer (event_id, volunteer_id),
   FOREIGN KEY (history_id) REFERENCES volunteer_history(id) ON DELETE CASCADE,
-  FOREIGN KEY (volunteer_id) REFERENCES users(id) ON DELETE SET NULL
+  FOREIGN KEY (volunteer_id) REFERENCES users(id) ON DELETE SET NULL,
+  FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE SET NULL
+);
+
+-- Create scoring_weights table
+CREATE TABLE scoring_weights (
+  owner_id   BIGINT UNSIGNED NOT NULL,
+  scorer     VARCHAR(40)     NOT NULL,
+  weight     DOUBLE          NOT NULL,
+  updated_at TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (owner_id, scorer),
+  FOREIGN KEY (owner_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- Create volunteer_recommendations table
+CREATE TABLE volunteer_recommendations (
+  volunteer_id BIGINT UNSIGNED   NOT NULL,
+  slot         SMALLINT UNSIGNED NOT NULL,
+  event_id     BIGINT UNSIGNED   NOT NULL,
+  score        DOUBLE            NOT NULL,
+  refreshed_at TIMESTAMP         NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (volunteer_id, slot),
+  KEY idx_recommendations_event (event_id),
+  FOREIGN KEY (volunteer_id) REFERENCES volunteers(id) ON DELETE CASCADE,
+  FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
+);
+
+-- Create volunteer_recommendation_state table
+CREATE TABLE volunteer_recommendation_state (
+  volunteer_id BIGINT UNSIGNED NOT NULL,
+  refreshed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (volunteer_id),
+  FOREIGN KEY (volunteer_id) REFERENCES volunteers(id) ON DELETE CASCADE
+);
+
+-- Create cache_versions table
+CREATE TABLE cache_versions (
+  id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+  origin VARCHAR(64) NOT NULL,
+  tags TEXT NOT NULL,
+  created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id),
+  KEY idx_cache_versions_created (created_at)
 );
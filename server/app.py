@@ -1,57 +1,138 @@
+"""
+Application factory.
+
+    from server.app import create_app
+    app = create_app({"ENGINE": engine}, blueprints=["auth", "bundle"])
+
+Importing this module is cheap: the engine, the extensions and the route
+modules are only imported and built when create_app() runs, and only the
+requested blueprints are loaded. `server.app.app` is still available for
+the servers (serve.py, asgi.py, `flask run`); it is the full app, built on
+first access and then reused.
+"""
+
+import importlib
+import threading
 
 from flask import Flask
-from flask_cors import CORS
-import os
-from sqlalchemy import create_engine
-from urllib.parse import quote_plus
-
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except Exception:
-    pass
-
-def make_engine_from_env():
-    host = os.getenv("DB_HOST", "127.0.0.1")
-    port = os.getenv("DB_PORT", "3306")
-    name = os.getenv("DB_NAME", "eventmatcher")
-    user = os.getenv("DB_USER", "root")
-    pw   = quote_plus(os.getenv("DB_PASS", "admin"))  
-
-
-    url = f"mysql+pymysql://{user}:{pw}@{host}:{port}/{name}?charset=utf8mb4"
-
-    return create_engine(url, pool_pre_ping=True, future=True)
-
-app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": "*"}})
-app.config["ENGINE"] = make_engine_from_env()
-
-from .routes.auth import bp as auth_bp
-from .routes.manager import bp as manager_bp
-from .routes.notification import bp as notifications_bp
-from .routes.profile import profile_bp
-from .routes.volunteer_history import history_bp
-from .routes.volunteer_matching import bp as matching_bp
-from .routes.volunteer_user import bp as volunteer_user_bp
-from .routes.task import task_bp
-from .routes.report import report_bp
-
-
-app.register_blueprint(auth_bp,          url_prefix="/api")
-app.register_blueprint(notifications_bp, url_prefix="/api")
-app.register_blueprint(profile_bp,       url_prefix="/api")
-app.register_blueprint(matching_bp,      url_prefix="/api")
-app.register_blueprint(history_bp,       url_prefix="/api")
-app.register_blueprint(manager_bp,       url_prefix="/api/manager")
-app.register_blueprint(volunteer_user_bp,url_prefix="/api/volunteer_user")
-app.register_blueprint(task_bp,          url_prefix="/api/tasks")
-app.register_blueprint(report_bp, url_prefix="/api")
-
-@app.get("/ping")
-def ping():
-    return "pong", 200
+
+# name -> (module, blueprint attribute, url prefix), imported on registration
+BLUEPRINTS = {
+    "auth":              (".routes.auth", "bp", "/api"),
+    "notification":      (".routes.notification", "bp", "/api"),
+    "profile":           (".routes.profile", "profile_bp", "/api"),
+    "volunteer_matching": (".routes.volunteer_matching", "bp", "/api"),
+    "volunteer_history": (".routes.volunteer_history", "history_bp", "/api"),
+    "manager":           (".routes.manager", "bp", "/api/manager"),
+    "volunteer_user":    (".routes.volunteer_user", "bp", "/api/volunteer_user"),
+    "task":              (".routes.task", "task_bp", "/api/tasks"),
+    "report":            (".routes.report", "report_bp", "/api"),
+    "bundle":            (".routes.bundle", "bp", "/api/bundles"),
+}
+
+_dotenv_loaded = False
+_default_app = None
+_default_lock = threading.Lock()
+
+
+def _load_dotenv():
+    global _dotenv_loaded
+    if _dotenv_loaded:
+        return
+    _dotenv_loaded = True
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except Exception:
+        pass
+
+
+def register_blueprints(app, names=None):
+    """Import and register the named blueprints (default: all of them)."""
+    names = list(BLUEPRINTS) if names is None else list(names)
+    unknown = [name for name in names if name not in BLUEPRINTS]
+    if unknown:
+        raise ValueError(f"Unknown blueprint(s): {', '.join(unknown)}")
+    for name in names:
+        module, attribute, url_prefix = BLUEPRINTS[name]
+        blueprint = getattr(importlib.import_module(module, __package__), attribute)
+        app.register_blueprint(blueprint, url_prefix=url_prefix)
+    return names
+
+
+def create_app(config=None, blueprints=None):
+    """Build an app with `config` applied and the named blueprints (default: all).
+    An ENGINE or READ_ENGINE in `config` is used as is; otherwise the engines
+    are made from the DB_* environment."""
+    _load_dotenv()
+    from flask_cors import CORS
+
+    from .compression import Compression
+    from .db import make_engine_from_env, make_read_engine_from_env
+    from .instrumentation import SQLInstrumentation
+    from .logs import StructuredLogging
+    from .metrics import Metrics
+    from .profiling import Profiler
+    from .services.engineRouting import PIN_HEADER
+    from .services.serialization import FastJSONProvider
+
+    app = Flask(__name__)
+    app.config.update(config or {})
+    app.json = FastJSONProvider(app)
+    Compression().init_app(app)  # registered first so it sees the final response
+    StructuredLogging().init_app(app)  # before other hooks, so their records carry the request id
+    CORS(app, resources={r"/api/*": {"origins": "*"}}, expose_headers=[PIN_HEADER])
+    if app.config.get("ENGINE") is None:
+        app.config["ENGINE"] = make_engine_from_env()
+    if "READ_ENGINE" not in app.config:  # an explicit None means no replica
+        app.config["READ_ENGINE"] = make_read_engine_from_env()
+    SQLInstrumentation().init_app(app)
+    Metrics().init_app(app)
+    Profiler().init_app(app)  # no-op unless PROFILER_TOKEN is set
+
+    from .services.batch import Batch
+    from .services.engineRouting import EngineRouter
+    from .services.invalidationBus import InvalidationBus
+    from .services.recommendationService import RecommendationMaterializer
+    from .services.responseCache import ResponseCache
+    from .services.skillIndex import SkillIndex
+
+    EngineRouter(read_engine=app.config["READ_ENGINE"]).init_app(app)
+    RecommendationMaterializer().init_app(app)
+    ResponseCache().init_app(app)
+    SkillIndex().init_app(app)
+    Batch().init_app(app)
+
+    bus = InvalidationBus.from_config(app)
+    if bus is not None:
+        bus.init_app(app)
+
+    register_blueprints(app, blueprints)
+
+    @app.get("/ping")
+    def ping():
+        return "pong", 200
+
+    return app
+
+
+def get_app():
+    """The shared full app, built on first use."""
+    global _default_app
+    if _default_app is None:
+        with _default_lock:
+            if _default_app is None:
+                _default_app = create_app()
+    return _default_app
+
+
+def __getattr__(name):
+    # `from server.app import app` keeps working without building an app at import
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
     print("Flask running on http://127.0.0.1:5000")
-    app.run(host="127.0.0.1", port=5000, debug=True)
+    create_app().run(host="127.0.0.1", port=5000, debug=True)
@@ -0,0 +1,284 @@
+"""
+ASGI serving mode.
+
+    pip install -r server/requirements-async.txt
+    uvicorn server.asgi:app --workers 4
+
+I/O-bound endpoints are served by an async Quart app on SQLAlchemy's
+asyncio engine (aiomysql): a request waiting on MySQL holds no thread, and
+independent queries are awaited concurrently, each on its own connection.
+The SQL is shared with the sync services. Every other route falls through
+to the Flask app on asgiref's thread pool, so both modes serve the same API.
+
+The async routes go through the Flask app's extensions where they apply:
+request metrics and async pool metrics (engine="async_primary" /
+"async_replica"), SQL instrumentation with Server-Timing, X-Request-ID and
+the access log. Reads use an async replica when the Flask app has a
+READ_ENGINE (DB_READ_HOST), unless the caller holds a read-your-writes pin.
+What they don't get:
+
+    - response compression, and /debug/profile sampling
+    - none of these routes is @cached on the Flask side either
+    - streamed bodies (SSE, CSV) are timed and logged when their headers
+      are sent; the queries run while streaming aren't in Server-Timing
+      or /debug/sql-stats
+
+    GET /api/bundles/event-view/<id>         event, counts, registration at once
+    GET /api/bundles/matching-form           events and a candidate page at once
+    GET /api/notifications/stream            server-sent events, no thread per client
+    GET /api/report/volunteer-history/csv    streamed while rows arrive
+"""
+
+import asyncio
+import csv
+import io
+import os
+import time
+
+from asgiref.wsgi import WsgiToAsgi
+from quart import Quart, Response, g, request
+from sqlalchemy import text
+from werkzeug.exceptions import HTTPException
+
+from .app import app as flask_app
+from .db import make_async_engine_from_env, make_async_read_engine_from_env
+from .instrumentation import RequestStats, request_stats_var
+from .logs import new_request_id, request_id_var
+from .routes.report import REPORT_HEADER, REPORT_QUERY
+from .services.bundleService import (
+    EVENT_COUNTS_QUERY,
+    EVENT_QUERY,
+    OWNER_EVENTS_QUERY,
+    OWNER_QUERY,
+    REGISTRATION_QUERY,
+    candidate_query,
+    event_view_payload,
+    matching_form_payload,
+    page_params,
+)
+from .services.engineRouting import PIN_COOKIE, PIN_HEADER
+from .services.serialization import encode
+
+NEW_NOTIFICATIONS_QUERY = text("""
+    SELECT id, user_id, type, message, is_read, created_at
+    FROM notifications
+    WHERE user_id = :user_id AND id > :after
+    ORDER BY id
+    LIMIT 100
+""")
+
+UNREAD_QUERY = text("""
+    SELECT COALESCE(SUM(CASE WHEN is_read = FALSE THEN 1 ELSE 0 END), 0), COALESCE(MAX(id), 0)
+    FROM notifications
+    WHERE user_id = :user_id
+""")
+
+KEEPALIVE_SECONDS = 15
+
+
+def _json(payload, status=200):
+    return Response(encode(payload, newline=True), status=status, mimetype='application/json')
+
+
+class AsyncFirst:
+    """Routes a request to the async app when it has the route, else to the WSGI app."""
+
+    def __init__(self, async_app, wsgi_app):
+        self.async_app = async_app
+        self.wsgi_app = wsgi_app
+        self.fallback = WsgiToAsgi(wsgi_app)
+        self._adapter = async_app.url_map.bind('localhost')
+
+    def handles(self, path, method):
+        try:
+            self._adapter.match(path, method=method)
+        except HTTPException:
+            return False
+        return True
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and not self.handles(scope['path'], scope['method']):
+            await self.fallback(scope, receive, send)
+            return
+        await self.async_app(scope, receive, send)
+
+
+def create_asgi_app(wsgi_app, engine=None, read_engine=None, poll_interval=None):
+    """The async routes in front of `wsgi_app`, sharing its extensions.
+
+    `engine` defaults to the env's aiomysql engine; `read_engine` to one on
+    DB_READ_HOST when `wsgi_app` has a READ_ENGINE, else no replica.
+    """
+    async_app = Quart(__name__)
+    poll_interval = poll_interval or float(os.getenv("NOTIFICATION_POLL_SECONDS", 2.0))
+    extensions = wsgi_app.extensions
+    state = {'engine': engine, 'read_engine': read_engine, 'ready': False}
+
+    def engines():
+        if not state['ready']:
+            if state['engine'] is None:
+                state['engine'] = make_async_engine_from_env()
+            if state['read_engine'] is None and wsgi_app.config.get("READ_ENGINE") is not None:
+                state['read_engine'] = make_async_read_engine_from_env()
+            metrics = extensions.get('metrics')
+            instrumentation = extensions.get('sql_instrumentation')
+            for label, async_engine in (('async_primary', state['engine']), ('async_replica', state['read_engine'])):
+                if async_engine is None:
+                    continue
+                if metrics is not None:
+                    metrics.instrument_engine(async_engine.sync_engine, label)
+                if instrumentation is not None:
+                    instrumentation.instrument_engine(async_engine.sync_engine, replica=label == 'async_replica')
+            state['ready'] = True
+        return state['engine'], state['read_engine']
+
+    def pinned():
+        router = extensions.get('engine_router')
+        if router is None:
+            return False
+        until = router.pinned_until(request.cookies.get(PIN_COOKIE) or request.headers.get(PIN_HEADER))
+        return until is not None and until > time.time()
+
+    def reader_engine():
+        """The replica for this request's reads, or the primary for pinned callers."""
+        primary, replica = engines()
+        return primary if replica is None or pinned() else replica
+
+    async def fetch(engine, query, params, reader):
+        async with engine.connect() as conn:
+            return reader(await conn.execute(query, params))
+
+    async def nothing():
+        return None
+
+    @async_app.after_serving
+    async def dispose():
+        for async_engine in (state['engine'], state['read_engine']):
+            if async_engine is not None:
+                await async_engine.dispose()
+
+    @async_app.before_request
+    async def start_request():
+        g.started = time.perf_counter()
+        if extensions.get('structured_logging') is not None:
+            g.request_id = new_request_id(request.headers.get('X-Request-ID'))
+            request_id_var.set(g.request_id)
+        if extensions.get('sql_instrumentation') is not None:
+            request_stats_var.set(RequestStats(request.endpoint))
+
+    @async_app.after_request
+    async def finish_request(response):
+        seconds = time.perf_counter() - g.started
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        instrumentation = extensions.get('sql_instrumentation')
+        stats = request_stats_var.get()
+        if instrumentation is not None and stats is not None:
+            request_stats_var.set(None)
+            timing = instrumentation.finish(stats, request.endpoint or request.path)
+            if timing is not None:
+                response.headers.add('Server-Timing', timing)
+        metrics = extensions.get('metrics')
+        if metrics is not None:
+            metrics.observe_request(request.blueprint or '', route, request.method, response.status_code, seconds)
+        logging_ext = extensions.get('structured_logging')
+        if logging_ext is not None:
+            response.headers['X-Request-ID'] = g.request_id
+            logging_ext.log_access(request.method, route, response.status_code, seconds * 1000)
+        response.headers.setdefault('Access-Control-Allow-Origin', '*')
+        return response
+
+    @async_app.get('/api/bundles/event-view/<int:event_id>')
+    async def event_view(event_id):
+        user_id = request.args.get('user_id')
+        params = {"event_id": event_id, "user_id": user_id}
+        engine = reader_engine()
+        event, counts, registration = await asyncio.gather(
+            fetch(engine, EVENT_QUERY, params, lambda r: r.mappings().first()),
+            fetch(engine, EVENT_COUNTS_QUERY, params, lambda r: dict(r.all())),
+            fetch(engine, REGISTRATION_QUERY, params, lambda r: r.mappings().first()) if user_id else nothing(),
+        )
+        if not event:
+            return _json({'message': 'Event not found'}, 404)
+        return _json(event_view_payload(event, counts, registration))
+
+    @async_app.get('/api/bundles/matching-form')
+    async def matching_form():
+        user_id = request.args.get('user_id')
+        if not user_id:
+            return _json({'error': 'Missing user_id'}, 400)
+        search = request.args.get('q')
+        cursor = request.args.get('cursor')
+        try:
+            params = page_params(user_id, request.args.get('per_page', 50, type=int), search, cursor)
+        except ValueError as e:
+            return _json({'message': str(e)}, 400)
+        engine = reader_engine()
+        owner, events, candidates = await asyncio.gather(
+            fetch(engine, OWNER_QUERY, params, lambda r: r.first()),
+            fetch(engine, OWNER_EVENTS_QUERY, params, lambda r: r.mappings().all()),
+            fetch(engine, candidate_query(search, cursor), params, lambda r: r.mappings().all()),
+        )
+        if not owner:
+            return _json({'message': 'Unauthorized'}, 403)
+        return _json(matching_form_payload(params, events, candidates))
+
+    @async_app.get('/api/notifications/stream')
+    async def notification_stream():
+        user_id = request.args.get('user_id')
+        if not user_id:
+            return _json({'success': False, 'error': 'Missing user_id'}, 400)
+        resume_from = request.headers.get('Last-Event-ID') or request.args.get('after')
+        engine = reader_engine()  # the generator runs after the request context is gone
+
+        async def events():
+            unread, newest = await fetch(engine, UNREAD_QUERY, {"user_id": user_id}, lambda r: r.one())
+            after = int(resume_from) if resume_from else newest
+            yield b'event: count\ndata: ' + encode({'unread': unread}) + b'\n\n'
+            idle = 0.0
+            while True:
+                rows = await fetch(engine, NEW_NOTIFICATIONS_QUERY, {"user_id": user_id, "after": after},
+                                   lambda r: r.mappings().all())
+                for row in rows:
+                    after = row['id']
+                    yield f'id: {after}\nevent: notification\ndata: '.encode() + encode(dict(row)) + b'\n\n'
+                idle = 0.0 if rows else idle + poll_interval
+                if idle >= KEEPALIVE_SECONDS:
+                    idle = 0.0
+                    yield b': keep-alive\n\n'
+                await asyncio.sleep(poll_interval)
+
+        response = Response(events(), mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        response.timeout = None
+        return response
+
+    @async_app.get('/api/report/volunteer-history/csv')
+    async def volunteer_history_csv():
+        admin_user_id = request.args.get('admin_user_id')
+        if not admin_user_id:
+            return _json({'error': 'admin_user_id required'}, 400)
+        engine = reader_engine()
+
+        async def rows():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(REPORT_HEADER)
+            async with engine.connect() as conn:
+                result = await conn.stream(REPORT_QUERY, {"admin_user_id": admin_user_id})
+                async for partition in result.partitions(500):
+                    writer.writerows(partition)
+                    yield buffer.getvalue().encode()
+                    buffer.seek(0)
+                    buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode()
+
+        response = Response(rows(), mimetype='text/csv',
+                            headers={'Content-Disposition': 'attachment; filename=volunteer_report.csv'})
+        response.timeout = None
+        return response
+
+    return AsyncFirst(async_app, wsgi_app)
+
+
+app = create_asgi_app(flask_app)
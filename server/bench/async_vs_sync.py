@@ -0,0 +1,137 @@
+"""
+Side-by-side load benchmark: threaded Flask (WSGI) vs the ASGI mode.
+
+    pip install -r server/requirements-async.txt
+    python -m server.bench.async_vs_sync --event-id 1 --user-id 2 --admin-id 1 \\
+        --concurrency 50 --duration 20
+
+Each server runs in its own process against the database configured by the
+DB_* environment variables. The same endpoints are then driven by N
+concurrent keep-alive clients, and requests/s plus latency percentiles are
+printed for both servers. Run it against a local database seeded with
+realistic volumes; an empty database measures little more than routing.
+"""
+
+import argparse
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+SERVERS = {
+    'sync': lambda port: [sys.executable, '-c',
+                          'from werkzeug.serving import run_simple; from server.app import app; '
+                          f'run_simple("127.0.0.1", {port}, app, threaded=True)'],
+    'async': lambda port: [sys.executable, '-m', 'uvicorn', 'server.asgi:app',
+                           '--port', str(port), '--log-level', 'warning'],
+}
+
+
+def endpoints(args):
+    return [
+        f'/api/bundles/event-view/{args.event_id}?user_id={args.user_id}',
+        f'/api/bundles/matching-form?user_id={args.admin_id}',
+        f'/api/report/volunteer-history/csv?admin_user_id={args.admin_id}',
+    ]
+
+
+def start_server(kind, port):
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    process = subprocess.Popen(SERVERS[kind](port), cwd=root)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/ping')
+            if conn.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'{kind} server did not start on port {port}')
+
+
+def drive(port, paths, concurrency, duration):
+    """Run `concurrency` clients for `duration` seconds; returns {path: [latency]}, errors."""
+    latencies = defaultdict(list)
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(offset):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        mine = defaultdict(list)
+        failed = 0
+        i = offset
+        while time.monotonic() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 400:
+                    failed += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            mine[path].append(time.perf_counter() - started)
+        with lock:
+            for path, values in mine.items():
+                latencies[path].extend(values)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+
+def percentile(values, pct):
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1] if len(values) > 1 else (values or [0])[0]
+
+
+def report(kind, latencies, errors, duration):
+    total = sum(len(v) for v in latencies.values())
+    print(f'\n{kind}: {total / duration:.1f} req/s, {errors} errors')
+    print(f'  {"endpoint":<60} {"n":>7} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}')
+    for path, values in sorted(latencies.items()):
+        print(f'  {path[:60]:<60} {len(values):>7} {percentile(values, 50) * 1000:>8.1f} '
+              f'{percentile(values, 95) * 1000:>8.1f} {percentile(values, 99) * 1000:>8.1f}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--event-id', type=int, required=True)
+    parser.add_argument('--user-id', type=int, required=True)
+    parser.add_argument('--admin-id', type=int, required=True)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--port', type=int, default=5100)
+    parser.add_argument('--only', choices=sorted(SERVERS))
+    args = parser.parse_args(argv)
+
+    paths = endpoints(args)
+    for kind in [args.only] if args.only else ['sync', 'async']:
+        process = start_server(kind, args.port)
+        try:
+            drive(args.port, paths, min(args.concurrency, 4), 2)  # warm caches and pools
+            latencies, errors = drive(args.port, paths, args.concurrency, args.duration)
+        finally:
+            process.terminate()
+            process.wait(10)
+        report(kind, latencies, errors, args.duration)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,429 @@
+"""
+Deterministic synthetic dataset at production scale.
+
+    python -m server.bench.dataset --users 100000 --events 20000 --matches 1000000
+    python -m server.bench.dataset --preset large --method infile --truncate
+
+The same --seed and --anchor-date always produce the same rows, so every
+benchmark and performance test can run against an identical database. Rows
+are generated with numpy and bulk-loaded into the database configured by the
+DB_* environment variables (DB_BACKEND=sqlite works too):
+
+    insert   executemany over multi-row INSERTs in batches (any backend)
+    infile   LOAD DATA LOCAL INFILE from temporary TSV files (MySQL with
+             local_infile enabled on the server); the fastest option
+
+Shape of the data:
+    - users are volunteers (volunteers.id == users.id) or, for --admin-ratio
+      of them, organizers with @pine.edu emails; everyone has a profile
+    - skill popularity follows a Zipf law; volunteers hold 1-8 skills and
+      events require 1-4, both drawn by popularity
+    - events are spread over --days-back / --days-ahead around the anchor
+      date and owned mostly by a few busy organizers
+    - registrations are Zipf-distributed over events, so a few hot events
+      take a large share; capacities are raised to fit, some exactly full
+    - past confirmed registrations get volunteer_history rows and tasks;
+      users have notifications, most of them read
+
+From code:
+    dataset = generate(DatasetSpec.preset('small'))
+    load(engine, dataset)
+"""
+
+import argparse
+import datetime
+import os
+import tempfile
+import time
+
+import numpy as np
+
+PASSWORD_HASH = 'ef92b778bafe771e89245b89ecbc08a44a4e166c06659911881f383d4473e94f'  # "password123"
+
+SKILL_NAMES = [
+    'Tree Planting', 'Disaster Relief', 'Youth Mentorship', 'Food Drives', 'Blood Drives',
+    'Gardening', 'Organizing', 'First Aid', 'Teaching', 'Teamwork', 'Environmental Awareness',
+    'Communication', 'Physical Stamina', 'Fundraising', 'Event Planning', 'CPR Certified',
+    'Bilingual Spanish', 'Bilingual Vietnamese', 'Computer Skills', 'Social Media Management',
+]
+FIRST_NAMES = ['James', 'Maria', 'Wei', 'Aisha', 'Carlos', 'Emily', 'Nguyen', 'Priya', 'David', 'Fatima',
+               'Liam', 'Sofia', 'Omar', 'Hannah', 'Kenji', 'Grace', 'Mateo', 'Zoe', 'Ivan', 'Leila']
+LAST_NAMES = ['Smith', 'Garcia', 'Chen', 'Khan', 'Rodriguez', 'Johnson', 'Tran', 'Patel', 'Williams',
+              'Ali', 'Brown', 'Lopez', 'Kim', 'Davis', 'Tanaka', 'Martin', 'Hernandez', 'Moore', 'Petrov', 'Said']
+STATES = ['TX', 'CA', 'NY', 'FL', 'IL', 'WA', 'GA', 'AZ']
+STATE_WEIGHTS = [0.40, 0.15, 0.10, 0.10, 0.07, 0.07, 0.06, 0.05]
+CITIES = ['Houston', 'Austin', 'Dallas', 'San Antonio', 'El Paso', 'Galveston']
+AVAILABILITY = ['weekends', 'weekdays', 'evenings', 'flexible']
+AVAILABILITY_WEIGHTS = [0.40, 0.20, 0.15, 0.25]
+URGENCY = ['low', 'medium', 'high']
+URGENCY_WEIGHTS = [0.50, 0.35, 0.15]
+STATUSES = ['pending', 'confirmed', 'cancelled']
+STATUS_WEIGHTS = [0.20, 0.75, 0.05]
+NOTIFICATION_TYPES = ['info', 'success', 'warning', 'error']
+NOTIFICATION_WEIGHTS = [0.60, 0.25, 0.12, 0.03]
+TASK_NAMES = ['Setup', 'Registration desk', 'Cleanup', 'Logistics', 'First aid station', 'Photography']
+
+# Load order: parents before children
+TABLES = (
+    'skills', 'users', 'user_skills', 'profiles', 'admins', 'volunteers', 'volunteer_skills',
+    'events', 'event_requirements', 'matches', 'volunteer_history', 'history_tasks', 'notifications',
+)
+
+
+class DatasetSpec:
+    """How much data to generate, and from which seed."""
+
+    PRESETS = {
+        'small': dict(users=2000, events=400, matches=20000),
+        'medium': dict(users=20000, events=4000, matches=200000),
+        'large': dict(users=100000, events=20000, matches=1000000),
+    }
+
+    def __init__(self, users=10000, events=2000, matches=100000, skills=40, admin_ratio=0.02,
+                 notifications_per_user=5.0, event_zipf=1.1, skill_zipf=1.0, days_back=180,
+                 days_ahead=180, anchor_date=None, seed=1):
+        self.users = users
+        self.events = events
+        self.matches = matches
+        self.skills = max(skills, 1)
+        self.admin_ratio = admin_ratio
+        self.notifications_per_user = notifications_per_user
+        self.event_zipf = event_zipf
+        self.skill_zipf = skill_zipf
+        self.days_back = days_back
+        self.days_ahead = days_ahead
+        self.anchor_date = anchor_date or datetime.date.today()
+        self.seed = seed
+
+    @classmethod
+    def preset(cls, name, **overrides):
+        return cls(**{**cls.PRESETS[name], **overrides})
+
+    @property
+    def admins(self):
+        return max(1, int(round(self.users * self.admin_ratio)))
+
+    @property
+    def volunteers(self):
+        return self.users - self.admins
+
+
+class Table:
+    """Generated rows of one table as aligned column arrays."""
+
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = list(columns)
+        self._data = [np.asarray(values) if not isinstance(values, list) else values
+                      for values in columns.values()]
+
+    def __len__(self):
+        return len(self._data[0]) if self._data else 0
+
+    def column(self, name):
+        return self._data[self.columns.index(name)]
+
+    def rows(self, start=0, stop=None):
+        """Row tuples of Python values (None for NULL)."""
+        parts = [_python(values[start:stop]) for values in self._data]
+        return list(zip(*parts))
+
+
+def _python(values):
+    if isinstance(values, np.ndarray):
+        if values.dtype.kind == 'M':
+            unit = np.datetime_data(values.dtype)[0]
+            return values.astype(f'datetime64[{unit}]').astype(object).tolist()
+        return values.tolist()
+    return list(values)
+
+
+def zipf_weights(n, exponent):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _choice(rng, options, weights, size):
+    return np.asarray(options)[rng.choice(len(options), size=size, p=weights)]
+
+
+def _pick_sets(rng, owners, counts, pool_size, weights):
+    """(owner, item) pairs: counts[i] distinct items for owners[i], drawn by weight."""
+    # Draw twice as many as needed, drop duplicate pairs, keep the first counts[i]
+    owner_of = np.repeat(owners.astype(np.int64), counts * 2)
+    draws = rng.choice(pool_size, size=len(owner_of), p=weights)
+    keys, first = np.unique(owner_of * pool_size + draws, return_index=True)
+    keys = keys[np.argsort(first, kind='stable')]  # back to draw order
+    owner_ids = keys // pool_size
+    order = np.argsort(owner_ids, kind='stable')
+    keys, owner_ids = keys[order], owner_ids[order]
+    rank = np.arange(len(keys)) - np.searchsorted(owner_ids, owner_ids)
+    limit = counts[np.searchsorted(owners, owner_ids)]
+    keep = rank < limit
+    owner_ids, items = owner_ids[keep], keys[keep] % pool_size
+    order = np.lexsort((items, owner_ids))
+    return owner_ids[order], items[order]
+
+
+def generate(spec):
+    """Build every table for `spec`; returns {table name: Table} in load order."""
+    rng = np.random.default_rng(spec.seed)
+    anchor = np.datetime64(spec.anchor_date, 'D')
+    tables = {}
+
+    # ---------- skills ----------
+    skill_names = SKILL_NAMES[:spec.skills] + [f'Skill {i}' for i in range(len(SKILL_NAMES) + 1, spec.skills + 1)]
+    skill_ids = np.arange(1, spec.skills + 1)
+    skill_weights = zipf_weights(spec.skills, spec.skill_zipf)
+    tables['skills'] = Table('skills', {'id': skill_ids, 'name': skill_names})
+
+    # ---------- users, admins, volunteers ----------
+    n = spec.users
+    user_ids = np.arange(1, n + 1)
+    is_admin = np.zeros(n, dtype=bool)
+    is_admin[rng.choice(n, size=spec.admins, replace=False)] = True
+    first = rng.integers(len(FIRST_NAMES), size=n)
+    last = rng.integers(len(LAST_NAMES), size=n)
+    names = [f'{FIRST_NAMES[f]} {LAST_NAMES[l]}' for f, l in zip(first.tolist(), last.tolist())]
+    emails = [f'admin{i}@pine.edu' if admin else f'user{i}@example.com'
+              for i, admin in zip(user_ids.tolist(), is_admin.tolist())]
+    states = _choice(rng, STATES, STATE_WEIGHTS, n)
+    joined = anchor - rng.integers(spec.days_back, spec.days_back + 730, size=n).astype('timedelta64[D]')
+    created_at = joined.astype('datetime64[s]') + rng.integers(0, 86400, size=n).astype('timedelta64[s]')
+    tables['users'] = Table('users', {
+        'id': user_ids, 'name': names, 'email': emails, 'password_hash': [PASSWORD_HASH] * n,
+        'state': states, 'created_at': created_at,
+    })
+
+    volunteer_ids = user_ids[~is_admin]
+    admin_user_ids = user_ids[is_admin]
+    skill_counts = np.clip(rng.poisson(2.5, size=len(volunteer_ids)) + 1, 1, min(8, spec.skills))
+    owners, items = _pick_sets(rng, volunteer_ids, skill_counts, spec.skills, skill_weights)
+    tables['user_skills'] = Table('user_skills', {'user_id': owners, 'skill_id': skill_ids[items]})
+
+    availability = _choice(rng, AVAILABILITY, AVAILABILITY_WEIGHTS, n)
+    tables['profiles'] = Table('profiles', {
+        'user_id': user_ids, 'full_name': names,
+        'address1': [f'{100 + i % 9000} Main St' for i in range(n)],
+        'city': _choice(rng, CITIES, None, n), 'state': states,
+        'zip': [f'{77000 + i % 999:05d}' for i in range(n)],
+        'availability': [f'["{a}"]' for a in availability.tolist()],
+    })
+    tables['admins'] = Table('admins', {
+        'id': np.arange(1, len(admin_user_ids) + 1), 'user_id': admin_user_ids,
+        'phone': [f'713-555-{i % 10000:04d}' for i in range(len(admin_user_ids))],
+        'created_at': created_at[is_admin],
+    })
+    tables['volunteers'] = Table('volunteers', {
+        'id': volunteer_ids, 'user_id': volunteer_ids,
+        'phone': [f'832-555-{i % 10000:04d}' for i in range(len(volunteer_ids))],
+        'availability': availability[~is_admin], 'created_at': created_at[~is_admin],
+    })
+    tables['volunteer_skills'] = Table('volunteer_skills', {'volunteer_id': owners, 'skill_id': skill_ids[items]})
+
+    # ---------- events ----------
+    m = spec.events
+    event_ids = np.arange(1, m + 1)
+    owner_weights = zipf_weights(len(admin_user_ids), 1.0)
+    event_owner = admin_user_ids[rng.choice(len(admin_user_ids), size=m, p=owner_weights)]
+    offsets = rng.integers(-spec.days_back, spec.days_ahead + 1, size=m)
+    event_date = anchor + offsets.astype('timedelta64[D]')
+    start_hour = rng.integers(7, 18, size=m)
+    urgency = _choice(rng, URGENCY, URGENCY_WEIGHTS, m)
+    requirement_counts = np.clip(rng.poisson(1.2, size=m) + 1, 1, min(4, spec.skills))
+    req_events, req_items = _pick_sets(rng, event_ids, requirement_counts, spec.skills, skill_weights)
+
+    # ---------- registrations ----------
+    # Popularity is independent of id, so hot events are spread over time
+    popularity = rng.permutation(zipf_weights(m, spec.event_zipf))
+    wanted = min(spec.matches, len(volunteer_ids) * m)
+    keys = np.empty(0, dtype=np.int64)
+    while len(keys) < wanted:
+        missing = wanted - len(keys)
+        ev = rng.choice(m, size=int(missing * 1.2) + 16, p=popularity)
+        vol = rng.integers(len(volunteer_ids), size=len(ev))
+        keys = np.unique(np.concatenate([keys, vol.astype(np.int64) * m + ev]))
+        if len(keys) > wanted:
+            keys = rng.choice(keys, size=wanted, replace=False)
+            keys.sort()
+    match_volunteer = volunteer_ids[keys // m]
+    match_event_index = keys % m
+    order = np.lexsort((match_volunteer, match_event_index))  # clustered by event like real inserts
+    match_volunteer, match_event_index = match_volunteer[order], match_event_index[order]
+    match_status = _choice(rng, STATUSES, STATUS_WEIGHTS, len(keys))
+    lead_days = rng.integers(1, 60, size=len(keys)).astype('timedelta64[D]')
+    matched_at = ((event_date[match_event_index] - lead_days).astype('datetime64[s]')
+                  + rng.integers(0, 86400, size=len(keys)).astype('timedelta64[s]'))
+    tables['matches'] = Table('matches', {
+        'id': np.arange(1, len(keys) + 1), 'volunteer_id': match_volunteer,
+        'event_id': event_ids[match_event_index], 'status': match_status, 'matched_at': matched_at,
+    })
+
+    registrations = np.bincount(match_event_index, minlength=m)
+    capacity = np.maximum(np.round(rng.lognormal(3.0, 0.8, size=m)).astype(int), 5)
+    full = rng.random(m) < 0.1
+    capacity = np.where(full, np.maximum(registrations, 1), np.maximum(capacity, registrations))
+    tables['events'] = Table('events', {
+        'id': event_ids, 'ownerid': event_owner, 'name': [f'Community Event {i}' for i in event_ids.tolist()],
+        'description': [f'{u.title()} priority volunteer event' for u in urgency.tolist()],
+        'date': event_date, 'location': _choice(rng, CITIES, None, m), 'max_volunteers': capacity,
+        'urgency': urgency, 'img': [f'/images/event{i % 12 + 1}.jpg' for i in range(m)],
+        'time_label': [f'{h % 12 or 12}:00 {"AM" if h < 12 else "PM"} - {(h + 3) % 12 or 12}:00 '
+                       f'{"AM" if h + 3 < 12 else "PM"}' for h in start_hour.tolist()],
+        'created_at': (event_date - 30).astype('datetime64[s]'),
+    })
+    tables['event_requirements'] = Table('event_requirements', {
+        'event_id': req_events, 'skill_id': skill_ids[req_items],
+    })
+
+    # ---------- history and tasks ----------
+    past = (event_date[match_event_index] < anchor) & (match_status == 'confirmed')
+    history_volunteer = match_volunteer[past]
+    history_event = event_ids[match_event_index[past]]
+    history_ids = np.arange(1, len(history_volunteer) + 1)
+    tables['volunteer_history'] = Table('volunteer_history', {
+        'id': history_ids, 'volunteer_id': history_volunteer, 'event_id': history_event,
+        'created_at': (event_date[history_event - 1] + 1).astype('datetime64[s]'),
+    })
+    with_task = rng.random(len(history_ids)) < 0.6
+    task_count = int(with_task.sum())
+    scores = rng.integers(1, 11, size=task_count) * 10
+    tables['history_tasks'] = Table('history_tasks', {
+        'id': np.arange(1, task_count + 1), 'history_id': history_ids[with_task],
+        'name': _choice(rng, TASK_NAMES, None, task_count),
+        'completed': (rng.random(task_count) < 0.8).astype(int),
+        'volunteer_id': history_volunteer[with_task], 'event_id': history_event[with_task],
+        'score': scores,
+    })
+
+    # ---------- notifications ----------
+    per_user = rng.poisson(spec.notifications_per_user, size=n)
+    notification_user = np.repeat(user_ids, per_user)
+    count = len(notification_user)
+    age = rng.exponential(20.0, size=count).astype(int).astype('timedelta64[D]')
+    tables['notifications'] = Table('notifications', {
+        'id': np.arange(1, count + 1), 'user_id': notification_user,
+        'type': _choice(rng, NOTIFICATION_TYPES, NOTIFICATION_WEIGHTS, count),
+        'message': [f'Update #{i} about your volunteer events' for i in range(1, count + 1)],
+        'is_read': (rng.random(count) < 0.7).astype(int),
+        'created_at': (anchor - age).astype('datetime64[s]') + rng.integers(0, 86400, size=count).astype('timedelta64[s]'),
+    })
+
+    return {name: tables[name] for name in TABLES}
+
+
+# ---------- loading ----------
+
+def _placeholders(engine, count):
+    marker = '?' if engine.dialect.paramstyle == 'qmark' else '%s'
+    return ', '.join([marker] * count)
+
+
+def _insert(conn, table, batch_size):
+    sql = (f"INSERT INTO {table.name} ({', '.join(table.columns)}) "
+           f"VALUES ({_placeholders(conn.engine, len(table.columns))})")
+    for start in range(0, len(table), batch_size):
+        # pymysql turns executemany of an INSERT .. VALUES into multi-row INSERTs
+        conn.exec_driver_sql(sql, table.rows(start, start + batch_size))
+
+
+def _tsv(value):
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+def _load_infile(conn, table, batch_size):
+    with tempfile.NamedTemporaryFile('w', suffix='.tsv', delete=False, encoding='utf-8') as f:
+        path = f.name
+        for start in range(0, len(table), batch_size):
+            f.writelines('\t'.join(map(_tsv, row)) + '\n' for row in table.rows(start, start + batch_size))
+    try:
+        conn.exec_driver_sql(
+            f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE {table.name} CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({', '.join(table.columns)})")
+    finally:
+        os.unlink(path)
+
+
+def truncate(engine, tables=TABLES):
+    """Delete every row the generator writes (children first)."""
+    with engine.begin() as conn:
+        if engine.dialect.name == 'mysql':
+            conn.exec_driver_sql("SET FOREIGN_KEY_CHECKS = 0")
+            for name in reversed(tables):
+                conn.exec_driver_sql(f"TRUNCATE TABLE {name}")
+            conn.exec_driver_sql("SET FOREIGN_KEY_CHECKS = 1")
+        else:
+            for name in reversed(tables):
+                conn.exec_driver_sql(f"DELETE FROM {name}")
+
+
+def load(engine, dataset, method='insert', batch_size=10000, report=None):
+    """Bulk-load a generated dataset into empty tables; returns {table: (rows, seconds)}."""
+    loader = _load_infile if method == 'infile' else _insert
+    timings = {}
+    with engine.begin() as conn:
+        mysql = engine.dialect.name == 'mysql'
+        if mysql:
+            # Rows are generated consistent; skip per-row checks while loading
+            conn.exec_driver_sql("SET FOREIGN_KEY_CHECKS = 0")
+            conn.exec_driver_sql("SET UNIQUE_CHECKS = 0")
+        for name, table in dataset.items():
+            started = time.perf_counter()
+            if len(table):
+                loader(conn, table, batch_size)
+            timings[name] = (len(table), time.perf_counter() - started)
+            if report:
+                report(name, *timings[name])
+        if mysql:
+            conn.exec_driver_sql("SET UNIQUE_CHECKS = 1")
+            conn.exec_driver_sql("SET FOREIGN_KEY_CHECKS = 1")
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--preset', choices=sorted(DatasetSpec.PRESETS))
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--events', type=int)
+    parser.add_argument('--matches', type=int)
+    parser.add_argument('--skills', type=int, default=40)
+    parser.add_argument('--admin-ratio', type=float, default=0.02)
+    parser.add_argument('--notifications-per-user', type=float, default=5.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--anchor-date', type=datetime.date.fromisoformat,
+                        help='date the data is generated around (default: today)')
+    parser.add_argument('--method', choices=['insert', 'infile'], default='insert')
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--truncate', action='store_true', help='delete existing rows first')
+    parser.add_argument('--dry-run', action='store_true', help='generate and count, load nothing')
+    args = parser.parse_args(argv)
+
+    sizes = {k: v for k, v in (('users', args.users), ('events', args.events), ('matches', args.matches))
+             if v is not None}
+    options = dict(skills=args.skills, admin_ratio=args.admin_ratio, seed=args.seed,
+                   notifications_per_user=args.notifications_per_user, anchor_date=args.anchor_date, **sizes)
+    spec = DatasetSpec.preset(args.preset, **options) if args.preset else DatasetSpec(**options)
+
+    started = time.perf_counter()
+    dataset = generate(spec)
+    print(f'generated {sum(len(t) for t in dataset.values()):,} rows in {time.perf_counter() - started:.1f}s')
+    if args.dry_run:
+        for name, table in dataset.items():
+            print(f'  {name:<20} {len(table):>10,}')
+        return
+
+    from server.db import make_engine_from_env
+    overrides = {'connect_args': {'local_infile': True}} if args.method == 'infile' else {}
+    engine = make_engine_from_env(**overrides)
+    if args.truncate:
+        truncate(engine)
+    started = time.perf_counter()
+    load(engine, dataset, args.method, args.batch_size,
+         report=lambda name, rows, seconds: print(f'  {name:<20} {rows:>10,} rows {seconds:>7.2f}s'))
+    print(f'loaded in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,358 @@
+"""
+Scenario-based HTTP load test with baselines.
+
+    python -m server.bench.loadtest run --users 200 --duration 60 --save baseline.json
+    python -m server.bench.loadtest run --users 200 --duration 60 --compare baseline.json
+    python -m server.bench.loadtest compare baseline.json current.json
+
+Virtual users replay the traffic the app actually sees, each following one
+scenario picked by --mix weights:
+
+    poller     volunteer polling notifications (list + count) every 5s
+    browser    volunteer browsing upcoming events and opening one
+    register   volunteer registering for the hottest upcoming event
+    admin      organizer running match/find and exporting the CSV report
+
+Ids come from the database configured by the DB_* environment variables,
+so load it first (python -m server.bench.dataset --preset medium
+--truncate). Registrations write rows; reload the dataset between runs that
+are compared. Without --url a threaded server is started on --port.
+
+Per route the report shows throughput, latency percentiles and the error
+rate. Statuses a step expects (a 400 "Event full" when registering, a 404
+when no event matches) count as rejections rather than errors. --save
+writes the results as JSON; --compare checks them against a saved run and
+exits with status 1 when a route regressed by more than --tolerance.
+"""
+
+import argparse
+import datetime
+import http.client
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+
+from .async_vs_sync import percentile, start_server
+
+DEFAULT_MIX = 'poller=60,browser=25,register=5,admin=10'
+
+
+class Step:
+    """One request of a scenario; `route` names it in the report."""
+
+    def __init__(self, method, route, path, body=None, expect=(), think=1.0):
+        self.method = method
+        self.route = route
+        self.path = path
+        self.body = body
+        self.expect = frozenset(expect)
+        self.think = think
+
+
+class Targets:
+    """Ids sampled from the database for the scenarios to use."""
+
+    def __init__(self, volunteers, admins, events, hot_event):
+        self.volunteers = volunteers  # [(volunteers.id, users.id)]
+        self.admins = admins          # [users.id]
+        self.events = events          # upcoming event ids, most registered first
+        self.hot_event = hot_event
+
+    @classmethod
+    def from_engine(cls, engine, limit=5000):
+        with engine.connect() as conn:
+            volunteers = [tuple(row) for row in conn.exec_driver_sql(
+                f"SELECT id, user_id FROM volunteers WHERE user_id IS NOT NULL ORDER BY id LIMIT {limit}")]
+            admins = [row[0] for row in conn.exec_driver_sql(
+                f"SELECT user_id FROM admins WHERE user_id IS NOT NULL ORDER BY id LIMIT {limit}")]
+            events = [row[0] for row in conn.exec_driver_sql(
+                "SELECT e.id FROM events e LEFT JOIN matches m ON m.event_id = e.id "
+                "WHERE e.date >= CURRENT_DATE GROUP BY e.id ORDER BY COUNT(m.id) DESC, e.id LIMIT 500")]
+        if not (volunteers and admins and events):
+            raise RuntimeError('Need volunteers, admins and upcoming events; load a dataset first')
+        return cls(volunteers, admins, events, events[0])
+
+
+# ---------- scenarios ----------
+# Each is an endless generator of Steps for one virtual user.
+
+def poller(targets, rng):
+    _, user_id = rng.choice(targets.volunteers)
+    while True:
+        yield Step('GET', 'GET /api/notifications', f'/api/notifications?user_id={user_id}', think=0)
+        yield Step('GET', 'GET /api/notifications/count', f'/api/notifications/count?user_id={user_id}', think=5.0)
+
+
+def browser(targets, rng):
+    _, user_id = rng.choice(targets.volunteers)
+    while True:
+        yield Step('GET', 'GET /api/volunteer_user/events/upcoming',
+                   f'/api/volunteer_user/events/upcoming?user_id={user_id}', think=3.0)
+        event_id = rng.choice(targets.events[:50])
+        yield Step('GET', 'GET /api/bundles/event-view/<id>',
+                   f'/api/bundles/event-view/{event_id}?user_id={user_id}', think=8.0)
+
+
+def register(targets, rng):
+    while True:
+        _, user_id = rng.choice(targets.volunteers)
+        yield Step('POST', 'POST /api/register-event', '/api/register-event',
+                   {'user_id': user_id, 'event_id': targets.hot_event}, expect=(400,), think=2.0)
+
+
+def admin(targets, rng):
+    admin_id = rng.choice(targets.admins)
+    while True:
+        for _ in range(5):
+            volunteer_id, _ = rng.choice(targets.volunteers)
+            yield Step('POST', 'POST /api/match/find', '/api/match/find',
+                       {'volunteer_id': volunteer_id, 'admin_id': admin_id}, expect=(404,), think=2.0)
+        yield Step('GET', 'GET /api/report/volunteer-history/csv',
+                   f'/api/report/volunteer-history/csv?admin_user_id={admin_id}', think=10.0)
+
+
+SCENARIOS = {'poller': poller, 'browser': browser, 'register': register, 'admin': admin}
+
+
+# ---------- driving ----------
+
+class Recorder:
+    """Per-route latencies and outcome counts, merged from every client."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.rejected = defaultdict(int)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def merge(self, other):
+        with self._lock:
+            for route, values in other.latencies.items():
+                self.latencies[route].extend(values)
+            for route, count in other.rejected.items():
+                self.rejected[route] += count
+            for route, count in other.errors.items():
+                self.errors[route] += count
+
+    def summary(self, duration):
+        routes = {}
+        for route in sorted(set(self.latencies) | set(self.errors)):
+            values = self.latencies[route]
+            total = len(values) + self.errors[route]
+            routes[route] = {
+                'requests': total,
+                'rps': round(len(values) / duration, 2),
+                'p50_ms': round(percentile(values, 50) * 1000, 2),
+                'p90_ms': round(percentile(values, 90) * 1000, 2),
+                'p95_ms': round(percentile(values, 95) * 1000, 2),
+                'p99_ms': round(percentile(values, 99) * 1000, 2),
+                'max_ms': round(max(values, default=0) * 1000, 2),
+                'rejected': self.rejected[route],
+                'errors': self.errors[route],
+                'error_rate': round(self.errors[route] / total, 4) if total else 0.0,
+            }
+        return routes
+
+
+def virtual_user(host, port, scenario, deadline, think_scale, recorder):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    mine = Recorder()
+    headers = {'Content-Type': 'application/json'}
+    for step in scenario:
+        if time.monotonic() >= deadline:
+            break
+        body = json.dumps(step.body) if step.body is not None else None
+        started = time.perf_counter()
+        try:
+            conn.request(step.method, step.path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            mine.errors[step.route] += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+        else:
+            elapsed = time.perf_counter() - started
+            if response.status < 400 or response.status in step.expect:
+                mine.latencies[step.route].append(elapsed)
+                if response.status >= 400:
+                    mine.rejected[step.route] += 1
+            else:
+                mine.errors[step.route] += 1
+        pause = min(step.think * think_scale, deadline - time.monotonic())
+        if pause > 0:
+            time.sleep(pause)
+    conn.close()
+    recorder.merge(mine)
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name.strip()}' (choose from {', '.join(SCENARIOS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def assign_scenarios(mix, users):
+    """Split `users` between scenarios in proportion to their weights."""
+    total = sum(mix.values())
+    shares = {name: users * weight / total for name, weight in mix.items()}
+    counts = {name: int(share) for name, share in shares.items()}
+    by_remainder = sorted(mix, key=lambda name: shares[name] - counts[name], reverse=True)
+    for name in by_remainder[:users - sum(counts.values())]:
+        counts[name] += 1
+    return [name for name in mix for _ in range(counts[name])]
+
+
+def run(url, targets, users=100, duration=60.0, mix=None, think_scale=1.0, seed=1, ramp=5.0):
+    """Drive `users` virtual users against `url`; returns the results document."""
+    mix = mix or parse_mix(DEFAULT_MIX)
+    parsed = urllib.parse.urlsplit(url)
+    rng = random.Random(seed)
+    names = assign_scenarios(mix, users)
+    rng.shuffle(names)
+    recorder = Recorder()
+    started = time.monotonic()
+    deadline = started + ramp + duration
+    threads = []
+    for i, name in enumerate(names):
+        scenario = SCENARIOS[name](targets, random.Random(seed * 100003 + i))
+        threads.append(threading.Thread(target=virtual_user, daemon=True, args=(
+            parsed.hostname, parsed.port or 80, scenario, deadline, think_scale, recorder)))
+    for thread in threads:
+        thread.start()
+        time.sleep(ramp / max(users, 1))  # staggered start so pollers don't fire in lockstep
+    for thread in threads:
+        thread.join()
+
+    routes = recorder.summary(time.monotonic() - started)
+    requests = sum(r['requests'] for r in routes.values())
+    errors = sum(r['errors'] for r in routes.values())
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'users': users, 'duration': duration, 'think_scale': think_scale, 'seed': seed,
+            'mix': {name: names.count(name) for name in mix},
+        },
+        'total': {'requests': requests, 'rps': round(sum(r['rps'] for r in routes.values()), 2),
+                  'errors': errors, 'error_rate': round(errors / requests, 4) if requests else 0.0},
+        'routes': routes,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ---------- reporting ----------
+
+def report(results):
+    total = results['total']
+    print(f"\n{results['meta']['users']} users, {results['meta']['duration']:.0f}s: "
+          f"{total['rps']:.1f} req/s, {total['errors']} errors ({total['error_rate']:.2%})")
+    print(f'  {"route":<45} {"n":>7} {"req/s":>8} {"p50":>7} {"p95":>7} {"p99":>7} {"max":>7} {"rej":>5} {"err%":>6}')
+    for route, r in results['routes'].items():
+        print(f"  {route[:45]:<45} {r['requests']:>7} {r['rps']:>8.1f} {r['p50_ms']:>7.1f} {r['p95_ms']:>7.1f} "
+              f"{r['p99_ms']:>7.1f} {r['max_ms']:>7.1f} {r['rejected']:>5} {r['error_rate']:>6.1%}")
+
+
+def compare(baseline, current, tolerance=0.10):
+    """Print per-route changes; returns the list of regressions found."""
+    regressions = []
+    print(f"\nbaseline {baseline['meta'].get('commit')} ({baseline['meta']['date']}) -> "
+          f"current {current['meta'].get('commit')} ({current['meta']['date']})")
+    print(f'  {"route":<45} {"p50":>16} {"p95":>16} {"req/s":>16} {"err%":>13}')
+    for route in sorted(set(baseline['routes']) | set(current['routes'])):
+        old, new = baseline['routes'].get(route), current['routes'].get(route)
+        if old is None or new is None:
+            print(f"  {route[:45]:<45} {'only in ' + ('current' if old is None else 'baseline'):>16}")
+            continue
+        flags = []
+        if new['p95_ms'] > old['p95_ms'] * (1 + tolerance) and new['p95_ms'] - old['p95_ms'] > 1:
+            flags.append('p95')
+        if new['rps'] < old['rps'] * (1 - tolerance):
+            flags.append('throughput')
+        if new['error_rate'] > old['error_rate'] + 0.01:
+            flags.append('errors')
+        regressions.extend(f'{route}: {flag}' for flag in flags)
+        print(f"  {route[:45]:<45} {_delta(old['p50_ms'], new['p50_ms']):>16} {_delta(old['p95_ms'], new['p95_ms']):>16} "
+              f"{_delta(old['rps'], new['rps']):>16} {old['error_rate']:>5.1%}->{new['error_rate']:<5.1%}"
+              f"{'  REGRESSED: ' + ', '.join(flags) if flags else ''}")
+    return regressions
+
+
+def _delta(old, new):
+    change = f'{(new - old) / old:+.0%}' if old else 'n/a'
+    return f'{new:.1f} ({change})'
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the scenarios and report')
+    run_parser.add_argument('--url', help='server to test (default: start one on --port)')
+    run_parser.add_argument('--port', type=int, default=5100)
+    run_parser.add_argument('--server', choices=['sync', 'async'], default='sync')
+    run_parser.add_argument('--users', type=int, default=100, help='concurrent virtual users')
+    run_parser.add_argument('--duration', type=float, default=60)
+    run_parser.add_argument('--ramp', type=float, default=5, help='seconds over which users start')
+    run_parser.add_argument('--mix', default=DEFAULT_MIX, help='scenario weights, e.g. poller=60,admin=10')
+    run_parser.add_argument('--think-scale', type=float, default=1.0,
+                            help='multiplier on think times; 0 drives the server at saturation')
+    run_parser.add_argument('--seed', type=int, default=1)
+    run_parser.add_argument('--save', metavar='FILE', help='write the results as JSON')
+    run_parser.add_argument('--compare', metavar='BASELINE', help='compare against saved results')
+    run_parser.add_argument('--tolerance', type=float, default=0.10)
+
+    compare_parser = commands.add_parser('compare', help='compare two saved results')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--tolerance', type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        regressions = compare(_load(args.baseline), _load(args.current), args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+    from server.db import make_engine_from_env
+    engine = make_engine_from_env()
+    targets = Targets.from_engine(engine)
+    engine.dispose()
+
+    process = None if args.url else start_server(args.server, args.port)
+    try:
+        results = run(args.url or f'http://127.0.0.1:{args.port}', targets, args.users, args.duration,
+                      parse_mix(args.mix), args.think_scale, args.seed, args.ramp)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(10)
+    report(results)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare and compare(_load(args.compare), results, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
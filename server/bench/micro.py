@@ -0,0 +1,344 @@
+"""
+Microbenchmarks for the matching hot loops, with stored history.
+
+    python -m server.bench.micro                         # all benchmarks, sizes 10^2..10^5
+    python -m server.bench.micro --bench calculate_score --sizes 100,1000
+    python -m server.bench.micro --save                  # append results to the history
+    python -m server.bench.micro --compare               # check against the last saved run
+    python -m server.bench.micro --history find_best_match
+
+Benchmarks (size is the number of items the loop walks):
+
+    calculate_score      MatchingHelper.calculate_score over `size` volunteer/event pairs
+    find_best_match      ScoringContext build + best_event for one volunteer over
+                         `size` open events (the find_best_match scoring path)
+    upcoming_events      VolunteerService.annotate_skill_matches over `size` event
+                         rows (set intersection + sort of get_upcoming_events_with_skills)
+
+Inputs are generated from --seed without a database, so every run and every
+implementation sees identical data. Each benchmark has a reference
+implementation; an alternative engine registers next to it
+
+    @implementation('find_best_match', 'my_engine')
+    def my_engine(inputs): ...
+
+and is timed on the same inputs, its results checked against the reference,
+and its speed reported relative to it.
+
+Time is the best and median per-call wall time over --repeat rounds, each
+long enough to be measured reliably. Allocations are measured separately
+with tracemalloc on a single call: the peak, and what the result keeps.
+History is one JSON line per saved run in .benchmarks/micro.jsonl at the
+repository root, tagged with the git commit.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HISTORY = os.path.join(ROOT, '.benchmarks', 'micro.jsonl')
+SIZES = (100, 1000, 10000, 100000)
+
+BENCHMARKS = {}
+
+
+class Benchmark:
+    """A loop to measure: input generator, implementations, result key."""
+
+    def __init__(self, name, make_inputs, result_key=None):
+        self.name = name
+        self.make_inputs = make_inputs
+        self.result_key = result_key or (lambda result: result)
+        self.implementations = {}
+
+
+def benchmark(name, result_key=None):
+    """Register the decorated input generator `(size, seed) -> inputs` as a benchmark."""
+    def decorator(fn):
+        BENCHMARKS[name] = Benchmark(name, fn, result_key)
+        return fn
+    return decorator
+
+
+def implementation(name, impl_name):
+    """Register the decorated `(inputs) -> result` as an implementation of benchmark `name`.
+
+    The first one registered is the reference the others are checked against.
+    """
+    def decorator(fn):
+        BENCHMARKS[name].implementations[impl_name] = fn
+        return fn
+    return decorator
+
+
+# ---------- synthetic inputs ----------
+
+SKILLS = [f'Skill {i}' for i in range(40)]
+SKILL_WEIGHTS = [1.0 / (i + 1) for i in range(len(SKILLS))]
+CITIES = [('Houston', 'TX'), ('Austin', 'TX'), ('Dallas', 'TX'), ('Miami', 'FL'), ('Denver', 'CO')]
+AVAILABILITY = ['weekends', 'weekdays', 'evenings', 'flexible', 'saturday']
+TIME_LABELS = ['Saturday 9:00 AM - 12:00 PM', 'Weekdays, evenings', 'Flexible hours', 'Sunday morning']
+
+
+def _skills(rng, low, high):
+    count = rng.randint(low, high)
+    return list(dict.fromkeys(rng.choices(range(len(SKILLS)), weights=SKILL_WEIGHTS, k=count)))
+
+
+def _events(rng, size, anchor=datetime.date(2026, 1, 1)):
+    events, requirements = [], {}
+    for event_id in range(1, size + 1):
+        city, state = rng.choice(CITIES)
+        events.append({
+            'id': event_id, 'ownerid': rng.randint(1, 20), 'name': f'Event {event_id}',
+            'date': anchor + datetime.timedelta(days=rng.randint(0, 365)),
+            'urgency': rng.choice(['low', 'medium', 'high']), 'location': f'1 Main St, {city}, {state} 77001',
+            'max_volunteers': 20, 'current_volunteers': rng.randint(0, 19),
+            'time_label': rng.choice(TIME_LABELS),
+        })
+        requirements[event_id] = _skills(rng, 1, 4)
+    return events, requirements
+
+
+@benchmark('calculate_score')
+def calculate_score_inputs(size, seed):
+    rng = random.Random(seed)
+    return [([SKILLS[s] for s in _skills(rng, 1, 8)], [SKILLS[s] for s in _skills(rng, 0, 4)])
+            for _ in range(size)]
+
+
+def _best_event_key(result):
+    event, score = result
+    return (event['id'] if event else None, score)
+
+
+@benchmark('find_best_match', result_key=_best_event_key)
+def find_best_match_inputs(size, seed):
+    rng = random.Random(seed)
+    city, state = rng.choice(CITIES)
+    volunteer = {'id': 1, 'availability': rng.choice(AVAILABILITY), 'profile_availability': None,
+                 'city': city, 'state': state, 'attended': 3, 'tasks': 4, 'completed': 3}
+    events, requirements = _events(rng, size)
+    return {'volunteers': [volunteer], 'volunteer_skill_ids': {1: set(_skills(rng, 1, 8))},
+            'events': events, 'event_skill_ids': {k: set(v) for k, v in requirements.items()},
+            'weights': {}}
+
+
+def _annotated_key(result):
+    return [(e['id'], e['skill_match_count'], sorted(e['matching_skills'])) for e in result]
+
+
+@benchmark('upcoming_events', result_key=_annotated_key)
+def upcoming_events_inputs(size, seed):
+    rng = random.Random(seed)
+    events, requirements = _events(rng, size)
+    rows = [{**event, 'required_skills': ','.join(SKILLS[s] for s in requirements[event['id']]) or None,
+             'is_registered': int(rng.random() < 0.05)} for event in events]
+    user_skills = {SKILLS[s].lower() for s in _skills(rng, 1, 8)}
+    return rows, user_skills
+
+
+# ---------- reference implementations ----------
+
+@implementation('calculate_score', 'reference')
+def calculate_score_reference(pairs):
+    from server.services.volunteerMatchingService import MatchingHelper
+    return [MatchingHelper.calculate_score(volunteer, event) for volunteer, event in pairs]
+
+
+@implementation('find_best_match', 'reference')
+def find_best_match_reference(inputs):
+    from server.services.matchScoring import ScoringContext
+    ctx = ScoringContext(inputs['volunteers'], inputs['volunteer_skill_ids'], inputs['events'],
+                         inputs['event_skill_ids'], inputs['weights'])
+    return ctx.best_event(inputs['volunteers'][0]['id'])
+
+
+@implementation('upcoming_events', 'reference')
+def upcoming_events_reference(inputs):
+    from server.services.volunteerService import VolunteerService
+    rows, user_skills = inputs
+    return VolunteerService.annotate_skill_matches(rows, user_skills)
+
+
+# ---------- measuring ----------
+
+def time_call(fn, arg, repeat=5, min_time=0.1):
+    """(best, median) seconds per call; each round runs enough calls to last min_time."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn(arg)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    rounds = [elapsed / number]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn(arg)
+        rounds.append((time.perf_counter() - started) / number)
+    return min(rounds), statistics.median(rounds)
+
+
+def measure_allocations(fn, arg):
+    """(peak bytes, bytes still held by the result) of one call."""
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        result = fn(arg)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak - base, current - base
+
+
+def run(names=None, sizes=SIZES, implementations=None, seed=1, repeat=5, min_time=0.1, report=None):
+    """Measure every (benchmark, implementation, size); returns a list of result dicts."""
+    results = []
+    for name in names or BENCHMARKS:
+        bench = BENCHMARKS[name]
+        impls = {k: v for k, v in bench.implementations.items()
+                 if not implementations or k in implementations or k == 'reference'}
+        for size in sizes:
+            inputs = bench.make_inputs(size, seed)
+            expected = None
+            for impl_name, fn in impls.items():
+                key = bench.result_key(fn(inputs))  # warm-up, and the result to check
+                if expected is None:
+                    expected = key
+                elif key != expected:
+                    raise AssertionError(f'{name}/{impl_name} disagrees with reference at size {size}')
+                best, median = time_call(fn, inputs, repeat, min_time)
+                peak, retained = measure_allocations(fn, inputs)
+                result = {'benchmark': name, 'implementation': impl_name, 'size': size,
+                          'best_s': best, 'median_s': median, 'per_item_ns': best / size * 1e9,
+                          'peak_bytes': peak, 'retained_bytes': retained}
+                results.append(result)
+                if report:
+                    report(result)
+    return results
+
+
+# ---------- history ----------
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(results, path=HISTORY, seed=1):
+    entry = {
+        'commit': _git_commit(), 'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+        'seed': seed, 'results': results,
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+    return entry
+
+
+def load_history(path=HISTORY):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(baseline, results, tolerance=0.10):
+    """Print per-case changes against a history entry; returns the slowed-down cases."""
+    old = {(r['benchmark'], r['implementation'], r['size']): r for r in baseline['results']}
+    slower = []
+    print(f"\nagainst {baseline['commit']} ({baseline['date']}):")
+    for r in results:
+        key = (r['benchmark'], r['implementation'], r['size'])
+        if key not in old:
+            continue
+        ratio = r['best_s'] / old[key]['best_s']
+        peak = r['peak_bytes'] / max(old[key]['peak_bytes'], 1)
+        flag = '  SLOWER' if ratio > 1 + tolerance else ''
+        if flag:
+            slower.append(key)
+        print(f"  {r['benchmark']:<16} {r['implementation']:<12} {r['size']:>7}  "
+              f"time x{ratio:.2f}  peak memory x{peak:.2f}{flag}")
+    return slower
+
+
+def _format_result(result, reference=None):
+    relative = ''
+    if reference and result['implementation'] != 'reference':
+        relative = f"  x{reference['best_s'] / result['best_s']:.2f} vs reference"
+    return (f"  {result['benchmark']:<16} {result['implementation']:<12} {result['size']:>7} "
+            f"{result['best_s'] * 1e3:>10.3f} {result['median_s'] * 1e3:>10.3f} {result['per_item_ns']:>9.0f} "
+            f"{result['peak_bytes'] / 1024:>10.0f} {result['retained_bytes'] / 1024:>10.0f}{relative}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--bench', action='append', choices=sorted(BENCHMARKS))
+    parser.add_argument('--impl', action='append', help='implementations besides the reference')
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)))
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.1, help='seconds per timing round')
+    parser.add_argument('--history-file', default=HISTORY)
+    parser.add_argument('--save', action='store_true', help='append the results to the history')
+    parser.add_argument('--compare', nargs='?', const='last', metavar='COMMIT',
+                        help='compare with the last saved run, or the last one for COMMIT')
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    parser.add_argument('--history', metavar='BENCHMARK', help='print saved results over time and exit')
+    args = parser.parse_args(argv)
+
+    if args.history:
+        for entry in load_history(args.history_file):
+            row = '  '.join(f"{r['size']}:{r['best_s'] * 1e3:.3f}ms" for r in entry['results']
+                            if r['benchmark'] == args.history and r['implementation'] == 'reference')
+            print(f"{entry['date']}  {entry['commit'] or '-':<9} {row}")
+        return
+
+    print(f'  {"benchmark":<16} {"impl":<12} {"size":>7} {"best ms":>10} {"median ms":>10} '
+          f'{"ns/item":>9} {"peak KiB":>10} {"kept KiB":>10}')
+    references = {}
+
+    def report(result):
+        key = (result['benchmark'], result['size'])
+        if result['implementation'] == 'reference':
+            references[key] = result
+        print(_format_result(result, references.get(key)), flush=True)
+
+    sizes = [int(s) for s in args.sizes.split(',')]
+    results = run(args.bench, sizes, args.impl, args.seed, args.repeat, args.min_time, report)
+
+    if args.compare:
+        history = load_history(args.history_file)
+        if args.compare != 'last':
+            history = [e for e in history if e['commit'] == args.compare]
+        if not history:
+            sys.exit(f'No saved run to compare with in {args.history_file}')
+        slower = compare(history[-1], results, args.tolerance)
+    if args.save:
+        save(results, args.history_file, args.seed)
+    if args.compare and slower:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Startup benchmark: cold import and app construction times.
+
+    python -m server.bench.startup [--runs 7] [--apps 50]
+
+Cold numbers come from a fresh interpreter per run (median of --runs), so
+they include every module the step imports: what a worker or a test
+session pays once. The per-app numbers build --apps apps in one warm
+interpreter, which is what each test pays when it makes its own app.
+No database connection is opened; app construction only creates engines.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# name -> statement timed in a fresh interpreter
+COLD = {
+    'import server.app': 'import server.app',
+    'create_app() all blueprints': 'from server.app import create_app; create_app()',
+    'create_app() one blueprint': (
+        'from sqlalchemy import create_engine; from server.app import create_app; '
+        'create_app({"ENGINE": create_engine("sqlite://")}, blueprints=["bundle"])'
+    ),
+}
+
+PROBE = '''
+import sys, time
+started = time.perf_counter()
+{statement}
+print(time.perf_counter() - started, len(sys.modules))
+'''
+
+
+def cold(statement, runs):
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    seconds, modules = [], 0
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', PROBE.format(statement=statement)],
+                                cwd=root, check=True, capture_output=True, text=True).stdout
+        elapsed, modules = output.split()
+        seconds.append(float(elapsed))
+    return statistics.median(seconds), int(modules)
+
+
+def per_app(apps, blueprints):
+    from sqlalchemy import create_engine
+
+    from server.app import create_app
+
+    engine = create_engine('sqlite://')
+    create_app({'ENGINE': engine}, blueprints=blueprints)  # imports paid here
+    started = time.perf_counter()
+    for _ in range(apps):
+        create_app({'ENGINE': engine}, blueprints=blueprints)
+    return (time.perf_counter() - started) / apps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--apps', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    print(f'{"cold start (median of " + str(args.runs) + ")":<40} {"ms":>8} {"modules":>8}')
+    for name, statement in COLD.items():
+        seconds, modules = cold(statement, args.runs)
+        print(f'{name:<40} {seconds * 1000:>8.1f} {modules:>8}')
+
+    print(f'\n{"per app, warm interpreter":<40} {"ms":>8}')
+    for name, blueprints in (('all blueprints', None), ('one blueprint', ['bundle']), ('no blueprints', [])):
+        print(f'{name:<40} {per_app(args.apps, blueprints) * 1000:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Response compression and conditional GET.
+
+An after_request hook that, for successful GET/HEAD responses:
+
+    - picks gzip or brotli from Accept-Encoding (brotli only when the
+      optional `brotli` package is installed)
+    - gives buffered bodies a strong ETag (a BLAKE2 hash of the body, with
+      the encoding appended, since each encoding is its own representation);
+      a view that already set an ETag, e.g. from a version counter, keeps it
+    - answers a matching If-None-Match with 304 before compressing anything
+    - compresses bodies over COMPRESS_MIN_SIZE bytes, and streamed bodies
+      chunk by chunk as they are produced
+
+    Compression().init_app(app)
+"""
+
+import gzip
+import hashlib
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+}
+
+
+def body_etag(body):
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class Compression:
+    """Negotiates Content-Encoding and answers conditional GETs."""
+
+    def __init__(self, min_size=1024, gzip_level=6, brotli_quality=4):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def init_app(self, app):
+        self.min_size = app.config.get("COMPRESS_MIN_SIZE", self.min_size)
+        self.gzip_level = app.config.get("COMPRESS_GZIP_LEVEL", self.gzip_level)
+        self.brotli_quality = app.config.get("COMPRESS_BROTLI_QUALITY", self.brotli_quality)
+        app.after_request(self._after_request)
+        app.extensions['compression'] = self
+        return self
+
+    def encodings(self):
+        return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    def negotiate(self):
+        """The encoding to use for this request, or None for identity."""
+        return request.accept_encodings.best_match(self.encodings())
+
+    def _after_request(self, response):
+        if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+            return response
+        if response.direct_passthrough or 'Content-Encoding' in response.headers:
+            # File responses and bodies another layer already encoded
+            return response
+
+        compressible = response.mimetype.startswith('text/') or response.mimetype in COMPRESSIBLE_TYPES
+        encoding = None
+        if compressible:
+            response.vary.add('Accept-Encoding')
+            if response.is_streamed or response.calculate_content_length() >= self.min_size:
+                encoding = self.negotiate()
+
+        etag, weak = response.get_etag()
+        if etag is None and not response.is_streamed:
+            etag = body_etag(response.get_data())
+        if etag is not None:
+            if encoding and not etag.endswith(f'-{encoding}'):
+                etag = f'{etag}-{encoding}'
+            response.set_etag(etag, weak=bool(weak))
+            if request.if_none_match.contains_weak(etag):
+                response.status_code = 304
+                response.set_data(b'')
+                response.headers.pop('Content-Length', None)
+                return response
+
+        if encoding is None:
+            return response
+        if response.is_streamed:
+            response.response = self._compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            response.set_data(self.compress(response.get_data(), encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def compress(self, body, encoding):
+        if encoding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def _compress_stream(self, chunks, encoding):
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+        else:
+            compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            compress = compressor.compress
+            flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)  # noqa: E731
+            finish = compressor.flush
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                # Flush per chunk so clients get each piece as it is produced
+                data = compress(chunk) + flush()
+                if data:
+                    yield data
+            yield finish()
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
@@ -0,0 +1,310 @@
+"""
+Database engine and connection pool construction.
+
+Pool settings come from the environment and default to a size derived from
+how many request threads each worker runs:
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW   explicit pool size / overflow
+    DB_POOL_THREADS                 request threads per worker (falls back to
+                                    WEB_THREADS / GUNICORN_THREADS, then 4)
+    WEB_CONCURRENCY                 worker processes sharing the server
+    DB_MAX_CONNECTIONS              server connection budget split across workers
+    DB_POOL_RECYCLE                 seconds before a connection is replaced (1800)
+    DB_POOL_TIMEOUT                 seconds to wait for a free connection (10)
+    DB_POOL_PING_AFTER_IDLE         ping only connections idle this long (30);
+                                    0 pings every checkout, -1 never pings
+    DB_POOL_WARMUP                  open this many connections at startup
+
+DB_READ_HOST / DB_READ_PORT point read-only service methods at a replica
+(see services/engineRouting.py); the replica gets its own pool.
+
+DB_BACKEND=sqlite runs everything on an embedded SQLite file instead
+(DB_SQLITE_PATH, default eventmatcher.db). The file is created from
+db/sqlite_schema.sql when the engine is made, and every connection is set up for a
+read-mostly web workload: WAL journaling so readers never block the writer,
+synchronous=NORMAL, memory-mapped reads (DB_SQLITE_MMAP_MB, default 256), a
+larger page cache and a busy timeout instead of immediate lock errors.
+
+The ASGI mode (server/asgi.py) uses an asyncio engine on aiomysql sized by
+DB_ASYNC_POOL_SIZE / DB_ASYNC_MAX_OVERFLOW: one event loop serves many
+requests, so its pool is not tied to a thread count.
+
+Instead of pool_pre_ping (a round trip on every checkout) connections are
+pinged only when they have sat idle long enough to have been dropped.
+"""
+
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import quote_plus
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Checkouts slower than this while the pool is exhausted count as waits
+WAIT_THRESHOLD_SECONDS = 0.001
+
+SQLITE_SCHEMA = os.path.join(os.path.dirname(__file__), '..', 'db', 'sqlite_schema.sql')
+
+
+def database_url_from_env(host=None, port=None):
+    if os.getenv("DB_BACKEND", "mysql") == "sqlite":
+        return f"sqlite:///{os.path.abspath(os.getenv('DB_SQLITE_PATH', 'eventmatcher.db'))}"
+    host = host or os.getenv("DB_HOST", "127.0.0.1")
+    port = port or os.getenv("DB_PORT", "3306")
+    name = os.getenv("DB_NAME", "eventmatcher")
+    user = os.getenv("DB_USER", "root")
+    pw   = quote_plus(os.getenv("DB_PASS", "admin"))
+
+    return f"mysql+pymysql://{user}:{pw}@{host}:{port}/{name}?charset=utf8mb4"
+
+
+def _env_int(environ, *names, default=None):
+    for name in names:
+        value = environ.get(name)
+        if value not in (None, ''):
+            return int(value)
+    return default
+
+
+def pool_settings_from_env(environ=None):
+    """Pool keyword arguments for create_engine plus the ping/warm-up settings."""
+    environ = os.environ if environ is None else environ
+    threads = _env_int(environ, "DB_POOL_THREADS", "WEB_THREADS", "GUNICORN_THREADS", default=4)
+    workers = _env_int(environ, "WEB_CONCURRENCY", default=1)
+
+    # One connection per request thread plus one for background work
+    pool_size = _env_int(environ, "DB_POOL_SIZE", default=threads + 1)
+    max_overflow = _env_int(environ, "DB_MAX_OVERFLOW", default=max(2, math.ceil(threads / 2)))
+
+    budget = _env_int(environ, "DB_MAX_CONNECTIONS")
+    if budget:
+        per_worker = max(1, budget // max(workers, 1))
+        pool_size = min(pool_size, per_worker)
+        max_overflow = max(0, min(max_overflow, per_worker - pool_size))
+
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_recycle": _env_int(environ, "DB_POOL_RECYCLE", default=1800),
+        "pool_timeout": _env_int(environ, "DB_POOL_TIMEOUT", default=10),
+        "ping_after_idle": _env_int(environ, "DB_POOL_PING_AFTER_IDLE", default=30),
+        "warmup": _env_int(environ, "DB_POOL_WARMUP", default=0),
+    }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that counts checkouts, waits for a free slot and timeouts."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self._counters = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'timeouts': 0,
+            'pings': 0,
+            'ping_failures': 0,
+        }
+
+    def connect(self):
+        exhausted = self.checkedout() >= self.size() + max(self._max_overflow, 0)
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.count('timeouts')
+            raise
+        waited = time.perf_counter() - started
+        with self._stats_lock:
+            self._counters['checkouts'] += 1
+            if exhausted and waited >= WAIT_THRESHOLD_SECONDS:
+                self._counters['waits'] += 1
+                self._counters['wait_seconds'] += waited
+        return connection
+
+    def count(self, name, amount=1):
+        with self._stats_lock:
+            self._counters[name] += amount
+
+    def stats(self):
+        """Counters since the pool was created plus current occupancy."""
+        with self._stats_lock:
+            stats = dict(self._counters)
+        stats['wait_seconds'] = round(stats['wait_seconds'], 6)
+        stats.update({
+            'size': self.size(),
+            'max_overflow': self._max_overflow,
+            'checked_out': self.checkedout(),
+            'checked_in': self.checkedin(),
+            'overflow': max(self.overflow(), 0),
+        })
+        return stats
+
+
+def install_idle_ping(engine, idle_seconds):
+    """Ping a connection on checkout only if it sat idle for `idle_seconds`."""
+    if idle_seconds < 0:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        connection_record.info['idle_since'] = time.monotonic()
+
+    @event.listens_for(engine, 'checkin')
+    def on_checkin(dbapi_connection, connection_record):
+        if connection_record is not None:
+            connection_record.info['idle_since'] = time.monotonic()
+
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        idle_since = connection_record.info.get('idle_since')
+        if idle_since is not None and time.monotonic() - idle_since < idle_seconds:
+            return
+        pool = engine.pool
+        counting = isinstance(pool, InstrumentedQueuePool)
+        if counting:
+            pool.count('pings')
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception:
+            if counting:
+                pool.count('ping_failures')
+            # The pool discards this connection and retries with a fresh one
+            raise exc.DisconnectionError()
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+
+def warm_pool(engine, count=None):
+    """Open `count` connections (default: pool size) so first requests don't connect."""
+    count = engine.pool.size() if count is None else count
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(engine.connect())
+    finally:
+        for conn in connections:
+            conn.close()
+    return len(connections)
+
+
+def sqlite_pragmas_from_env(environ=None):
+    environ = os.environ if environ is None else environ
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "foreign_keys": "ON",
+        "temp_store": "MEMORY",
+        "mmap_size": _env_int(environ, "DB_SQLITE_MMAP_MB", default=256) * 1024 * 1024,
+        "cache_size": -1024 * _env_int(environ, "DB_SQLITE_CACHE_MB", default=64),  # negative: KiB
+        "busy_timeout": _env_int(environ, "DB_SQLITE_BUSY_TIMEOUT_MS", default=5000),
+    }
+
+
+def configure_sqlite(engine, pragmas=None):
+    """Apply `pragmas` to every new connection of a SQLite engine."""
+    pragmas = sqlite_pragmas_from_env() if pragmas is None else pragmas
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+
+def create_sqlite_schema(engine, path=SQLITE_SCHEMA):
+    """Create the tables in an empty SQLite database; returns True if it did."""
+    with engine.connect() as conn:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users'").first()
+    if exists:
+        return False
+    with open(path, encoding='utf-8') as f:
+        script = f.read()
+    raw = engine.raw_connection()
+    try:
+        raw.driver_connection.executescript(script)  # the triggers hold ';' of their own
+    finally:
+        raw.close()
+    return True
+
+
+def make_engine_from_env(url=None, **overrides):
+    settings = pool_settings_from_env()
+    settings.update(overrides)
+    ping_after_idle = settings.pop("ping_after_idle")
+    warmup = settings.pop("warmup")
+
+    from_env = url is None
+    url = url or database_url_from_env()
+    sqlite = url.startswith("sqlite")
+    if sqlite:
+        # Return DATE and TIMESTAMP columns as date/datetime, as pymysql does
+        settings["connect_args"] = {"detect_types": sqlite3.PARSE_DECLTYPES, "check_same_thread": False}
+    engine = create_engine(url, poolclass=InstrumentedQueuePool, future=True, **settings)
+    if sqlite:
+        configure_sqlite(engine)
+        if from_env:
+            create_sqlite_schema(engine)
+    install_idle_ping(engine, ping_after_idle)
+    if warmup:
+        try:
+            warm_pool(engine, min(warmup, settings["pool_size"]))
+        except exc.SQLAlchemyError:
+            logger.warning("Connection pool warm-up failed", exc_info=True)
+    return engine
+
+
+def make_read_engine_from_env(**overrides):
+    """Engine for the read replica, or None when DB_READ_HOST is unset."""
+    host = os.getenv("DB_READ_HOST")
+    if not host:
+        return None
+    url = database_url_from_env(host=host, port=os.getenv("DB_READ_PORT"))
+    return make_engine_from_env(url, **overrides)
+
+
+def make_async_engine_from_env(url=None, **overrides):
+    """Asyncio engine on aiomysql (aiosqlite for DB_BACKEND=sqlite); needs requirements-async.txt."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    environ = os.environ
+    settings = {
+        "pool_size": _env_int(environ, "DB_ASYNC_POOL_SIZE", default=20),
+        "max_overflow": _env_int(environ, "DB_ASYNC_MAX_OVERFLOW", default=10),
+        "pool_recycle": _env_int(environ, "DB_POOL_RECYCLE", default=1800),
+        "pool_timeout": _env_int(environ, "DB_POOL_TIMEOUT", default=10),
+        "ping_after_idle": _env_int(environ, "DB_POOL_PING_AFTER_IDLE", default=30),
+    }
+    settings.update(overrides)
+    ping_after_idle = settings.pop("ping_after_idle")
+    url = url or database_url_from_env()
+    url = url.replace("mysql+pymysql://", "mysql+aiomysql://", 1).replace("sqlite://", "sqlite+aiosqlite://", 1)
+    engine = create_async_engine(url, **settings)
+    if url.startswith("sqlite"):
+        configure_sqlite(engine.sync_engine)
+    install_idle_ping(engine.sync_engine, ping_after_idle)
+    return engine
+
+
+def make_async_read_engine_from_env(**overrides):
+    """Asyncio engine for the read replica, or None when DB_READ_HOST is unset."""
+    host = os.getenv("DB_READ_HOST")
+    if not host:
+        return None
+    url = database_url_from_env(host=host, port=os.getenv("DB_READ_PORT"))
+    return make_async_engine_from_env(url, **overrides)
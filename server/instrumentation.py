@@ -0,0 +1,262 @@
+"""
+Per-request SQL instrumentation.
+
+Hooks the before/after_cursor_execute events of the app's ENGINE and, when
+reads are routed to a replica, its READ_ENGINE, plus Flask's request hooks,
+to count the statements each request runs and how long they take (the
+async routes in server/asgi.py add their engines with instrument_engine()
+and keep their RequestStats in request_stats_var instead of `g`). Every
+response gets a Server-Timing header (db time, query count, total time),
+identical statements repeated within one request are flagged as N+1
+suspects, and per-endpoint aggregates are kept for the process so
+regressions show up in production without attaching a profiler.
+
+The aggregates include statement text, so /debug/sql-stats is only
+registered when PROFILER_TOKEN is configured, and takes the same
+X-Profile-Token and X-Profile-Admin headers as /debug/profile.
+
+    SQLInstrumentation().init_app(app)
+    GET /debug/sql-stats   -> per-endpoint aggregates as JSON
+"""
+
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_request_context, jsonify, request
+from sqlalchemy import event
+
+from .profiling import debug_authorized
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Per-request stats for requests outside Flask (the ASGI routes)
+request_stats_var = contextvars.ContextVar('sql_request_stats', default=None)
+
+
+def normalize_statement(statement):
+    """Collapse whitespace so the same query text always compares equal."""
+    return _WHITESPACE_RE.sub(' ', statement).strip()
+
+
+class RequestStats:
+    """Queries run while handling a single request."""
+
+    __slots__ = ('endpoint', 'started', 'count', 'replica_count', 'db_seconds', 'slowest', 'slowest_seconds',
+                 'statements')
+
+    def __init__(self, endpoint=None):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.count = 0
+        self.replica_count = 0
+        self.db_seconds = 0.0
+        self.slowest = None
+        self.slowest_seconds = 0.0
+        self.statements = Counter()
+
+    def record(self, statement, seconds, executemany=False, replica=False):
+        self.count += 1
+        self.replica_count += replica
+        self.db_seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest, self.slowest_seconds = statement, seconds
+        # One executemany is a single batched round trip, not an N+1
+        if not executemany:
+            self.statements[statement] += 1
+
+    def repeated(self, threshold):
+        """Statements run at least `threshold` times, most repeated first."""
+        return [(stmt, n) for stmt, n in self.statements.most_common() if n >= threshold]
+
+
+class SQLInstrumentation:
+    """Collects query counts and DB time per request and per endpoint."""
+
+    def __init__(self, engine=None, read_engine=None, n_plus_one_threshold=5, slow_query_ms=200,
+                 header=True, token=None):
+        self.engine = engine
+        self.read_engine = read_engine
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.slow_query_ms = slow_query_ms
+        self.header = header
+        self.token = token
+        self._extra_engines = []  # (engine, replica?) added with instrument_engine()
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Attach to a Flask app and its ENGINE and READ_ENGINE unless given."""
+        if self.engine is None:
+            self.engine = app.config["ENGINE"]
+        if self.read_engine is None:
+            self.read_engine = app.config.get("READ_ENGINE")
+        self.n_plus_one_threshold = app.config.get("SQL_N_PLUS_ONE_THRESHOLD", self.n_plus_one_threshold)
+        self.slow_query_ms = app.config.get("SQL_SLOW_QUERY_MS", self.slow_query_ms)
+        self.token = self.token or app.config.get("PROFILER_TOKEN") or os.getenv("PROFILER_TOKEN")
+
+        for engine in self.engines:
+            self._listen(engine)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        if self.token:
+            app.add_url_rule('/debug/sql-stats', 'sql_stats', self._stats_view, methods=['GET'])
+        app.extensions['sql_instrumentation'] = self
+        return self
+
+    @property
+    def engines(self):
+        """The primary, then the replica when there is a distinct one."""
+        if self.read_engine is None or self.read_engine is self.engine:
+            return [self.engine]
+        return [self.engine, self.read_engine]
+
+    def instrument_engine(self, engine, replica=False):
+        """Also count statements run on `engine` (e.g. an async engine's sync_engine)."""
+        self._extra_engines.append((engine, replica))
+        self._listen(engine)
+
+    def _listen(self, engine):
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def _is_replica(self, engine):
+        if len(self.engines) > 1 and engine is self.read_engine:
+            return True
+        return any(extra is engine and replica for extra, replica in self._extra_engines)
+
+    def remove(self):
+        """Detach the engine listeners (request hooks stay with the app)."""
+        for engine in self.engines + [extra for extra, _ in self._extra_engines]:
+            event.remove(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.remove(engine, 'after_cursor_execute', self._after_cursor_execute)
+        self._extra_engines = []
+
+    # ---------- engine events ----------
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Kept on the statement's context, not the connection: after_cursor_execute
+        # doesn't fire for a statement that raises, and nothing must outlive it
+        if context is not None:
+            context.query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, 'query_started', None)
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+        # Background threads (e.g. the recommendation materializer) have no request
+        stats = g.get('sql_stats') if has_request_context() else request_stats_var.get()
+        if stats is None:
+            return
+        statement = normalize_statement(statement)
+        stats.record(statement, seconds, executemany, self._is_replica(conn.engine))
+        if seconds * 1000 >= self.slow_query_ms:
+            endpoint = request.endpoint if has_request_context() else stats.endpoint
+            logger.warning('Slow query (%.1f ms) on %s: %s', seconds * 1000, endpoint, statement)
+
+    # ---------- request hooks ----------
+
+    def _before_request(self):
+        g.sql_stats = RequestStats()
+
+    def _after_request(self, response):
+        stats = g.pop('sql_stats', None)
+        if stats is None:
+            return response
+        timing = self.finish(stats, request.endpoint or request.path)
+        if timing is not None:
+            response.headers.add('Server-Timing', timing)
+        return response
+
+    def finish(self, stats, endpoint):
+        """Flag N+1 suspects and aggregate one request's stats; returns the
+        Server-Timing value to send, or None when the header is off."""
+        total_seconds = time.perf_counter() - stats.started
+        suspects = stats.repeated(self.n_plus_one_threshold)
+        for statement, count in suspects:
+            logger.warning('Possible N+1 on %s: %d x %s', endpoint, count, statement)
+        self._aggregate(endpoint, stats, total_seconds, suspects)
+        return self.server_timing(stats, total_seconds) if self.header else None
+
+    @staticmethod
+    def server_timing(stats, total_seconds):
+        """Server-Timing header value for one request."""
+        return (f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.count} queries", '
+                f'app;dur={total_seconds * 1000:.2f}')
+
+    # ---------- aggregates ----------
+
+    def _aggregate(self, endpoint, stats, total_seconds, suspects):
+        with self._lock:
+            agg = self._endpoints.get(endpoint)
+            if agg is None:
+                agg = self._endpoints[endpoint] = {
+                    'requests': 0,
+                    'queries': 0,
+                    'replica_queries': 0,
+                    'max_queries': 0,
+                    'db_seconds': 0.0,
+                    'total_seconds': 0.0,
+                    'n_plus_one_requests': 0,
+                    'slowest_ms': 0.0,
+                    'slowest_statement': None,
+                    'suspects': Counter(),
+                }
+            agg['requests'] += 1
+            agg['queries'] += stats.count
+            agg['replica_queries'] += stats.replica_count
+            agg['max_queries'] = max(agg['max_queries'], stats.count)
+            agg['db_seconds'] += stats.db_seconds
+            agg['total_seconds'] += total_seconds
+            if suspects:
+                agg['n_plus_one_requests'] += 1
+                for statement, count in suspects:
+                    agg['suspects'][statement] = max(agg['suspects'][statement], count)
+            if stats.slowest_seconds * 1000 > agg['slowest_ms']:
+                agg['slowest_ms'] = stats.slowest_seconds * 1000
+                agg['slowest_statement'] = stats.slowest
+
+    def aggregates(self):
+        """Per-endpoint totals and averages, busiest endpoints first."""
+        with self._lock:
+            snapshot = {name: dict(agg, suspects=dict(agg['suspects'])) for name, agg in self._endpoints.items()}
+        result = {}
+        for name, agg in sorted(snapshot.items(), key=lambda item: -item[1]['db_seconds']):
+            requests = agg['requests']
+            result[name] = {
+                'requests': requests,
+                'queries': agg['queries'],
+                'replica_queries': agg['replica_queries'],
+                'avg_queries': round(agg['queries'] / requests, 2),
+                'max_queries': agg['max_queries'],
+                'avg_db_ms': round(agg['db_seconds'] * 1000 / requests, 2),
+                'avg_total_ms': round(agg['total_seconds'] * 1000 / requests, 2),
+                'n_plus_one_requests': agg['n_plus_one_requests'],
+                'n_plus_one_suspects': agg['suspects'],
+                'slowest_ms': round(agg['slowest_ms'], 2),
+                'slowest_statement': agg['slowest_statement'],
+            }
+        return result
+
+    def dump(self, path):
+        """Write the aggregates to `path` as JSON."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.aggregates(), f, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def _stats_view(self):
+        if not debug_authorized(self.engine, self.token, request.headers.get('X-Profile-Token'),
+                                request.headers.get('X-Profile-Admin')):
+            return jsonify({'error': 'Forbidden'}), 403
+        return jsonify(self.aggregates()), 200
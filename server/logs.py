@@ -0,0 +1,273 @@
+"""
+Structured, non-blocking logging.
+
+Request threads never write to stdout or a file. Records go through a
+bounded in-memory queue (QueueHandler) to a listener thread that formats
+and writes them; when the queue is full, records are dropped and counted
+rather than making the request wait. Formatting, including tracebacks,
+happens on the listener thread.
+
+Every request gets a correlation id - the incoming X-Request-ID when it
+looks sane, a fresh one otherwise. It is stamped on every record logged
+while the request is handled and echoed in the X-Request-ID response
+header. One access record per request goes to the `server.access` logger;
+LOG_SAMPLE keeps only a fraction of them for high-volume routes, while
+server errors and requests slower than LOG_SLOW_MS are always kept.
+
+Output is one JSON object per line (LOG_FORMAT=text for humans), with any
+`extra={...}` fields as keys:
+
+    {"ts": "...", "level": "INFO", "logger": "server.services.authService",
+     "msg": "Login succeeded", "request_id": "9f2c...", "user_id": 12}
+
+Settings (app config or environment):
+    LOG_LEVEL        root level (default INFO)
+    LOG_FORMAT       json | text (default json)
+    LOG_FILE         append here instead of stdout
+    LOG_QUEUE_SIZE   records buffered before dropping (default 10000)
+    LOG_SAMPLE       access-log sample rates by route, e.g.
+                     "/api/notifications=0.01,/api/notifications/count=0.01"
+                     (default: those two polling routes at 1%)
+    LOG_SLOW_MS      access records slower than this are always kept (default 1000)
+
+    StructuredLogging().init_app(app)
+"""
+
+import atexit
+import contextvars
+import datetime
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+
+from flask import g, request
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+    import json
+
+DEFAULT_SAMPLE = '/api/notifications=0.01,/api/notifications/count=0.01'
+REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# Attributes every LogRecord has; anything else was passed via extra=
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'request_id'}
+
+request_id_var = contextvars.ContextVar('request_id', default=None)
+access_logger = logging.getLogger('server.access')
+
+
+def current_request_id():
+    return request_id_var.get()
+
+
+def new_request_id(incoming=None):
+    """The incoming X-Request-ID when it looks sane, a fresh id otherwise."""
+    return incoming if incoming and REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+
+
+def _dumps(document):
+    if orjson is not None:
+        return orjson.dumps(document, default=str).decode()
+    return json.dumps(document, default=str)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record):
+        document = {
+            'ts': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(
+                timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            document['request_id'] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                document[key] = value
+        if record.exc_info:
+            document['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            document['exc'] = record.exc_text
+        return _dumps(document)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps the current request id on records, in the thread that logs them."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.addFilter(RequestIdFilter())
+
+    def prepare(self, record):
+        # Only freeze the message; tracebacks are formatted by the listener
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StructuredLogging:
+    """Installs the queue handler on the root logger and per-request ids on an app."""
+
+    # One queue and listener per process, shared by every app in it
+    _installed = None
+    _install_lock = threading.Lock()
+
+    def __init__(self, level=None, fmt=None, sample=None, slow_ms=None, queue_size=None, stream=None):
+        self.level = level
+        self.fmt = fmt
+        self.sample = sample
+        self.slow_ms = slow_ms
+        self.queue_size = queue_size
+        self.stream = stream
+        self.handler = None
+        self.listener = None
+        self.output = None
+        self._root_level = None
+
+    def init_app(self, app):
+        setting = lambda name, default: app.config.get(name) or os.getenv(name) or default
+        self.level = self.level or setting("LOG_LEVEL", "INFO")
+        self.fmt = self.fmt or setting("LOG_FORMAT", "json")
+        self.slow_ms = float(self.slow_ms or setting("LOG_SLOW_MS", 1000))
+        self.queue_size = int(self.queue_size or setting("LOG_QUEUE_SIZE", 10000))
+        self.sample = parse_sample(self.sample if self.sample is not None else setting("LOG_SAMPLE", DEFAULT_SAMPLE))
+        log_file = setting("LOG_FILE", None)
+
+        self.install(log_file)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.extensions['structured_logging'] = self
+        return self
+
+    # ---------- process-wide handler ----------
+
+    def install(self, log_file=None):
+        """Attach the queue handler to the root logger once per process."""
+        cls = StructuredLogging
+        with cls._install_lock:
+            if cls._installed is not None:
+                installed = cls._installed
+                self.handler, self.listener, self.output = installed.handler, installed.listener, installed.output
+                return
+            if self.stream is not None:
+                output = logging.StreamHandler(self.stream)
+            elif log_file:
+                output = logging.FileHandler(log_file)
+            else:
+                output = logging.StreamHandler(sys.stdout)
+            output.setFormatter(JSONFormatter() if self.fmt == 'json' else logging.Formatter(
+                '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'))
+            self.output = output
+            self.handler = DroppingQueueHandler(queue.Queue(self.queue_size))
+            self._start_listener()
+            root = logging.getLogger()
+            root.addHandler(self.handler)
+            self._root_level = root.level
+            root.setLevel(self.level)
+            cls._installed = self
+        atexit.register(self.stop)
+
+    def _start_listener(self):
+        self.listener = logging.handlers.QueueListener(self.handler.queue, self.output, respect_handler_level=True)
+        self.listener.start()
+
+    def after_fork(self):
+        """The listener thread doesn't survive fork; give the child its own."""
+        if self.handler is None:
+            return
+        self.handler.queue = queue.Queue(self.queue_size)
+        self._start_listener()
+
+    def stop(self):
+        """Flush queued records and stop the listener."""
+        listener, self.listener = self.listener, None
+        if listener is not None and listener._thread is not None:
+            listener.stop()
+        if StructuredLogging._installed is self:
+            root = logging.getLogger()
+            root.removeHandler(self.handler)
+            root.setLevel(self._root_level)
+            StructuredLogging._installed = None
+
+    @property
+    def dropped(self):
+        return self.handler.dropped if self.handler else 0
+
+    # ---------- request hooks ----------
+
+    def _before_request(self):
+        request_id = new_request_id(request.headers.get('X-Request-ID'))
+        g.request_id = request_id
+        g.log_token = request_id_var.set(request_id)
+        g.log_started = time.perf_counter()
+
+    def _after_request(self, response):
+        request_id = g.get('request_id')
+        if request_id is None:
+            return response
+        response.headers['X-Request-ID'] = request_id
+        duration_ms = (time.perf_counter() - g.log_started) * 1000
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        self.log_access(request.method, route, response.status_code, duration_ms)
+        return response
+
+    def log_access(self, method, route, status, duration_ms):
+        """Write the access record for one request, subject to sampling."""
+        rate = self.sample.get(route, 1.0)
+        keep = rate >= 1.0 or status >= 500 or duration_ms >= self.slow_ms or random.random() < rate
+        if keep and access_logger.isEnabledFor(logging.INFO):
+            access_logger.info('%s %s %s', method, route, status, extra={
+                'method': method, 'route': route, 'status': status,
+                'duration_ms': round(duration_ms, 2), 'sample_rate': rate,
+            })
+
+    def _teardown_request(self, exc):
+        token = g.pop('log_token', None)
+        if token is not None:
+            request_id_var.reset(token)
+
+
+def parse_sample(setting):
+    """{route: rate} from "route=rate,route=rate"."""
+    rates = {}
+    for part in (setting or '').split(','):
+        route, _, rate = part.strip().rpartition('=')
+        if route:
+            rates[route] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+def _after_fork_in_child():
+    if StructuredLogging._installed is not None:
+        StructuredLogging._installed.after_fork()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,464 @@
+"""
+Prometheus text-format metrics.
+
+Counters and histograms are lock-striped: each thread is pinned to one of a
+few stripes, so request threads rarely contend on the same lock, and the
+stripes are only merged when /metrics is scraped. Histograms use fixed
+bucket bounds.
+
+With several worker processes each one writes a snapshot file to
+METRICS_DIR (periodically, and on every scrape it serves), and /metrics
+merges the files of all workers: counters and histograms are summed,
+gauges are reported per pid. When a worker exits the server calls
+mark_process_dead(): its counters are folded into metrics-exited.json so
+totals never go backwards, and its gauges are dropped.
+
+Pool metrics carry an engine="primary" or engine="replica" label, so a
+READ_ENGINE is watched alongside ENGINE.
+
+Route names and pool state aren't public, so /metrics is only registered
+when METRICS_TOKEN is configured, and scrapes must send it as a bearer
+token (Prometheus: `authorization: {credentials: ...}`). Without it the
+metrics are still collected and can be rendered from the registry.
+
+    Metrics().init_app(app)
+    GET /metrics   Authorization: Bearer $METRICS_TOKEN
+"""
+
+import atexit
+import bisect
+import glob
+import hmac
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+
+from flask import Response, g, request
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Striped:
+    """Per-thread stripe selection shared by counters and histograms."""
+
+    def __init__(self, stripes):
+        self._stripes = [(threading.Lock(), {}) for _ in range(stripes)]
+        self._next = itertools.count()
+        self._local = threading.local()
+
+    def reset(self):
+        """Drop all values (e.g. in a freshly forked worker)."""
+        self._stripes = [(threading.Lock(), {}) for _ in self._stripes]
+        self._local = threading.local()
+
+    def _stripe(self):
+        index = getattr(self._local, 'index', None)
+        if index is None:
+            index = self._local.index = next(self._next) % len(self._stripes)
+        return self._stripes[index]
+
+
+class Counter(_Striped):
+    """Monotonic counter keyed by a tuple of label values."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=(), stripes=8):
+        super().__init__(stripes)
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def inc(self, labels=(), amount=1):
+        lock, values = self._stripe()
+        with lock:
+            values[labels] = values.get(labels, 0) + amount
+
+    def collect(self):
+        """{labels: total} across all stripes."""
+        merged = {}
+        for lock, values in self._stripes:
+            with lock:
+                for labels, value in values.items():
+                    merged[labels] = merged.get(labels, 0) + value
+        return merged
+
+
+class Histogram(_Striped):
+    """Fixed-bucket histogram keyed by a tuple of label values."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, stripes=8):
+        super().__init__(stripes)
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        lock, values = self._stripe()
+        with lock:
+            entry = values.get(labels)
+            if entry is None:
+                # Per-bucket (not cumulative) counts, the last slot is +Inf
+                entry = values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def collect(self):
+        """{labels: [bucket_counts, sum, count]} across all stripes."""
+        merged = {}
+        for lock, values in self._stripes:
+            with lock:
+                for labels, (counts, total, count) in values.items():
+                    entry = merged.setdefault(labels, [[0] * len(counts), 0.0, 0])
+                    entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                    entry[1] += total
+                    entry[2] += count
+        return merged
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return repr(value)
+    return str(value)
+
+
+class MetricsRegistry:
+    """Named metrics plus scrape-time gauge collectors."""
+
+    def __init__(self, multiprocess_dir=None, stripes=8, flush_interval=5.0, pid=None):
+        self.multiprocess_dir = multiprocess_dir
+        self.stripes = stripes
+        self.flush_interval = flush_interval
+        self.pid = pid or os.getpid()
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames, self.stripes))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets, self.stripes))
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector):
+        """Register fn() -> [(name, documentation, kind, {labels_dict_items: value})].
+
+        Collectors are read whenever a snapshot is taken. `kind` is 'counter'
+        for values that only grow (summed across workers) or 'gauge' for
+        current state (labelled with the pid when there are several workers).
+        """
+        self._collectors.append(collector)
+
+    # ---------- snapshots ----------
+
+    def snapshot(self):
+        """This process's metrics, collectors included, as JSON-able data."""
+        data = {}
+        for name, metric in list(self._metrics.items()):
+            data[name] = {
+                'type': metric.kind,
+                'help': metric.documentation,
+                'labelnames': list(metric.labelnames),
+                'buckets': list(getattr(metric, 'buckets', ())),
+                'samples': [[list(labels), value] for labels, value in metric.collect().items()],
+            }
+        for collector in self._collectors:
+            for name, documentation, kind, samples in collector():
+                pid = [str(self.pid)] if kind == 'gauge' and self.multiprocess_dir else []
+                for labels, value in samples.items():
+                    entry = data.setdefault(name, {
+                        'type': kind,
+                        'help': documentation,
+                        'labelnames': [k for k, _ in labels] + (['pid'] if pid else []),
+                        'buckets': [],
+                        'samples': [],
+                    })
+                    entry['samples'].append([[v for _, v in labels] + pid, value])
+        return data
+
+    def write_snapshot(self):
+        """Atomically write this process's snapshot to the shared directory."""
+        if not self.multiprocess_dir:
+            return
+        os.makedirs(self.multiprocess_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.multiprocess_dir, prefix='.metrics-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, os.path.join(self.multiprocess_dir, f'metrics-{self.pid}.json'))
+
+    def start_flusher(self):
+        """Periodically write snapshots so other workers can serve them."""
+        if not self.multiprocess_dir or self._flusher is not None:
+            return
+        self._start_flusher_thread()
+        atexit.register(self.write_snapshot)
+
+    def _start_flusher_thread(self):
+        def run():
+            while True:
+                time.sleep(self.flush_interval)
+                self.write_snapshot()
+
+        self._flusher = threading.Thread(target=run, name='metrics-flusher', daemon=True)
+        self._flusher.start()
+
+    def reset(self):
+        """Zero every counter and histogram."""
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+    def after_fork(self):
+        """Start over as a new process: own pid, empty values, own flusher thread."""
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self.reset()
+        if self._flusher is not None:
+            # Threads don't survive fork; the inherited atexit hook stays registered
+            self._start_flusher_thread()
+
+    def merged(self):
+        """Counters and histograms summed over every process's snapshot."""
+        if not self.multiprocess_dir:
+            return self.snapshot()
+        self.write_snapshot()
+        return _merge(_read_snapshot(path) for path in
+                      sorted(glob.glob(os.path.join(self.multiprocess_dir, 'metrics-*.json'))))
+
+    def mark_process_dead(self, pid):
+        """Fold an exited worker's counters into metrics-exited.json and drop its file.
+
+        Called from the server's master process, one worker at a time.
+        """
+        if not self.multiprocess_dir:
+            return
+        path = os.path.join(self.multiprocess_dir, f'metrics-{pid}.json')
+        dead = _read_snapshot(path)
+        if dead is None:
+            return
+        exited_path = os.path.join(self.multiprocess_dir, 'metrics-exited.json')
+        totals = _merge([_read_snapshot(exited_path) or {},
+                         {name: metric for name, metric in dead.items() if metric['type'] != 'gauge'}])
+        fd, tmp = tempfile.mkstemp(dir=self.multiprocess_dir, prefix='.metrics-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({name: dict(metric, samples=[[list(labels), value] for labels, value in metric['samples']])
+                       for name, metric in totals.items()}, f)
+        os.replace(tmp, exited_path)
+        os.remove(path)
+
+    # ---------- exposition ----------
+
+    def render(self):
+        """Text exposition format 0.0.4."""
+        lines = []
+        for name, metric in sorted(self.merged().items()):
+            names = metric['labelnames']
+            lines.append(f'# HELP {name} {metric["help"]}')
+            lines.append(f'# TYPE {name} {metric["type"]}')
+            for labels, value in sorted(metric['samples'], key=lambda s: [str(v) for v in s[0]]):
+                if metric['type'] == 'histogram':
+                    counts, total, count = value
+                    cumulative = 0
+                    for bound, bucket in zip(list(metric['buckets']) + ['+Inf'], counts):
+                        cumulative += bucket
+                        lines.append(f'{name}_bucket{_labels(names, labels, [("le", bound)])} {cumulative}')
+                    lines.append(f'{name}_sum{_labels(names, labels)} {_format_value(total)}')
+                    lines.append(f'{name}_count{_labels(names, labels)} {count}')
+                else:
+                    lines.append(f'{name}{_labels(names, labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(snapshots):
+    """Sum samples with the same name and labels across snapshots."""
+    merged = {}
+    for snapshot in snapshots:
+        for name, metric in (snapshot or {}).items():
+            target = merged.setdefault(name, dict(metric, samples={}))
+            for labels, value in metric['samples']:
+                key = tuple(labels)
+                current = target['samples'].get(key)
+                if current is None:
+                    target['samples'][key] = value
+                elif metric['type'] == 'histogram':
+                    target['samples'][key] = [
+                        [a + b for a, b in zip(current[0], value[0])],
+                        current[1] + value[1],
+                        current[2] + value[2],
+                    ]
+                else:
+                    target['samples'][key] = current + value
+    for metric in merged.values():
+        metric['samples'] = list(metric['samples'].items())
+    return merged
+
+
+class Metrics:
+    """Flask integration: request metrics, DB pool metrics and /metrics."""
+
+    def __init__(self, registry=None, token=None):
+        self.registry = registry
+        self.token = token
+        self._engines = {}  # label -> engine
+
+    def init_app(self, app):
+        if self.registry is None:
+            self.registry = MetricsRegistry(multiprocess_dir=app.config.get("METRICS_DIR") or os.getenv("METRICS_DIR"))
+        self.token = self.token or app.config.get("METRICS_TOKEN") or os.getenv("METRICS_TOKEN")
+        registry = self.registry
+        self.requests = registry.counter(
+            'http_requests_total', 'HTTP requests by route and status.',
+            ('blueprint', 'route', 'method', 'status'))
+        self.latency = registry.histogram(
+            'http_request_duration_seconds', 'HTTP request latency by route.',
+            ('blueprint', 'route', 'method'))
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        if self.token:
+            app.add_url_rule('/metrics', 'metrics', self._metrics_view, methods=['GET'])
+        app.extensions['metrics'] = self
+
+        engine, read_engine = app.config.get("ENGINE"), app.config.get("READ_ENGINE")
+        if engine is not None:
+            self.instrument_engine(engine)
+        if read_engine is not None and read_engine is not engine:
+            self.instrument_engine(read_engine, 'replica')
+        registry.add_collector(self._pool_gauges)
+        registry.add_collector(lambda: self._cache_gauges(app))
+        registry.start_flusher()
+        return self
+
+    # ---------- requests ----------
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+
+    def _after_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        self.observe_request(request.blueprint or '', route, request.method, response.status_code,
+                             time.perf_counter() - started)
+        return response
+
+    def observe_request(self, blueprint, route, method, status, seconds):
+        """Count one request; also called by the async routes in server/asgi.py."""
+        self.latency.observe((blueprint, route, method), seconds)
+        self.requests.inc((blueprint, route, method, str(status)))
+
+    def _metrics_view(self):
+        scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not hmac.compare_digest(credentials.encode(), self.token.encode()):
+            return Response('Forbidden\n', 403, mimetype='text/plain')
+        return Response(self.registry.render(), mimetype='text/plain; version=0.0.4')
+
+    # ---------- database pool ----------
+
+    def instrument_engine(self, engine, label='primary'):
+        """Count pool checkouts and new connections, and expose pool gauges, for `engine`."""
+        checkouts = self.registry.counter(
+            'db_pool_checkouts_total', 'Connections checked out of the pool.', ('engine', 'overflow'))
+        connects = self.registry.counter(
+            'db_pool_connects_total', 'New DBAPI connections opened.', ('engine',))
+        self._engines[label] = engine
+
+        # Listen on the engine so the hooks survive engine.dispose() recreating the pool
+        @event.listens_for(engine, 'checkout')
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            pool = engine.pool
+            overflow = isinstance(pool, QueuePool) and pool.checkedout() > pool.size()
+            checkouts.inc((label, 'true' if overflow else 'false'))
+
+        @event.listens_for(engine, 'connect')
+        def on_connect(dbapi_connection, connection_record):
+            connects.inc((label,))
+
+    def _pool_gauges(self):
+        """Pool state (gauges) and pool stats (counters), labelled per engine."""
+        metrics = {}
+
+        def add(name, documentation, kind, label, value):
+            metrics.setdefault(name, (documentation, kind, {}))[2][(('engine', label),)] = value
+
+        for label, engine in self._engines.items():
+            pool = engine.pool
+            if not isinstance(pool, QueuePool):
+                continue
+            add('db_pool_size', 'Configured pool size.', 'gauge', label, pool.size())
+            add('db_pool_checked_out', 'Connections currently in use.', 'gauge', label, pool.checkedout())
+            add('db_pool_checked_in', 'Idle connections in the pool.', 'gauge', label, pool.checkedin())
+            add('db_pool_overflow', 'Connections open beyond pool size.', 'gauge', label, max(pool.overflow(), 0))
+            stats = getattr(pool, 'stats', None)
+            if stats is not None:
+                stats = stats()
+                add('db_pool_waits_total', 'Checkouts that waited on an exhausted pool.', 'counter',
+                    label, stats['waits'])
+                add('db_pool_wait_seconds_total', 'Time spent waiting on an exhausted pool.', 'counter',
+                    label, stats['wait_seconds'])
+                add('db_pool_timeouts_total', 'Checkouts that timed out.', 'counter', label, stats['timeouts'])
+                add('db_pool_pings_total', 'Idle connections pinged on checkout.', 'counter', label, stats['pings'])
+                add('db_pool_ping_failures_total', 'Pings that found a dead connection.', 'counter',
+                    label, stats['ping_failures'])
+        return [(name, documentation, kind, samples) for name, (documentation, kind, samples) in metrics.items()]
+
+    # ---------- caches ----------
+
+    @staticmethod
+    def _cache_gauges(app):
+        """Hits, misses and hit ratios of in-process caches that expose cache_stats()."""
+        hits, misses, ratios = {}, {}, {}
+        for name, extension in app.extensions.items():
+            cache_stats = getattr(extension, 'cache_stats', None)
+            if cache_stats is None:
+                continue
+            stats = cache_stats()
+            key = (('cache', name),)
+            hits[key], misses[key] = stats['hits'], stats['misses']
+            total = stats['hits'] + stats['misses']
+            ratios[key] = round(stats['hits'] / total, 4) if total else 0.0
+        if not hits:
+            return []
+        return [
+            ('cache_hits_total', 'Cache hits.', 'counter', hits),
+            ('cache_misses_total', 'Cache misses.', 'counter', misses),
+            ('cache_hit_ratio', 'Cache hits over lookups since process start.', 'gauge', ratios),
+        ]
@@ -0,0 +1,229 @@
+"""
+Versioned schema migrations for a live database.
+
+Migrations are SQL files in server/migrations named NNN_description.sql and
+applied in version order. Applied versions are recorded in schema_migrations
+with a checksum of the file, so editing an applied migration is reported.
+Files without a numeric prefix (e.g. add_role_column.sql) are not managed.
+
+DDL is expected to be online-safe (ALGORITHM=INPLACE, LOCK=NONE) and
+idempotent: statements that fail only because the object already exists
+are treated as applied, so a fresh database created from db/db.sql can be
+brought under the runner without special casing.
+
+Run from the repository root:
+    python -m server.migrate status
+    python -m server.migrate up [--target N]
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'migrations')
+FILENAME_RE = re.compile(r'^(\d+)_(\w+)\.sql$')
+
+# MySQL errors meaning the statement's effect is already in place:
+# table exists, duplicate column, duplicate key name, can't drop missing key/column
+ALREADY_APPLIED_ERRORS = {1050, 1060, 1061, 1091}
+# Lock wait timeout: another session holds a metadata lock on the table
+LOCK_WAIT_ERRORS = {1205}
+
+
+class Migration:
+    """One versioned SQL migration file."""
+
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, 'r', encoding='utf-8') as f:
+            self.sql = f.read()
+        self.checksum = hashlib.sha256(self.sql.encode('utf-8')).hexdigest()
+
+    @property
+    def statements(self):
+        return split_statements(self.sql)
+
+    def __repr__(self):
+        return f'<Migration {self.version:03d} {self.name}>'
+
+
+def split_statements(sql):
+    """Split a SQL script into statements, dropping comments and COMMITs."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    statements = []
+    for stmt in '\n'.join(lines).split(';'):
+        stmt = stmt.strip()
+        if stmt and stmt.upper() != 'COMMIT':
+            statements.append(stmt)
+    return statements
+
+
+def discover(directory=MIGRATIONS_DIR):
+    """Versioned migrations in `directory`, sorted by version."""
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = FILENAME_RE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f'Duplicate migration version {version}: {filename}')
+        migrations[version] = Migration(version, match.group(2), os.path.join(directory, filename))
+    return [migrations[v] for v in sorted(migrations)]
+
+
+def _mysql_error_code(exc):
+    args = getattr(exc.orig, 'args', ())
+    return args[0] if args and isinstance(args[0], int) else None
+
+
+class MigrationRunner:
+    """Applies pending migrations and records them in schema_migrations."""
+
+    def __init__(self, engine, directory=MIGRATIONS_DIR, table='schema_migrations',
+                 lock_wait_timeout=5, retries=5, retry_delay=2.0):
+        self.engine = engine
+        self.directory = directory
+        self.table = table
+        self.lock_wait_timeout = lock_wait_timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.is_mysql = engine.dialect.name == 'mysql'
+
+    def ensure_table(self):
+        with self.engine.begin() as conn:
+            conn.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                  version     INT          NOT NULL,
+                  name        VARCHAR(200) NOT NULL,
+                  checksum    CHAR(64)     NOT NULL,
+                  applied_at  TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                  duration_ms INT          NOT NULL DEFAULT 0,
+                  PRIMARY KEY (version)
+                )
+            """))
+
+    def applied(self):
+        """{version: row} for recorded migrations."""
+        self.ensure_table()
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(
+                f"SELECT version, name, checksum, applied_at, duration_ms FROM {self.table} ORDER BY version"
+            )).mappings().all()
+        return {row['version']: dict(row) for row in rows}
+
+    def status(self):
+        """Every known migration with its applied state; flags edited files."""
+        applied = self.applied()
+        result = []
+        for migration in discover(self.directory):
+            row = applied.get(migration.version)
+            result.append({
+                'version': migration.version,
+                'name': migration.name,
+                'applied': row is not None,
+                'applied_at': row['applied_at'] if row else None,
+                'modified': row is not None and row['checksum'] != migration.checksum,
+            })
+        return result
+
+    def pending(self, target=None):
+        applied = self.applied()
+        return [m for m in discover(self.directory)
+                if m.version not in applied and (target is None or m.version <= target)]
+
+    def upgrade(self, target=None):
+        """Apply pending migrations up to `target`; returns the versions applied."""
+        done = []
+        with self.engine.connect() as lock_conn:
+            self._acquire_lock(lock_conn)
+            try:
+                # Re-read under the lock: another worker may have just migrated
+                for migration in self.pending(target):
+                    self._apply(migration)
+                    done.append(migration.version)
+            finally:
+                self._release_lock(lock_conn)
+        return done
+
+    def _apply(self, migration):
+        started = time.monotonic()
+        for stmt in migration.statements:
+            self._execute(stmt)
+        duration_ms = int((time.monotonic() - started) * 1000)
+        with self.engine.begin() as conn:
+            conn.execute(text(f"""
+                INSERT INTO {self.table} (version, name, checksum, duration_ms)
+                VALUES (:version, :name, :checksum, :duration_ms)
+            """), {
+                "version": migration.version,
+                "name": migration.name,
+                "checksum": migration.checksum,
+                "duration_ms": duration_ms,
+            })
+
+    def _execute(self, stmt):
+        for attempt in range(self.retries + 1):
+            try:
+                with self.engine.begin() as conn:
+                    if self.is_mysql:
+                        # Fail fast instead of queueing every query behind a DDL metadata lock
+                        conn.execute(text("SET SESSION lock_wait_timeout = :t"), {"t": self.lock_wait_timeout})
+                    conn.execute(text(stmt))
+                return
+            except DBAPIError as e:
+                code = _mysql_error_code(e)
+                if code in ALREADY_APPLIED_ERRORS:
+                    return
+                if code in LOCK_WAIT_ERRORS and attempt < self.retries:
+                    time.sleep(self.retry_delay)
+                    continue
+                raise
+
+    def _acquire_lock(self, conn):
+        if not self.is_mysql:
+            return
+        got = conn.execute(text("SELECT GET_LOCK(:name, :timeout)"),
+                           {"name": f"{self.table}_lock", "timeout": 60}).scalar()
+        if got != 1:
+            raise RuntimeError('Timed out waiting for another migration run to finish')
+
+    def _release_lock(self, conn):
+        if self.is_mysql:
+            conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": f"{self.table}_lock"})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply versioned schema migrations.')
+    parser.add_argument('command', choices=['status', 'up'])
+    parser.add_argument('--target', type=int, default=None, help='highest version to apply')
+    args = parser.parse_args(argv)
+
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except Exception:
+        pass
+    from .db import make_engine_from_env
+
+    runner = MigrationRunner(make_engine_from_env())
+    if args.command == 'status':
+        for row in runner.status():
+            state = 'applied' if row['applied'] else 'pending'
+            if row['modified']:
+                state += ' (file changed since applied)'
+            print(f"{row['version']:03d} {row['name']:<40} {state}")
+    else:
+        applied = runner.upgrade(args.target)
+        print(f"Applied {len(applied)} migration(s): {', '.join(map(str, applied)) or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,14 @@
+-- Migration: Add scoring_weights table
+-- Purpose: Per-organizer weights for the match scoring components
+-- Date: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS scoring_weights (
+  owner_id   BIGINT UNSIGNED NOT NULL,
+  scorer     VARCHAR(40)     NOT NULL,
+  weight     DOUBLE          NOT NULL,
+  updated_at TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (owner_id, scorer),
+  CONSTRAINT fk_scoring_weights_owner FOREIGN KEY (owner_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+COMMIT;
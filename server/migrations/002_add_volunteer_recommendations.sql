@@ -0,0 +1,17 @@
+-- Migration: Add volunteer_recommendations table
+-- Purpose: Materialized top-N event recommendations per volunteer
+-- Date: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS volunteer_recommendations (
+  volunteer_id BIGINT UNSIGNED   NOT NULL,
+  slot         SMALLINT UNSIGNED NOT NULL,
+  event_id     BIGINT UNSIGNED   NOT NULL,
+  score        DOUBLE            NOT NULL,
+  refreshed_at TIMESTAMP         NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (volunteer_id, slot),
+  KEY idx_recommendations_event (event_id),
+  CONSTRAINT fk_recommendations_volunteer FOREIGN KEY (volunteer_id) REFERENCES volunteers(id) ON DELETE CASCADE,
+  CONSTRAINT fk_recommendations_event     FOREIGN KEY (event_id)     REFERENCES events(id)     ON DELETE CASCADE
+);
+
+COMMIT;
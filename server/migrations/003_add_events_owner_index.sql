@@ -0,0 +1,7 @@
+-- Migration: Add composite index for organizer event listings
+-- Purpose: /api/manager/listevents filters by owner, date range and urgency
+-- Date: 2026-10-19
+
+ALTER TABLE events ADD INDEX idx_events_owner_date (ownerid, date, urgency), ALGORITHM=INPLACE, LOCK=NONE;
+
+COMMIT;
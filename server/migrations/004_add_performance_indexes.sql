@@ -0,0 +1,21 @@
+-- Migration: Indexes for hot lookup predicates
+-- Purpose: Stop full scans in the leaderboard, total-points, volunteer-task
+--          and attendance queries. events.ownerid is covered by
+--          idx_events_owner_date (003).
+-- Date: 2026-10-19
+-- Built online (INPLACE, no table lock) so it can run against a live database.
+
+-- Leaderboard and total points: SUM(score) WHERE volunteer_id = ? AND completed = 1
+ALTER TABLE history_tasks
+  ADD INDEX idx_history_tasks_volunteer (volunteer_id, completed, score),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- Tasks a volunteer claimed for an event
+ALTER TABLE history_tasks
+  ADD INDEX idx_history_tasks_event_volunteer (event_id, volunteer_id),
+  ALGORITHM=INPLACE, LOCK=NONE;
+
+-- History joined to events (volunteer history, attendance)
+ALTER TABLE volunteer_history
+  ADD INDEX idx_volunteer_history_event (event_id, volunteer_id),
+  ALGORITHM=INPLACE, LOCK=NONE;
@@ -0,0 +1,15 @@
+-- Migration: Add cache_versions table
+-- Purpose: Log of cache tag invalidations that every worker polls by id,
+--          so in-process caches stay consistent across workers and nodes
+-- Date: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS cache_versions (
+  id         BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+  origin     VARCHAR(64)     NOT NULL,
+  tags       TEXT            NOT NULL,
+  created_at TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id),
+  KEY idx_cache_versions_created (created_at)
+);
+
+COMMIT;
@@ -0,0 +1,13 @@
+-- Migration: Add volunteer_recommendation_state table
+-- Purpose: Record when each volunteer's recommendations were last materialized,
+--          so a volunteer with no recommendations is not recomputed on every read
+-- Date: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS volunteer_recommendation_state (
+  volunteer_id BIGINT UNSIGNED NOT NULL,
+  refreshed_at TIMESTAMP       NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (volunteer_id),
+  CONSTRAINT fk_recommendation_state_volunteer FOREIGN KEY (volunteer_id) REFERENCES volunteers(id) ON DELETE CASCADE
+);
+
+COMMIT;
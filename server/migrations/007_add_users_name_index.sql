@@ -0,0 +1,11 @@
+-- Migration: Add index on users.name
+-- Purpose: The matching-form bundle pages volunteer candidates in (name, id)
+--          order with a keyset cursor; without this index every page was a
+--          full scan of volunteers joined to users plus a filesort. InnoDB
+--          appends the primary key, so the index is ordered by (name, users.id),
+--          which is the order and cursor the bundle query uses.
+-- Date: 2026-10-19
+
+ALTER TABLE users ADD INDEX idx_users_name (name), ALGORITHM=INPLACE, LOCK=NONE;
+
+COMMIT;
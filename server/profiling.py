@@ -0,0 +1,272 @@
+"""
+On-demand statistical profiling of a running worker.
+
+Opt-in: nothing is installed unless PROFILER_TOKEN is configured, so an
+app without it pays nothing. With it, callers must send the token in
+X-Profile-Token and an admin's user id in X-Profile-Admin (checked against
+the admins table).
+
+    POST /debug/profile?seconds=10          sample every thread of this worker
+    any request + X-Profile-Token/-Admin    profile just that request
+
+A sampler thread reads sys._current_frames() PROFILER_HZ times a second
+(PROFILER_REQUEST_HZ while profiling one request) and counts identical
+stacks; the application code itself is never hooked or traced. Both modes
+return the stacks in collapsed format, one "frame;frame;frame count" line
+per stack, which flamegraph.pl, speedscope and inferno read directly
+(?format=json, or X-Profile-Format: json on a profiled request, for JSON).
+A profiled request's own response is replaced by its profile; the original
+status is in X-Profiled-Status.
+
+With several workers a profile covers the worker that served the request
+(its pid is in X-Profile-Pid). Each process runs at most one sampling
+session at a time - a second one gets 409 - and a forked worker starts
+with no session.
+
+    Profiler().init_app(app)
+"""
+
+import collections
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+
+from flask import Response, jsonify, request
+from sqlalchemy import text
+
+# Leaf functions of threads that are parked rather than running
+IDLE_FUNCTIONS = frozenset({
+    'wait', 'select', 'poll', 'accept', 'sleep', '_wait_for_tstate_lock', 'serve_forever',
+    'readinto', 'recv_into', 'handle_request',
+})
+
+# One sampling session per process, whichever app started it
+_session_lock = threading.Lock()
+
+
+def _reset_session_lock():
+    # A session running in the parent does not exist in a forked child
+    global _session_lock
+    _session_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_session_lock)
+
+
+def debug_authorized(engine, expected_token, token, admin_user_id):
+    """True when `token` is the configured debug token and `admin_user_id` is an admin.
+
+    Shared by the debug endpoints (this profiler, /debug/sql-stats).
+    """
+    if not expected_token or not token or not hmac.compare_digest(token.encode(), expected_token.encode()):
+        return False
+    try:
+        admin_user_id = int(admin_user_id)
+    except (TypeError, ValueError):
+        return False
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT 1 FROM admins WHERE user_id = :user_id"),
+                            {"user_id": admin_user_id}).first() is not None
+
+
+class Profile:
+    """Stack counts collected by one sampling session."""
+
+    def __init__(self, counts, samples, seconds, interval):
+        self.counts = counts
+        self.samples = samples
+        self.seconds = seconds
+        self.interval = interval
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed-stack format, most frequent stack first."""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.counts.most_common())
+
+    def as_dict(self):
+        return {'pid': os.getpid(), 'samples': self.samples, 'seconds': round(self.seconds, 3),
+                'interval': self.interval, 'stacks': dict(self.counts.most_common())}
+
+
+class StackSampler:
+    """Samples the Python stacks of this process's threads from a background thread."""
+
+    def __init__(self, interval=0.01, thread_ids=None, exclude=(), include_idle=False, by_thread=False):
+        self.interval = interval
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None
+        self.exclude = set(exclude)
+        self.include_idle = include_idle
+        self.by_thread = by_thread
+        self.counts = collections.Counter()
+        self.samples = 0
+        self.lock = None  # the session lock, held until stop
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return Profile(self.counts, self.samples, time.perf_counter() - self._started, self.interval)
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(skip=own)
+
+    def sample(self, skip=None):
+        names = {t.ident: t.name for t in threading.enumerate()} if self.by_thread else None
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == skip or thread_id in self.exclude:
+                continue
+            if self.thread_ids is not None and thread_id not in self.thread_ids:
+                continue
+            if not self.include_idle and frame.f_code.co_name in IDLE_FUNCTIONS:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            if names is not None:
+                stack.append(names.get(thread_id, str(thread_id)))
+            self.counts[';'.join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            name = getattr(code, 'co_qualname', code.co_name)
+            label = self._labels[code] = f'{module}:{name}:{code.co_firstlineno}'.replace(';', ',').replace(' ', '_')
+        return label
+
+
+class Profiler:
+    """Token- and admin-gated sampling profiler endpoints for a Flask app."""
+
+    def __init__(self, token=None, hz=None, request_hz=None, max_seconds=None):
+        self.token = token
+        self.hz = hz
+        self.request_hz = request_hz
+        self.max_seconds = max_seconds
+        self.engine = None
+
+    def init_app(self, app):
+        self.token = self.token or app.config.get("PROFILER_TOKEN") or os.getenv("PROFILER_TOKEN")
+        if not self.token:
+            return self
+        self.hz = float(self.hz or app.config.get("PROFILER_HZ") or os.getenv("PROFILER_HZ") or 100)
+        self.request_hz = float(self.request_hz or app.config.get("PROFILER_REQUEST_HZ")
+                                or os.getenv("PROFILER_REQUEST_HZ") or 1000)
+        self.max_seconds = float(self.max_seconds or app.config.get("PROFILER_MAX_SECONDS")
+                                 or os.getenv("PROFILER_MAX_SECONDS") or 30)
+        self.engine = app.config["ENGINE"]
+        app.wsgi_app = _ProfileRequestMiddleware(app.wsgi_app, self)
+        app.add_url_rule('/debug/profile', 'profile', self._profile_view, methods=['POST'])
+        app.extensions['profiler'] = self
+        return self
+
+    def authorized(self, token, admin_user_id):
+        return debug_authorized(self.engine, self.token, token, admin_user_id)
+
+    def session(self, interval, **options):
+        """Start a sampler unless one is already running in this process; None if busy."""
+        lock = _session_lock
+        if not lock.acquire(blocking=False):
+            return None
+        try:
+            sampler = StackSampler(interval, **options).start()
+        except BaseException:
+            lock.release()
+            raise
+        sampler.lock = lock
+        return sampler
+
+    def finish(self, sampler):
+        try:
+            return sampler.stop()
+        finally:
+            sampler.lock.release()
+
+    def _profile_view(self):
+        if not self.authorized(request.headers.get('X-Profile-Token'), request.headers.get('X-Profile-Admin')):
+            return jsonify({'error': 'Forbidden'}), 403
+        try:
+            seconds = float(request.args.get('seconds', 10))
+        except ValueError:
+            return jsonify({'error': 'seconds must be a number'}), 400
+        seconds = min(max(seconds, 0.01), self.max_seconds)
+        sampler = self.session(1.0 / self.hz, exclude={threading.get_ident()},
+                               include_idle=request.args.get('idle') == '1',
+                               by_thread=request.args.get('threads') == '1')
+        if sampler is None:
+            return jsonify({'error': 'A profile is already running in this worker'}), 409
+        try:
+            time.sleep(seconds)
+        finally:
+            profile = self.finish(sampler)
+        return render(profile, request.args.get('format'))
+
+
+def render(profile, fmt=None, status=200, headers=None):
+    headers = {'X-Profile-Pid': str(os.getpid()), 'X-Profile-Samples': str(profile.samples), **(headers or {})}
+    if fmt == 'json':
+        return Response(json.dumps(profile.as_dict()), status, headers, mimetype='application/json')
+    return Response(profile.collapsed(), status, headers, mimetype='text/plain')
+
+
+class _ProfileRequestMiddleware:
+    """Profiles a single request when it carries X-Profile-Token.
+
+    Requests without the header go straight through with one dict lookup.
+    """
+
+    def __init__(self, wsgi_app, profiler):
+        self.wsgi_app = wsgi_app
+        self.profiler = profiler
+
+    def __call__(self, environ, start_response):
+        token = environ.get('HTTP_X_PROFILE_TOKEN')
+        if token is None:
+            return self.wsgi_app(environ, start_response)
+        # The token header also authenticates /debug/profile itself
+        if environ.get('PATH_INFO') == '/debug/profile':
+            return self.wsgi_app(environ, start_response)
+
+        profiler = self.profiler
+        if not profiler.authorized(token, environ.get('HTTP_X_PROFILE_ADMIN')):
+            return Response(json.dumps({'error': 'Forbidden'}), 403, mimetype='application/json')(
+                environ, start_response)
+        sampler = profiler.session(1.0 / profiler.request_hz, thread_ids={threading.get_ident()},
+                                   include_idle=True)
+        if sampler is None:
+            return Response(json.dumps({'error': 'A profile is already running in this worker'}), 409,
+                            mimetype='application/json')(environ, start_response)
+
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured['status'] = status
+            return lambda data: None
+
+        try:
+            body = self.wsgi_app(environ, capture)
+            try:
+                for _ in body:  # run streamed responses to completion inside the profile
+                    pass
+            finally:
+                if hasattr(body, 'close'):
+                    body.close()
+        finally:
+            profile = profiler.finish(sampler)
+        response = render(profile, environ.get('HTTP_X_PROFILE_FORMAT'), headers={'X-Profiled-Status': captured.get('status', '')})
+        return response(environ, start_response)
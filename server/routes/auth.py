@@ -1,6 +1,7 @@
 # server/routes/auth.py
 from flask import Blueprint, jsonify, request
 from ..services.authService import AuthService
+from ..services.responseCache import cached
 
 bp = Blueprint("auth", __name__)  # app registers with url_prefix="/api"
 
@@ -24,6 +25,7 @@ def check_email():
     return AuthService.check_email()
 
 @bp.route("/skills", methods=["GET"])
+@cached(['skills'])
 def list_skills():
     return AuthService.list_skills()
 
@@ -0,0 +1,22 @@
+from flask import Blueprint, request
+from ..services.bundleService import BundleService
+
+bp = Blueprint('bundle', __name__)
+
+@bp.route('/event-view/<int:event_id>', methods=['GET'])
+def event_view(event_id):
+    """Event details, counts and the caller's registration for EventView"""
+    return BundleService.event_view(event_id, request.args.get('user_id'))
+
+@bp.route('/matching-form', methods=['GET'])
+def matching_form():
+    """Upcoming events and a page of candidates for VolunteerMatchingForm"""
+    user_id = request.args.get('user_id')
+    if not user_id:
+        return {'error': 'Missing user_id'}, 400
+    return BundleService.matching_form(
+        user_id,
+        per_page=request.args.get('per_page', 50, type=int),
+        search=request.args.get('q'),
+        cursor=request.args.get('cursor'),
+    )
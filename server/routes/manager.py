@@ -1,4 +1,5 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
+from ..services.engineRouting import mark_request_read_only
 from ..services.managerService import ManagerEventService
 
 
@@ -6,6 +7,7 @@ bp = Blueprint('manager', __name__)
 
 @bp.route('/listevents', methods=['POST'])
 def fetch_events():
+    mark_request_read_only()  # POST only to carry the filters
     return ManagerEventService.fetch_events()
 
 @bp.route('/events', methods=['POST'])
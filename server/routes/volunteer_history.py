@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify, current_app
 from sqlalchemy import text
 from ..services.volunteerService import VolunteerService
+from ..services.engineRouting import get_engine, read_only
+from ..services.responseCache import cached, invalidate_tags
+from ..services.serialization import json_rows
 
 history_bp = Blueprint('history', __name__)
 
@@ -11,6 +14,7 @@ def get_volunteer_history():
     return VolunteerService.get_volunteer_history_user(id)
 
 @history_bp.route('/admin/volunteer-attendance', methods=['GET'])
+@read_only
 def get_admin_volunteer_attendance():
     """Get all volunteers who attended events owned by this admin"""
     admin_user_id = request.args.get('admin_user_id')
@@ -18,7 +22,7 @@ def get_admin_volunteer_attendance():
     if not admin_user_id:
         return jsonify({'error': 'admin_user_id is required'}), 400
     
-    engine = current_app.config["ENGINE"]
+    engine = get_engine()
     with engine.connect() as conn:
         # Get admin_id from user_id
         admin_result = conn.execute(text("""
@@ -45,24 +49,25 @@ def get_admin_volunteer_attendance():
             JOIN users u ON v.user_id = u.id
             WHERE e.ownerid = :admin_user_id
             ORDER BY e.date DESC, u.name ASC
-        """), {"admin_user_id": admin_user_id}).mappings().all()
+        """), {"admin_user_id": admin_user_id}).all()
         
-    return jsonify([dict(row) for row in result]), 200
+    return json_rows(result), 200
 
 @history_bp.route('/volunteer-tasks/<int:volunteer_id>/<int:event_id>', methods=['GET'])
+@read_only
 def get_volunteer_tasks(volunteer_id, event_id):
     """Get all tasks claimed by a volunteer for a specific event"""
     
-    engine = current_app.config["ENGINE"]
+    engine = get_engine()
     with engine.connect() as conn:
         result = conn.execute(text("""
             SELECT id, name, score, completed, volunteer_id, event_id
             FROM history_tasks
             WHERE volunteer_id = :volunteer_id
                 AND event_id = :event_id
-        """), {"volunteer_id": volunteer_id, "event_id": event_id}).mappings().all()
+        """), {"volunteer_id": volunteer_id, "event_id": event_id}).all()
         
-    return jsonify([dict(row) for row in result]), 200
+    return json_rows(result), 200
 
 @history_bp.route('/task/<int:task_id>/rate', methods=['POST'])
 def rate_task(task_id):
@@ -95,6 +100,7 @@ def rate_task(task_id):
             WHERE id = :task_id
         """), {"task_id": task_id, "actual_score": actual_score})
         
+    invalidate_tags('leaderboard')
     return jsonify({
         'message': 'Task rated successfully',
         'original_score': original_score,
@@ -103,6 +109,7 @@ def rate_task(task_id):
     }), 200
 
 @history_bp.route('/volunteer-total-points', methods=['GET'])
+@read_only
 def get_volunteer_total_points():
     """Get total points for a volunteer across all completed tasks"""
     user_id = request.args.get('user_id')
@@ -110,7 +117,7 @@ def get_volunteer_total_points():
     if not user_id:
         return jsonify({'error': 'user_id is required'}), 400
     
-    engine = current_app.config["ENGINE"]
+    engine = get_engine()
     with engine.connect() as conn:
         # Get volunteer_id from user_id
         volunteer_result = conn.execute(text("""
@@ -133,10 +140,12 @@ def get_volunteer_total_points():
     return jsonify({'total_points': result['total_points']}), 200
 
 @history_bp.route('/leaderboard', methods=['GET'])
+@cached(['leaderboard'])
+@read_only
 def get_leaderboard():
     """Get top 10 volunteers by total points"""
     
-    engine = current_app.config["ENGINE"]
+    engine = get_engine()
     with engine.connect() as conn:
         result = conn.execute(text("""
             SELECT 
@@ -149,6 +158,6 @@ def get_leaderboard():
             GROUP BY v.id, u.name
             ORDER BY total_points DESC
             LIMIT 10
-        """)).mappings().all()
+        """)).all()
         
-    return jsonify([dict(row) for row in result]), 200
\ No newline at end of file
+    return json_rows(result), 200
\ No newline at end of file
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify, current_app
 from sqlalchemy import text
-from ..services.volunteerMatchingService import VolunteerService, EventService, MatchService
+from ..services.engineRouting import mark_request_read_only
+from ..services.volunteerMatchingService import VolunteerService, EventService, MatchService, VolunteerMatchingService
+from ..services.responseCache import cached
 
 bp = Blueprint('volunteer_matching', __name__)
 
@@ -13,6 +15,14 @@ def list_volunteers():
     return VolunteerService.get_all()
 
 
+@bp.route('/volunteers/available', methods=['GET'])
+def list_available_volunteers():
+    """Get volunteers available between start_date and end_date"""
+    return VolunteerMatchingService.find_available_volunteers(
+        request.args.get('start_date'), request.args.get('end_date')
+    )
+
+
 @bp.route('/volunteers/<int:id>', methods=['GET'])
 def get_volunteer(id):
     """Get volunteer by ID"""
@@ -46,17 +56,29 @@ def remove_volunteer(id):
 # ========== Event Routes ==========
 
 @bp.route('/events', methods=['GET'])
+@cached(['events', 'matches', 'skills'])
 def list_events():
     """Get all events"""
     return EventService.get_all()
 
 
 @bp.route('/events/<int:id>', methods=['GET'])
+@cached(lambda id: [f'event:{id}', f'matches:{id}', 'skills'])
 def get_event(id):
     """Get event by ID"""
     return EventService.get_by_id(id)
 
 
+@bp.route('/events/<int:id>/candidates', methods=['GET'])
+def event_candidates(id):
+    """Rank the best unmatched volunteers for an event"""
+    limit = request.args.get('limit', 50, type=int)
+    if limit < 1 or limit > 500:
+        return jsonify({'error': 'limit must be between 1 and 500'}), 400
+    available_only = request.args.get('available_only', 'true').lower() != 'false'
+    return VolunteerMatchingService.find_matching_candidates(id, limit, available_only)
+
+
 @bp.route('/events', methods=['POST'])
 def add_event():
     """Create a new event"""
@@ -86,6 +108,7 @@ def remove_event(id):
 @bp.route('/match/find', methods=['POST'])
 def find_match():
     """Find best matching event for a volunteer"""
+    mark_request_read_only()
     data = request.get_json(silent=True)
     if not data:
         return jsonify({'error': 'Invalid or missing JSON body'}), 400
@@ -98,6 +121,38 @@ def find_match():
     return MatchService.find_best_match(vol_id, admin_id)
 
 
+@bp.route('/match/find/batch', methods=['POST'])
+def find_matches_batch():
+    """Find the best matching event for each of several volunteers"""
+    mark_request_read_only()
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'Invalid or missing JSON body'}), 400
+
+    vol_ids = data.get('volunteer_ids')
+    admin_id = data.get('admin_id')
+    if not vol_ids or not isinstance(vol_ids, list):
+        return jsonify({'error': 'volunteer_ids list required'}), 400
+
+    return MatchService.find_best_matches(vol_ids, admin_id)
+
+
+@bp.route('/match/weights/<int:admin_id>', methods=['GET'])
+def get_match_weights(admin_id):
+    """Get the scoring weights for an organizer"""
+    return MatchService.get_scoring_weights(admin_id)
+
+
+@bp.route('/match/weights/<int:admin_id>', methods=['PUT'])
+def set_match_weights(admin_id):
+    """Update the scoring weights for an organizer"""
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'Invalid or missing JSON body'}), 400
+
+    return MatchService.update_scoring_weights(admin_id, data.get('weights'))
+
+
 @bp.route('/match', methods=['POST'])
 def make_match():
     """Create a match between volunteer and event"""
@@ -150,7 +205,7 @@ def register_for_event():
             # Create notification for event owner
             conn.execute(text("""
                 INSERT INTO notifications (user_id, type, message, is_read, created_at)
-                VALUES (:owner_id, 'info', :message, 0, NOW())
+                VALUES (:owner_id, 'info', :message, 0, CURRENT_TIMESTAMP)
             """), {
                 "owner_id": event_data['ownerid'],
                 "message": f"{event_data['volunteer_name']} has registered for your event '{event_data['event_name']}'"
@@ -199,7 +254,7 @@ def remove_match(id):
             # Create notification for event owner about unregistration
             conn.execute(text("""
                 INSERT INTO notifications (user_id, type, message, is_read, created_at)
-                VALUES (:owner_id, 'warning', :message, 0, NOW())
+                VALUES (:owner_id, 'warning', :message, 0, CURRENT_TIMESTAMP)
             """), {
                 "owner_id": match_data['ownerid'],
                 "message": f"{match_data['volunteer_name']} has unregistered from your event '{match_data['event_name']}'"
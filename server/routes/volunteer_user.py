@@ -1,19 +1,38 @@
 from flask import Blueprint, request
+from ..services.engineRouting import mark_request_read_only
 from ..services.volunteerService import VolunteerService
+from ..services.recommendationService import RecommendationService
+from ..services.responseCache import cached
 
 bp = Blueprint('volunteer', __name__)
 
 @bp.route('/history', methods=['POST'])
 def get_volunteer_history():
     """Get volunteer history for the user"""
+    mark_request_read_only()
     user_id = request.get_json().get('userId')
     
     return VolunteerService.get_volunteer_history_user(id=user_id)
 
 @bp.route('/events/upcoming', methods=['GET'])
+@cached(['events', 'matches', 'skills'], unless=lambda: bool(request.args.get('user_id')))
 def get_upcoming_events():
     """Get all upcoming events with skill matching for the current user"""
     user_id = request.args.get('user_id')
     if not user_id:
         return VolunteerService.get_upcoming_events_public()
-    return VolunteerService.get_upcoming_events_with_skills(user_id)
\ No newline at end of file
+    return VolunteerService.get_upcoming_events_with_skills(user_id)
+
+@bp.route('/events/recommended', methods=['GET'])
+def get_recommended_events():
+    """Get the precomputed top event recommendations for a volunteer"""
+    user_id = request.args.get('user_id')
+    if not user_id:
+        return {'success': False, 'error': 'Missing user_id'}, 400
+    return RecommendationService.get_recommended_events(user_id)
+
+
+@bp.route('/recommendations/metrics', methods=['GET'])
+def get_recommendation_metrics():
+    """Get recommendation materializer lag and throughput"""
+    return RecommendationService.get_metrics()
@@ -0,0 +1,225 @@
+"""
+Production entry point: a preforking gunicorn server for the Flask app.
+
+    python -m server.serve [--bind 0.0.0.0:5000] [--workers 4] [--threads 4]
+
+The master imports the app once (preload), warms the in-process caches and
+disposes its connection pool, then forks the workers, which share the warm
+memory copy-on-write. Each worker:
+
+    - drops the pool references it inherited and starts its own
+    - starts its own metrics flusher and invalidation bus receiver
+    - is recycled after SERVE_MAX_REQUESTS requests (with jitter), or when
+      its RSS has grown SERVE_MAX_MEMORY_GROWTH_MB past its post-fork size
+    - on SIGTERM stops accepting, finishes in-flight requests within
+      SERVE_GRACEFUL_TIMEOUT seconds and drains queued background work
+
+Worker and thread counts default to WEB_CONCURRENCY (CPU count) and
+WEB_THREADS (4); the connection pool is sized from the same variables.
+"""
+
+import argparse
+import logging
+import os
+import resource
+
+logger = logging.getLogger(__name__)
+
+WARM_PATHS = ('/api/skills', '/api/events', '/api/volunteer_user/events/upcoming')
+MEMORY_CHECK_EVERY = 50
+
+
+def _env(name, default, cast=int):
+    value = os.getenv(name)
+    return cast(value) if value not in (None, '') else default
+
+
+def settings_from_env(argv=None):
+    parser = argparse.ArgumentParser(description='Run the API with a preforking server.')
+    parser.add_argument('--bind', default=os.getenv('SERVE_BIND', '127.0.0.1:5000'))
+    parser.add_argument('--workers', type=int, default=_env('WEB_CONCURRENCY', os.cpu_count() or 2))
+    parser.add_argument('--threads', type=int, default=_env('WEB_THREADS', 4))
+    parser.add_argument('--max-requests', type=int, default=_env('SERVE_MAX_REQUESTS', 2000))
+    parser.add_argument('--max-requests-jitter', type=int, default=_env('SERVE_MAX_REQUESTS_JITTER', 200))
+    parser.add_argument('--max-memory-growth-mb', type=int, default=_env('SERVE_MAX_MEMORY_GROWTH_MB', 256))
+    parser.add_argument('--graceful-timeout', type=int, default=_env('SERVE_GRACEFUL_TIMEOUT', 30))
+    parser.add_argument('--timeout', type=int, default=_env('SERVE_TIMEOUT', 60))
+    parser.add_argument('--no-warm', action='store_true', help='skip cache warm-up before forking')
+    return parser.parse_args(argv)
+
+
+# ---------- memory ----------
+
+def current_rss_bytes():
+    """Resident set size now (Linux), else the peak RSS."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryWatch:
+    """Decides when a worker has grown enough to be replaced."""
+
+    def __init__(self, max_growth_bytes, check_every=MEMORY_CHECK_EVERY, rss=current_rss_bytes):
+        self.max_growth_bytes = max_growth_bytes
+        self.check_every = check_every
+        self.rss = rss
+        self.baseline = None
+        self.requests = 0
+
+    def start(self):
+        self.baseline = self.rss()
+        self.requests = 0
+
+    def exceeded(self):
+        """Called after each request; True once growth passes the limit."""
+        self.requests += 1
+        if not self.max_growth_bytes or self.requests % self.check_every:
+            return False
+        if self.baseline is None:
+            self.start()
+            return False
+        return self.rss() - self.baseline > self.max_growth_bytes
+
+
+# ---------- app lifecycle ----------
+
+def _engines(app):
+    return [engine for engine in (app.config.get("ENGINE"), app.config.get("READ_ENGINE")) if engine is not None]
+
+
+def warm(app, paths=WARM_PATHS):
+    """Fill the caches the workers will inherit, then close the master's connections."""
+    client = app.test_client()
+    for path in paths:
+        try:
+            response = client.get(path)
+            if response.status_code != 200:
+                logger.warning('Warm-up of %s returned %s', path, response.status_code)
+        except Exception:
+            logger.warning('Warm-up of %s failed', path, exc_info=True)
+    index = app.extensions.get('skill_index')
+    if index is not None:
+        try:
+            with app.config["ENGINE"].connect() as conn:
+                index.postings(conn, [])
+        except Exception:
+            logger.warning('Skill index warm-up failed', exc_info=True)
+    # Warm-up traffic isn't real traffic, and the master serves none itself
+    metrics = app.extensions.get('metrics')
+    if metrics is not None:
+        metrics.registry.reset()
+    instrumentation = app.extensions.get('sql_instrumentation')
+    if instrumentation is not None:
+        instrumentation.reset()
+    bus = app.extensions.get('invalidation_bus')
+    if bus is not None:
+        bus.stop()
+    for engine in _engines(app):
+        engine.dispose()
+
+
+def after_fork(app):
+    """Make a forked worker independent of the master's pool and threads."""
+    for engine in _engines(app):
+        # Forget inherited connections without closing the parent's sockets
+        engine.dispose(close=False)
+    metrics = app.extensions.get('metrics')
+    if metrics is not None:
+        metrics.registry.after_fork()
+
+
+def before_exit(app):
+    """Finish background work a worker owns before it exits."""
+    materializer = app.extensions.get('recommendations')
+    if materializer is not None:
+        materializer.stop()
+    bus = app.extensions.get('invalidation_bus')
+    if bus is not None:
+        bus.stop()
+    metrics = app.extensions.get('metrics')
+    if metrics is not None:
+        metrics.registry.write_snapshot()
+    for engine in _engines(app):
+        engine.dispose()
+
+
+def load_app(warm_caches=True):
+    from .app import app
+    if warm_caches:
+        warm(app)
+    return app
+
+
+# ---------- gunicorn ----------
+
+def gunicorn_options(args):
+    memory = MemoryWatch(args.max_memory_growth_mb * 1024 * 1024)
+
+    def when_ready(server):
+        logger.info('Serving on %s with %d workers x %d threads', args.bind, args.workers, args.threads)
+
+    def post_fork(server, worker):
+        after_fork(server.app.wsgi())  # the preloaded app
+        memory.start()
+
+    def post_request(worker, req, environ, resp):
+        if memory.exceeded():
+            logger.warning('Worker %s grew past %d MB; recycling', worker.pid, args.max_memory_growth_mb)
+            worker.alive = False  # exits after in-flight requests finish
+
+    def worker_exit(server, worker):
+        before_exit(server.app.wsgi())
+
+    def child_exit(server, worker):
+        # Runs in the master once the worker is gone
+        metrics = server.app.wsgi().extensions.get('metrics')
+        if metrics is not None:
+            metrics.registry.mark_process_dead(worker.pid)
+
+    return {
+        'bind': args.bind,
+        'workers': args.workers,
+        'worker_class': 'gthread',
+        'threads': args.threads,
+        'preload_app': True,
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests_jitter,
+        'graceful_timeout': args.graceful_timeout,
+        'timeout': args.timeout,
+        'keepalive': 5,
+        'when_ready': when_ready,
+        'post_fork': post_fork,
+        'post_request': post_request,
+        'worker_exit': worker_exit,
+        'child_exit': child_exit,
+    }
+
+
+def main(argv=None):
+    args = settings_from_env(argv)
+    # Size each worker's connection pool for this process layout before the app is built
+    os.environ['WEB_CONCURRENCY'] = str(args.workers)
+    os.environ['WEB_THREADS'] = str(args.threads)
+
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return load_app(warm_caches=not args.no_warm)
+
+    Server(gunicorn_options(args)).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,16 @@
 from flask import jsonify, current_app, request
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 import json
+import logging
 import re
 import hashlib
 
+from .changeEvents import notify_change
+from .responseCache import invalidate_tags
+from .sqlDialect import insert_ignore
+
+logger = logging.getLogger(__name__)
+
 users = [{"email": "test@example.com", "password": "1234", "name": "Test User"}]
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
@@ -36,18 +43,12 @@ def _ensure_skill_ids(conn, skills):
     """Upsert skills by name and return {name: id}."""
     if not skills:
         return {}
-    # INSERT .. ON DUPLICATE to set LAST_INSERT_ID to existing id
-    upsert = text("""
-        INSERT INTO skills (name) VALUES (:name)
-        ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)
-    """)
-    for s in skills:
-        conn.execute(upsert, {"name": s})
+    conn.execute(insert_ignore(conn, "skills", ("name",)), [{"name": s} for s in skills])
 
     # fetch ids
     rows = conn.execute(
-        text("SELECT id, name FROM skills WHERE name IN :names"),
-        {"names": tuple(skills)}
+        text("SELECT id, name FROM skills WHERE name IN :names").bindparams(bindparam("names", expanding=True)),
+        {"names": list(skills)}
     ).mappings().all()
 
     return {r["name"]: r["id"] for r in rows}
@@ -87,14 +88,14 @@ class AuthService:
 
             # insert user
             pwd_hash = hashlib.sha256(password.encode()).hexdigest()
-            conn.execute(
+            result = conn.execute(
                 text("""
                     INSERT INTO users (name, email, password_hash, state)
                     VALUES (:name, :email, :hash, :state)
                 """),
                 {"name": name, "email": email, "hash": pwd_hash, "state": state or None}
             )
-            user_id = conn.execute(text("SELECT LAST_INSERT_ID()")).scalar()
+            user_id = result.lastrowid
 
             # create profile with minimal required fields
             conn.execute(
@@ -119,8 +120,8 @@ class AuthService:
                     sid = name_to_id.get(s)
                     if sid:
                         conn.execute(
-                            text("INSERT IGNORE INTO user_skills (user_id, skill_id) VALUES (:u, :s)"),
-                            {"u": user_id, "s": sid}
+                            insert_ignore(conn, "user_skills", ("user_id", "skill_id")),
+                            {"user_id": user_id, "skill_id": sid}
                         )
 
             # Check if email ends with @pine.edu and create admin entry
@@ -136,6 +137,11 @@ class AuthService:
                     {"user_id": user_id, "availability": "flexible"}
                 )
 
+        if not is_admin:
+            notify_change('user', user_id)
+            invalidate_tags('leaderboard')
+        if skills:
+            invalidate_tags('skills')
 
         return jsonify({
             "message": "Signup successful",
@@ -162,8 +168,6 @@ class AuthService:
                 WHERE email = :email
                 LIMIT 1
             """), {"email": email}).mappings().first()
-
-            print(row)
     
             ad = conn.execute(text("""
                 SELECT * FROM admins, users WHERE users.email = :email AND admins.user_id = users.id LIMIT 1
@@ -178,16 +182,8 @@ class AuthService:
         if not row or row["password_hash"] != pw_hash:
             return jsonify({"message": "Invalid credentials"}), 401
 
-        print({
-            "message": "Login successful",
-            "user": {
-                "id": row["id"],
-                "name": row["name"],
-                "email": row["email"],
-                "state": row["state"],
-                "role": "admin" if ad else "volunteer" if vl else "none"
-            }
-        })
+        logger.info("Login succeeded", extra={
+            "user_id": row["id"], "role": "admin" if ad else "volunteer" if vl else "none"})
 
         return jsonify({
             "message": "Login successful",
@@ -0,0 +1,133 @@
+"""
+POST /api/batch: several GETs in one round trip.
+
+    POST /api/batch
+    {"requests": [{"path": "/api/notifications/5"},
+                  {"path": "/api/notifications/count?user_id=5"}],
+     "parallel": false}
+
+    -> {"responses": [{"status": 200, "body": [...]},
+                      {"status": 200, "body": {...}}]}
+
+Each sub-request is dispatched through the app as its own request (hooks,
+caching and metrics included) and gets its own status; one failing does
+not fail the others. Sequential sub-requests share one connection per
+engine for their @read_only reads. With "parallel": true they run on a
+thread pool of at most BATCH_MAX_WORKERS threads, each with its own
+connection. Only GET sub-requests are accepted: writes keep their own
+request so failures and retries stay unambiguous.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from flask import current_app, jsonify, request
+from werkzeug.test import EnvironBuilder
+
+from .engineRouting import PIN_HEADER, mark_request_read_only, shared_connections
+from .serialization import encode
+
+logger = logging.getLogger(__name__)
+
+FORWARDED_HEADERS = ('Authorization', 'Cookie', PIN_HEADER, 'Accept-Language', 'User-Agent')
+
+
+class BatchError(ValueError):
+    pass
+
+
+class Batch:
+    """Registers /api/batch and runs its sub-requests."""
+
+    def __init__(self, max_requests=20, max_workers=4, path='/api/batch'):
+        self.max_requests = max_requests
+        self.max_workers = max_workers
+        self.path = path
+
+    def init_app(self, app):
+        self.max_requests = app.config.get("BATCH_MAX_REQUESTS", self.max_requests)
+        self.max_workers = app.config.get("BATCH_MAX_WORKERS", self.max_workers)
+        app.add_url_rule(self.path, 'batch', self._view, methods=['POST'])
+        app.extensions['batch'] = self
+        return self
+
+    def _view(self):
+        mark_request_read_only()
+        data = request.get_json(silent=True) or {}
+        subs = data.get('requests')
+        if not isinstance(subs, list) or not subs:
+            return jsonify({'error': 'requests must be a non-empty list'}), 400
+        if len(subs) > self.max_requests:
+            return jsonify({'error': f'At most {self.max_requests} requests per batch'}), 400
+
+        app = current_app._get_current_object()
+        base = {
+            'headers': {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers},
+            'environ_base': {'REMOTE_ADDR': request.remote_addr},
+        }
+        if data.get('parallel') and len(subs) > 1:
+            workers = min(self.max_workers, len(subs))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as pool:
+                results = list(pool.map(lambda sub: self._run_isolated(app, sub, base), subs))
+        else:
+            with shared_connections():
+                results = [self.run(app, sub, base) for sub in subs]
+
+        body = b'{"responses":[' + b','.join(results) + b']}\n'
+        return current_app.response_class(body, mimetype='application/json')
+
+    def _run_isolated(self, app, sub, base):
+        with shared_connections():
+            return self.run(app, sub, base)
+
+    def run(self, app, sub, base):
+        """Dispatch one sub-request; returns its serialized result object."""
+        try:
+            environ = self._environ(sub, base)
+        except BatchError as e:
+            return encode({'status': 400, 'body': {'error': str(e)}})
+
+        # A fresh app context gives the sub-request its own `g`
+        with app.app_context(), app.request_context(environ):
+            try:
+                response = app.full_dispatch_request()
+            except Exception:
+                logger.exception('Batch sub-request %s failed', environ.get('PATH_INFO'))
+                return encode({'status': 500, 'body': {'error': 'Internal Server Error'}})
+            try:
+                payload = response.get_data()
+            finally:
+                response.close()
+
+        head = {'status': response.status_code}
+        if response.headers.get('ETag'):
+            head['etag'] = response.headers['ETag']
+        if response.is_json and payload.strip():
+            # Splice the already-encoded body in rather than decoding it again
+            return encode(head)[:-1] + b',"body":' + payload.rstrip() + b'}'
+        head['body'] = payload.decode('utf-8', 'replace')
+        return encode(head)
+
+    def _environ(self, sub, base):
+        if not isinstance(sub, dict) or not isinstance(sub.get('path'), str):
+            raise BatchError('Each request needs a path')
+        method = str(sub.get('method', 'GET')).upper()
+        if method != 'GET':
+            raise BatchError('Only GET requests can be batched')
+        url = urlsplit(sub['path'])
+        if url.scheme or url.netloc or not url.path.startswith('/'):
+            raise BatchError('path must be a local path')
+        if url.path.rstrip('/') == self.path:
+            raise BatchError('Batches cannot be nested')
+        builder = EnvironBuilder(
+            path=url.path,
+            method=method,
+            query_string=url.query or sub.get('params'),
+            headers=base['headers'],
+            environ_base=base['environ_base'],
+        )
+        try:
+            return builder.get_environ()
+        finally:
+            builder.close()
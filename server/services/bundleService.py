@@ -0,0 +1,171 @@
+from datetime import date
+
+from flask import jsonify
+from sqlalchemy import text
+
+from .engineRouting import get_engine, read_only
+from .managerService import EventListingQuery
+
+MAX_PAGE_SIZE = 200
+
+# Shared with the async routes in server/asgi.py
+EVENT_QUERY = text("""
+    SELECT e.*, GROUP_CONCAT(s.name) AS required_skills
+    FROM events e
+    LEFT JOIN event_requirements er ON er.event_id = e.id
+    LEFT JOIN skills s ON s.id = er.skill_id
+    WHERE e.id = :event_id
+    GROUP BY e.id
+""")
+
+EVENT_COUNTS_QUERY = text("""
+    SELECT status, COUNT(*) FROM matches WHERE event_id = :event_id GROUP BY status
+""")
+
+REGISTRATION_QUERY = text("""
+    SELECT v.id AS volunteer_id, m.id AS match_id, m.status, m.matched_at
+    FROM volunteers v
+    LEFT JOIN matches m ON m.volunteer_id = v.id AND m.event_id = :event_id
+    WHERE v.user_id = :user_id
+""")
+
+OWNER_EVENTS_QUERY = text("""
+    SELECT e.id, e.name, e.description, e.date, e.location, e.max_volunteers,
+           e.time_label, e.ownerid,
+           (SELECT COUNT(*) FROM matches m WHERE m.event_id = e.id) AS current_volunteers,
+           (SELECT GROUP_CONCAT(s.name) FROM event_requirements er
+            JOIN skills s ON s.id = er.skill_id WHERE er.event_id = e.id) AS skills
+    FROM events e
+    WHERE e.ownerid = :owner_id AND e.date >= :today
+    ORDER BY e.date, e.id
+""")
+
+
+OWNER_QUERY = text("""
+    SELECT id FROM admins WHERE user_id = :owner_id
+""")
+
+
+def candidate_query(search, after):
+    """One keyset page of volunteers in (user name, user id) order, optionally filtered by name.
+
+    Walks idx_users_name (migration 007), which InnoDB orders by (name, users.id),
+    from the cursor and stops after :fetch rows, so neither a deep page nor a
+    count scans or sorts the table. The order and cursor use only users columns
+    (each user has one volunteer row); a volunteers column would force a filesort.
+    """
+    conditions = []
+    if search:
+        conditions.append("u.name LIKE :search")
+    if after:
+        conditions.append("(u.name > :after_name OR (u.name = :after_name AND u.id > :after_id))")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    # Page the volunteers first so skills are only gathered for the visible rows
+    return text(f"""
+        SELECT p.id, p.user_id, p.name, p.availability, GROUP_CONCAT(s.name) AS skills
+        FROM (
+            SELECT v.id, u.id AS user_id, u.name, v.availability
+            FROM users u
+            JOIN volunteers v ON v.user_id = u.id
+            {where}
+            ORDER BY u.name, u.id
+            LIMIT :fetch
+        ) p
+        LEFT JOIN volunteer_skills vs ON vs.volunteer_id = p.id
+        LEFT JOIN skills s ON s.id = vs.skill_id
+        GROUP BY p.id, p.user_id, p.name, p.availability
+        ORDER BY p.name, p.user_id
+    """)
+
+
+def page_params(owner_id, per_page, search, cursor=None):
+    """Query parameters for a matching-form page; raises ValueError on a bad cursor."""
+    per_page = min(max(int(per_page), 1), MAX_PAGE_SIZE)
+    params = {
+        "owner_id": owner_id,
+        "today": date.today(),
+        "limit": per_page,
+        "fetch": per_page + 1,  # one extra row tells whether there is a next page
+        "search": f"%{search}%",
+        "after_name": None,
+        "after_id": None,
+    }
+    if cursor:
+        params["after_name"], params["after_id"] = EventListingQuery.decode_cursor(cursor)
+    return params
+
+
+def _split(value):
+    return value.split(',') if value else []
+
+
+def event_view_payload(event, counts, registration):
+    event = dict(event)
+    event['required_skills'] = _split(event['required_skills'])
+    event['current_volunteers'] = sum(counts.values())
+    match = dict(registration) if registration and registration['match_id'] is not None else None
+    if match is not None:
+        del match['volunteer_id']
+    return {
+        'event': event,
+        'counts': counts,
+        'volunteer_id': registration['volunteer_id'] if registration else None,
+        'registration': match,
+        'is_registered': match is not None,
+    }
+
+
+def matching_form_payload(params, events, candidates):
+    has_more = len(candidates) > params['limit']
+    candidates = candidates[:params['limit']]
+    last = candidates[-1] if has_more else None
+    return {
+        'events': [dict(e, skills=_split(e['skills'])) for e in events],
+        'candidates': [dict(c, skills=_split(c['skills'])) for c in candidates],
+        'per_page': params['limit'],
+        'has_more': has_more,
+        'next_cursor': EventListingQuery.encode_cursor(last['name'], last['user_id']) if last else None,
+    }
+
+
+class BundleService:
+    """Everything one page needs, in one response"""
+
+    @staticmethod
+    @read_only
+    def event_view(event_id, user_id=None):
+        """An event, its registration counts and the user's own registration"""
+        params = {"event_id": event_id, "user_id": user_id}
+        engine = get_engine()
+        with engine.connect() as conn:
+            event = conn.execute(EVENT_QUERY, params).mappings().first()
+            if not event:
+                return jsonify({'message': 'Event not found'}), 404
+            counts = dict(conn.execute(EVENT_COUNTS_QUERY, params).all())
+            registration = None
+            if user_id:
+                registration = conn.execute(REGISTRATION_QUERY, params).mappings().first()
+
+        return jsonify(event_view_payload(event, counts, registration)), 200
+
+    @staticmethod
+    @read_only
+    def matching_form(owner_id, per_page=50, search=None, cursor=None):
+        """The owner's upcoming events and one page of volunteer candidates
+
+        Pages follow `next_cursor` from the previous response; there is no
+        total, which would cost a count over every volunteer per page.
+        """
+        try:
+            params = page_params(owner_id, per_page, search, cursor)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+
+        engine = get_engine()
+        with engine.connect() as conn:
+            if not conn.execute(OWNER_QUERY, params).first():
+                return jsonify({'message': 'Unauthorized'}), 403
+            events = conn.execute(OWNER_EVENTS_QUERY, params).mappings().all()
+            candidates = conn.execute(candidate_query(search, cursor), params).mappings().all()
+
+        return jsonify(matching_form_payload(params, events, candidates)), 200
@@ -0,0 +1,33 @@
+"""
+In-process change notifications from the service write paths.
+
+Services call notify_change(kind, id) after committing a write; components
+that keep derived state (the recommendation materializer, the skill index)
+register a listener on the app and react to the kinds they care about.
+
+Kinds: 'event' (an event was created, edited or deleted), 'event_full'
+(an event reached capacity), 'volunteer' (a volunteer's registrations
+changed, by volunteer id), 'user' (a user's skills or profile changed).
+
+Changes are also published on the invalidation bus, if the app has one, so
+other workers' skill indexes see them; derived tables such as
+volunteer_recommendations are only rebuilt by the worker that made the write.
+"""
+
+from flask import current_app
+
+from .invalidationBus import publish_change
+
+
+def add_change_listener(app, listener):
+    """Register listener(kind, ident) to receive changes made through `app`."""
+    app.extensions.setdefault('change_listeners', []).append(listener)
+
+
+def notify_change(kind, ident):
+    """Report a committed change to every listener on the current app."""
+    if ident is None:
+        return
+    for listener in current_app.extensions.get('change_listeners', ()):
+        listener(kind, ident)
+    publish_change(current_app, kind, ident)
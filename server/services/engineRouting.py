@@ -0,0 +1,213 @@
+"""
+Read/write engine routing.
+
+Service methods that only read are marked with @read_only and fetch their
+engine with get_engine(); inside them it returns the app's READ_ENGINE (a
+replica) when one is configured. Everything else keeps using ENGINE, the
+primary.
+
+Replicas lag, so a client that just wrote (any successful non-GET request
+not marked with mark_request_read_only()) is pinned to the primary for
+`sticky_seconds` so it reads its own writes. The pin travels with the
+client rather than living in one worker: the response carries a signed
+token holding the pin's expiry, as the `rw_pin` cookie and the
+X-Read-Your-Writes header, and any worker sharing SECRET_KEY accepts it
+back from either. Clients cannot mint or extend a pin; the worst a copied
+token does is send reads to the primary until it expires.
+
+Without SECRET_KEY a random key is made when the app is built, which the
+preloaded gunicorn workers (server/serve.py) inherit; separately started
+processes need a shared SECRET_KEY.
+
+Inside shared_connections() (used by /api/batch), every @read_only connect()
+on an engine gets the same Connection, and the pin check is cached, so many
+sub-requests cost one pool checkout.
+"""
+
+import contextlib
+import contextvars
+import functools
+import logging
+import math
+import os
+import time
+
+from flask import current_app, has_request_context, request
+from itsdangerous import BadSignature, Signer
+
+_read_only = contextvars.ContextVar('db_read_only', default=False)
+_shared = contextvars.ContextVar('db_shared_connections', default=None)
+_primary_only = contextvars.ContextVar('db_primary_only', default=False)
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_COOKIE = 'rw_pin'
+PIN_HEADER = 'X-Read-Your-Writes'
+READ_ONLY_REQUEST = 'eventmatcher.read_only_request'
+
+
+def read_only(func):
+    """Mark a service method as read-only so it may run on the replica."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+    return wrapper
+
+
+def get_engine():
+    """Engine for the current call: the replica inside @read_only, else the primary."""
+    config = current_app.config
+    if not _read_only.get():
+        return config["ENGINE"]
+    engine = config.get("READ_ENGINE")
+    if engine is None:
+        engine = config["ENGINE"]
+    elif _primary_only.get():
+        engine = config["ENGINE"]
+    else:
+        router = current_app.extensions.get('engine_router')
+        if router is not None and router.is_sticky():
+            engine = config["ENGINE"]
+    scope = _shared.get()
+    return engine if scope is None else _SharedEngine(engine, scope)
+
+
+class SharedConnections:
+    """One Connection per engine for every read in the scope."""
+
+    def __init__(self):
+        self.sticky = {}  # pin token -> still pinned to the primary?
+        self._connections = {}
+
+    def connection(self, engine):
+        conn = self._connections.get(engine)
+        if conn is None:
+            conn = self._connections[engine] = engine.connect()
+        return conn
+
+    def close(self):
+        for conn in self._connections.values():
+            conn.close()
+        self._connections.clear()
+
+
+class _SharedEngine:
+    """Stands in for an engine; connect() lends the scope's connection."""
+
+    def __init__(self, engine, scope):
+        self._engine = engine
+        self._scope = scope
+
+    @contextlib.contextmanager
+    def connect(self):
+        conn = self._scope.connection(self._engine)
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+
+    def __getattr__(self, name):
+        return getattr(self._engine, name)
+
+
+@contextlib.contextmanager
+def shared_connections():
+    """Share connections (and pin checks) between the reads run inside."""
+    scope = SharedConnections()
+    token = _shared.set(scope)
+    try:
+        yield scope
+    finally:
+        _shared.reset(token)
+        scope.close()
+
+
+@contextlib.contextmanager
+def use_primary():
+    """Run @read_only reads inside on the primary, e.g. to refill a cache
+    right after a write the replica may not have applied yet."""
+    token = _primary_only.set(True)
+    try:
+        yield
+    finally:
+        _primary_only.reset(token)
+
+
+def mark_request_read_only():
+    """Declare a non-GET request (e.g. a batch of reads) as not being a write."""
+    request.environ[READ_ONLY_REQUEST] = True
+
+
+def request_pin():
+    """The pin token the client sent back, if any."""
+    return request.cookies.get(PIN_COOKIE) or request.headers.get(PIN_HEADER)
+
+
+class EngineRouter:
+    """Pins recent writers to the primary with a signed, expiring token."""
+
+    def __init__(self, read_engine=None, sticky_seconds=5.0, secret_key=None):
+        self.read_engine = read_engine
+        self.sticky_seconds = sticky_seconds
+        self.secret_key = secret_key
+        self._signer = None
+
+    def init_app(self, app):
+        if self.read_engine is not None:
+            app.config["READ_ENGINE"] = self.read_engine
+        self.sticky_seconds = app.config.get("READ_YOUR_WRITES_SECONDS", self.sticky_seconds)
+        secret = self.secret_key or app.config.get("SECRET_KEY") or os.getenv("SECRET_KEY")
+        if not secret:
+            if app.config.get("READ_ENGINE") is not None:
+                logger.warning("SECRET_KEY is not set; read-your-writes pins only hold "
+                               "within workers forked from this process")
+            secret = os.urandom(32)
+        self._signer = Signer(secret, salt='read-your-writes')
+        app.after_request(self._after_request)
+        app.extensions['engine_router'] = self
+        return self
+
+    def issue(self, now=None):
+        """A token pinning its bearer to the primary for the sticky window."""
+        until = (time.time() if now is None else now) + self.sticky_seconds
+        return self._signer.sign(f'{until:.3f}').decode('ascii')
+
+    def pinned_until(self, token):
+        """Expiry (epoch seconds) of a valid token, else None."""
+        if not token:
+            return None
+        try:
+            return float(self._signer.unsign(token))
+        except (BadSignature, ValueError):
+            return None
+
+    def is_sticky(self):
+        if not has_request_context():
+            return False
+        token = request_pin()
+        if not token:
+            return False
+        scope = _shared.get()
+        if scope is not None and token in scope.sticky:
+            return scope.sticky[token]
+        until = self.pinned_until(token)
+        sticky = until is not None and until > time.time()
+        if scope is not None:
+            scope.sticky[token] = sticky
+        return sticky
+
+    def _after_request(self, response):
+        if request.environ.get(READ_ONLY_REQUEST):
+            return response
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            token = self.issue()
+            response.headers[PIN_HEADER] = token
+            response.set_cookie(PIN_COOKIE, token, max_age=math.ceil(self.sticky_seconds),
+                                httponly=True, samesite='Lax')
+        return response
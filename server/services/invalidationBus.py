@@ -0,0 +1,360 @@
+"""
+Cross-worker cache invalidation bus.
+
+Every worker keeps in-process caches (the response cache, the skill index),
+so a write handled by one worker must reach the others. invalidate_tags()
+and notify_change() publish on the bus; each worker's receiver thread
+applies what other workers published to its own caches.
+
+Two transports:
+
+    TableTransport          rows in cache_versions, polled by id. Works across
+                            nodes; staleness is bounded by the poll interval.
+                            Auto-increment ids can commit out of order, so ids
+                            skipped over are re-read until they show up or
+                            `hole_timeout` passes (then caches resync).
+    UnixDatagramTransport   a datagram socket per worker in a shared directory.
+                            Same host only, near-instant delivery; per-sender
+                            sequence numbers detect dropped datagrams.
+
+Bounded staleness: if the receiver has not heard from the transport for
+`max_staleness` seconds, is_fresh() turns false and cached responses are
+bypassed; if messages may have been missed (a gap, or polling resumed after
+an outage) every subscribed cache is cleared before it is used again.
+
+Configured with CACHE_BUS=table or CACHE_BUS=unix:<directory>.
+"""
+
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from sqlalchemy import bindparam, text
+
+logger = logging.getLogger(__name__)
+
+CHANGE_PREFIX = 'change:'
+
+
+class TableTransport:
+    """Invalidations as rows in cache_versions, read in id order."""
+
+    MAX_HOLES = 1000
+
+    def __init__(self, engine, table='cache_versions', poll_interval=0.5, max_rows=10000, hole_timeout=5.0):
+        self.engine = engine
+        self.table = table
+        self.poll_interval = poll_interval
+        self.max_rows = max_rows
+        self.hole_timeout = hole_timeout
+        self.origin = None
+        self._last_id = None
+        self._holes = {}  # id skipped over -> monotonic time it was first missed
+        self._published = 0
+
+    def open(self, origin):
+        self.origin = origin
+        with self.engine.connect() as conn:
+            self._last_id = conn.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {self.table}")).scalar()
+
+    def publish(self, tags):
+        with self.engine.begin() as conn:
+            result = conn.execute(text(f"INSERT INTO {self.table} (origin, tags) VALUES (:origin, :tags)"),
+                                  {"origin": self.origin, "tags": '\n'.join(tags)})
+            self._published += 1
+            if self._published % 100 == 0 and result.lastrowid:
+                # Keep the log short; receivers that fall this far behind resync
+                conn.execute(text(f"DELETE FROM {self.table} WHERE id <= :cutoff"),
+                             {"cutoff": result.lastrowid - self.max_rows})
+
+    def poll(self, stop_event):
+        """Wait one interval, then return ([tags], gap) published by other workers."""
+        stop_event.wait(self.poll_interval)
+        params = {"last": self._last_id}
+        where = "id > :last"
+        if self._holes:
+            # Ids we skipped because a later id committed first
+            where += " OR id IN :holes"
+            params["holes"] = list(self._holes)
+        query = text(f"SELECT id, origin, tags FROM {self.table} WHERE {where} ORDER BY id LIMIT 1000")
+        if self._holes:
+            query = query.bindparams(bindparam('holes', expanding=True))
+        with self.engine.connect() as conn:
+            rows = conn.execute(query, params).all()
+            oldest = conn.execute(text(f"SELECT MIN(id) FROM {self.table}")).scalar() if rows else None
+        # The whole retained log is ahead of us: rows we never read were pruned
+        gap = oldest is not None and oldest > self._last_id + 1
+        now = time.monotonic()
+        batches = []
+        for row_id, origin, tags in rows:
+            if self._holes.pop(row_id, None) is None:
+                if row_id <= self._last_id:
+                    continue
+                skipped = row_id - self._last_id - 1
+                if skipped > self.MAX_HOLES:
+                    gap = True
+                elif skipped and not gap:
+                    self._holes.update(dict.fromkeys(range(self._last_id + 1, row_id), now))
+                self._last_id = row_id
+            if origin != self.origin and tags:
+                batches.append(tags.split('\n'))
+
+        # A hole that never filled was a rolled-back insert or a very slow commit;
+        # we can't tell which, so treat it as a possible loss
+        expired = [row_id for row_id, missed_at in self._holes.items() if now - missed_at > self.hole_timeout]
+        for row_id in expired:
+            del self._holes[row_id]
+        if gap:
+            self._holes.clear()
+        return batches, gap or bool(expired)
+
+    def close(self):
+        pass
+
+
+class UnixDatagramTransport:
+    """One datagram socket per worker in `directory`; publish sends to all of them."""
+
+    MAX_DATAGRAM = 60000
+
+    def __init__(self, directory, recv_timeout=0.5):
+        self.directory = directory
+        self.recv_timeout = recv_timeout
+        self.origin = None
+        self.path = None
+        self._sock = None
+        self._send_sock = None
+        self._seq = 0
+        self._seen = {}  # origin -> last sequence number
+        self._lock = threading.Lock()
+
+    def open(self, origin):
+        os.makedirs(self.directory, exist_ok=True)
+        self.origin = origin
+        self.path = os.path.join(self.directory, f'bus-{origin}.sock')
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.path)
+        self._sock.settimeout(self.recv_timeout)
+        self._send_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._send_sock.setblocking(False)
+
+    def publish(self, tags):
+        with self._lock:
+            self._seq += 1
+            payload = json.dumps({'origin': self.origin, 'seq': self._seq, 'tags': list(tags)}).encode()
+        if len(payload) > self.MAX_DATAGRAM:
+            # Too big for one datagram: tell receivers to drop everything instead
+            payload = json.dumps({'origin': self.origin, 'seq': self._seq, 'tags': [], 'flush': True}).encode()
+        for path in glob.glob(os.path.join(self.directory, 'bus-*.sock')):
+            if path == self.path:
+                continue
+            try:
+                self._send_sock.sendto(payload, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker is gone; clean up its socket file
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except BlockingIOError:
+                # Receiver's buffer is full; it will see a sequence gap and resync
+                logger.warning('Invalidation datagram to %s dropped', path)
+
+    def poll(self, stop_event):
+        try:
+            data = self._sock.recv(self.MAX_DATAGRAM + 1024)
+        except socket.timeout:
+            return [], False
+        message = json.loads(data)
+        origin, seq = message['origin'], message['seq']
+        last = self._seen.get(origin)
+        self._seen[origin] = seq
+        gap = message.get('flush', False) or (last is not None and seq != last + 1)
+        return [message['tags']], gap
+
+    def close(self):
+        for sock in (self._sock, self._send_sock):
+            if sock is not None:
+                sock.close()
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class InvalidationBus:
+    """Fans tag invalidations out to the other workers' caches."""
+
+    def __init__(self, transport, max_staleness=5.0):
+        self.transport = transport
+        self.max_staleness = max_staleness
+        self.origin = None
+        self._subscribers = []
+        self._resync_handlers = []
+        self._thread = None
+        self._stop = threading.Event()
+        self._pid = None
+        self._last_ok = None
+        self._needs_resync = False
+        self._lock = threading.Lock()
+        self._stats = {'published': 0, 'received': 0, 'resyncs': 0, 'errors': 0}
+
+    @classmethod
+    def from_config(cls, app):
+        """Bus described by CACHE_BUS, or None when it is unset."""
+        setting = app.config.get("CACHE_BUS") or os.getenv("CACHE_BUS")
+        if not setting:
+            return None
+        max_staleness = float(app.config.get("CACHE_MAX_STALENESS", os.getenv("CACHE_MAX_STALENESS", 5.0)))
+        if setting == 'table':
+            return cls(TableTransport(app.config["ENGINE"]), max_staleness)
+        if setting.startswith('unix:'):
+            return cls(UnixDatagramTransport(setting[len('unix:'):]), max_staleness)
+        raise ValueError(f'Unknown CACHE_BUS transport: {setting}')
+
+    def init_app(self, app):
+        """Attach to an app and subscribe the caches it has installed."""
+        app.extensions['invalidation_bus'] = self
+        cache = app.extensions.get('response_cache')
+        if cache is not None:
+            cache.bus = self
+            self.subscribe(cache.invalidate)
+            self.on_resync(cache.clear)
+        index = app.extensions.get('skill_index')
+        if index is not None:
+            self.subscribe_changes(index.on_change)
+            self.on_resync(index.invalidate)
+        app.before_request(self.ensure_started)
+        return self
+
+    def subscribe(self, handler):
+        """handler(tags) is called with tags published by other workers."""
+        self._subscribers.append(handler)
+
+    def subscribe_changes(self, listener):
+        """listener(kind, ident) receives other workers' notify_change() calls."""
+        def handler(tags):
+            for tag in tags:
+                if tag.startswith(CHANGE_PREFIX):
+                    kind, _, ident = tag[len(CHANGE_PREFIX):].partition(':')
+                    listener(kind, ident)
+        self.subscribe(handler)
+
+    def on_resync(self, handler):
+        """handler() drops all cached state; called when messages may have been lost."""
+        self._resync_handlers.append(handler)
+
+    # ---------- lifecycle ----------
+
+    def ensure_started(self):
+        """Start (or restart after fork) the receiver for this process."""
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self.origin = f'{socket.gethostname()}-{self._pid}-{uuid.uuid4().hex[:8]}'
+            self.transport.open(self.origin)
+            self._last_ok = time.monotonic()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='invalidation-bus', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        self.transport.close()
+
+    # ---------- send / receive ----------
+
+    def publish(self, tags):
+        tags = [str(tag) for tag in tags]
+        if not tags:
+            return
+        self.ensure_started()
+        try:
+            self.transport.publish(tags)
+        except Exception:
+            logger.exception('Failed to publish invalidation %s', tags)
+            with self._lock:
+                self._stats['errors'] += 1
+            return
+        with self._lock:
+            self._stats['published'] += 1
+
+    def publish_change(self, kind, ident):
+        self.publish([f'{CHANGE_PREFIX}{kind}:{ident}'])
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                batches, gap = self.transport.poll(self._stop)
+            except Exception:
+                if self._stop.is_set():
+                    return
+                logger.exception('Invalidation bus receive failed')
+                with self._lock:
+                    self._stats['errors'] += 1
+                    self._needs_resync = True
+                self._stop.wait(1.0)
+                continue
+
+            now = time.monotonic()
+            if gap or self._needs_resync or now - self._last_ok > self.max_staleness:
+                self._resync()
+            self._last_ok = now
+            for tags in batches:
+                self._deliver(tags)
+
+    def _deliver(self, tags):
+        with self._lock:
+            self._stats['received'] += 1
+        for handler in self._subscribers:
+            try:
+                handler(tags)
+            except Exception:
+                logger.exception('Invalidation handler failed for %s', tags)
+
+    def _resync(self):
+        with self._lock:
+            self._needs_resync = False
+            self._stats['resyncs'] += 1
+        for handler in self._resync_handlers:
+            try:
+                handler()
+            except Exception:
+                logger.exception('Cache resync failed')
+
+    def is_fresh(self):
+        """Whether every invalidation older than max_staleness has been applied."""
+        if self._thread is None or self._last_ok is None:
+            return True
+        return not self._needs_resync and time.monotonic() - self._last_ok <= self.max_staleness
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['lag_seconds'] = round(time.monotonic() - self._last_ok, 3) if self._last_ok else None
+        stats['fresh'] = self.is_fresh()
+        return stats
+
+
+def publish_tags(app, tags):
+    """Send tags to the other workers if the app has a bus."""
+    bus = app.extensions.get('invalidation_bus')
+    if bus is not None:
+        bus.publish(tags)
+
+
+def publish_change(app, kind, ident):
+    bus = app.extensions.get('invalidation_bus')
+    if bus is not None:
+        bus.publish_change(kind, ident)
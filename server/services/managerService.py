@@ -1,11 +1,167 @@
 from sqlalchemy import text
 from flask import jsonify, current_app, request
+import base64
+import json
+import logging
+
+from .changeEvents import notify_change
+from .engineRouting import get_engine, read_only
+from .responseCache import invalidate_tags
+
+logger = logging.getLogger(__name__)
+
+URGENCY_RANK_SQL = "CASE e.urgency WHEN 'low' THEN 0 WHEN 'medium' THEN 1 ELSE 2 END"
+URGENCY_RANKS = {'low': 0, 'medium': 1, 'high': 2}
+MATCH_COUNT_SQL = "(SELECT COUNT(*) FROM matches m WHERE m.event_id = e.id)"
+
+
+class EventListingQuery:
+    """Builds the SQL for an organizer's event listing.
+
+    Filters and ordering run in MySQL on the (ownerid, date, urgency) index.
+    Pagination is keyset based: the cursor carries the last row's sort value
+    and id, and one extra row is fetched to tell whether there is more.
+    """
+
+    SORT_KEYS = {
+        'date': 'e.date',
+        'urgency': URGENCY_RANK_SQL,
+        'name': 'e.name',
+        'created_at': 'e.created_at',
+    }
+    EVENT_STATUSES = ('upcoming', 'past', 'open', 'full')
+    MAX_LIMIT = 200
+
+    def __init__(self, owner_id, urgency=None, date_from=None, date_to=None, event_status=None,
+                 sort='date', limit=None, cursor=None):
+        self.owner_id = owner_id
+        self.urgency = [urgency] if isinstance(urgency, str) else list(urgency or [])
+        self.date_from = date_from
+        self.date_to = date_to
+        self.event_status = event_status
+        self.descending = sort.startswith('-')
+        self.sort = sort.lstrip('-')
+        self.limit = limit
+        self.cursor = cursor
+
+    @classmethod
+    def from_request(cls, owner_id, body):
+        """Validate listing options from a request body; raises ValueError."""
+        query = cls(
+            owner_id,
+            urgency=body.get('urgency'),
+            date_from=body.get('date_from'),
+            date_to=body.get('date_to'),
+            event_status=body.get('event_status'),
+            sort=body.get('sort') or 'date',
+            limit=body.get('limit'),
+            cursor=body.get('cursor'),
+        )
+        for level in query.urgency:
+            if level not in URGENCY_RANKS:
+                raise ValueError(f'Invalid urgency: {level}')
+        if query.event_status is not None and query.event_status not in cls.EVENT_STATUSES:
+            raise ValueError(f'Invalid event_status: {query.event_status}')
+        if query.sort not in cls.SORT_KEYS:
+            raise ValueError(f'Invalid sort key: {query.sort}')
+        if query.limit is not None:
+            if isinstance(query.limit, bool) or not isinstance(query.limit, int) \
+                    or not 1 <= query.limit <= cls.MAX_LIMIT:
+                raise ValueError(f'limit must be between 1 and {cls.MAX_LIMIT}')
+        if query.cursor is not None:
+            query.cursor = cls.decode_cursor(query.cursor)
+        return query
+
+    @staticmethod
+    def encode_cursor(sort_value, event_id):
+        raw = json.dumps([sort_value, event_id], default=str).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            sort_value, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return sort_value, int(event_id)
+        except (ValueError, TypeError, AttributeError):
+            raise ValueError('Invalid cursor')
+
+    def build(self):
+        """Return (sql, params)."""
+        sort_expr = self.SORT_KEYS[self.sort]
+        columns = [f"{sort_expr} AS sort_value"]
+        where = ["e.ownerid = :owner_id"]
+        params = {"owner_id": self.owner_id}
+
+        if self.urgency:
+            names = []
+            for i, level in enumerate(self.urgency):
+                names.append(f":urgency_{i}")
+                params[f"urgency_{i}"] = level
+            where.append(f"e.urgency IN ({', '.join(names)})")
+        if self.date_from:
+            where.append("e.date >= :date_from")
+            params["date_from"] = self.date_from
+        if self.date_to:
+            where.append("e.date <= :date_to")
+            params["date_to"] = self.date_to
+        if self.event_status == 'upcoming':
+            where.append("e.date >= CURRENT_DATE")
+        elif self.event_status == 'past':
+            where.append("e.date < CURRENT_DATE")
+        elif self.event_status in ('open', 'full'):
+            columns.append(f"{MATCH_COUNT_SQL} AS current_volunteers")
+            op = '<' if self.event_status == 'open' else '>='
+            where.append(f"{MATCH_COUNT_SQL} {op} e.max_volunteers")
+
+        direction = 'DESC' if self.descending else 'ASC'
+        if self.cursor is not None:
+            op = '<' if self.descending else '>'
+            where.append(f"({sort_expr} {op} :cursor_value OR "
+                         f"({sort_expr} = :cursor_value AND e.id {op} :cursor_id))")
+            params["cursor_value"], params["cursor_id"] = self.cursor
+
+        sql = f"""
+            SELECT e.*, {', '.join(columns)}
+            FROM events e
+            WHERE {' AND '.join(where)}
+            ORDER BY {sort_expr} {direction}, e.id {direction}
+        """
+        if self.limit is not None:
+            sql += " LIMIT :limit"
+            params["limit"] = self.limit + 1
+        return sql, params
+
+    def page(self, rows):
+        """Split fetched rows into (events, has_more, next_cursor)."""
+        rows = list(rows)
+        has_more = self.limit is not None and len(rows) > self.limit
+        if has_more:
+            rows = rows[:self.limit]
+        events = []
+        for row in rows:
+            event = dict(row)
+            event.pop('sort_value')
+            events.append(event)
+        next_cursor = None
+        if has_more:
+            next_cursor = self.encode_cursor(rows[-1]['sort_value'], rows[-1]['id'])
+        return events, has_more, next_cursor
+
 
 class ManagerEventService:
     
     @staticmethod
+    @read_only
     def fetch_events(status=None):
-        engine = current_app.config["ENGINE"]
+        """List an organizer's events.
+
+        Optional body fields: urgency (value or list), date_from, date_to,
+        event_status ('upcoming'|'past'|'open'|'full'), sort (key, '-' prefix
+        for descending), limit and cursor. With a limit the response is
+        {events, has_more, next_cursor}; otherwise the plain list.
+        The `status` argument is the legacy urgency filter.
+        """
+        engine = get_engine()
         
         body = request.get_json()
         user_id = body.get('userId')
@@ -13,21 +169,25 @@ class ManagerEventService:
         if not user_id:
             return jsonify({'message': 'User is not sign in'}), 400
 
+        try:
+            query = EventListingQuery.from_request(user_id, body)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        if status:
+            query.urgency = [status]
+
         with engine.connect() as conn:
             user = conn.execute(text("SELECT * FROM admins WHERE user_id = :id"), {'id': user_id}).mappings().first()
             if not user:
                 return jsonify({'message': 'Unauthorized'}), 403
 
-            events = conn.execute(text("SELECT * FROM events WHERE ownerid = :user_id"), {'user_id': user_id}).mappings().all()
-
-            # Convert RowMapping objects to dictionaries
-            events_list = [dict(event) for event in events]
+            sql, params = query.build()
+            rows = conn.execute(text(sql), params).mappings().all()
 
-            if status:
-                filtered_events = [event for event in events_list if event['urgency'] == status]
-                return jsonify(filtered_events), 200
-            
-            return jsonify(events_list), 200
+        events, has_more, next_cursor = query.page(rows)
+        if query.limit is None:
+            return jsonify(events), 200
+        return jsonify({'events': events, 'has_more': has_more, 'next_cursor': next_cursor}), 200
 
     @staticmethod
     def create_event(data):
@@ -68,7 +228,9 @@ class ManagerEventService:
                 new_event['id'] = result.lastrowid
             except Exception as e:
                 return jsonify({'message': 'Error creating event', 'error': str(e)}), 500
-                
+
+        notify_change('event', new_event['id'])
+        invalidate_tags('events', f"event:{new_event['id']}")
         return jsonify(new_event), 201
     
     @staticmethod
@@ -110,9 +272,11 @@ class ManagerEventService:
                 updated_event = conn.execute(text("SELECT * FROM events WHERE id = :id"), {'id': event_id}).mappings().first()
 
             except Exception as e:
-                print(e)
+                logger.exception('Updating event %s failed', event_id)
                 return jsonify({'message': 'Error updating event', 'error': str(e)}), 500
 
+        notify_change('event', updated_event['id'])
+        invalidate_tags('events', f"event:{updated_event['id']}")
         return jsonify(dict(updated_event)), 200
     
     @staticmethod
@@ -133,5 +297,7 @@ class ManagerEventService:
             
             conn.execute(text("DELETE FROM events WHERE id = :id"), {'id': event_id})
             conn.commit()
-        
+
+        notify_change('event', event['id'])
+        invalidate_tags('events', f"event:{event['id']}", 'matches', f"matches:{event['id']}")
         return jsonify({'message': 'Event deleted successfully'}), 200
\ No newline at end of file
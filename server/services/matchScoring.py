@@ -0,0 +1,379 @@
+"""
+Vectorized volunteer/event match scoring.
+
+A ScoringContext loads everything the scorers need for a set of volunteers and
+candidate events in a handful of queries, then scores any (volunteer, event)
+pairs - one volunteer, a batch, or the full volunteer x event matrix used by an
+assignment engine - without going back to the database.
+
+Each scorer takes the context plus two aligned index arrays (volunteer rows,
+event rows) and returns a float array in [0, 1]. The final score is the
+per-organizer weighted sum of the components.
+"""
+
+import json
+import re
+
+import numpy as np
+from sqlalchemy import bindparam, text
+
+SCORERS = {}
+DEFAULT_WEIGHTS = {}
+
+URGENCY_LEVELS = {'low': 0.0, 'medium': 0.5, 'high': 1.0}
+DAY_NAMES = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+AVAILABILITY_LABELS = {
+    'weekdays': [0, 1, 2, 3, 4],
+    'weekends': [5, 6],
+}
+# Confirmed registrations after which past attendance stops adding to the score
+ATTENDANCE_SATURATION = 5.0
+
+LOCATION_RE = re.compile(r'([A-Za-z .\'-]+),\s*([A-Z]{2})\b(?:\s*\d{5})?\s*$')
+
+
+def register_scorer(name, default_weight=0.0):
+    """Register a scorer component under `name` with its default weight."""
+    def decorator(fn):
+        SCORERS[name] = fn
+        DEFAULT_WEIGHTS[name] = float(default_weight)
+        return fn
+    return decorator
+
+
+# The defaults reproduce the original model: percentage of required skills
+# covered (volunteer_skills only), plus 10 points when the volunteer's
+# availability appears in the event's time label. The other components,
+# including the profile-skill and weekday variants, default to 0.
+
+def _coverage(volunteer_skills, ctx, ei):
+    required = ctx.required_counts[ei]
+    matched = np.count_nonzero(volunteer_skills & ctx.event_skills[ei], axis=1)
+    return np.divide(matched, required, out=np.zeros(len(ei)), where=required > 0)
+
+
+@register_scorer('skills', default_weight=100)
+def skill_coverage(ctx, vi, ei):
+    """Fraction of the event's required skills in the volunteer's volunteer_skills."""
+    return _coverage(ctx.volunteer_skills[vi], ctx, ei)
+
+
+@register_scorer('profile_skills')
+def profile_skill_coverage(ctx, vi, ei):
+    """Fraction of required skills covered by volunteer_skills plus profile (user_skills) skills."""
+    return _coverage(ctx.volunteer_skills[vi] | ctx.profile_skills[vi], ctx, ei)
+
+
+@register_scorer('urgency')
+def urgency_weight(ctx, vi, ei):
+    """Event urgency mapped to 0 (low), 0.5 (medium), 1 (high)."""
+    return ctx.event_urgency[ei]
+
+
+@register_scorer('availability', default_weight=10)
+def availability_label(ctx, vi, ei):
+    """1 when the volunteer's availability text appears in the event's time label."""
+    labels, availability = ctx.event_time_label, ctx.volunteer_availability
+    return np.array([availability[v] is not None and availability[v] in labels[e]
+                     for v, e in zip(vi.tolist(), ei.tolist())], dtype=np.float64)
+
+
+@register_scorer('weekday')
+def availability_overlap(ctx, vi, ei):
+    """1 when the volunteer is available on the event's weekday."""
+    return ctx.volunteer_days[vi, ctx.event_weekday[ei]].astype(np.float64)
+
+
+@register_scorer('distance')
+def distance(ctx, vi, ei):
+    """Coarse locality: 1 for the same city, 0.5 for the same state."""
+    vol_city, evt_city = ctx.volunteer_city[vi], ctx.event_city[ei]
+    vol_state, evt_state = ctx.volunteer_state[vi], ctx.event_state[ei]
+    same_city = (vol_city >= 0) & (vol_city == evt_city)
+    same_state = (vol_state >= 0) & (vol_state == evt_state)
+    return np.where(same_city, 1.0, np.where(same_state, 0.5, 0.0))
+
+
+@register_scorer('attendance')
+def past_attendance(ctx, vi, ei):
+    """Confirmed registrations, saturating at ATTENDANCE_SATURATION."""
+    return np.minimum(ctx.volunteer_attended[vi] / ATTENDANCE_SATURATION, 1.0)
+
+
+@register_scorer('reliability')
+def reliability(ctx, vi, ei):
+    """Smoothed share of claimed tasks the volunteer completed."""
+    return (ctx.volunteer_completed[vi] + 1.0) / (ctx.volunteer_tasks[vi] + 2.0)
+
+
+def parse_location(location):
+    """Extract (city, state) from an address like '..., Houston, TX 77029'."""
+    match = LOCATION_RE.search(location or '')
+    if not match:
+        return None, None
+    return match.group(1).strip().lower(), match.group(2).upper()
+
+
+def availability_days(label, profile_days=None):
+    """Weekday mask (Monday first) from profile days or the volunteer's label."""
+    if isinstance(profile_days, str):
+        try:
+            profile_days = json.loads(profile_days)
+        except ValueError:
+            profile_days = None
+    mask = np.zeros(7, dtype=bool)
+    if profile_days:
+        for day in profile_days:
+            day = str(day).strip().lower()
+            if day in DAY_NAMES:
+                mask[DAY_NAMES.index(day)] = True
+        if mask.any():
+            return mask
+    label = (label or '').strip().lower()
+    if label in AVAILABILITY_LABELS:
+        mask[AVAILABILITY_LABELS[label]] = True
+    elif label in DAY_NAMES:
+        mask[DAY_NAMES.index(label)] = True
+    else:
+        # 'flexible', 'evenings' and free-form values don't restrict the day
+        mask[:] = True
+    return mask
+
+
+def availability_sql(weekdays):
+    """WHERE condition over `volunteers v LEFT JOIN profiles p` matching the
+    volunteers whose availability_days() includes any of `weekdays`, and its
+    bind parameters."""
+    params = {}
+
+    def listed(days, prefix):
+        terms = []
+        for day in days:
+            params[f'{prefix}{day}'] = f'%"{DAY_NAMES[day]}"%'
+            terms.append(f"LOWER(CAST(COALESCE(p.availability, '') AS CHAR)) LIKE :{prefix}{day}")
+        return '(' + ' OR '.join(terms) + ')'
+
+    def names(values, prefix):
+        for i, value in enumerate(values):
+            params[f'{prefix}{i}'] = value
+        return ', '.join(f':{prefix}{i}' for i in range(len(values)))
+
+    weekdays = sorted(set(weekdays))
+    any_day = listed(range(7), 'avail_any_')
+    wanted = listed(weekdays, 'avail_day_')
+    labels = [label for label, days in AVAILABILITY_LABELS.items() if set(days) & set(weekdays)]
+    labels += [DAY_NAMES[day] for day in weekdays]
+    label = "LOWER(TRIM(COALESCE(v.availability, '')))"
+    by_label = (f"({label} IN ({names(labels, 'avail_label_')})"
+                f" OR {label} NOT IN ({names(list(AVAILABILITY_LABELS) + DAY_NAMES, 'avail_known_')}))")
+    # Profile days win when they name any day; otherwise the label decides
+    return f"(({any_day} AND {wanted}) OR (NOT {any_day} AND {by_label}))", params
+
+
+def load_weights(conn, owner_ids):
+    """Return {owner_id: {scorer: weight}} with defaults filled in."""
+    weights = {owner_id: dict(DEFAULT_WEIGHTS) for owner_id in owner_ids}
+    if not weights:
+        return weights
+    rows = conn.execute(
+        text("SELECT owner_id, scorer, weight FROM scoring_weights WHERE owner_id IN :owners")
+        .bindparams(bindparam('owners', expanding=True)),
+        {"owners": list(weights)}
+    ).mappings().all()
+    for row in rows:
+        if row['scorer'] in SCORERS:
+            weights[row['owner_id']][row['scorer']] = float(row['weight'])
+    return weights
+
+
+def _codes(values, vocabulary):
+    """Map strings to integer codes shared across volunteers and events; -1 for missing."""
+    return np.array(
+        [vocabulary.setdefault(v, len(vocabulary)) if v else -1 for v in values],
+        dtype=np.int64,
+    )
+
+
+class ScoringContext:
+    """Feature arrays for a set of volunteers and candidate events."""
+
+    def __init__(self, volunteers, volunteer_skill_ids, events, event_skill_ids, weights,
+                 profile_skill_ids=None):
+        self.volunteers = volunteers
+        self.events = events
+        self.volunteer_index = {v['id']: i for i, v in enumerate(volunteers)}
+        self.event_index = {e['id']: i for i, e in enumerate(events)}
+        profile_skill_ids = profile_skill_ids or {}
+
+        skill_ids = sorted({s for ids in volunteer_skill_ids.values() for s in ids}
+                           | {s for ids in profile_skill_ids.values() for s in ids}
+                           | {s for ids in event_skill_ids.values() for s in ids})
+        skill_col = {s: i for i, s in enumerate(skill_ids)}
+
+        def skill_matrix(assignments):
+            matrix = np.zeros((len(volunteers), len(skill_ids)), dtype=bool)
+            for vol_id, ids in assignments.items():
+                if vol_id in self.volunteer_index:
+                    matrix[self.volunteer_index[vol_id], [skill_col[s] for s in ids]] = True
+            return matrix
+
+        self.volunteer_skills = skill_matrix(volunteer_skill_ids)
+        self.profile_skills = skill_matrix(profile_skill_ids)
+
+        self.event_skills = np.zeros((len(events), len(skill_ids)), dtype=bool)
+        for event_id, ids in event_skill_ids.items():
+            if event_id in self.event_index:
+                self.event_skills[self.event_index[event_id], [skill_col[s] for s in ids]] = True
+        self.required_counts = self.event_skills.sum(axis=1)
+
+        self.volunteer_availability = [
+            v['availability'].lower() if v.get('availability') is not None else None for v in volunteers
+        ]
+        self.volunteer_days = np.array(
+            [availability_days(v['availability'], v['profile_availability']) for v in volunteers],
+            dtype=bool,
+        ).reshape(len(volunteers), 7)
+        self.volunteer_attended = np.array([v['attended'] or 0 for v in volunteers], dtype=np.float64)
+        self.volunteer_tasks = np.array([v['tasks'] or 0 for v in volunteers], dtype=np.float64)
+        self.volunteer_completed = np.array([v['completed'] or 0 for v in volunteers], dtype=np.float64)
+
+        # 1970-01-01 was a Thursday, so shifting by 3 makes Monday 0
+        dates = np.array([e['date'] for e in events], dtype='datetime64[D]')
+        self.event_day = dates.astype(np.int64)
+        self.event_weekday = (self.event_day + 3) % 7
+        self.event_time_label = [(e.get('time_label') or '').lower() for e in events]
+        self.event_urgency = np.array(
+            [URGENCY_LEVELS.get(e['urgency'], 0.0) for e in events], dtype=np.float64
+        )
+
+        cities, states = {}, {}
+        event_places = [parse_location(e['location']) for e in events]
+        self.volunteer_city = _codes([(v['city'] or '').strip().lower() for v in volunteers], cities)
+        self.volunteer_state = _codes([(v['state'] or '').upper() for v in volunteers], states)
+        self.event_city = _codes([c for c, _ in event_places], cities)
+        self.event_state = _codes([s for _, s in event_places], states)
+
+        self.scorer_names = list(SCORERS)
+        self.weights = np.array(
+            [[weights.get(e['ownerid'], DEFAULT_WEIGHTS).get(name, DEFAULT_WEIGHTS[name])
+              for name in self.scorer_names] for e in events],
+            dtype=np.float64,
+        ).reshape(len(events), len(self.scorer_names))
+
+    @classmethod
+    def load(cls, conn, volunteer_ids, admin_id=None, event_ids=None):
+        """Load volunteers and the open events (optionally one organizer's, or only
+        `event_ids`) they can be matched to."""
+        volunteer_ids = list(volunteer_ids)
+        volunteers, volunteer_skill_ids, profile_skill_ids = [], {}, {}
+        if volunteer_ids:
+            volunteers = conn.execute(text("""
+                SELECT v.id, v.availability, p.availability AS profile_availability, p.city, p.state,
+                       (SELECT COUNT(*) FROM matches m
+                         WHERE m.volunteer_id = v.id AND m.status = 'confirmed') AS attended,
+                       (SELECT COUNT(*) FROM history_tasks ht WHERE ht.volunteer_id = v.id) AS tasks,
+                       (SELECT COUNT(*) FROM history_tasks ht
+                         WHERE ht.volunteer_id = v.id AND ht.completed = 1) AS completed
+                FROM volunteers v
+                LEFT JOIN profiles p ON p.user_id = v.user_id
+                WHERE v.id IN :ids
+                ORDER BY v.id
+            """).bindparams(bindparam('ids', expanding=True)), {"ids": volunteer_ids}).mappings().all()
+
+            rows = conn.execute(text("""
+                SELECT 'volunteer', vs.volunteer_id, vs.skill_id FROM volunteer_skills vs
+                WHERE vs.volunteer_id IN :ids
+                UNION ALL
+                SELECT 'profile', v.id, us.skill_id FROM volunteers v
+                JOIN user_skills us ON us.user_id = v.user_id
+                WHERE v.id IN :ids
+            """).bindparams(bindparam('ids', expanding=True)), {"ids": volunteer_ids}).all()
+            for source, vol_id, skill_id in rows:
+                target = volunteer_skill_ids if source == 'volunteer' else profile_skill_ids
+                target.setdefault(vol_id, set()).add(skill_id)
+
+        query = """
+            SELECT e.*, GROUP_CONCAT(DISTINCT s.name) AS required_skills,
+                   COUNT(DISTINCT m.id) AS current_volunteers
+            FROM events e
+            LEFT JOIN event_requirements er ON e.id = er.event_id
+            LEFT JOIN skills s ON er.skill_id = s.id
+            LEFT JOIN matches m ON e.id = m.event_id
+        """
+        filters, params = [], {}
+        if admin_id:
+            filters.append("e.ownerid = :admin_id")
+            params["admin_id"] = admin_id
+        if event_ids is not None:
+            filters.append("e.id IN :event_ids")
+            params["event_ids"] = list(event_ids) or [None]
+        if filters:
+            query += " WHERE " + " AND ".join(filters)
+        query += """
+            GROUP BY e.id
+            HAVING current_volunteers < e.max_volunteers
+        """
+        stmt = text(query)
+        if event_ids is not None:
+            stmt = stmt.bindparams(bindparam('event_ids', expanding=True))
+        events = conn.execute(stmt, params).mappings().all()
+
+        event_skill_ids = {}
+        if events:
+            rows = conn.execute(
+                text("SELECT event_id, skill_id FROM event_requirements WHERE event_id IN :ids")
+                .bindparams(bindparam('ids', expanding=True)),
+                {"ids": [e['id'] for e in events]}
+            ).all()
+            for event_id, skill_id in rows:
+                event_skill_ids.setdefault(event_id, set()).add(skill_id)
+
+        weights = load_weights(conn, {e['ownerid'] for e in events})
+        return cls(volunteers, volunteer_skill_ids, events, event_skill_ids, weights, profile_skill_ids)
+
+    def score_pairs(self, vi, ei, components=False):
+        """Weighted score for aligned volunteer/event row indices.
+
+        With components=True also returns {scorer: unweighted component array}.
+        """
+        vi = np.asarray(vi, dtype=np.intp)
+        ei = np.asarray(ei, dtype=np.intp)
+        total = np.zeros(len(vi), dtype=np.float64)
+        parts = {}
+        for k, name in enumerate(self.scorer_names):
+            weight = self.weights[ei, k]
+            if not components and not weight.any():
+                continue
+            part = SCORERS[name](self, vi, ei)
+            total += weight * part
+            parts[name] = part
+        return (total, parts) if components else total
+
+    def score_matrix(self):
+        """Scores for every volunteer x event combination, shape (volunteers, events)."""
+        nv, ne = len(self.volunteers), len(self.events)
+        vi = np.repeat(np.arange(nv), ne)
+        ei = np.tile(np.arange(ne), nv)
+        return self.score_pairs(vi, ei).reshape(nv, ne)
+
+    def skill_overlap(self):
+        """Boolean (volunteers, events) matrix: volunteer has at least one required skill,
+        counting profile skills."""
+        skills = self.volunteer_skills | self.profile_skills
+        return (skills.astype(np.int32) @ self.event_skills.T.astype(np.int32)) > 0
+
+    def score_volunteer(self, vol_id):
+        """Scores of every candidate event for one volunteer."""
+        ne = len(self.events)
+        vi = np.full(ne, self.volunteer_index[vol_id])
+        return self.score_pairs(vi, np.arange(ne))
+
+    def best_event(self, vol_id):
+        """Return (event_row, score) of the top event for a volunteer, or (None, 0)."""
+        if vol_id not in self.volunteer_index or not self.events:
+            return None, 0
+        scores = self.score_volunteer(vol_id)
+        best = int(np.argmax(scores))
+        if scores[best] <= 0:
+            return None, 0
+        return self.events[best], round(float(scores[best]), 2)
@@ -1,14 +1,17 @@
 from sqlalchemy import text
 from flask import jsonify, current_app
-from datetime import datetime
+
+from .engineRouting import get_engine, read_only
+from .serialization import json_rows
 
 class NotificationService:
     """Service for managing notifications"""
     
     @staticmethod
+    @read_only
     def get_notifications(user_id=None, unread_only=False):
         """Get notifications, optionally filtered by user and read status"""
-        engine = current_app.config["ENGINE"]
+        engine = get_engine()
         
         with engine.connect() as conn:
             if unread_only:
@@ -17,15 +20,15 @@ class NotificationService:
                     FROM notifications
                     WHERE user_id = :user_id AND is_read = FALSE
                     ORDER BY created_at DESC
-                """), {"user_id": user_id}).mappings().all()
+                """), {"user_id": user_id}).all()
             else:
                 result = conn.execute(text("""
                     SELECT id, user_id, type, message, is_read, created_at 
                     FROM notifications
                     WHERE user_id = :user_id
                     ORDER BY created_at DESC
-                """), {"user_id": user_id}).mappings().all()
-        return jsonify([dict(row) for row in result]), 200
+                """), {"user_id": user_id}).all()
+        return json_rows(result), 200
     
     @staticmethod
     def get_all_notifications(user_id=None):
@@ -39,9 +42,10 @@ class NotificationService:
         return NotificationService.get_notifications(user_id, unread_only=True)
     
     @staticmethod
+    @read_only
     def get_notification_by_id(notification_id):
         """Get a specific notification by ID"""
-        engine = current_app.config["ENGINE"]
+        engine = get_engine()
         with engine.connect() as conn:
             result = conn.execute(text("SELECT * FROM notifications WHERE id = :notification_id"), {"notification_id": notification_id}).mappings().first()
         
@@ -148,9 +152,10 @@ class NotificationService:
         return NotificationService.delete_all_read_notifications(user_id)
     
     @staticmethod
+    @read_only
     def get_notification_count(user_id=None):
         """Get notification counts"""
-        engine = current_app.config["ENGINE"]
+        engine = get_engine()
         with engine.connect() as conn:
             result = conn.execute(text("""
                 SELECT 
@@ -1,6 +1,16 @@
 from sqlalchemy import text
-from flask import jsonify, current_app, request
+from flask import jsonify, current_app
 import json
+import logging
+
+from .changeEvents import notify_change
+from .responseCache import invalidate_tags
+from .sqlDialect import insert_ignore, upsert
+
+logger = logging.getLogger(__name__)
+
+PROFILE_COLUMNS = ("user_id", "full_name", "address1", "address2", "city", "state", "zip",
+                   "preferences", "availability")
 
 class ProfileService:
     @staticmethod
@@ -244,7 +254,7 @@ class ProfileService:
     def update_profile_legacy(data):
         user_id = data.get('userId')
 
-        print(data)
+        logger.debug('Legacy profile update', extra={'user_id': user_id, 'fields': sorted(data)})
         
         try:
             # Validate required
@@ -272,14 +282,7 @@ class ProfileService:
                 if not user_exists:
                     return {"error": f"User with ID {user_id} not found"}, 404
                     
-                conn.execute(text("""
-                    INSERT INTO profiles (user_id, full_name, address1, address2, city, state, zip, preferences, availability)
-                    VALUES (:user_id, :full_name, :address1, :address2, :city, :state, :zip, :preferences, :availability)
-                    ON DUPLICATE KEY UPDATE
-                    full_name=VALUES(full_name), address1=VALUES(address1), address2=VALUES(address2),
-                    city=VALUES(city), state=VALUES(state), zip=VALUES(zip),
-                    preferences=VALUES(preferences), availability=VALUES(availability)
-                """), {
+                conn.execute(upsert(conn, "profiles", PROFILE_COLUMNS, keys=("user_id",)), {
                     "user_id": user_id,
                     "full_name": data['fullName'],
                     "address1": data['address1'],
@@ -296,7 +299,7 @@ class ProfileService:
                 
                 for skill in data.get('skills', []):
                     # Insert skill if it doesn't exist
-                    conn.execute(text("INSERT IGNORE INTO skills (name) VALUES (:name)"), {"name": skill})
+                    conn.execute(insert_ignore(conn, "skills", ("name",)), {"name": skill})
                     
                     # Get skill ID
                     skill_row = conn.execute(
@@ -307,10 +310,12 @@ class ProfileService:
                     if skill_row:
                         skill_id = skill_row[0]
                         conn.execute(
-                            text("INSERT IGNORE INTO user_skills (user_id, skill_id) VALUES (:user_id, :skill_id)"), 
+                            insert_ignore(conn, "user_skills", ("user_id", "skill_id")),
                             {"user_id": user_id, "skill_id": skill_id}
                         )
 
+            notify_change('user', user_id)
+            invalidate_tags('skills', 'leaderboard')
             return {"message": "Profile saved!"}, 200
         except Exception as e:
             return {"error": str(e)}, 500
\ No newline at end of file
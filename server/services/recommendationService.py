@@ -0,0 +1,333 @@
+"""
+Precomputed per-volunteer event recommendations.
+
+Write paths report what changed (an event, a volunteer, an event filling up)
+through changeEvents.notify_change(). The RecommendationMaterializer collects those deltas,
+works out which volunteers they affect, and rewrites only those volunteers'
+top-N rows in volunteer_recommendations in batches on a background thread.
+Every refresh also stamps volunteer_recommendation_state, so a volunteer
+whose list came out empty is told apart from one never materialized.
+The read path is a single indexed query; for a volunteer not materialized
+yet it computes the list without storing it and queues the volunteer.
+"""
+
+import datetime
+import logging
+import threading
+import time
+
+import numpy as np
+from flask import current_app, jsonify
+from sqlalchemy import bindparam, text
+
+from .changeEvents import add_change_listener
+from .engineRouting import get_engine, read_only
+from .matchScoring import ScoringContext
+from .serialization import json_rows
+from .sqlDialect import upsert
+
+logger = logging.getLogger(__name__)
+
+# Delta kinds, see changeEvents
+CHANGE_KINDS = ('event', 'event_full', 'volunteer', 'user')
+
+
+class RecommendationMaterializer:
+    """Keeps volunteer_recommendations up to date from change deltas."""
+
+    def __init__(self, engine=None, top_n=20, batch_size=500, flush_interval=0.5,
+                 chunk_size=200, retry_interval=5.0, autostart=True):
+        self.engine = engine
+        self.top_n = top_n
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.chunk_size = chunk_size
+        self.retry_interval = retry_interval
+        self.autostart = autostart
+
+        self._pending = {}  # (kind, id) -> monotonic time first enqueued
+        self._cond = threading.Condition()
+        self._process_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._started_at = time.monotonic()
+        self._stats = {
+            'batches': 0,
+            'deltas_processed': 0,
+            'volunteers_recomputed': 0,
+            'busy_seconds': 0.0,
+            'errors': 0,
+            'last_batch': None,
+        }
+
+    def init_app(self, app):
+        """Attach to a Flask app; uses its ENGINE unless one was given."""
+        if self.engine is None:
+            self.engine = app.config["ENGINE"]
+        self.top_n = app.config.get("RECOMMENDATIONS_TOP_N", self.top_n)
+        app.extensions['recommendations'] = self
+        add_change_listener(app, self.notify)
+        return self
+
+    # ---------- producer side ----------
+
+    def notify(self, kind, ident):
+        """Queue a change delta; duplicates collapse into the oldest entry."""
+        if kind not in CHANGE_KINDS:
+            raise ValueError(f'Unknown change kind: {kind}')
+        with self._cond:
+            self._pending.setdefault((kind, int(ident)), time.monotonic())
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        if self.autostart and self._thread is None:
+            self.start()
+
+    def start(self):
+        """Start the background worker thread."""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name='recommendation-materializer', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Drain pending deltas and stop the worker."""
+        with self._cond:
+            thread = self._thread
+            self._stopping = True
+            self._cond.notify()
+        if thread is not None:
+            thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping and not self._pending:
+                    return
+                # Give deltas a moment to accumulate into a batch
+                if len(self._pending) < self.batch_size and not self._stopping:
+                    self._cond.wait(self.flush_interval)
+                stopping = self._stopping
+            if not self.process_pending():
+                if stopping:
+                    # Leave the failed deltas queued rather than spin on shutdown
+                    return
+                # Failed batch was re-queued; back off before retrying
+                with self._cond:
+                    self._cond.wait(self.retry_interval)
+
+    # ---------- consumer side ----------
+
+    def process_pending(self):
+        """Apply one batch of pending deltas. Returns the number processed."""
+        with self._process_lock:
+            with self._cond:
+                batch = sorted(self._pending.items(), key=lambda item: item[1])[:self.batch_size]
+                for key, _ in batch:
+                    del self._pending[key]
+            if not batch:
+                return 0
+
+            started = time.monotonic()
+            try:
+                with self.engine.begin() as conn:
+                    volunteer_ids = self._affected_volunteers(conn, [key for key, _ in batch])
+                    for i in range(0, len(volunteer_ids), self.chunk_size):
+                        self.refresh_volunteers(conn, volunteer_ids[i:i + self.chunk_size])
+            except Exception:
+                logger.exception('Recommendation batch failed; re-queueing %d deltas', len(batch))
+                with self._cond:
+                    for key, enqueued_at in batch:
+                        self._pending.setdefault(key, enqueued_at)
+                    self._stats['errors'] += 1
+                return 0
+
+            finished = time.monotonic()
+            with self._cond:
+                self._stats['batches'] += 1
+                self._stats['deltas_processed'] += len(batch)
+                self._stats['volunteers_recomputed'] += len(volunteer_ids)
+                self._stats['busy_seconds'] += finished - started
+                self._stats['last_batch'] = {
+                    'deltas': len(batch),
+                    'volunteers': len(volunteer_ids),
+                    'duration_ms': round((finished - started) * 1000, 2),
+                    'max_lag_ms': round((finished - batch[0][1]) * 1000, 2),
+                }
+            return len(batch)
+
+    def process_all(self):
+        """Apply every pending delta synchronously."""
+        total = 0
+        while True:
+            processed = self.process_pending()
+            if not processed:
+                return total
+            total += processed
+
+    def _affected_volunteers(self, conn, keys):
+        """Resolve a batch of deltas to the sorted volunteer ids needing recomputation."""
+        ids = {kind: [ident for k, ident in keys if k == kind] for kind in CHANGE_KINDS}
+        affected = set(ids['volunteer'])
+
+        def run(sql, values):
+            if not values:
+                return []
+            stmt = text(sql).bindparams(bindparam('ids', expanding=True))
+            return [row[0] for row in conn.execute(stmt, {"ids": values})]
+
+        affected.update(run("SELECT id FROM volunteers WHERE user_id IN :ids", ids['user']))
+        # Volunteers currently holding a changed or filled event
+        affected.update(run(
+            "SELECT DISTINCT volunteer_id FROM volunteer_recommendations WHERE event_id IN :ids",
+            ids['event'] + ids['event_full'],
+        ))
+        # Volunteers who could newly qualify for a changed event
+        affected.update(run("""
+            SELECT vs.volunteer_id FROM event_requirements er
+            JOIN volunteer_skills vs ON vs.skill_id = er.skill_id
+            WHERE er.event_id IN :ids
+            UNION
+            SELECT v.id FROM event_requirements er
+            JOIN user_skills us ON us.skill_id = er.skill_id
+            JOIN volunteers v ON v.user_id = us.user_id
+            WHERE er.event_id IN :ids
+        """, ids['event']))
+        return sorted(affected)
+
+    def refresh_volunteers(self, conn, volunteer_ids):
+        """Recompute and store the top-N events for the given volunteers."""
+        volunteer_ids = list(volunteer_ids)
+        if not volunteer_ids:
+            return
+        ctx, rows = self.recommend(conn, volunteer_ids)
+        refreshed_at = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+        conn.execute(
+            text("DELETE FROM volunteer_recommendations WHERE volunteer_id IN :ids")
+            .bindparams(bindparam('ids', expanding=True)),
+            {"ids": volunteer_ids}
+        )
+        if rows:
+            conn.execute(text("""
+                INSERT INTO volunteer_recommendations (volunteer_id, slot, event_id, score)
+                VALUES (:volunteer_id, :slot, :event_id, :score)
+            """), rows)
+        if ctx.volunteers:
+            conn.execute(
+                upsert(conn, "volunteer_recommendation_state", ("volunteer_id", "refreshed_at"),
+                       keys=("volunteer_id",)),
+                [{"volunteer_id": v['id'], "refreshed_at": refreshed_at} for v in ctx.volunteers]
+            )
+
+    def recommend(self, conn, volunteer_ids):
+        """Score the given volunteers' top-N events without storing them; returns (ctx, rows)."""
+        ctx = ScoringContext.load(conn, volunteer_ids)
+        rows = []
+        if ctx.volunteers and ctx.events:
+            registered = conn.execute(
+                text("SELECT volunteer_id, event_id FROM matches WHERE volunteer_id IN :ids")
+                .bindparams(bindparam('ids', expanding=True)),
+                {"ids": volunteer_ids}
+            ).all()
+
+            scores = ctx.score_matrix()
+            eligible = ctx.skill_overlap()
+            for vol_id, event_id in registered:
+                if vol_id in ctx.volunteer_index and event_id in ctx.event_index:
+                    eligible[ctx.volunteer_index[vol_id], ctx.event_index[event_id]] = False
+            scores[~eligible] = -np.inf
+
+            for vi, volunteer in enumerate(ctx.volunteers):
+                # Highest score first, earlier events break ties
+                order = np.lexsort((ctx.event_day, -scores[vi]))[:self.top_n]
+                for slot, ei in enumerate(order[np.isfinite(scores[vi, order])]):
+                    rows.append({
+                        "volunteer_id": volunteer['id'],
+                        "slot": slot,
+                        "event_id": ctx.events[ei]['id'],
+                        "score": round(float(scores[vi, ei]), 2),
+                    })
+        return ctx, rows
+
+    def stats(self):
+        """Queue depth, lag and throughput counters."""
+        now = time.monotonic()
+        with self._cond:
+            oldest = min(self._pending.values(), default=None)
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending)
+        stats['lag_seconds'] = round(now - oldest, 3) if oldest is not None else 0.0
+        busy = stats.pop('busy_seconds')
+        stats['busy_seconds'] = round(busy, 3)
+        stats['volunteers_per_second'] = round(stats['volunteers_recomputed'] / busy, 2) if busy else 0.0
+        stats['deltas_per_second'] = round(stats['deltas_processed'] / (now - self._started_at), 2)
+        stats['running'] = self._thread is not None
+        return stats
+
+
+class RecommendationService:
+    """Read side of the recommendation materializer"""
+
+    @staticmethod
+    @read_only
+    def get_recommended_events(user_id):
+        """Get a volunteer's precomputed top event recommendations"""
+        engine = get_engine()
+        query = text("""
+            SELECT r.slot, r.score, r.refreshed_at, r.volunteer_id, e.*
+            FROM volunteers v
+            JOIN volunteer_recommendations r ON r.volunteer_id = v.id
+            JOIN events e ON e.id = r.event_id
+            WHERE v.user_id = :user_id
+            ORDER BY r.slot
+        """)
+        with engine.connect() as conn:
+            rows = conn.execute(query, {"user_id": user_id}).all()
+            if not rows:
+                volunteer = conn.execute(text("""
+                    SELECT v.id, s.refreshed_at FROM volunteers v
+                    LEFT JOIN volunteer_recommendation_state s ON s.volunteer_id = v.id
+                    WHERE v.user_id = :user_id
+                """), {"user_id": user_id}).mappings().first()
+                if not volunteer:
+                    return jsonify({'message': 'Volunteer not found'}), 404
+                materializer = current_app.extensions.get('recommendations')
+                if volunteer['refreshed_at'] is None and materializer is not None:
+                    # Cold start: answer from a fresh computation and let the materializer
+                    # store it, so reads never write. Once stored, empty means empty.
+                    materializer.notify('volunteer', volunteer['id'])
+                    _, computed = materializer.recommend(conn, [volunteer['id']])
+                    rows = RecommendationService._with_events(conn, computed)
+
+        return json_rows(rows), 200
+
+    @staticmethod
+    def _with_events(conn, computed):
+        """Computed recommendation rows shaped like the materialized read."""
+        if not computed:
+            return []
+        events = conn.execute(
+            text("SELECT * FROM events WHERE id IN :ids").bindparams(bindparam('ids', expanding=True)),
+            {"ids": [row['event_id'] for row in computed]}
+        ).mappings().all()
+        events = {event['id']: event for event in events}
+        return [
+            {'slot': row['slot'], 'score': row['score'], 'refreshed_at': None,
+             'volunteer_id': row['volunteer_id'], **events[row['event_id']]}
+            for row in computed
+        ]
+
+    @staticmethod
+    def get_metrics():
+        """Get materializer lag and throughput"""
+        materializer = current_app.extensions.get('recommendations')
+        if materializer is None:
+            return jsonify({'message': 'Recommendations are not enabled'}), 404
+        return jsonify(materializer.stats()), 200
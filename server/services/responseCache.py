@@ -0,0 +1,303 @@
+"""
+Tag-based response cache for public read endpoints.
+
+A @cached view stores its serialized response body keyed by path and query
+string, tagged with what it depends on:
+
+    events            any event's row (listings)
+    event:<id>        one event's row and requirements
+    matches           any registration (listing volunteer counts)
+    matches:<id>      registrations for one event
+    skills            the skills table
+    leaderboard       task scores and completion
+
+Write paths call invalidate_tags() with the tags they touch, which drops
+every entry carrying one of them. Entries live in a size-bounded in-process
+LRU; a shared backend (RedisBackend, when CACHE_REDIS_URL is set) lets every
+worker read the same entries and see the same invalidations. Either way
+entries expire after CACHE_TTL seconds (default 300).
+
+A miss on a tag invalidated in the last CACHE_PRIMARY_FILL_SECONDS (default
+5) is rendered from the primary: the replica may not have the write yet,
+and what it returned would stay cached until the next invalidation.
+"""
+
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, current_app, request
+
+from .engineRouting import use_primary
+from .invalidationBus import publish_tags
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_TTL = 300
+
+
+class CacheEntry:
+    __slots__ = ('body', 'status', 'mimetype', 'tags', 'expires_at')
+
+    def __init__(self, body, status, mimetype, tags, expires_at=None):
+        self.body = body
+        self.status = status
+        self.mimetype = mimetype
+        self.tags = tuple(tags)
+        self.expires_at = expires_at
+
+    @property
+    def size(self):
+        return len(self.body)
+
+
+class LRUBackend:
+    """In-process LRU bounded by total body bytes and entry count."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entries=10000):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._tags = {}  # tag -> set of keys
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, tags):
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    if key in self._entries:
+                        self._remove(key)
+                        removed += 1
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+
+class RedisBackend:
+    """Shared entries in Redis; tag sets hold the keys to drop on invalidation."""
+
+    def __init__(self, url, prefix='respcache:', ttl=DEFAULT_TTL):
+        import redis  # optional dependency, only needed for a shared cache
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key):
+        data = self.client.hgetall(self.prefix + key)
+        if not data:
+            return None
+        tags = data[b'tags'].decode().split('\n') if data.get(b'tags') else []
+        return CacheEntry(data[b'body'], int(data[b'status']), data[b'mimetype'].decode(), tags)
+
+    def set(self, key, entry):
+        name = self.prefix + key
+        pipe = self.client.pipeline()
+        pipe.hset(name, mapping={
+            'body': entry.body,
+            'status': entry.status,
+            'mimetype': entry.mimetype,
+            'tags': '\n'.join(entry.tags),
+        })
+        pipe.expire(name, self.ttl)
+        for tag in entry.tags:
+            pipe.sadd(f'{self.prefix}tag:{tag}', name)
+            pipe.expire(f'{self.prefix}tag:{tag}', self.ttl)
+        pipe.execute()
+
+    def invalidate(self, tags):
+        removed = 0
+        for tag in tags:
+            tag_key = f'{self.prefix}tag:{tag}'
+            keys = self.client.smembers(tag_key)
+            if keys:
+                removed += self.client.delete(*keys)
+            self.client.delete(tag_key)
+        return removed
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+class ResponseCache:
+    """Caches @cached view responses and invalidates them by tag."""
+
+    def __init__(self, backend=None, ttl=DEFAULT_TTL, primary_fill_seconds=5.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.primary_fill_seconds = primary_fill_seconds
+        self.bus = None  # set by InvalidationBus.init_app
+        self._invalidated = {}  # tag -> time.time() of its last invalidation
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        if self.backend is None:
+            url = app.config.get("CACHE_REDIS_URL") or os.getenv("CACHE_REDIS_URL")
+            if url:
+                self.backend = RedisBackend(url, ttl=app.config.get("CACHE_TTL", DEFAULT_TTL))
+            else:
+                self.backend = LRUBackend(app.config.get("CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self.ttl = app.config.get("CACHE_TTL", self.ttl)
+        self.primary_fill_seconds = app.config.get("CACHE_PRIMARY_FILL_SECONDS", self.primary_fill_seconds)
+        app.extensions['response_cache'] = self
+        return self
+
+    def lookup(self, key):
+        entry = self.backend.get(key)
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return entry
+
+    @property
+    def generation(self):
+        """Bumped by every invalidation in this process."""
+        return self._generation
+
+    def store(self, key, response, tags, generation=None):
+        # An invalidation raced with rendering this response: it may be stale
+        if generation is not None and generation != self._generation:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        entry = CacheEntry(response.get_data(), response.status_code, response.mimetype, tags, expires_at)
+        self.backend.set(key, entry)
+
+    def invalidate(self, tags):
+        removed = self.backend.invalidate(tags)
+        now = time.time()
+        with self._lock:
+            self._invalidations += 1
+            self._generation += 1
+            for tag in tags:
+                self._invalidated[tag] = now
+            if len(self._invalidated) > 10000:
+                cutoff = now - self.primary_fill_seconds
+                self._invalidated = {t: at for t, at in self._invalidated.items() if at > cutoff}
+        return removed
+
+    def recently_invalidated(self, tags):
+        """Was any of `tags` invalidated within the replica lag window?"""
+        cutoff = time.time() - self.primary_fill_seconds
+        with self._lock:
+            return any(self._invalidated.get(tag, 0) > cutoff for tag in tags)
+
+    def clear(self):
+        self.backend.clear()
+
+    def cache_stats(self):
+        with self._lock:
+            return {'hits': self._hits, 'misses': self._misses, 'invalidations': self._invalidations}
+
+
+def cache_key():
+    """Route plus sorted query arguments, so argument order doesn't split entries."""
+    args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+    return f'{request.method}:{request.path}?{args}'
+
+
+def cached(tags, unless=None):
+    """Cache a GET view's 200 responses under `tags`.
+
+    `tags` is a list of tags or a callable taking the view's arguments and
+    returning one. `unless()` returning True bypasses the cache, e.g. for
+    personalized variants of the same route.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get('response_cache')
+            if cache is None or request.method != 'GET' or (unless is not None and unless()):
+                return view(*args, **kwargs)
+            if cache.bus is not None and not cache.bus.is_fresh():
+                # Other workers' invalidations may not have arrived; don't serve or store
+                return view(*args, **kwargs)
+
+            key = cache_key()
+            entry = cache.lookup(key)
+            if entry is not None:
+                response = Response(entry.body, status=entry.status, mimetype=entry.mimetype)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            generation = cache.generation
+            entry_tags = tags(*args, **kwargs) if callable(tags) else tags
+            if cache.recently_invalidated(entry_tags):
+                with use_primary():
+                    response = current_app.make_response(view(*args, **kwargs))
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                cache.store(key, response, entry_tags, generation)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def invalidate_tags(*tags):
+    """Drop cached responses depending on any of `tags`, here and in other workers."""
+    if not tags:
+        return
+    cache = current_app.extensions.get('response_cache')
+    if cache is not None:
+        cache.invalidate(tags)
+    publish_tags(current_app, tags)
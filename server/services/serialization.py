@@ -0,0 +1,129 @@
+"""
+Fast JSON encoding for responses.
+
+FastJSONProvider replaces Flask's JSON provider, so every jsonify() call in
+every blueprint is encoded by orjson when it is installed (stdlib json
+otherwise). json_rows() builds a response straight from SQLAlchemy rows:
+it zips the column names with each row's tuple instead of copying rows
+through dict(RowMapping), and streams very large result sets in chunks.
+
+Wire format is unchanged from Flask's provider: dates and datetimes are
+RFC 822 strings ("Tue, 31 Dec 2024 00:00:00 GMT"), which the client parses
+and displays, and Decimals are strings.
+"""
+
+import dataclasses
+import datetime
+import decimal
+import json
+
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.engine import Result, Row, RowMapping
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+STREAM_ROWS = 5000  # larger result sets are streamed
+CHUNK_ROWS = 1000
+
+
+def _default(obj):
+    """Types the encoder doesn't handle itself."""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, Row):
+        return obj._asdict()
+    if isinstance(obj, RowMapping):
+        return dict(obj)
+    if isinstance(obj, datetime.date):
+        return http_date(obj)
+    if isinstance(obj, datetime.time):
+        return obj.isoformat()
+    if isinstance(obj, datetime.timedelta):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def encode(obj, indent=False, newline=False):
+    """Serialize obj to UTF-8 JSON bytes."""
+    if orjson is not None:
+        # Dates go through _default so they keep Flask's format
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        return orjson.dumps(obj, default=_default, option=option)
+    body = json.dumps(obj, default=_default, ensure_ascii=False,
+                      indent=2 if indent else None, separators=None if indent else (',', ':'))
+    return (body + '\n' if newline else body).encode()
+
+
+def decode(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson. Install with app.json = FastJSONProvider(app)."""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs and orjson is None:
+            return super().dumps(obj, **kwargs)
+        return encode(obj, indent=bool(kwargs.get('indent'))).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return decode(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(encode(obj, indent=indent, newline=True), mimetype=self.mimetype)
+
+
+def _row_dicts(keys, rows):
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def _stream(keys, rows):
+    yield b'['
+    for start in range(0, len(rows), CHUNK_ROWS):
+        chunk = encode(_row_dicts(keys, rows[start:start + CHUNK_ROWS]))
+        # Splice each chunk's elements into the one enclosing array
+        yield (b',' if start else b'') + chunk[1:-1]
+    yield b']\n'
+
+
+def json_rows(rows, stream_rows=STREAM_ROWS):
+    """A JSON array response of rows: a Result, or a list of Rows or RowMappings.
+
+    Must be called while the connection is open when given a Result.
+    """
+    if isinstance(rows, Result):
+        keys = list(rows.keys())
+        rows = rows.all()
+    elif rows and isinstance(rows[0], Row):
+        keys = rows[0]._fields
+    else:
+        rows = [dict(row) for row in rows]
+        keys = None
+
+    response_class = current_app.response_class
+    if keys is None:
+        return response_class(encode(rows, newline=True), mimetype='application/json')
+    if stream_rows is not None and len(rows) > stream_rows:
+        return response_class(_stream(keys, rows), mimetype='application/json')
+    return response_class(encode(_row_dicts(keys, rows), newline=True), mimetype='application/json')
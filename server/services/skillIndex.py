@@ -0,0 +1,139 @@
+"""
+Inverted skill -> volunteer index for reverse matching.
+
+Each skill maps to a posting list of the volunteers who have it (from both
+volunteer_skills and user_skills). Ranking volunteers for an event merges the
+posting lists of its required skills instead of scanning the volunteers table.
+The index is built once per process and patched incrementally when the write
+paths report that a volunteer's or user's skills changed.
+"""
+
+import threading
+
+import numpy as np
+from sqlalchemy import bindparam, text
+
+from .changeEvents import add_change_listener
+
+SKILL_ASSIGNMENTS_SQL = """
+    SELECT vs.volunteer_id, vs.skill_id FROM volunteer_skills vs {vs_filter}
+    UNION
+    SELECT v.id AS volunteer_id, us.skill_id FROM user_skills us
+    JOIN volunteers v ON v.user_id = us.user_id {us_filter}
+"""
+
+
+class SkillIndex:
+    """Posting lists of volunteer ids per skill id."""
+
+    def __init__(self, engine=None):
+        self.engine = engine
+        self._postings = None         # skill_id -> set of volunteer ids
+        self._volunteer_skills = {}   # volunteer_id -> set of skill ids
+        self._arrays = {}             # skill_id -> sorted np.ndarray, rebuilt on demand
+        self._dirty_volunteers = set()
+        self._dirty_users = set()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def init_app(self, app):
+        """Attach to a Flask app and follow its skill changes."""
+        if self.engine is None:
+            self.engine = app.config["ENGINE"]
+        app.extensions['skill_index'] = self
+        add_change_listener(app, self.on_change)
+        return self
+
+    @classmethod
+    def for_app(cls, app):
+        """Return the app's index, installing one on first use."""
+        index = app.extensions.get('skill_index')
+        if index is None:
+            index = cls().init_app(app)
+        return index
+
+    def on_change(self, kind, ident):
+        """Mark volunteers whose skills may have changed."""
+        with self._lock:
+            if kind == 'volunteer':
+                self._dirty_volunteers.add(int(ident))
+            elif kind == 'user':
+                self._dirty_users.add(int(ident))
+
+    def invalidate(self):
+        """Drop the whole index; it is rebuilt on next use."""
+        with self._lock:
+            self._postings = None
+            self._volunteer_skills = {}
+            self._arrays = {}
+            self._dirty_volunteers.clear()
+            self._dirty_users.clear()
+
+    def postings(self, conn, skill_ids):
+        """Posting arrays for the given skills, refreshing stale entries first."""
+        with self._lock:
+            if self._postings is None:
+                self._build(conn)
+            elif self._dirty_volunteers or self._dirty_users:
+                self._apply_dirty(conn)
+
+            result = []
+            for skill_id in skill_ids:
+                array = self._arrays.get(skill_id)
+                if array is None:
+                    self._misses += 1
+                    array = np.fromiter(sorted(self._postings.get(skill_id, ())), dtype=np.int64)
+                    self._arrays[skill_id] = array
+                else:
+                    self._hits += 1
+                result.append(array)
+            return result
+
+    def accumulate(self, conn, skill_ids):
+        """Candidate volunteer ids and how many of `skill_ids` each one has."""
+        lists = [p for p in self.postings(conn, skill_ids) if len(p)]
+        if not lists:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(lists), return_counts=True)
+
+    def cache_stats(self):
+        """Posting array lookups served from cache vs rebuilt."""
+        with self._lock:
+            return {'hits': self._hits, 'misses': self._misses}
+
+    def _build(self, conn):
+        rows = conn.execute(text(SKILL_ASSIGNMENTS_SQL.format(vs_filter='', us_filter=''))).all()
+        self._postings, self._volunteer_skills, self._arrays = {}, {}, {}
+        for vol_id, skill_id in rows:
+            self._postings.setdefault(skill_id, set()).add(vol_id)
+            self._volunteer_skills.setdefault(vol_id, set()).add(skill_id)
+        self._dirty_volunteers.clear()
+        self._dirty_users.clear()
+
+    def _apply_dirty(self, conn):
+        volunteer_ids = set(self._dirty_volunteers)
+        if self._dirty_users:
+            rows = conn.execute(
+                text("SELECT id FROM volunteers WHERE user_id IN :ids")
+                .bindparams(bindparam('ids', expanding=True)),
+                {"ids": list(self._dirty_users)}
+            ).all()
+            volunteer_ids.update(row[0] for row in rows)
+        self._dirty_volunteers.clear()
+        self._dirty_users.clear()
+        if not volunteer_ids:
+            return
+
+        for vol_id in volunteer_ids:
+            for skill_id in self._volunteer_skills.pop(vol_id, ()):
+                self._postings[skill_id].discard(vol_id)
+                self._arrays.pop(skill_id, None)
+
+        stmt = text(SKILL_ASSIGNMENTS_SQL.format(
+            vs_filter='WHERE vs.volunteer_id IN :ids', us_filter='WHERE v.id IN :ids'
+        )).bindparams(bindparam('ids', expanding=True))
+        for vol_id, skill_id in conn.execute(stmt, {"ids": list(volunteer_ids)}):
+            self._postings.setdefault(skill_id, set()).add(vol_id)
+            self._volunteer_skills.setdefault(vol_id, set()).add(skill_id)
+            self._arrays.pop(skill_id, None)
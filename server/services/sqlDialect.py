@@ -0,0 +1,51 @@
+"""
+Statements that MySQL and SQLite spell differently.
+
+Where the two agree the services write the SQL inline: GROUP_CONCAT with the
+default ',' separator, CURRENT_TIMESTAMP for NOW(), TRUE/FALSE, and
+result.lastrowid for the id of a new row. Inserts that skip or update on a
+duplicate key have no common spelling, so they are built per dialect and
+cached:
+
+    conn.execute(insert_ignore(conn, 'user_skills', ('user_id', 'skill_id')), params)
+    conn.execute(upsert(conn, 'scoring_weights', ('owner_id', 'scorer', 'weight'),
+                        keys=('owner_id', 'scorer')), params)
+
+Bind parameters are named after the columns.
+"""
+
+import functools
+
+from sqlalchemy import text
+
+
+def _values(columns):
+    return f"({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)})"
+
+
+def insert_ignore(bind, table, columns):
+    """INSERT that silently skips rows colliding with a unique key."""
+    return _insert_ignore(bind.dialect.name, table, tuple(columns))
+
+
+@functools.lru_cache(maxsize=None)
+def _insert_ignore(dialect, table, columns):
+    verb = "INSERT OR IGNORE" if dialect == 'sqlite' else "INSERT IGNORE"
+    return text(f"{verb} INTO {table} {_values(columns)}")
+
+
+def upsert(bind, table, columns, keys, update=None):
+    """INSERT that updates `update` (default: every non-key column) when the
+    row identified by the unique `keys` already exists."""
+    update = tuple(c for c in columns if c not in keys) if update is None else tuple(update)
+    return _upsert(bind.dialect.name, table, tuple(columns), tuple(keys), update)
+
+
+@functools.lru_cache(maxsize=None)
+def _upsert(dialect, table, columns, keys, update):
+    if dialect == 'sqlite':
+        assignments = ', '.join(f"{c} = excluded.{c}" for c in update)
+        return text(f"INSERT INTO {table} {_values(columns)} "
+                    f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {assignments}")
+    assignments = ', '.join(f"{c} = VALUES({c})" for c in update)
+    return text(f"INSERT INTO {table} {_values(columns)} ON DUPLICATE KEY UPDATE {assignments}")
@@ -1,14 +1,18 @@
 from sqlalchemy import text
 from flask import jsonify, current_app
-from datetime import datetime
+
+from .engineRouting import get_engine, read_only
+from .responseCache import invalidate_tags
+from .serialization import json_rows
 
 class TaskService:
     """Service for managing event tasks"""
     
     @staticmethod
+    @read_only
     def get_tasks_by_event(event_id):
         """Get all tasks for a specific event"""
-        engine = current_app.config["ENGINE"]
+        engine = get_engine()
         
         with engine.connect() as conn:
             result = conn.execute(text("""
@@ -16,9 +20,9 @@ class TaskService:
                 FROM history_tasks
                 WHERE event_id = :event_id
                 ORDER BY id ASC
-            """), {"event_id": event_id}).mappings().all()
+            """), {"event_id": event_id}).all()
             
-        return jsonify([dict(row) for row in result]), 200
+        return json_rows(result), 200
     
     @staticmethod
     def create_task(data):
@@ -103,6 +107,7 @@ class TaskService:
             conn.execute(text(query), params)
             conn.commit()
             
+        invalidate_tags('leaderboard')
         return jsonify({'success': True, 'message': 'Task updated successfully'}), 200
     
     @staticmethod
@@ -118,6 +123,7 @@ class TaskService:
             if result.rowcount == 0:
                 return jsonify({'success': False, 'message': 'Task not found'}), 404
             
+        invalidate_tags('leaderboard')
         return jsonify({'success': True, 'message': 'Task deleted successfully'}), 200
     
     @staticmethod
@@ -180,15 +186,17 @@ class TaskService:
                 })
                 conn.commit()
         
+        invalidate_tags('leaderboard')
         return jsonify({
             'success': True,
             'message': 'Task assigned successfully'
         }), 200
     
     @staticmethod
+    @read_only
     def get_unassigned_tasks_by_event(event_id):
         """Get all unassigned tasks for a specific event"""
-        engine = current_app.config["ENGINE"]
+        engine = get_engine()
         
         with engine.connect() as conn:
             result = conn.execute(text("""
@@ -196,6 +204,6 @@ class TaskService:
                 FROM history_tasks
                 WHERE event_id = :event_id AND volunteer_id IS NULL
                 ORDER BY id ASC
-            """), {"event_id": event_id}).mappings().all()
+            """), {"event_id": event_id}).all()
             
-        return jsonify([dict(row) for row in result]), 200
+        return json_rows(result), 200
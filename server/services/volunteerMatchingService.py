@@ -1,8 +1,16 @@
 from flask import jsonify, current_app
-from datetime import datetime
-from sqlalchemy import text
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, text
+import numpy as np
 import re
 
+from .changeEvents import notify_change
+from .matchScoring import SCORERS, ScoringContext, availability_sql, load_weights
+from .responseCache import invalidate_tags
+from .serialization import json_rows
+from .skillIndex import SkillIndex
+from .sqlDialect import upsert
+
 class ValidationHelper:
     """Helper class for validation functions"""
     
@@ -34,7 +42,11 @@ class MatchingHelper:
     
     @staticmethod
     def calculate_score(volunteer, event):
-        """Calculate match score between volunteer skills and event requirements"""
+        """Calculate match score between volunteer skills and event requirements
+
+        Single-pair helper kept for callers outside the matching engine; ranking
+        goes through matchScoring.ScoringContext.
+        """
         vol_skills = volunteer
         event_reqs = event
         if not event_reqs:
@@ -87,8 +99,8 @@ class VolunteerService:
                 LEFT JOIN skills s ON vs.skill_id = s.id
                 GROUP BY v.id
             """))
-            volunteers = result.mappings().all()
-        return jsonify([dict(v) for v in volunteers]), 200
+            volunteers = result.all()
+        return json_rows(volunteers), 200
     
     @staticmethod
     def get_by_id(vol_id):
@@ -167,9 +179,9 @@ class EventService:
                 LEFT JOIN skills s ON er.skill_id = s.id
                 GROUP BY e.id
             """))
-        events = result.mappings().all()
+        events = result.all()
         
-        return jsonify([dict(e) for e in events]), 200
+        return json_rows(events), 200
     
     @staticmethod
     def get_by_id(event_id):
@@ -200,52 +212,14 @@ class MatchService:
         """Find best matching event for a volunteer"""
         engine = current_app.config["ENGINE"]
         with engine.connect() as conn:
-
-            # 1️⃣ Get volunteer info
-            result = conn.execute(text("SELECT * FROM volunteers WHERE id = :vol_id"), {"vol_id": vol_id})
+            result = conn.execute(text("SELECT id FROM volunteers WHERE id = :vol_id"), {"vol_id": vol_id})
             volunteer = result.mappings().first()
             if not volunteer:
                 return jsonify({'message': 'Volunteer not found'}), 404
 
-            # 2️⃣ Get volunteer’s skills
-            result = conn.execute(text("""
-                SELECT s.name FROM skills s
-                JOIN volunteer_skills vs ON vs.skill_id = s.id
-                WHERE vs.volunteer_id = :vol_id
-            """), {"vol_id": vol_id})
-            volunteer_skills = [row['name'].lower() for row in result.mappings().all()]
-
-            # 3️⃣ Get events with required skills and open slots
-            query = """
-                SELECT e.*, GROUP_CONCAT(s.name) AS required_skills, COUNT(m.id) AS current_volunteers
-                FROM events e
-                LEFT JOIN event_requirements er ON e.id = er.event_id
-                LEFT JOIN skills s ON er.skill_id = s.id
-                LEFT JOIN matches m ON e.id = m.event_id
-            """
-            if admin_id:
-                query += " WHERE e.ownerid = :admin_id"
-            query += """
-                GROUP BY e.id
-                HAVING current_volunteers < e.max_volunteers
-            """
-            
-            params = {"admin_id": admin_id} if admin_id else {}
-            result = conn.execute(text(query), params)
-            events = result.mappings().all()
-
-        best_event = None
-        best_score = 0
-
-        for evt in events:
-            event_skills = [s.lower() for s in evt['required_skills'].split(',')] if evt['required_skills'] else []
-            score = MatchingHelper.calculate_score(volunteer_skills, event_skills)
-            if volunteer['availability'].lower() in (evt.get('time_label') or '').lower():
-                score += 10  # bonus for availability match
-            if score > best_score:
-                best_score = score
-                best_event = evt
+            ctx = ScoringContext.load(conn, [volunteer['id']], admin_id)
 
+        best_event, best_score = ctx.best_event(volunteer['id'])
         if not best_event:
             return jsonify({'message': 'No matches found'}), 404
 
@@ -253,7 +227,151 @@ class MatchService:
         best_event_dict = dict(best_event)
         best_event_dict['match_score'] = best_score
         return jsonify({'event': best_event_dict, 'score': best_score}), 200
-    
+
+    @staticmethod
+    def find_best_matches(vol_ids, admin_id=None):
+        """Find the best matching event for each of several volunteers"""
+        engine = current_app.config["ENGINE"]
+        with engine.connect() as conn:
+            ctx = ScoringContext.load(conn, vol_ids, admin_id)
+
+        results = []
+        for volunteer in ctx.volunteers:
+            best_event, best_score = ctx.best_event(volunteer['id'])
+            event_dict = dict(best_event) if best_event else None
+            if event_dict:
+                event_dict['match_score'] = best_score
+            results.append({'volunteer_id': volunteer['id'], 'event': event_dict, 'score': best_score})
+        return jsonify(results), 200
+
+    @staticmethod
+    def rank_volunteers_for_event(event_id, limit=50, available_only=True):
+        """Rank the best unmatched volunteers for an event
+
+        Candidates come from the skill index posting lists of the event's required
+        skills and are scored in descending skill-coverage order; scoring stops once
+        no remaining candidate can beat the current top `limit`. An event without
+        required skills takes every volunteer (available on its weekday, with
+        available_only) as a candidate.
+        """
+        engine = current_app.config["ENGINE"]
+        index = SkillIndex.for_app(current_app)
+        with engine.connect() as conn:
+            event = conn.execute(text("""
+                SELECT e.id, e.ownerid, e.date, e.max_volunteers, COUNT(m.id) AS current_volunteers
+                FROM events e
+                LEFT JOIN matches m ON e.id = m.event_id
+                WHERE e.id = :event_id
+                GROUP BY e.id
+            """), {"event_id": event_id}).mappings().first()
+            if not event:
+                return jsonify({'message': 'Event not found'}), 404
+            if event['current_volunteers'] >= event['max_volunteers']:
+                return jsonify({'message': 'Event full'}), 400
+
+            required = [row[0] for row in conn.execute(
+                text("SELECT skill_id FROM event_requirements WHERE event_id = :event_id"),
+                {"event_id": event_id}
+            )]
+            if required:
+                candidates, counts = index.accumulate(conn, required)
+            else:
+                where, params = '1 = 1', {}
+                if available_only:
+                    # 1970-01-01 was a Thursday, so shifting by 3 makes Monday 0
+                    weekday = int((np.datetime64(str(event['date'])[:10], 'D').astype(np.int64) + 3) % 7)
+                    where, params = availability_sql([weekday])
+                candidates = np.fromiter((row[0] for row in conn.execute(text(f"""
+                    SELECT v.id FROM volunteers v
+                    LEFT JOIN profiles p ON p.user_id = v.user_id
+                    WHERE {where}
+                    ORDER BY v.id
+                """), params)), dtype=np.int64)
+                counts = np.zeros(len(candidates), dtype=np.int64)
+            matched = [row[0] for row in conn.execute(
+                text("SELECT volunteer_id FROM matches WHERE event_id = :event_id"),
+                {"event_id": event_id}
+            )]
+            keep = ~np.isin(candidates, matched)
+            candidates, coverage = candidates[keep], counts[keep] / max(len(required), 1)
+
+            weights = load_weights(conn, [event['ownerid']])[event['ownerid']]
+            other_max = sum(w for name, w in weights.items() if name != 'skills')
+            order = np.argsort(-coverage, kind='stable')
+            chunk = max(limit * 4, 200)
+
+            top_ids = np.empty(0, dtype=np.int64)
+            top_scores = np.empty(0, dtype=np.float64)
+            for start in range(0, len(order), chunk):
+                # Best score any remaining candidate could reach
+                bound = weights['skills'] * coverage[order[start]] + other_max
+                if len(top_scores) >= limit and top_scores[-1] >= bound:
+                    break
+                ctx = ScoringContext.load(conn, candidates[order[start:start + chunk]].tolist(),
+                                          event_ids=[event_id])
+                if not ctx.events:
+                    break
+                vi = np.arange(len(ctx.volunteers))
+                scores, parts = ctx.score_pairs(vi, np.zeros(len(vi), dtype=np.intp), components=True)
+                ids = np.array([v['id'] for v in ctx.volunteers], dtype=np.int64)
+                if available_only:
+                    ids, scores = ids[parts['weekday'] > 0], scores[parts['weekday'] > 0]
+                top_ids = np.concatenate([top_ids, ids])
+                top_scores = np.concatenate([top_scores, scores])
+                best = np.lexsort((top_ids, -top_scores))[:limit]
+                top_ids, top_scores = top_ids[best], top_scores[best]
+
+            names = {}
+            if len(top_ids):
+                rows = conn.execute(
+                    text("""
+                        SELECT v.id, u.name FROM volunteers v
+                        LEFT JOIN users u ON v.user_id = u.id
+                        WHERE v.id IN :ids
+                    """).bindparams(bindparam('ids', expanding=True)),
+                    {"ids": top_ids.tolist()}
+                ).all()
+                names = {vol_id: name for vol_id, name in rows}
+
+        return jsonify([
+            {'volunteer_id': int(vol_id), 'name': names.get(int(vol_id)), 'score': round(float(score), 2)}
+            for vol_id, score in zip(top_ids, top_scores)
+        ]), 200
+
+    @staticmethod
+    def get_scoring_weights(admin_id):
+        """Get the match scoring weights used for an organizer's events"""
+        engine = current_app.config["ENGINE"]
+        with engine.connect() as conn:
+            weights = load_weights(conn, [admin_id])[admin_id]
+        return jsonify(weights), 200
+
+    @staticmethod
+    def update_scoring_weights(admin_id, weights):
+        """Set match scoring weights for an organizer"""
+        if not isinstance(weights, dict) or not weights:
+            return jsonify({'message': 'weights required'}), 400
+        for name, weight in weights.items():
+            if name not in SCORERS:
+                return jsonify({'message': f'Unknown scorer: {name}'}), 400
+            if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0:
+                return jsonify({'message': f'Weight for {name} must be a non-negative number'}), 400
+
+        engine = current_app.config["ENGINE"]
+        with engine.connect() as conn:
+            admin = conn.execute(text("SELECT user_id FROM admins WHERE user_id = :admin_id"),
+                                 {"admin_id": admin_id}).mappings().first()
+            if not admin:
+                return jsonify({'message': 'Unauthorized'}), 403
+
+            for name, weight in weights.items():
+                conn.execute(upsert(conn, "scoring_weights", ("owner_id", "scorer", "weight"),
+                                    keys=("owner_id", "scorer")),
+                             {"owner_id": admin_id, "scorer": name, "weight": float(weight)})
+            conn.commit()
+            updated = load_weights(conn, [admin_id])[admin_id]
+        return jsonify(updated), 200
+
     @staticmethod
     def create_match(vol_id, event_id, status='pending'):
         """Create a match between volunteer and event"""
@@ -281,15 +399,20 @@ class MatchService:
                     return jsonify({'message': 'Event full'}), 400
 
                 # insert match
-                conn.execute(text("""
+                result = conn.execute(text("""
                     INSERT INTO matches (volunteer_id, event_id, status, matched_at)
-                    VALUES (:vol_id, :event_id, :status, NOW())
+                    VALUES (:vol_id, :event_id, :status, CURRENT_TIMESTAMP)
                 """), {"vol_id": vol_id, "event_id": event_id, "status": status})
                 conn.commit()
 
-                result = conn.execute(text("SELECT * FROM matches WHERE id = LAST_INSERT_ID()"))
+                result = conn.execute(text("SELECT * FROM matches WHERE id = :id"), {"id": result.lastrowid})
                 new_match = result.mappings().first()
 
+            notify_change('volunteer', vol_id)
+            invalidate_tags('matches', f'matches:{event_id}')
+            if row and row['count'] + 1 >= row['max_volunteers']:
+                notify_change('event_full', event_id)
+
             # Convert RowMapping to dict
             return jsonify(dict(new_match)), 201
         except Exception as e:
@@ -315,8 +438,8 @@ class MatchService:
                 JOIN users u ON v.user_id = u.id
                 JOIN events e ON m.event_id = e.id
             """))
-        matches = result.mappings().all()
-        return jsonify([dict(m) for m in matches]), 200
+        matches = result.all()
+        return json_rows(matches), 200
 
     @staticmethod
     def get_by_volunteer(vol_id):
@@ -331,8 +454,8 @@ class MatchService:
                 JOIN events e ON m.event_id = e.id
                 WHERE m.volunteer_id = :vol_id
         """), {"vol_id": vol_id})
-        matches = result.mappings().all()
-        return jsonify([dict(m) for m in matches]), 200
+        matches = result.all()
+        return json_rows(matches), 200
 
     @staticmethod
     def get_by_event(event_id):
@@ -347,20 +470,26 @@ class MatchService:
                 JOIN events e ON m.event_id = e.id
                 WHERE m.event_id = :event_id
             """), {"event_id": event_id})
-        matches = result.mappings().all()
-        return jsonify([dict(m) for m in matches]), 200
+        matches = result.all()
+        return json_rows(matches), 200
 
     @staticmethod
     def delete(match_id):
         """Delete a match"""
         engine = current_app.config["ENGINE"]
         with engine.connect() as conn:
-            result = conn.execute(text("SELECT id FROM matches WHERE id = :match_id"), {"match_id": match_id})
-            if not result.mappings().first():
+            result = conn.execute(text("SELECT id, volunteer_id, event_id FROM matches WHERE id = :match_id"), {"match_id": match_id})
+            match = result.mappings().first()
+            if not match:
                 return jsonify({'message': 'Not found'}), 404
 
             conn.execute(text("DELETE FROM matches WHERE id = :match_id"), {"match_id": match_id})
             conn.commit()
+
+        # The volunteer can be recommended this event again, and it may have reopened
+        notify_change('volunteer', match['volunteer_id'])
+        notify_change('event', match['event_id'])
+        invalidate_tags('matches', f"matches:{match['event_id']}")
         return jsonify({'message': 'Deleted'}), 200
 
 
@@ -372,12 +501,18 @@ class MatchService:
         engine = current_app.config["ENGINE"]
         with engine.connect() as conn:
             # Check if match exists
-            result = conn.execute(text("SELECT id FROM matches WHERE id = :match_id"), {"match_id": match_id})
-            if not result.mappings().first():
+            result = conn.execute(text("SELECT id, volunteer_id, event_id FROM matches WHERE id = :match_id"), {"match_id": match_id})
+            match = result.mappings().first()
+            if not match:
                 return jsonify({'message': 'Not found'}), 404
             
             conn.execute(text("UPDATE matches SET status = :status WHERE id = :match_id"), {"status": status, "match_id": match_id})
             conn.commit()
+
+        # A cancellation frees a seat and makes the event recommendable again
+        notify_change('volunteer', match['volunteer_id'])
+        notify_change('event', match['event_id'])
+        invalidate_tags('matches', f"matches:{match['event_id']}")
         return jsonify({'message': 'Status updated'}), 200
 
 
@@ -422,7 +557,37 @@ class VolunteerMatchingService:
         """Find volunteers matching an event"""
         return MatchService.get_by_event(event_id)
     
+    @staticmethod
+    def find_matching_candidates(event_id, limit=50, available_only=True):
+        """Rank unmatched volunteers for an event"""
+        return MatchService.rank_volunteers_for_event(event_id, limit, available_only)
+
     @staticmethod
     def find_available_volunteers(start_date=None, end_date=None):
-        """Find available volunteers"""
-        return VolunteerService.get_all()
+        """Find volunteers available on at least one day between start_date and end_date (YYYY-MM-DD)"""
+        if not start_date and not end_date:
+            return VolunteerService.get_all()
+        try:
+            start = datetime.strptime(start_date or end_date, '%Y-%m-%d').date()
+            end = datetime.strptime(end_date or start_date, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'message': 'Dates must be YYYY-MM-DD'}), 400
+        if end < start:
+            return jsonify({'message': 'end_date must not be before start_date'}), 400
+
+        weekdays = {(start + timedelta(days=d)).weekday() for d in range(min((end - start).days + 1, 7))}
+        where, params = availability_sql(weekdays)
+        engine = current_app.config["ENGINE"]
+        with engine.connect() as conn:
+            result = conn.execute(text(f"""
+                SELECT v.*, u.name, GROUP_CONCAT(DISTINCT s.name) as skills
+                FROM volunteers v
+                LEFT JOIN users u ON v.user_id = u.id
+                LEFT JOIN profiles p ON p.user_id = v.user_id
+                LEFT JOIN volunteer_skills vs ON v.id = vs.volunteer_id
+                LEFT JOIN skills s ON vs.skill_id = s.id
+                WHERE {where}
+                GROUP BY v.id
+            """), params)
+            volunteers = result.all()
+        return json_rows(volunteers), 200
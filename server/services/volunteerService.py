@@ -1,11 +1,14 @@
-from flask import current_app, jsonify
+from flask import jsonify
 from sqlalchemy import text
-from datetime import datetime
+
+from .engineRouting import get_engine, read_only
+from .serialization import json_rows
 
 class VolunteerService:
 	@staticmethod
+	@read_only
 	def get_volunteer_history_user(id):
-		engine = current_app.config["ENGINE"]
+		engine = get_engine()
 		with engine.connect() as conn:
 			user_id = id
 			
@@ -26,6 +29,7 @@ class VolunteerService:
 					e.id, 
 					e.name as eventName, 
 					e.time_label as time_label,
+					e.time_label as date,
 					e.location, 
 					e.description, 
 					e.urgency, 
@@ -48,14 +52,15 @@ class VolunteerService:
 				LEFT JOIN volunteer_history vh ON e.id = vh.event_id AND vh.volunteer_id = :volunteer_id
 				WHERE (m.volunteer_id = :volunteer_id OR vh.volunteer_id = :volunteer_id)
 				ORDER BY created_at DESC
-			"""), {"volunteer_id": volunteer_id}).mappings().all()
+			"""), {"volunteer_id": volunteer_id}).all()
    
-		return jsonify([dict(row) for row in result])
+		return json_rows(result)
 
 	@staticmethod
+	@read_only
 	def get_upcoming_events_public():
 		"""Get all upcoming events without skill matching"""
-		engine = current_app.config["ENGINE"]
+		engine = get_engine()
 		with engine.connect() as conn:
 			result = conn.execute(text("""
 				SELECT e.*,
@@ -80,9 +85,10 @@ class VolunteerService:
 		return jsonify(events_list), 200
 
 	@staticmethod
+	@read_only
 	def get_upcoming_events_with_skills(user_id):
 		"""Get all upcoming events with skill matching for the user"""
-		engine = current_app.config["ENGINE"]
+		engine = get_engine()
 		with engine.connect() as conn:
 			# Get user's skills
 			user_skills_result = conn.execute(text("""
@@ -116,8 +122,17 @@ class VolunteerService:
 				ORDER BY e.date DESC, e.urgency DESC
 			"""), {"volunteer_id": volunteer_id}).mappings().all()
 		
+		return jsonify(VolunteerService.annotate_skill_matches(result, user_skills)), 200
+
+	@staticmethod
+	def annotate_skill_matches(rows, user_skills):
+		"""Add skill matching fields to event rows and sort best match first
+
+		`user_skills` is a set of lowercased skill names. Pure, so the matching
+		microbenchmarks can call it without a database.
+		"""
 		events_list = []
-		for event in result:
+		for event in rows:
 			event_dict = dict(event)
 			required_skills = event_dict['required_skills'].split(',') if event_dict['required_skills'] else []
 			event_dict['required_skills'] = required_skills
@@ -135,5 +150,4 @@ class VolunteerService:
 		
 		# Sort by skill match count (descending), then by date
 		events_list.sort(key=lambda x: (-x['skill_match_count'], x['date']))
-		
-		return jsonify(events_list), 200
+		return events_list
@@ -1,9 +1,23 @@
 # Test Configuration and Fixtures
 # Run: pytest tests/new_tests/ -v
+#
+# Each test runs inside one transaction on a single connection that is rolled
+# back afterwards; the services' commit()/rollback() calls stop at a SAVEPOINT
+# inside it. Tests that need real commits (DDL, a second connection, threads)
+# are marked @pytest.mark.commits and get the old truncate-before-and-after.
+#
+# Under pytest-xdist (pip install pytest-xdist; pytest -n 4) every worker gets
+# its own database, eventmatcher_test_gw0 and so on, built from
+# db/test_schema.sql once and rebuilt only when that file changes.
+#
+# TEST_DB_BACKEND=sqlite runs the suite on a fresh SQLite file per session
+# (db/sqlite_schema.sql) instead; tests marked @pytest.mark.mysql are skipped.
 
+import hashlib
 import pytest
 from flask import Flask
 from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
 import sys
 import os
 from urllib.parse import quote_plus
@@ -11,68 +25,181 @@ from urllib.parse import quote_plus
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
+SCHEMA_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../db/test_schema.sql'))
 
-@pytest.fixture(scope='session')
-def test_engine():
-    """Create a test database engine."""
-    # Use environment variables or defaults matching app.py
+# Children first, so the order also works with foreign key checks on
+TABLES = (
+    'volunteer_recommendation_state', 'volunteer_recommendations', 'scoring_weights',
+    'history_tasks', 'volunteer_history', 'matches', 'event_requirements', 'volunteer_skills', 'user_skills', 'notifications',
+    'profiles', 'events', 'volunteers', 'admins', 'users',
+)
+
+
+from server.services.serialization import FastJSONProvider
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'commits: test commits for real; tables are truncated around it')
+    config.addinivalue_line('markers', 'mysql: test relies on MySQL-only behaviour')
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.getenv("TEST_DB_BACKEND", "mysql") != "sqlite":
+        return
+    skip = pytest.mark.skip(reason='MySQL only')
+    for item in items:
+        if item.get_closest_marker('mysql'):
+            item.add_marker(skip)
+
+
+def _server_url(database=''):
     host = os.getenv("DB_HOST", "127.0.0.1")
     port = os.getenv("DB_PORT", "3306")
     user = os.getenv("DB_USER", "root")
     pw = quote_plus(os.getenv("DB_PASS", "admin"))
-    test_db_name = os.getenv("TEST_DB_NAME", "eventmatcher_test")
-    
-    url = f"mysql+pymysql://{user}:{pw}@{host}:{port}/{test_db_name}?charset=utf8mb4"
-    engine = create_engine(url)
+    return f"mysql+pymysql://{user}:{pw}@{host}:{port}/{database}?charset=utf8mb4"
+
+
+def _schema_statements():
+    with open(SCHEMA_FILE, encoding='utf-8') as f:
+        sql = f.read()
+    statements = []
+    for chunk in sql.split(';'):
+        lines = [line for line in chunk.splitlines() if line.strip() and not line.strip().startswith('--')]
+        if lines:
+            statements.append('\n'.join(lines))
+    return sql, statements
+
+
+def create_worker_database(name):
+    """Create `name` from test_schema.sql unless it already holds the current schema."""
+    sql, statements = _schema_statements()
+    checksum = hashlib.sha1(sql.encode()).hexdigest()
+    server = create_engine(_server_url())
+    with server.connect() as conn:
+        conn.execute(text(f"CREATE DATABASE IF NOT EXISTS `{name}` CHARACTER SET utf8mb4"))
+    server.dispose()
+
+    engine = create_engine(_server_url(name))
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS test_schema_version (checksum CHAR(40) NOT NULL)"))
+        if conn.execute(text("SELECT checksum FROM test_schema_version")).scalar() != checksum:
+            for statement in statements:
+                conn.execute(text(statement))
+            conn.execute(text("DELETE FROM test_schema_version"))
+            conn.execute(text("INSERT INTO test_schema_version VALUES (:checksum)"), {"checksum": checksum})
     return engine
 
 
+def truncate_tables(engine):
+    if engine.dialect.name == 'sqlite':
+        with engine.begin() as conn:
+            for table in TABLES[:-1]:
+                conn.execute(text(f"DELETE FROM {table}"))
+            conn.execute(text("DELETE FROM skills WHERE name LIKE 'Test%'"))
+            conn.execute(text(f"DELETE FROM {TABLES[-1]}"))
+        return
+    with engine.begin() as conn:
+        conn.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
+        for table in TABLES[:-1]:
+            conn.execute(text(f"TRUNCATE TABLE {table}"))
+        conn.execute(text("DELETE FROM skills WHERE name LIKE 'Test%'"))
+        conn.execute(text(f"TRUNCATE TABLE {TABLES[-1]}"))
+        conn.execute(text("SET FOREIGN_KEY_CHECKS = 1"))
+
+
+class SavepointConnection:
+    """DBAPI connection whose commit and rollback stop at a savepoint."""
+
+    def __init__(self, dbapi_connection):
+        self._connection = dbapi_connection
+        self._run("BEGIN")
+        self._run("SAVEPOINT test_case")
+
+    def _run(self, statement):
+        cursor = self._connection.cursor()
+        try:
+            cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    def commit(self):
+        # Keep the work in the outer transaction and start the next unit
+        self._run("RELEASE SAVEPOINT test_case")
+        self._run("SAVEPOINT test_case")
+
+    def rollback(self):
+        self._run("ROLLBACK TO SAVEPOINT test_case")
+
+    def close(self):
+        pass  # the fixture owns the real connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class rolled_back_engine:
+    """An engine whose every connect() shares one connection in an open
+    transaction; leaving the block rolls all of it back."""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def __enter__(self):
+        self._raw = self.engine.raw_connection()
+        savepoints = SavepointConnection(self._raw.driver_connection)
+        self.bound = create_engine(self.engine.url, poolclass=StaticPool, creator=lambda: savepoints)
+        return self.bound
+
+    def __exit__(self, *exc_info):
+        self.bound.dispose()
+        try:
+            self._raw.driver_connection.rollback()
+        finally:
+            self._raw.close()
+
+
+@pytest.fixture(scope='session')
+def test_engine(tmp_path_factory):
+    """Create a test database engine."""
+    if os.getenv("TEST_DB_BACKEND", "mysql") == "sqlite":
+        from server.db import create_sqlite_schema, make_engine_from_env
+        engine = make_engine_from_env(f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}")
+        create_sqlite_schema(engine)
+        yield engine
+        engine.dispose()
+        return
+
+    # Use environment variables or defaults matching app.py
+    test_db_name = os.getenv("TEST_DB_NAME", "eventmatcher_test")
+    worker = os.getenv("PYTEST_XDIST_WORKER")
+    if worker:
+        engine = create_worker_database(f"{test_db_name}_{worker}")
+    else:
+        engine = create_engine(_server_url(test_db_name))
+    yield engine
+    engine.dispose()
+
+
 @pytest.fixture(scope='function')
-def app(test_engine):
+def app(request, test_engine):
     """Create and configure a test Flask app for each test."""
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)  # the production encoder, so tests see the real wire format
     app.config['TESTING'] = True
-    app.config['ENGINE'] = test_engine
-    
-    with app.app_context():
-        # Clean up test data before each test
-        with test_engine.begin() as conn:
-            conn.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
-            conn.execute(text("TRUNCATE TABLE history_tasks"))
-            conn.execute(text("TRUNCATE TABLE volunteer_history"))
-            conn.execute(text("TRUNCATE TABLE matches"))
-            conn.execute(text("TRUNCATE TABLE event_requirements"))
-            conn.execute(text("TRUNCATE TABLE volunteer_skills"))
-            conn.execute(text("TRUNCATE TABLE user_skills"))
-            conn.execute(text("TRUNCATE TABLE notifications"))
-            conn.execute(text("TRUNCATE TABLE profiles"))
-            conn.execute(text("TRUNCATE TABLE events"))
-            conn.execute(text("TRUNCATE TABLE volunteers"))
-            conn.execute(text("TRUNCATE TABLE admins"))
-            conn.execute(text("DELETE FROM skills WHERE name LIKE 'Test%'"))
-            conn.execute(text("TRUNCATE TABLE users"))
-            conn.execute(text("SET FOREIGN_KEY_CHECKS = 1"))
-    
-    yield app
-    
-    # Cleanup after each test
-    with app.app_context():
-        with test_engine.begin() as conn:
-            conn.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
-            conn.execute(text("TRUNCATE TABLE history_tasks"))
-            conn.execute(text("TRUNCATE TABLE volunteer_history"))
-            conn.execute(text("TRUNCATE TABLE matches"))
-            conn.execute(text("TRUNCATE TABLE event_requirements"))
-            conn.execute(text("TRUNCATE TABLE volunteer_skills"))
-            conn.execute(text("TRUNCATE TABLE user_skills"))
-            conn.execute(text("TRUNCATE TABLE notifications"))
-            conn.execute(text("TRUNCATE TABLE profiles"))
-            conn.execute(text("TRUNCATE TABLE events"))
-            conn.execute(text("TRUNCATE TABLE volunteers"))
-            conn.execute(text("TRUNCATE TABLE admins"))
-            conn.execute(text("DELETE FROM skills WHERE name LIKE 'Test%'"))
-            conn.execute(text("TRUNCATE TABLE users"))
-            conn.execute(text("SET FOREIGN_KEY_CHECKS = 1"))
+
+    if request.node.get_closest_marker('commits'):
+        app.config['ENGINE'] = test_engine
+        with app.app_context():
+            truncate_tables(test_engine)
+        yield app
+        with app.app_context():
+            truncate_tables(test_engine)
+        return
+
+    with rolled_back_engine(test_engine) as engine:
+        app.config['ENGINE'] = engine
+        yield app
 
 
 @pytest.fixture
@@ -90,7 +217,7 @@ def test_user(app):
             # Insert test user with SHA-256 hash of "password123"
             conn.execute(text("""
                 INSERT INTO users (id, name, email, password_hash, state, created_at)
-                VALUES (:id, :name, :email, :hash, :state, NOW())
+                VALUES (:id, :name, :email, :hash, :state, CURRENT_TIMESTAMP)
             """), {
                 'id': 999,
                 'name': 'Test User',
@@ -115,7 +242,7 @@ def test_admin(app, test_user):
         with engine.begin() as conn:
             conn.execute(text("""
                 INSERT INTO admins (id, user_id, phone, created_at)
-                VALUES (:id, :user_id, :phone, NOW())
+                VALUES (:id, :user_id, :phone, CURRENT_TIMESTAMP)
             """), {
                 'id': 999,
                 'user_id': test_user['id'],
@@ -132,7 +259,7 @@ def test_user2(app):
         with engine.begin() as conn:
             conn.execute(text("""
                 INSERT INTO users (id, name, email, password_hash, state, created_at)
-                VALUES (:id, :name, :email, :hash, :state, NOW())
+                VALUES (:id, :name, :email, :hash, :state, CURRENT_TIMESTAMP)
             """), {
                 'id': 998,
                 'name': 'Test User 2',
@@ -157,7 +284,7 @@ def test_volunteer(app, test_user):
         with engine.begin() as conn:
             conn.execute(text("""
                 INSERT INTO volunteers (id, user_id, phone, availability, created_at)
-                VALUES (:id, :user_id, :phone, :availability, NOW())
+                VALUES (:id, :user_id, :phone, :availability, CURRENT_TIMESTAMP)
             """), {
                 'id': 999,
                 'user_id': test_user['id'],
@@ -182,7 +309,7 @@ def test_event(app, test_admin):
                 INSERT INTO events (id, ownerid, name, description, date, location, 
                                   max_volunteers, urgency, img, time_label, created_at)
                 VALUES (:id, :ownerid, :name, :desc, :date, :loc, :max, :urgency, 
-                       :img, :time_label, NOW())
+                       :img, :time_label, CURRENT_TIMESTAMP)
             """), {
                 'id': 999,
                 'ownerid': test_admin['id'],
@@ -0,0 +1,71 @@
+"""
+Tests for the application factory
+Run: pytest tests/test_app_factory_db.py -v
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from server.app import BLUEPRINTS, create_app
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+
+@pytest.fixture
+def engine():
+    return create_engine('sqlite://')
+
+
+def _rules(app):
+    return {rule.rule for rule in app.url_map.iter_rules()}
+
+
+class TestCreateApp:
+    """Test building apps with all or some blueprints"""
+
+    def test_uses_given_engine(self, engine):
+        app = create_app({'ENGINE': engine, 'READ_ENGINE': None, 'TESTING': True}, blueprints=[])
+        assert app.config['ENGINE'] is engine
+        assert app.config['READ_ENGINE'] is None
+        assert app.testing
+        assert app.test_client().get('/ping').data == b'pong'
+
+    def test_blueprint_subset(self, engine):
+        app = create_app({'ENGINE': engine}, blueprints=['bundle'])
+        rules = _rules(app)
+        assert '/api/bundles/matching-form' in rules
+        assert not any(rule.startswith('/api/manager') for rule in rules)
+        assert set(app.blueprints) == {'bundle'}
+
+    def test_all_blueprints_by_default(self, engine):
+        app = create_app({'ENGINE': engine})
+        assert len(app.blueprints) == len(BLUEPRINTS)
+
+    def test_apps_are_independent(self, engine):
+        first = create_app({'ENGINE': engine}, blueprints=['task'])
+        second = create_app({'ENGINE': engine}, blueprints=['task'])
+        assert first.extensions['response_cache'] is not second.extensions['response_cache']
+        assert _rules(first) == _rules(second)
+
+    def test_unknown_blueprint(self, engine):
+        with pytest.raises(ValueError, match='nope'):
+            create_app({'ENGINE': engine}, blueprints=['auth', 'nope'])
+
+
+class TestImport:
+    """Test that importing the module builds nothing"""
+
+    def test_import_is_lazy(self):
+        probe = ("import sys, server.app; "
+                 "print(any(m.startswith(('server.routes', 'server.services', 'numpy', 'pymysql')) "
+                 "for m in sys.modules))")
+        output = subprocess.run([sys.executable, '-c', probe], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout
+        assert output.strip() == 'False'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,228 @@
+"""
+Tests for the ASGI serving mode (needs requirements-async.txt)
+Run: pytest tests/test_asgi_db.py -v
+"""
+
+import asyncio
+import io
+import json
+import os
+from datetime import date, timedelta
+
+import pytest
+
+# CI installs requirements-async.txt and sets REQUIRE_ASYNC_TESTS, so there a
+# missing package is an import error rather than a silent skip
+if not os.getenv('REQUIRE_ASYNC_TESTS'):
+    pytest.importorskip('quart')
+    pytest.importorskip('aiosqlite')
+    pytest.importorskip('asgiref')
+
+from flask import Flask
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from server.asgi import create_asgi_app
+from server.db import make_async_engine_from_env
+from server.instrumentation import SQLInstrumentation
+from server.logs import StructuredLogging
+from server.metrics import Metrics, MetricsRegistry
+from server.services.engineRouting import PIN_HEADER, EngineRouter
+
+SCHEMA = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)",
+    "CREATE TABLE admins (id INTEGER PRIMARY KEY, user_id INT)",
+    "CREATE TABLE volunteers (id INTEGER PRIMARY KEY, user_id INT, availability TEXT)",
+    "CREATE TABLE skills (id INTEGER PRIMARY KEY, name TEXT)",
+    "CREATE TABLE volunteer_skills (volunteer_id INT, skill_id INT)",
+    "CREATE TABLE event_requirements (event_id INT, skill_id INT)",
+    "CREATE TABLE events (id INTEGER PRIMARY KEY, ownerid INT, name TEXT, description TEXT, date DATE,"
+    " location TEXT, max_volunteers INT, time_label TEXT)",
+    "CREATE TABLE matches (id INTEGER PRIMARY KEY, volunteer_id INT, event_id INT, status TEXT, matched_at TEXT)",
+    "CREATE TABLE notifications (id INTEGER PRIMARY KEY, user_id INT, type TEXT, message TEXT,"
+    " is_read BOOLEAN, created_at TEXT)",
+]
+
+
+def _make_db(path, event_name='Drive'):
+    sync_engine = create_engine(f"sqlite:///{path}")
+    with sync_engine.begin() as conn:
+        for statement in SCHEMA:
+            conn.execute(text(statement))
+        conn.execute(text("INSERT INTO users VALUES (1, 'Ada'), (2, 'Ben')"))
+        conn.execute(text("INSERT INTO admins VALUES (1, 9)"))
+        conn.execute(text("INSERT INTO volunteers VALUES (1, 1, 'weekends'), (2, 2, 'weekdays')"))
+        conn.execute(text("INSERT INTO events VALUES (5, 9, :name, 'd', :day, 'Hall', 10, 't')"),
+                     {"name": event_name, "day": date.today() + timedelta(days=3)})
+        conn.execute(text("INSERT INTO matches VALUES (1, 1, 5, 'confirmed', '2024-01-01')"))
+        conn.execute(text("INSERT INTO notifications VALUES (1, 1, 'info', 'hello', 0, '2024-01-01')"))
+    return sync_engine
+
+
+def _get(app, path, headers=None):
+    async def run():
+        response = await app.async_app.test_client().get(path, headers=headers)
+        return response, await response.get_data()
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def asgi(tmp_path):
+    path = tmp_path / 'asgi.db'
+    sync_engine = _make_db(path)
+
+    wsgi = Flask(__name__)
+
+    @wsgi.get('/ping')
+    def ping():
+        return {'ok': True}
+
+    app = create_asgi_app(wsgi, engine=create_async_engine(f"sqlite+aiosqlite:///{path}"), poll_interval=0.01)
+    return app, sync_engine
+
+
+class TestAsyncRoutes:
+    """Test the routes served by the async app"""
+
+    def test_event_view_bundle(self, asgi):
+        app, _ = asgi
+
+        async def run():
+            response = await app.async_app.test_client().get('/api/bundles/event-view/5?user_id=1')
+            return response.status_code, await response.get_json()
+
+        status, data = asyncio.run(run())
+        assert status == 200
+        assert data['registration']['match_id'] == 1
+        assert data['event']['current_volunteers'] == 1
+
+    def test_matching_form_bundle(self, asgi):
+        app, _ = asgi
+
+        async def run(query):
+            response = await app.async_app.test_client().get(f'/api/bundles/matching-form?{query}')
+            return response.status_code, await response.get_json()
+
+        status, data = asyncio.run(run('user_id=9&per_page=1'))
+        assert status == 200
+        assert [e['id'] for e in data['events']] == [5]
+        assert [c['name'] for c in data['candidates']] == ['Ada']
+        assert data['has_more'] is True
+        _, rest = asyncio.run(run(f"user_id=9&per_page=1&cursor={data['next_cursor']}"))
+        assert [c['name'] for c in rest['candidates']] == ['Ben'] and rest['has_more'] is False
+        assert asyncio.run(run('user_id=1'))[0] == 403
+
+    def test_notification_stream(self, asgi):
+        """The stream opens with the unread count and then sends new notifications"""
+        app, sync_engine = asgi
+
+        async def run():
+            client = app.async_app.test_client()
+            async with client.request('/api/notifications/stream?user_id=1&after=0') as connection:
+                await connection.send_complete()
+                chunks = b''
+                while b'event: notification' not in chunks:
+                    chunks += await asyncio.wait_for(connection.receive(), timeout=5)
+                await connection.disconnect()
+            return chunks
+
+        chunks = asyncio.run(run()).decode()
+        assert chunks.startswith('event: count\ndata: {"unread":1}')
+        assert 'id: 1\nevent: notification' in chunks
+        assert '"message":"hello"' in chunks
+
+    def test_csv_export(self, asgi):
+        app, _ = asgi
+        response, body = _get(app, '/api/report/volunteer-history/csv?admin_user_id=9')
+        assert response.status_code == 200
+        lines = body.decode().splitlines()
+        assert lines[0] == 'Volunteer Name,Event Name,Date,Location,Description'
+        assert lines[1].startswith('Ada,Drive,')
+        assert _get(app, '/api/report/volunteer-history/csv')[0].status_code == 400
+
+    def test_routing(self, asgi):
+        app, _ = asgi
+        assert app.handles('/api/bundles/matching-form', 'GET')
+        assert not app.handles('/ping', 'GET')
+        assert not app.handles('/api/bundles/matching-form', 'POST')
+
+
+@pytest.fixture
+def hooked(tmp_path):
+    """Async routes in front of a Flask app with the production extensions and a replica."""
+    if StructuredLogging._installed is not None:
+        StructuredLogging._installed.stop()
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    wsgi = Flask(__name__)
+    wsgi.config.update(ENGINE=_make_db(primary), SECRET_KEY='test-secret')
+    EngineRouter(read_engine=_make_db(replica, 'Drive (replica)')).init_app(wsgi)
+    instrumentation = SQLInstrumentation().init_app(wsgi)
+    metrics = Metrics(MetricsRegistry()).init_app(wsgi)
+    stream = io.StringIO()
+    logging_ext = StructuredLogging(stream=stream).init_app(wsgi)
+    app = create_asgi_app(wsgi, engine=create_async_engine(f"sqlite+aiosqlite:///{primary}"),
+                          read_engine=create_async_engine(f"sqlite+aiosqlite:///{replica}"))
+    yield app, wsgi, stream
+    logging_ext.stop()
+    instrumentation.remove()
+
+
+class TestSharedHooks:
+    """Test that the async routes keep the guarantees of the Flask routes"""
+
+    def test_reads_use_replica(self, hooked):
+        app, _, _ = hooked
+        response, body = _get(app, '/api/bundles/event-view/5')
+        assert json.loads(body)['event']['name'] == 'Drive (replica)'
+
+    def test_pinned_caller_reads_primary(self, hooked):
+        app, wsgi, _ = hooked
+        token = wsgi.extensions['engine_router'].issue()
+        response, body = _get(app, '/api/bundles/event-view/5', headers={PIN_HEADER: token})
+        assert json.loads(body)['event']['name'] == 'Drive'
+        forged, _ = _get(app, '/api/bundles/event-view/5', headers={PIN_HEADER: 'nope'})
+        assert forged.status_code == 200
+
+    def test_metrics_instrumentation_and_logs(self, hooked):
+        app, wsgi, stream = hooked
+        response, _ = _get(app, '/api/bundles/event-view/5?user_id=1', headers={'X-Request-ID': 'req-1'})
+        assert response.headers['X-Request-ID'] == 'req-1'
+        assert 'desc="3 queries"' in response.headers['Server-Timing']
+
+        stats = wsgi.extensions['sql_instrumentation'].aggregates()['event_view']
+        assert stats['requests'] == 1 and stats['replica_queries'] == 3
+
+        rendered = wsgi.extensions['metrics'].registry.render()
+        assert 'route="/api/bundles/event-view/<int:event_id>"' in rendered
+        assert 'engine="async_replica"' in rendered
+
+        wsgi.extensions['structured_logging'].stop()
+        access = [json.loads(line) for line in stream.getvalue().splitlines()]
+        access = [r for r in access if r['logger'] == 'server.access']
+        assert access[0]['route'] == '/api/bundles/event-view/<int:event_id>'
+        assert access[0]['request_id'] == 'req-1'
+
+
+
+class TestAsyncEngine:
+    """Test the asyncio engine's pool settings"""
+
+    def test_pings_only_after_idle(self, tmp_path):
+        """Like the sync engine: no pre-ping, idle connections pinged on checkout"""
+        engine = make_async_engine_from_env(f"sqlite:///{tmp_path / 'async.db'}", pool_size=1,
+                                            max_overflow=0, ping_after_idle=0)
+        assert engine.pool._pre_ping is False
+        records = []
+        event.listen(engine.sync_engine, 'checkout', lambda dbapi, record, proxy: records.append(record))
+
+        async def run():
+            for _ in range(2):
+                async with engine.connect() as conn:
+                    assert (await conn.execute(text("SELECT 1"))).scalar() == 1
+            await engine.dispose()
+        asyncio.run(run())
+        assert len(records) == 2
+        assert 'idle_since' in records[0].info
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
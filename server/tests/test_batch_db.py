@@ -0,0 +1,146 @@
+"""
+Tests for the /api/batch endpoint
+Run: pytest tests/test_batch_db.py -v
+"""
+
+import threading
+import time
+
+import pytest
+from flask import Flask, g, jsonify, request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import QueuePool
+from services.batch import Batch
+from services.engineRouting import PIN_HEADER, EngineRouter, get_engine, read_only
+from services.serialization import FastJSONProvider
+
+
+@read_only
+def _count_items():
+    with get_engine().connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM items")).scalar()
+
+
+@pytest.fixture
+def batch_app(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'batch.db'}", poolclass=QueuePool, pool_size=4)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+        conn.execute(text("INSERT INTO items (id) VALUES (1), (2), (3)"))
+    checkouts = []
+    event.listen(engine, 'checkout', lambda *args: checkouts.append(1))
+
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.config['ENGINE'] = engine
+    app.config['BATCH_MAX_WORKERS'] = 2
+    router = EngineRouter().init_app(app)
+    Batch(max_requests=5).init_app(app)
+    running = {'now': 0, 'max': 0}
+    lock = threading.Lock()
+
+    @app.get('/api/count')
+    def count():
+        return jsonify({'count': _count_items(), 'user': request.args.get('user_id')})
+
+    @app.get('/api/text')
+    def plain():
+        return 'hello', 200, {'Content-Type': 'text/plain'}
+
+    @app.get('/api/missing')
+    def missing():
+        return jsonify({'message': 'Not found'}), 404
+
+    @app.get('/api/boom')
+    def boom():
+        raise RuntimeError('boom')
+
+    @app.get('/api/slow')
+    def slow():
+        with lock:
+            running['now'] += 1
+            running['max'] = max(running['max'], running['now'])
+        time.sleep(0.05)
+        with lock:
+            running['now'] -= 1
+        return jsonify(True)
+
+    @app.get('/api/g')
+    def read_g():
+        seen = getattr(g, 'seen', None)
+        g.seen = request.args.get('v')
+        return jsonify(seen)
+
+    return app, checkouts, running, router
+
+
+def _batch(app, requests, **extra):
+    return app.test_client().post('/api/batch', json={'requests': requests, **extra})
+
+
+class TestBatch:
+    """Test sub-request dispatch"""
+
+    def test_each_sub_request_has_own_status(self, batch_app):
+        app, _, _, _ = batch_app
+        response = _batch(app, [
+            {'path': '/api/count?user_id=5'},
+            {'path': '/api/missing'},
+            {'path': '/api/text'},
+            {'path': '/api/boom'},
+            {'path': '/api/count', 'method': 'POST'},
+        ])
+        assert response.status_code == 200
+        results = response.get_json()['responses']
+        assert results[0] == {'status': 200, 'body': {'count': 3, 'user': '5'}}
+        assert [r['status'] for r in results] == [200, 404, 200, 500, 400]
+        assert results[2]['body'] == 'hello'
+
+    def test_reads_share_one_connection(self, batch_app):
+        app, checkouts, _, _ = batch_app
+        results = _batch(app, [{'path': '/api/count'}] * 4).get_json()['responses']
+        assert [r['body']['count'] for r in results] == [3, 3, 3, 3]
+        assert len(checkouts) == 1
+
+    def test_sub_requests_get_their_own_g(self, batch_app):
+        app, _, _, _ = batch_app
+        results = _batch(app, [{'path': '/api/g?v=1'}, {'path': '/api/g?v=2'}]).get_json()['responses']
+        assert [r['body'] for r in results] == [None, None]
+
+    def test_parallel_respects_limit(self, batch_app):
+        app, _, running, _ = batch_app
+        results = _batch(app, [{'path': '/api/slow'}] * 5, parallel=True).get_json()['responses']
+        assert [r['status'] for r in results] == [200] * 5
+        assert running['max'] == 2
+
+    def test_limits(self, batch_app):
+        app, _, _, _ = batch_app
+        assert _batch(app, [{'path': '/api/count'}] * 6).status_code == 400
+        assert _batch(app, []).status_code == 400
+        nested = _batch(app, [{'path': '/api/batch'}, {'path': 'http://example.com/api/count'}])
+        assert [r['status'] for r in nested.get_json()['responses']] == [400, 400]
+
+    def test_batch_does_not_pin_caller(self, batch_app):
+        app, _, _, router = batch_app
+        response = _batch(app, [{'path': '/api/count?user_id=5'}])
+        assert PIN_HEADER not in response.headers
+        assert 'Set-Cookie' not in response.headers
+
+    def test_pin_header_reaches_sub_requests(self, batch_app, tmp_path):
+        """A caller pinned by header keeps reading its writes inside a batch"""
+        app, _, _, router = batch_app
+        replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+        with replica.begin() as conn:
+            conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+        app.config['READ_ENGINE'] = replica
+        client = app.test_client()
+
+        unpinned = client.post('/api/batch', json={'requests': [{'path': '/api/count'}]})
+        assert unpinned.get_json()['responses'][0]['body']['count'] == 0
+        pinned = client.post('/api/batch', json={'requests': [{'path': '/api/count'}]},
+                             headers={PIN_HEADER: router.issue()})
+        assert pinned.get_json()['responses'][0]['body']['count'] == 3
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
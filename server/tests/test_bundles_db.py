@@ -0,0 +1,114 @@
+"""
+Tests for the page bundle endpoints
+Run: pytest tests/test_bundles_db.py -v
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+from services.bundleService import BundleService
+from services.volunteerMatchingService import MatchService
+
+
+def _add_volunteers(engine, count):
+    """Volunteer ids run opposite to user ids, so paging can't mix the two up"""
+    with engine.begin() as conn:
+        for i in range(count):
+            conn.execute(text("""
+                INSERT INTO users (id, name, email, password_hash, state, created_at)
+                VALUES (:id, :name, :email, 'x', 'TX', CURRENT_TIMESTAMP)
+            """), {'id': 2000 + i, 'name': f'Bundle Volunteer {i:02d}', 'email': f'bundle{i}@example.com'})
+            conn.execute(text("""
+                INSERT INTO volunteers (id, user_id, availability) VALUES (:id, :user_id, 'weekends')
+            """), {'id': 2100 - i, 'user_id': 2000 + i})
+
+
+class TestEventViewBundle:
+    """Test the EventView bundle"""
+
+    def test_registered_user(self, app, test_volunteer, test_event):
+        with app.app_context():
+            MatchService.create_match(test_volunteer['volunteer_id'], test_event['id'])
+            response, status = BundleService.event_view(test_event['id'], test_volunteer['user_id'])
+            assert status == 200
+            data = response.get_json()
+            assert data['event']['name'] == 'Test Event'
+            assert data['is_registered'] is True
+            assert data['volunteer_id'] == test_volunteer['volunteer_id']
+            assert data['registration']['match_id']
+            assert data['event']['current_volunteers'] == 1
+
+    def test_anonymous(self, app, test_event):
+        with app.app_context():
+            response, status = BundleService.event_view(test_event['id'])
+            data = response.get_json()
+            assert status == 200
+            assert data['registration'] is None
+            assert data['counts'] == {}
+
+    def test_missing_event(self, app):
+        with app.app_context():
+            response, status = BundleService.event_view(123456)
+            assert status == 404
+
+
+class TestMatchingFormBundle:
+    """Test the VolunteerMatchingForm bundle"""
+
+    def test_only_upcoming_owned_events(self, app, test_admin, test_event):
+        with app.app_context():
+            with app.config['ENGINE'].begin() as conn:
+                conn.execute(text("""
+                    INSERT INTO events (id, ownerid, name, date, urgency) VALUES (1001, :owner, 'Future', :day, 'low')
+                """), {'owner': test_admin['id'], 'day': date.today() + timedelta(days=7)})
+            response, status = BundleService.matching_form(test_admin['id'])
+            assert status == 200
+            assert [e['id'] for e in response.get_json()['events']] == [1001]
+
+    def test_candidates_paginated(self, app, test_admin):
+        """Following next_cursor walks every candidate once, in name order"""
+        with app.app_context():
+            _add_volunteers(app.config['ENGINE'], 5)
+            names, cursor, pages = [], None, 0
+            while True:
+                response, status = BundleService.matching_form(
+                    test_admin['id'], per_page=2, search='Bundle', cursor=cursor)
+                assert status == 200
+                data = response.get_json()
+                pages += 1
+                names += [c['name'] for c in data['candidates']]
+                if not data['has_more']:
+                    assert data['next_cursor'] is None
+                    break
+                cursor = data['next_cursor']
+            assert names == [f'Bundle Volunteer {i:02d}' for i in range(5)]
+            assert pages == 3
+            assert 'total' not in data
+
+    def test_same_name_candidates_split_by_id(self, app, test_admin):
+        with app.app_context():
+            _add_volunteers(app.config['ENGINE'], 3)
+            with app.config['ENGINE'].begin() as conn:
+                conn.execute(text("UPDATE users SET name = 'Bundle Twin' WHERE id IN (2000, 2001, 2002)"))
+            first, _ = BundleService.matching_form(test_admin['id'], per_page=2, search='Twin')
+            first = first.get_json()
+            rest, _ = BundleService.matching_form(test_admin['id'], per_page=2, search='Twin',
+                                                  cursor=first['next_cursor'])
+            ids = [c['id'] for c in first['candidates']] + [c['id'] for c in rest.get_json()['candidates']]
+            assert ids == [2100, 2099, 2098]
+
+    def test_bad_cursor(self, app, test_admin):
+        with app.app_context():
+            response, status = BundleService.matching_form(test_admin['id'], cursor='not-a-cursor')
+            assert status == 400
+
+    def test_requires_admin(self, app, test_user2):
+        """Only organizers can load the matching form"""
+        with app.app_context():
+            response, status = BundleService.matching_form(test_user2['id'])
+            assert status == 403
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,134 @@
+"""
+Tests for response compression and conditional GET
+Run: pytest tests/test_compression_db.py -v
+"""
+
+import gzip
+import zlib
+
+import pytest
+from flask import Flask, Response, jsonify
+from services.serialization import FastJSONProvider
+from server import compression
+from server.compression import Compression
+
+ITEMS = [{'id': i, 'name': f'item {i}', 'description': 'x' * 40} for i in range(200)]
+
+
+@pytest.fixture
+def compressed_app():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    Compression(min_size=512).init_app(app)
+
+    @app.get('/items')
+    def items():
+        return jsonify(ITEMS)
+
+    @app.get('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.get('/versioned')
+    def versioned():
+        response = jsonify(ITEMS)
+        response.set_etag('v42')
+        return response
+
+    @app.get('/stream')
+    def stream():
+        return Response((f'{i}\n' * 100 for i in range(50)), mimetype='text/plain')
+
+    @app.post('/items')
+    def create():
+        return jsonify(ITEMS), 200
+
+    return app
+
+
+class TestCompression:
+    """Test Content-Encoding negotiation"""
+
+    def test_gzip_when_accepted(self, compressed_app):
+        response = compressed_app.test_client().get('/items', headers={'Accept-Encoding': 'gzip, deflate'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert int(response.headers['Content-Length']) == len(response.data)
+        assert gzip.decompress(response.data).decode().startswith('[{')
+
+    def test_identity_without_accept_encoding(self, compressed_app):
+        response = compressed_app.test_client().get('/items')
+        assert 'Content-Encoding' not in response.headers
+        assert response.get_json() == ITEMS
+
+    def test_small_bodies_left_alone(self, compressed_app):
+        response = compressed_app.test_client().get('/small', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+
+    def test_brotli_preferred_when_available(self, compressed_app, monkeypatch):
+        calls = []
+
+        class FakeBrotli:
+            @staticmethod
+            def compress(body, quality):
+                calls.append(quality)
+                return b'br:' + body
+
+        monkeypatch.setattr(compression, 'brotli', FakeBrotli)
+        response = compressed_app.test_client().get('/items', headers={'Accept-Encoding': 'gzip, br'})
+        assert response.headers['Content-Encoding'] == 'br'
+        assert response.data.startswith(b'br:')
+        assert calls == [4]
+
+    def test_streamed_response(self, compressed_app):
+        response = compressed_app.test_client().get('/stream', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Content-Length' not in response.headers
+        body = zlib.decompress(response.data, 16 + zlib.MAX_WBITS).decode()
+        assert body == ''.join(f'{i}\n' * 100 for i in range(50))
+
+    def test_writes_untouched(self, compressed_app):
+        response = compressed_app.test_client().post('/items', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+        assert 'ETag' not in response.headers
+
+
+class TestConditionalGet:
+    """Test ETags and 304 responses"""
+
+    def test_not_modified(self, compressed_app):
+        client = compressed_app.test_client()
+        first = client.get('/items')
+        etag = first.headers['ETag']
+        second = client.get('/items', headers={'If-None-Match': etag})
+        assert second.status_code == 304
+        assert second.data == b''
+        assert second.headers['ETag'] == etag
+
+    def test_etag_differs_per_encoding(self, compressed_app):
+        client = compressed_app.test_client()
+        plain = client.get('/items').headers['ETag']
+        gzipped = client.get('/items', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+        assert plain != gzipped
+        revalidated = client.get('/items', headers={'Accept-Encoding': 'gzip', 'If-None-Match': gzipped})
+        assert revalidated.status_code == 304
+        assert client.get('/items', headers={'If-None-Match': gzipped}).status_code == 200
+
+    def test_view_etag_kept(self, compressed_app):
+        client = compressed_app.test_client()
+        response = client.get('/versioned')
+        assert response.headers['ETag'] == '"v42"'
+        assert client.get('/versioned', headers={'If-None-Match': '"v42"'}).status_code == 304
+
+    def test_changed_body_gets_new_etag(self, compressed_app):
+        client = compressed_app.test_client()
+        etag = client.get('/items').headers['ETag']
+        ITEMS.append({'id': 999})
+        try:
+            assert client.get('/items', headers={'If-None-Match': etag}).status_code == 200
+        finally:
+            ITEMS.pop()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
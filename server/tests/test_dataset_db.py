@@ -0,0 +1,99 @@
+"""
+Tests for the synthetic dataset generator and bulk loader
+Run: pytest tests/test_dataset_db.py -v
+"""
+
+import datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import text
+from server.bench.dataset import DatasetSpec, generate, load, truncate
+from server.db import create_sqlite_schema, make_engine_from_env
+
+ANCHOR = datetime.date(2026, 1, 1)
+
+
+@pytest.fixture(scope='module')
+def spec():
+    return DatasetSpec(users=500, events=60, matches=3000, skills=25, anchor_date=ANCHOR, seed=7)
+
+
+@pytest.fixture(scope='module')
+def dataset(spec):
+    return generate(spec)
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    engine = make_engine_from_env(f"sqlite:///{tmp_path / 'dataset.db'}")
+    create_sqlite_schema(engine)
+    yield engine
+    engine.dispose()
+
+
+class TestGenerate:
+    """Test the generated rows"""
+
+    def test_deterministic(self, spec, dataset):
+        again = generate(spec)
+        for name, table in dataset.items():
+            assert table.rows() == again[name].rows(), name
+
+    def test_seed_changes_data(self, spec, dataset):
+        other = generate(DatasetSpec(**{**vars(spec), 'seed': 8}))
+        assert other['matches'].rows() != dataset['matches'].rows()
+
+    def test_counts(self, spec, dataset):
+        assert len(dataset['users']) == len(dataset['profiles']) == spec.users
+        assert len(dataset['admins']) == spec.admins
+        assert len(dataset['volunteers']) == spec.volunteers
+        assert len(dataset['events']) == spec.events
+        assert len(dataset['matches']) == spec.matches
+        assert len(dataset['skills']) == spec.skills
+
+    def test_unique_registrations_within_capacity(self, dataset):
+        matches = dataset['matches']
+        pairs = set(zip(matches.column('volunteer_id').tolist(), matches.column('event_id').tolist()))
+        assert len(pairs) == len(matches)
+        registered = np.bincount(matches.column('event_id'))[1:]
+        assert (registered <= dataset['events'].column('max_volunteers')[:len(registered)]).all()
+
+    def test_registrations_are_skewed(self, dataset):
+        registered = np.sort(np.bincount(dataset['matches'].column('event_id')))[::-1]
+        top = registered[:len(registered) // 10].sum()
+        assert top > 0.3 * registered.sum()
+
+    def test_history_only_for_past_confirmed(self, dataset):
+        dates = dict(zip(dataset['events'].column('id').tolist(), dataset['events'].rows()))
+        date_index = dataset['events'].columns.index('date')
+        status = {(v, e): s for _, v, e, s, _ in dataset['matches'].rows()}
+        for _, volunteer, event, _ in dataset['volunteer_history'].rows():
+            assert status[(volunteer, event)] == 'confirmed'
+            assert dates[event][date_index] < ANCHOR
+
+
+class TestLoad:
+    """Test bulk-loading into the SQLite schema"""
+
+    def test_load_and_foreign_keys(self, sqlite_engine, dataset):
+        timings = load(sqlite_engine, dataset, batch_size=700)
+        assert {name: rows for name, (rows, _) in timings.items()} == \
+            {name: len(table) for name, table in dataset.items()}
+        with sqlite_engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM matches")).scalar() == len(dataset['matches'])
+            assert conn.exec_driver_sql("PRAGMA foreign_key_check").fetchall() == []
+            event = conn.execute(text("SELECT date, created_at FROM events WHERE id = 1")).one()
+        assert isinstance(event.date, datetime.date)
+        assert isinstance(event.created_at, datetime.datetime)
+
+    def test_truncate_then_reload(self, sqlite_engine, dataset):
+        load(sqlite_engine, dataset)
+        truncate(sqlite_engine)
+        with sqlite_engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM users")).scalar() == 0
+        load(sqlite_engine, dataset)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,95 @@
+"""
+Tests for connection pool configuration
+Run: pytest tests/test_db_pool_db.py -v
+"""
+
+import threading
+import time
+
+import pytest
+from sqlalchemy import exc, text
+from server.db import InstrumentedQueuePool, make_engine_from_env, pool_settings_from_env, warm_pool
+
+
+@pytest.fixture
+def sqlite_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'pool.db'}"
+
+
+class TestPoolSettings:
+    """Test deriving pool sizes from the environment"""
+
+    def test_defaults_follow_thread_count(self):
+        settings = pool_settings_from_env({"WEB_THREADS": "8"})
+        assert settings["pool_size"] == 9
+        assert settings["max_overflow"] == 4
+        assert settings["ping_after_idle"] == 30
+
+    def test_explicit_sizes_win(self):
+        settings = pool_settings_from_env({"WEB_THREADS": "8", "DB_POOL_SIZE": "3", "DB_MAX_OVERFLOW": "0"})
+        assert settings["pool_size"] == 3
+        assert settings["max_overflow"] == 0
+
+    def test_connection_budget_split_across_workers(self):
+        """Workers never open more than their share of the server's connections"""
+        settings = pool_settings_from_env({
+            "WEB_THREADS": "16", "WEB_CONCURRENCY": "4", "DB_MAX_CONNECTIONS": "40",
+        })
+        assert settings["pool_size"] + settings["max_overflow"] <= 10
+        assert settings["pool_size"] == 10
+
+
+class TestInstrumentedPool:
+    """Test pool behaviour against a SQLite file"""
+
+    def test_engine_uses_instrumented_pool(self, sqlite_url):
+        engine = make_engine_from_env(sqlite_url, pool_size=2, max_overflow=1)
+        assert isinstance(engine.pool, InstrumentedQueuePool)
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+        stats = engine.pool.stats()
+        assert stats["checkouts"] == 1
+        assert stats["size"] == 2
+
+    def test_ping_only_after_idle(self, sqlite_url):
+        """Fresh and recently used connections are not pinged"""
+        engine = make_engine_from_env(sqlite_url, pool_size=1, max_overflow=0, ping_after_idle=0.05)
+        for _ in range(3):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        assert engine.pool.stats()["pings"] == 0
+
+        time.sleep(0.1)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        assert engine.pool.stats()["pings"] == 1
+
+    def test_waits_and_timeouts_counted(self, sqlite_url):
+        engine = make_engine_from_env(sqlite_url, pool_size=1, max_overflow=0, pool_timeout=1)
+        held = engine.connect()
+        release = threading.Timer(0.05, held.close)
+        release.start()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        release.join()
+        assert engine.pool.stats()["waits"] == 1
+
+        held = engine.connect()
+        engine.pool._timeout = 0.01
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        held.close()
+        assert engine.pool.stats()["timeouts"] == 1
+
+    def test_warm_pool_opens_connections(self, sqlite_url):
+        engine = make_engine_from_env(sqlite_url, pool_size=3, max_overflow=0)
+        assert warm_pool(engine) == 3
+        assert engine.pool.checkedin() == 3
+
+    def test_warmup_from_settings(self, sqlite_url):
+        engine = make_engine_from_env(sqlite_url, pool_size=2, max_overflow=0, warmup=5)
+        assert engine.pool.checkedin() == 2
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
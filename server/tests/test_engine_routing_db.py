@@ -0,0 +1,145 @@
+"""
+Tests for read/write engine routing
+Run: pytest tests/test_engine_routing_db.py -v
+"""
+
+import time
+
+import pytest
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, text
+from services.engineRouting import PIN_COOKIE, PIN_HEADER, EngineRouter, get_engine, mark_request_read_only, read_only
+
+
+def _make_db(path, label):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE source (label TEXT)"))
+        conn.execute(text("INSERT INTO source (label) VALUES (:label)"), {"label": label})
+    return engine
+
+
+@read_only
+def _read_label():
+    with get_engine().connect() as conn:
+        return conn.execute(text("SELECT label FROM source")).scalar()
+
+
+def _write_label():
+    with get_engine().connect() as conn:
+        return conn.execute(text("SELECT label FROM source")).scalar()
+
+
+@pytest.fixture
+def routed_app(tmp_path):
+    """Primary and replica stand-ins that answer with their own name."""
+    app = Flask(__name__)
+    app.config['ENGINE'] = _make_db(tmp_path / 'primary.db', 'primary')
+    app.config['SECRET_KEY'] = 'test-secret'
+    router = EngineRouter(read_engine=_make_db(tmp_path / 'replica.db', 'replica'), sticky_seconds=0.2)
+    router.init_app(app)
+
+    @app.get('/label')
+    def label():
+        return jsonify(_read_label())
+
+    @app.post('/label')
+    def write():
+        return jsonify(_write_label()), 201
+
+    @app.post('/search')
+    def search():
+        mark_request_read_only()
+        return jsonify(_read_label())
+
+    @app.post('/fail')
+    def fail():
+        return jsonify({'error': 'bad'}), 400
+
+    return app
+
+
+class TestEngineRouting:
+    """Test which engine service methods get"""
+
+    def test_read_only_uses_replica(self, routed_app):
+        with routed_app.test_request_context('/'):
+            assert _read_label() == 'replica'
+            assert _write_label() == 'primary'
+
+    def test_no_replica_configured(self, tmp_path):
+        """Without READ_ENGINE everything stays on the primary"""
+        app = Flask(__name__)
+        app.config['ENGINE'] = _make_db(tmp_path / 'only.db', 'primary')
+        with app.app_context():
+            assert _read_label() == 'primary'
+
+    def test_outside_request(self, routed_app):
+        """Background work has no identity and reads from the replica"""
+        with routed_app.app_context():
+            assert _read_label() == 'replica'
+
+
+class TestReadYourWrites:
+    """Test stickiness after a write"""
+
+    def test_writer_pinned_to_primary(self, routed_app):
+        client = routed_app.test_client()
+        assert client.get('/label').get_json() == 'replica'
+        response = client.post('/label')
+        assert response.status_code == 201
+        assert response.headers[PIN_HEADER]
+        assert client.get('/label').get_json() == 'primary'
+        # Other clients are unaffected, whatever user_id they claim
+        assert routed_app.test_client().get('/label?user_id=1').get_json() == 'replica'
+
+    def test_pin_header_without_cookies(self, routed_app):
+        """Clients that don't keep cookies can echo the header instead"""
+        client = routed_app.test_client(use_cookies=False)
+        token = client.post('/label').headers[PIN_HEADER]
+        assert client.get('/label').get_json() == 'replica'
+        assert client.get('/label', headers={PIN_HEADER: token}).get_json() == 'primary'
+
+    def test_pin_honoured_by_other_workers(self, routed_app, tmp_path):
+        """A second app with the same SECRET_KEY (another worker) accepts the pin"""
+        token = routed_app.test_client().post('/label').headers[PIN_HEADER]
+        other = Flask(__name__)
+        other.config.update(ENGINE=routed_app.config['ENGINE'], SECRET_KEY='test-secret')
+        EngineRouter(read_engine=routed_app.config['READ_ENGINE']).init_app(other)
+        with other.test_request_context('/', headers={PIN_HEADER: token}):
+            assert _read_label() == 'primary'
+
+    def test_forged_pin_ignored(self, routed_app):
+        client = routed_app.test_client()
+        token = client.post('/label').headers[PIN_HEADER]
+        until, _, signature = token.partition('.')
+        forged = f'{float(until) + 3600:.3f}.{signature}'
+        fresh = routed_app.test_client()
+        assert fresh.get('/label', headers={PIN_HEADER: forged}).get_json() == 'replica'
+        assert fresh.get('/label', headers={PIN_HEADER: 'garbage'}).get_json() == 'replica'
+
+    def test_pin_expires(self, routed_app):
+        client = routed_app.test_client()
+        client.post('/label')
+        assert client.get('/label').get_json() == 'primary'
+        time.sleep(0.25)
+        assert client.get('/label').get_json() == 'replica'
+
+    def test_failed_write_not_pinned(self, routed_app):
+        client = routed_app.test_client()
+        response = client.post('/fail')
+        assert PIN_HEADER not in response.headers
+        assert client.get('/label').get_json() == 'replica'
+
+    def test_read_only_post_not_pinned(self, routed_app):
+        """POSTs that only read (searches, listings) don't pin"""
+        client = routed_app.test_client()
+        response = client.post('/search')
+        assert response.get_json() == 'replica'
+        assert PIN_HEADER not in response.headers
+        assert client.get_cookie(PIN_COOKIE) is None
+        assert client.get('/label').get_json() == 'replica'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,175 @@
+"""
+Tests for per-request SQL instrumentation
+Run: pytest tests/test_instrumentation_db.py -v
+"""
+
+import time
+
+import pytest
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import StaticPool
+from server.instrumentation import RequestStats, SQLInstrumentation, normalize_statement
+
+TOKEN = 'debug-token'
+
+
+@pytest.fixture
+def instrumented():
+    """A small app on an in-memory database with one N+1 endpoint."""
+    engine = create_engine('sqlite://', poolclass=StaticPool,
+                           connect_args={'check_same_thread': False})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO items (id, name) VALUES (:id, :name)"),
+                      [{"id": i, "name": f"item {i}"} for i in range(10)])
+
+    app = Flask(__name__)
+    app.config['ENGINE'] = engine
+    app.config['PROFILER_TOKEN'] = TOKEN
+
+    @app.get('/one')
+    def one():
+        with engine.connect() as conn:
+            return jsonify(conn.execute(text("SELECT COUNT(*) FROM items")).scalar())
+
+    @app.get('/each')
+    def each():
+        with engine.connect() as conn:
+            ids = [row[0] for row in conn.execute(text("SELECT id FROM items"))]
+            names = [conn.execute(text("SELECT name FROM items WHERE id = :id"), {"id": i}).scalar()
+                     for i in ids]
+        return jsonify(names)
+
+    instrumentation = SQLInstrumentation().init_app(app)
+    yield app, instrumentation
+    instrumentation.remove()
+
+
+@pytest.fixture
+def admin(instrumented):
+    """An admins row for user 7, so the debug credentials check passes"""
+    app, _ = instrumented
+    with app.config['ENGINE'].begin() as conn:
+        conn.execute(text("CREATE TABLE admins (id INTEGER PRIMARY KEY, user_id INTEGER)"))
+        conn.execute(text("INSERT INTO admins (id, user_id) VALUES (1, 7)"))
+    return {'X-Profile-Token': TOKEN, 'X-Profile-Admin': '7'}
+
+
+class TestRequestStats:
+    """Test per-request bookkeeping"""
+
+    def test_normalize_statement(self):
+        assert normalize_statement("SELECT *\n    FROM  items\n") == "SELECT * FROM items"
+
+    def test_repeated_statements(self):
+        """Only statements at or above the threshold are suspects"""
+        stats = RequestStats()
+        for _ in range(3):
+            stats.record("SELECT a", 0.001)
+        stats.record("SELECT b", 0.005)
+        assert stats.count == 4
+        assert stats.slowest == "SELECT b"
+        assert stats.repeated(3) == [("SELECT a", 3)]
+
+    def test_executemany_not_suspect(self):
+        """A batched insert is one round trip, not an N+1"""
+        stats = RequestStats()
+        for _ in range(5):
+            stats.record("INSERT INTO t VALUES (?)", 0.001, executemany=True)
+        assert stats.repeated(2) == []
+
+
+class TestSQLInstrumentation:
+    """Test the Flask and engine hooks"""
+
+    def test_server_timing_header(self, instrumented):
+        app, _ = instrumented
+        response = app.test_client().get('/one')
+        timing = response.headers['Server-Timing']
+        assert timing.startswith('db;dur=')
+        assert 'desc="1 queries"' in timing
+        assert 'app;dur=' in timing
+
+    def test_n_plus_one_flagged(self, instrumented):
+        app, instrumentation = instrumented
+        app.test_client().get('/each')
+        stats = instrumentation.aggregates()['each']
+        assert stats['queries'] == 11
+        assert stats['n_plus_one_requests'] == 1
+        assert stats['n_plus_one_suspects'] == {"SELECT name FROM items WHERE id = ?": 10}
+
+    def test_endpoint_aggregates(self, instrumented, admin):
+        app, instrumentation = instrumented
+        client = app.test_client()
+        for _ in range(3):
+            client.get('/one')
+        data = client.get('/debug/sql-stats', headers=admin).get_json()
+        assert data['one']['requests'] == 3
+        assert data['one']['avg_queries'] == 1
+        assert data['one']['n_plus_one_requests'] == 0
+
+    def test_stats_require_debug_credentials(self, instrumented, admin):
+        app, _ = instrumented
+        client = app.test_client()
+        assert client.get('/debug/sql-stats').status_code == 403
+        assert client.get('/debug/sql-stats', headers={**admin, 'X-Profile-Token': 'wrong'}).status_code == 403
+        assert client.get('/debug/sql-stats', headers={**admin, 'X-Profile-Admin': '8'}).status_code == 403
+
+    def test_stats_not_served_without_token(self, monkeypatch):
+        monkeypatch.delenv('PROFILER_TOKEN', raising=False)
+        app = Flask(__name__)
+        instrumentation = SQLInstrumentation(engine=create_engine('sqlite://')).init_app(app)
+        try:
+            assert app.test_client().get('/debug/sql-stats').status_code == 404
+        finally:
+            instrumentation.remove()
+
+    def test_replica_queries_counted(self):
+        primary, replica = create_engine('sqlite://'), create_engine('sqlite://')
+        app = Flask(__name__)
+        app.config.update(ENGINE=primary, READ_ENGINE=replica)
+
+        @app.get('/both')
+        def both():
+            for engine in (primary, replica, replica):
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+            return 'ok'
+
+        instrumentation = SQLInstrumentation().init_app(app)
+        try:
+            response = app.test_client().get('/both')
+            assert 'desc="3 queries"' in response.headers['Server-Timing']
+            stats = instrumentation.aggregates()['both']
+            assert stats['queries'] == 3 and stats['replica_queries'] == 2
+        finally:
+            instrumentation.remove()
+
+    def test_queries_outside_requests_ignored(self, instrumented):
+        app, instrumentation = instrumented
+        with app.config['ENGINE'].connect() as conn:
+            conn.execute(text("SELECT 1"))
+        assert instrumentation.aggregates() == {}
+
+    def test_failed_statement_leaves_no_state(self, instrumented):
+        """A statement that raises never reaches after_cursor_execute; its start must not linger"""
+        app, instrumentation = instrumented
+        with app.config['ENGINE'].connect() as conn:
+            with pytest.raises(exc.OperationalError):
+                conn.execute(text("SELECT * FROM missing"))
+            assert 'query_started' not in conn.info
+        time.sleep(0.05)
+        app.test_client().get('/one')
+        assert instrumentation.aggregates()['one']['avg_db_ms'] < 50
+
+    def test_dump(self, instrumented, tmp_path):
+        app, instrumentation = instrumented
+        app.test_client().get('/one')
+        path = tmp_path / 'sql-stats.json'
+        instrumentation.dump(str(path))
+        assert '"one"' in path.read_text()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
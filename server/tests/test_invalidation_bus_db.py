@@ -0,0 +1,241 @@
+"""
+Tests for the cross-worker cache invalidation bus
+Run: pytest tests/test_invalidation_bus_db.py -v
+"""
+
+import multiprocessing
+import threading
+import time
+
+import pytest
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, text
+from services.changeEvents import notify_change
+from services.invalidationBus import InvalidationBus, TableTransport, UnixDatagramTransport
+from services.responseCache import LRUBackend, ResponseCache, cached, invalidate_tags
+
+CACHE_VERSIONS_SQLITE = """
+    CREATE TABLE cache_versions (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      origin VARCHAR(64) NOT NULL,
+      tags TEXT NOT NULL,
+      created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def _sqlite_log(path):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text(CACHE_VERSIONS_SQLITE))
+    return engine
+
+
+def _make_transport(kind, location):
+    if kind == 'table':
+        return TableTransport(create_engine(f"sqlite:///{location}"), poll_interval=0.02)
+    return UnixDatagramTransport(location, recv_timeout=0.05)
+
+
+def _worker(kind, location, ready, received):
+    """A worker process that reports every invalidation it receives."""
+    bus = InvalidationBus(_make_transport(kind, location))
+    bus.subscribe(lambda tags: received.put(list(tags)))
+    bus.ensure_started()
+    ready.set()
+    time.sleep(3)
+    bus.stop()
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class FailingTransport:
+    """A transport whose receive side is down."""
+
+    def open(self, origin):
+        pass
+
+    def publish(self, tags):
+        pass
+
+    def poll(self, stop_event):
+        stop_event.wait(0.01)
+        raise ConnectionError('log unavailable')
+
+    def close(self):
+        pass
+
+
+class TestTableTransport:
+    """Test the cache_versions log within one process"""
+
+    def test_other_workers_receive(self, tmp_path):
+        engine = _sqlite_log(tmp_path / 'log.db')
+        sender = InvalidationBus(TableTransport(engine, poll_interval=0.02))
+        receiver = InvalidationBus(TableTransport(engine, poll_interval=0.02))
+        got, own = [], []
+        receiver.subscribe(got.append)
+        sender.subscribe(own.append)
+        sender.ensure_started()
+        receiver.ensure_started()
+        try:
+            sender.publish(['event:1', 'events'])
+            assert _wait_for(lambda: got == [['event:1', 'events']])
+            assert own == []  # publishers don't receive their own invalidations
+        finally:
+            sender.stop()
+            receiver.stop()
+
+    def test_pruned_log_forces_resync(self, tmp_path):
+        engine = _sqlite_log(tmp_path / 'log.db')
+        transport = TableTransport(engine, poll_interval=0)
+        transport.open('reader')
+        with engine.begin() as conn:
+            for i in range(5):
+                conn.execute(text("INSERT INTO cache_versions (origin, tags) VALUES ('w', 'x')"))
+            conn.execute(text("DELETE FROM cache_versions WHERE id <= 3"))
+        batches, gap = transport.poll(threading.Event())
+        assert gap is True
+        assert len(batches) == 2
+
+    def test_late_commit_of_lower_id_is_read(self, tmp_path):
+        """Id 3 becoming visible before id 2 commits must not lose id 2"""
+        engine = _sqlite_log(tmp_path / 'log.db')
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO cache_versions (id, origin, tags) VALUES (1, 'w', 'old')"))
+        transport = TableTransport(engine, poll_interval=0)
+        transport.open('reader')
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO cache_versions (id, origin, tags) VALUES (3, 'w', 'third')"))
+        batches, gap = transport.poll(threading.Event())
+        assert (batches, gap) == ([['third']], False)
+
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO cache_versions (id, origin, tags) VALUES (2, 'w', 'second')"))
+            conn.execute(text("INSERT INTO cache_versions (id, origin, tags) VALUES (4, 'w', 'fourth')"))
+        batches, gap = transport.poll(threading.Event())
+        assert (batches, gap) == ([['second'], ['fourth']], False)
+        assert transport.poll(threading.Event()) == ([], False)
+
+    def test_unfilled_hole_forces_resync(self, tmp_path):
+        """An id that never commits (rolled back, or too slow) clears caches once"""
+        engine = _sqlite_log(tmp_path / 'log.db')
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO cache_versions (id, origin, tags) VALUES (1, 'w', 'old')"))
+        transport = TableTransport(engine, poll_interval=0, hole_timeout=0.05)
+        transport.open('reader')
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO cache_versions (id, origin, tags) VALUES (3, 'w', 'x')"))
+        assert transport.poll(threading.Event()) == ([['x']], False)
+        time.sleep(0.1)
+        assert transport.poll(threading.Event()) == ([], True)
+        assert transport.poll(threading.Event()) == ([], False)
+
+
+class TestUnixDatagramTransport:
+    """Test the socket transport within one process"""
+
+    def test_sequence_gap_detected(self, tmp_path):
+        receiver = UnixDatagramTransport(str(tmp_path), recv_timeout=0.5)
+        sender = UnixDatagramTransport(str(tmp_path))
+        receiver.open('r')
+        sender.open('s')
+        stop = threading.Event()
+        try:
+            sender.publish(['a'])
+            assert receiver.poll(stop) == ([['a']], False)
+            sender._seq += 1  # simulate a dropped datagram
+            sender.publish(['b'])
+            assert receiver.poll(stop) == ([['b']], True)
+        finally:
+            sender.close()
+            receiver.close()
+
+
+class TestMultiProcess:
+    """Invalidations reach caches in other processes"""
+
+    @pytest.mark.parametrize('kind', ['table', 'unix'])
+    def test_broadcast_to_workers(self, tmp_path, kind):
+        location = str(tmp_path / 'log.db') if kind == 'table' else str(tmp_path / 'bus')
+        if kind == 'table':
+            _sqlite_log(location)
+        ctx = multiprocessing.get_context('fork')
+        received = ctx.Queue()
+        readies = [ctx.Event() for _ in range(2)]
+        workers = [ctx.Process(target=_worker, args=(kind, location, ready, received)) for ready in readies]
+        for w in workers:
+            w.start()
+        try:
+            assert all(ready.wait(5) for ready in readies)
+            publisher = InvalidationBus(_make_transport(kind, location))
+            publisher.ensure_started()
+            publisher.publish(['matches:7'])
+            results = [received.get(timeout=3) for _ in workers]
+            publisher.stop()
+        finally:
+            for w in workers:
+                w.join(5)
+        assert results == [['matches:7'], ['matches:7']]
+
+
+class TestBoundedStaleness:
+    """Caches stop serving when the bus can't vouch for them"""
+
+    def test_stale_bus_bypasses_cache(self):
+        app = Flask(__name__)
+        ResponseCache(LRUBackend()).init_app(app)
+        bus = InvalidationBus(FailingTransport(), max_staleness=0.05).init_app(app)
+        calls = []
+
+        @app.get('/items')
+        @cached(['items'])
+        def items():
+            calls.append(1)
+            return jsonify(len(calls))
+
+        client = app.test_client()
+        client.get('/items')
+        assert _wait_for(lambda: not bus.is_fresh())
+        assert client.get('/items').headers.get('X-Cache') is None
+        assert len(calls) == 2
+        bus.stop()
+
+    def test_recovery_clears_cache(self, tmp_path):
+        app = Flask(__name__)
+        cache = ResponseCache(LRUBackend()).init_app(app)
+        engine = _sqlite_log(tmp_path / 'log.db')
+        bus = InvalidationBus(TableTransport(engine, poll_interval=0.02)).init_app(app)
+        bus._needs_resync = True
+        resynced = []
+        bus.on_resync(lambda: resynced.append(1))
+        bus.ensure_started()
+        try:
+            assert _wait_for(lambda: resynced)
+            assert bus.is_fresh()
+        finally:
+            bus.stop()
+
+    def test_writes_publish_tags_and_changes(self, tmp_path):
+        app = Flask(__name__)
+        ResponseCache(LRUBackend()).init_app(app)
+        engine = _sqlite_log(tmp_path / 'log.db')
+        bus = InvalidationBus(TableTransport(engine, poll_interval=0.02)).init_app(app)
+        with app.app_context():
+            invalidate_tags('event:3')
+            notify_change('user', 9)
+        with engine.connect() as conn:
+            tags = [row[0] for row in conn.execute(text("SELECT tags FROM cache_versions ORDER BY id"))]
+        bus.stop()
+        assert tags == ['event:3', 'change:user:9']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,107 @@
+"""
+Tests for the load-test harness
+Run: pytest tests/test_loadtest_db.py -v
+"""
+
+import itertools
+import json
+import random
+import threading
+
+import pytest
+from sqlalchemy import text
+from werkzeug.serving import make_server
+from server.app import create_app
+from server.bench.loadtest import SCENARIOS, Recorder, Targets, assign_scenarios, compare, parse_mix, run
+
+
+@pytest.fixture
+def targets(app, test_volunteer, test_admin, test_event):
+    with app.config['ENGINE'].begin() as conn:
+        conn.execute(text("INSERT INTO notifications (user_id, message) VALUES (:user_id, 'Welcome')"),
+                     {'user_id': test_volunteer['user_id']})
+    return Targets(volunteers=[(test_volunteer['volunteer_id'], test_volunteer['user_id'])],
+                   admins=[test_admin['id']], events=[test_event['id']], hot_event=test_event['id'])
+
+
+@pytest.fixture
+def server_url(app):
+    # Single-threaded, so requests share the test's rolled-back connection one at a time
+    served = create_app({'ENGINE': app.config['ENGINE'], 'READ_ENGINE': None, 'TESTING': True})
+    server = make_server('127.0.0.1', 0, served)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    thread.join()
+
+
+def _results(**routes):
+    base = {'requests': 100, 'rps': 10.0, 'p50_ms': 5.0, 'p90_ms': 8.0, 'p95_ms': 10.0, 'p99_ms': 20.0,
+            'max_ms': 30.0, 'rejected': 0, 'errors': 0, 'error_rate': 0.0}
+    return {'meta': {'commit': 'abc', 'date': '2026-01-01'},
+            'routes': {route: {**base, **changes} for route, changes in routes.items()}}
+
+
+class TestScenarios:
+    """Test the traffic each scenario produces"""
+
+    def test_poller_polls_every_five_seconds(self, targets):
+        steps = list(itertools.islice(SCENARIOS['poller'](targets, random.Random(1)), 4))
+        assert [s.route for s in steps] == ['GET /api/notifications', 'GET /api/notifications/count'] * 2
+        assert sum(s.think for s in steps[:2]) == 5.0
+
+    def test_register_targets_hot_event(self, targets):
+        step = next(SCENARIOS['register'](targets, random.Random(1)))
+        assert step.body == {'user_id': 999, 'event_id': 999}
+        assert 400 in step.expect
+
+    def test_parse_mix(self):
+        assert parse_mix('poller=3,admin') == {'poller': 3.0, 'admin': 1.0}
+        with pytest.raises(ValueError, match='nope'):
+            parse_mix('nope=1')
+
+    def test_assign_scenarios_in_proportion(self):
+        names = assign_scenarios({'poller': 60, 'browser': 25, 'register': 5, 'admin': 10}, 20)
+        assert {name: names.count(name) for name in set(names)} == \
+            {'poller': 12, 'browser': 5, 'register': 1, 'admin': 2}
+
+
+class TestReporting:
+    """Test aggregation and baseline comparison"""
+
+    def test_summary(self):
+        recorder = Recorder()
+        recorder.latencies['GET /x'] = [0.001 * i for i in range(1, 101)]
+        recorder.errors['GET /x'] = 25
+        summary = recorder.summary(duration=10)['GET /x']
+        assert summary['requests'] == 125
+        assert summary['rps'] == 10.0
+        assert summary['p50_ms'] == pytest.approx(50.5)
+        assert summary['p99_ms'] <= summary['max_ms'] == 100.0
+        assert summary['error_rate'] == 0.2
+
+    def test_compare_flags_regressions(self):
+        baseline = _results(**{'GET /a': {}, 'GET /b': {}, 'GET /c': {}})
+        current = _results(**{'GET /a': {'p95_ms': 10.5}, 'GET /b': {'p95_ms': 25.0},
+                              'GET /c': {'rps': 5.0, 'error_rate': 0.05}})
+        assert compare(baseline, current) == ['GET /b: p95', 'GET /c: throughput', 'GET /c: errors']
+        assert compare(baseline, baseline) == []
+
+
+class TestRun:
+    """Test a short run against a live server"""
+
+    def test_run(self, server_url, targets, tmp_path):
+        results = run(server_url, targets, users=4, duration=1, think_scale=0, ramp=0,
+                      mix=parse_mix('poller=1,register=1,admin=1'))
+        routes = results['routes']
+        assert {'GET /api/notifications', 'POST /api/register-event', 'POST /api/match/find'} <= set(routes)
+        assert results['total']['errors'] == 0
+        # The first registration succeeds, the rest are rejected as duplicates
+        assert routes['POST /api/register-event']['rejected'] == routes['POST /api/register-event']['requests'] - 1
+        (tmp_path / 'results.json').write_text(json.dumps(results))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
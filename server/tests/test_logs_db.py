@@ -0,0 +1,147 @@
+"""
+Tests for structured, queue-based logging
+Run: pytest tests/test_logs_db.py -v
+"""
+
+import io
+import json
+import logging
+import os
+import queue
+import sys
+import time
+
+import pytest
+from server.logs import DroppingQueueHandler, JSONFormatter, StructuredLogging, parse_sample
+
+logger = logging.getLogger('server.tests.logs')
+
+
+@pytest.fixture
+def stream():
+    return io.StringIO()
+
+
+@pytest.fixture
+def logged_app(app, stream):
+    if StructuredLogging._installed is not None:
+        StructuredLogging._installed.stop()
+
+    @app.get('/work')
+    def work():
+        logger.info('Working', extra={'items': 3})
+        return 'ok', 200
+
+    @app.get('/poll')
+    def poll():
+        return 'nothing new', 200
+
+    @app.get('/boom')
+    def boom():
+        return 'broken', 503
+
+    extension = StructuredLogging(stream=stream, sample='/poll=0').init_app(app)
+    yield app
+    extension.stop()
+
+
+def records(app, stream):
+    """Flush the listener and parse what it wrote."""
+    app.extensions['structured_logging'].stop()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+class TestFormatter:
+    """Test the JSON line format"""
+
+    def test_fields(self):
+        record = logging.LogRecord('svc', logging.WARNING, __file__, 1, 'Event %s failed', (7,), None)
+        record.request_id = 'abc'
+        record.user_id = 12
+        document = json.loads(JSONFormatter().format(record))
+        assert document['msg'] == 'Event 7 failed'
+        assert document['level'] == 'WARNING'
+        assert document['request_id'] == 'abc'
+        assert document['user_id'] == 12
+        assert document['ts'].endswith('+00:00')
+
+    def test_exception(self):
+        try:
+            raise ValueError('bad')
+        except ValueError:
+            record = logging.LogRecord('svc', logging.ERROR, __file__, 1, 'Failed', (), sys.exc_info())
+        assert 'ValueError: bad' in json.loads(JSONFormatter().format(record))['exc']
+
+    def test_parse_sample(self):
+        assert parse_sample('/a=0.5, /b=2,') == {'/a': 0.5, '/b': 1.0}
+
+
+class TestRequests:
+    """Test correlation ids and the access log"""
+
+    def test_request_id_on_records_and_response(self, logged_app, stream):
+        response = logged_app.test_client().get('/work')
+        request_id = response.headers['X-Request-ID']
+        logged = records(logged_app, stream)
+        work = next(r for r in logged if r['msg'] == 'Working')
+        access = next(r for r in logged if r['logger'] == 'server.access')
+        assert work['request_id'] == access['request_id'] == request_id
+        assert work['items'] == 3
+        assert access['route'] == '/work' and access['status'] == 200 and access['duration_ms'] >= 0
+
+    def test_incoming_request_id(self, logged_app):
+        client = logged_app.test_client()
+        assert client.get('/work', headers={'X-Request-ID': 'edge-123'}).headers['X-Request-ID'] == 'edge-123'
+        replaced = client.get('/work', headers={'X-Request-ID': 'bad id;drop'}).headers['X-Request-ID']
+        assert replaced != 'bad id;drop' and len(replaced) == 32
+
+    def test_no_request_id_outside_requests(self, logged_app, stream):
+        logged_app.test_client().get('/work')
+        logger.info('Background')
+        background = next(r for r in records(logged_app, stream) if r['msg'] == 'Background')
+        assert 'request_id' not in background
+
+    def test_sampling(self, logged_app, stream):
+        client = logged_app.test_client()
+        for _ in range(20):
+            client.get('/poll')
+        client.get('/boom')
+        routes = [r['route'] for r in records(logged_app, stream) if r['logger'] == 'server.access']
+        assert '/poll' not in routes
+        assert '/boom' in routes
+
+
+class TestQueue:
+    """Test that logging never blocks the caller"""
+
+    def test_full_queue_drops(self):
+        handler = DroppingQueueHandler(queue.Queue(2))
+        test_logger = logging.getLogger('server.tests.logs.full')
+        test_logger.propagate = False
+        test_logger.addHandler(handler)
+        try:
+            started = time.perf_counter()
+            for i in range(100):
+                test_logger.warning('record %d', i)
+            assert time.perf_counter() - started < 0.5
+        finally:
+            test_logger.removeHandler(handler)
+        assert handler.queue.qsize() == 2
+        assert handler.dropped == 98
+        assert handler.queue.get_nowait().msg == 'record 0'
+
+    def test_forked_child_gets_listener(self, logged_app, tmp_path):
+        extension = logged_app.extensions['structured_logging']
+        output = tmp_path / 'child.log'
+        pid = os.fork()
+        if pid == 0:
+            extension.output.stream = open(output, 'w')
+            logger.warning('From child')
+            extension.stop()
+            os._exit(0)
+        os.waitpid(pid, 0)
+        assert json.loads(output.read_text())['msg'] == 'From child'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
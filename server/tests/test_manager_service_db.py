@@ -6,6 +6,7 @@ Run: pytest tests/new_tests/test_manager_service_db.py -v
 import pytest
 from services.managerService import ManagerEventService
 from flask import json
+from sqlalchemy import text
 
 
 class TestManagerFetchEvents:
@@ -56,6 +57,74 @@ class TestManagerFetchEvents:
                     assert all(e['urgency'] == 'medium' for e in events)
 
 
+class TestManagerEventListingQuery:
+    """Test server-side filtering, sorting and keyset pagination"""
+
+    @pytest.fixture
+    def many_events(self, app, test_admin):
+        """Seven events for test_admin across dates and urgencies"""
+        with app.app_context():
+            with app.config['ENGINE'].begin() as conn:
+                for i in range(7):
+                    conn.execute(text(
+                        "INSERT INTO events (id, ownerid, name, date, urgency, max_volunteers) "
+                        "VALUES (:id, :ownerid, :name, :date, :urgency, 1)"
+                    ), {
+                        "id": 9900 + i, "ownerid": test_admin['id'], "name": f"Event {i}",
+                        "date": f"2030-01-{10 + i % 3:02d}", "urgency": ['low', 'medium', 'high'][i % 3],
+                    })
+        return [9900 + i for i in range(7)]
+
+    def _fetch(self, app, body):
+        with app.test_request_context(json=body):
+            return ManagerEventService.fetch_events()
+
+    def test_filters_in_sql(self, app, test_admin, many_events):
+        """Urgency list and date range filters combine"""
+        with app.app_context():
+            response, status = self._fetch(app, {
+                'userId': test_admin['id'], 'urgency': ['low', 'high'],
+                'date_from': '2030-01-10', 'date_to': '2030-01-11',
+            })
+            assert status == 200
+            assert sorted(e['id'] for e in response.get_json()) == [9900, 9903, 9906]
+
+    def test_event_status_full(self, app, test_admin, test_volunteer, many_events):
+        """The full event status compares registrations to capacity"""
+        with app.app_context():
+            with app.config['ENGINE'].begin() as conn:
+                conn.execute(text("INSERT INTO matches (volunteer_id, event_id) VALUES (999, 9901)"))
+            response, status = self._fetch(app, {'userId': test_admin['id'], 'event_status': 'full'})
+            assert status == 200
+            assert [e['id'] for e in response.get_json()] == [9901]
+
+    def test_keyset_pagination(self, app, test_admin, many_events):
+        """Pages follow the sort order without overlap and stop with has_more false"""
+        with app.app_context():
+            seen, cursor = [], None
+            while True:
+                response, status = self._fetch(app, {
+                    'userId': test_admin['id'], 'sort': '-date', 'limit': 3, 'cursor': cursor,
+                })
+                assert status == 200
+                page = response.get_json()
+                seen += [e['id'] for e in page['events']]
+                cursor = page['next_cursor']
+                if not page['has_more']:
+                    assert cursor is None
+                    break
+            # Newest date first (2030-01-12, -11, -10), higher id first within a date
+            assert seen == [9905, 9902, 9904, 9901, 9906, 9903, 9900]
+
+    def test_invalid_options(self, app, test_admin):
+        """Unknown sort keys, statuses, limits and cursors are rejected"""
+        with app.app_context():
+            for options in ({'sort': 'ownerid'}, {'event_status': 'archived'}, {'limit': 0},
+                            {'cursor': 'not-a-cursor'}, {'urgency': 'urgent'}):
+                response, status = self._fetch(app, {'userId': test_admin['id'], **options})
+                assert status == 400
+
+
 class TestManagerCreateEvent:
     """Test creating events"""
     
@@ -0,0 +1,258 @@
+"""
+Tests for the vectorized match scoring model and the services built on it
+Run: pytest tests/test_match_scoring_db.py -v
+"""
+
+import numpy as np
+import pytest
+from sqlalchemy import text
+from services.matchScoring import (
+    DEFAULT_WEIGHTS, SCORERS, ScoringContext, availability_days, parse_location
+)
+from services.volunteerMatchingService import MatchService, MatchingHelper
+
+
+def _volunteer(id, availability='flexible', city=None, state=None, attended=0, tasks=0, completed=0):
+    return {
+        'id': id, 'availability': availability, 'profile_availability': None,
+        'city': city, 'state': state, 'attended': attended, 'tasks': tasks, 'completed': completed,
+    }
+
+
+def _event(id, date='2024-12-31', urgency='low', location=None, ownerid=1, time_label=None):
+    return {'id': id, 'date': date, 'urgency': urgency, 'location': location, 'ownerid': ownerid,
+            'time_label': time_label}
+
+
+def legacy_score(volunteer, volunteer_skills, event):
+    """The scoring loop find_best_match used before the scoring framework"""
+    event_skills = [s.lower() for s in event['required_skills'].split(',')] if event['required_skills'] else []
+    score = MatchingHelper.calculate_score(volunteer_skills, event_skills)
+    if volunteer['availability'].lower() in (event.get('time_label') or '').lower():
+        score += 10
+    return score
+
+
+class TestScorers:
+    """Test the scorer components on in-memory batches"""
+
+    def test_partial_skill_coverage(self):
+        """Volunteers get partial credit for covering some required skills"""
+        ctx = ScoringContext(
+            [_volunteer(1), _volunteer(2)], {1: {10, 11}, 2: {10}},
+            [_event(5)], {5: {10, 11, 12, 13}}, {},
+        )
+        coverage = SCORERS['skills'](ctx, np.array([0, 1]), np.array([0, 0]))
+        assert coverage.tolist() == [0.5, 0.25]
+
+    def test_event_without_requirements_scores_zero(self):
+        """Events with no required skills give no skill credit"""
+        ctx = ScoringContext([_volunteer(1)], {1: {10}}, [_event(5)], {}, {})
+        assert SCORERS['skills'](ctx, np.array([0]), np.array([0])).tolist() == [0.0]
+
+    def test_profile_skills_count_only_in_their_own_scorer(self):
+        """user_skills add coverage to profile_skills but not to the default skills scorer"""
+        ctx = ScoringContext(
+            [_volunteer(1)], {1: {10}}, [_event(5)], {5: {10, 11}}, {}, profile_skill_ids={1: {11}},
+        )
+        vi, ei = np.array([0]), np.array([0])
+        assert SCORERS['skills'](ctx, vi, ei).tolist() == [0.5]
+        assert SCORERS['profile_skills'](ctx, vi, ei).tolist() == [1.0]
+
+    def test_availability_matches_time_label(self):
+        """The default availability bonus looks for the volunteer's availability in the time label"""
+        ctx = ScoringContext(
+            [_volunteer(1, availability='Weekends'), _volunteer(2, availability=None)], {},
+            [_event(5, time_label='Weekends, 9 AM'), _event(6, time_label='Dec 31 · 9:00 AM')], {}, {},
+        )
+        scores = SCORERS['availability'](ctx, np.array([0, 0, 1]), np.array([0, 1, 0]))
+        assert scores.tolist() == [1.0, 0.0, 0.0]
+
+    def test_weekday_uses_event_date(self):
+        """2024-12-28 is a Saturday, 2024-12-30 a Monday"""
+        ctx = ScoringContext(
+            [_volunteer(1, availability='weekends')], {},
+            [_event(5, date='2024-12-28'), _event(6, date='2024-12-30')], {}, {},
+        )
+        scores = SCORERS['weekday'](ctx, np.array([0, 0]), np.array([0, 1]))
+        assert scores.tolist() == [1.0, 0.0]
+
+    def test_distance_and_urgency(self):
+        """Same city beats same state; urgency maps to 0/0.5/1"""
+        ctx = ScoringContext(
+            [_volunteer(1, city='Houston', state='TX')], {},
+            [_event(5, urgency='high', location='535 Portwall St, Houston, TX 77029'),
+             _event(6, urgency='medium', location='2501 Seawall Blvd, Galveston, TX 77550'),
+             _event(7, location='Somewhere else')],
+            {}, {},
+        )
+        vi, ei = np.zeros(3, dtype=int), np.arange(3)
+        assert SCORERS['distance'](ctx, vi, ei).tolist() == [1.0, 0.5, 0.0]
+        assert SCORERS['urgency'](ctx, vi, ei).tolist() == [1.0, 0.5, 0.0]
+
+    def test_attendance_and_reliability(self):
+        """History-based components are bounded to [0, 1]"""
+        ctx = ScoringContext(
+            [_volunteer(1, attended=10, tasks=8, completed=8), _volunteer(2)], {},
+            [_event(5)], {}, {},
+        )
+        vi, ei = np.array([0, 1]), np.array([0, 0])
+        assert SCORERS['attendance'](ctx, vi, ei).tolist() == [1.0, 0.0]
+        assert SCORERS['reliability'](ctx, vi, ei).tolist() == [0.9, 0.5]
+
+    def test_per_organizer_weights(self):
+        """Each event is scored with its owner's weights"""
+        weights = {1: dict(DEFAULT_WEIGHTS), 2: {**DEFAULT_WEIGHTS, 'urgency': 50.0}}
+        ctx = ScoringContext(
+            [_volunteer(1)], {1: {10}},
+            [_event(5, urgency='high', ownerid=1, time_label='Flexible hours'),
+             _event(6, urgency='high', ownerid=2, time_label='Flexible hours')],
+            {5: {10}, 6: {10}}, weights,
+        )
+        assert ctx.score_volunteer(1).tolist() == [110.0, 160.0]
+
+    def test_score_matrix_matches_pairs(self):
+        """The full matrix agrees with pairwise scoring"""
+        ctx = ScoringContext(
+            [_volunteer(1), _volunteer(2, availability='weekdays')], {1: {10}, 2: {11}},
+            [_event(5, time_label='Flexible'), _event(6, date='2024-12-28')], {5: {10, 11}, 6: {11}}, {},
+        )
+        matrix = ctx.score_matrix()
+        assert matrix.shape == (2, 2)
+        assert matrix[1, 1] == ctx.score_pairs([1], [1])[0] == 100.0
+        assert matrix[0, 0] == 60.0
+
+    def test_helpers(self):
+        """Location and availability parsing"""
+        assert parse_location('Memorial Park, 6501 Memorial Dr, Houston, TX 77007') == ('houston', 'TX')
+        assert parse_location(None) == (None, None)
+        assert availability_days('flexible').all()
+        assert availability_days('weekends', '["Monday"]').tolist() == [True] + [False] * 6
+
+
+class TestFindBestMatch:
+    """Test best-match search through the scoring framework"""
+
+    def test_find_best_match_prefers_skill_coverage(self, app, test_volunteer, test_event, test_admin, test_skills):
+        """The event covering more required skills wins"""
+        with app.app_context():
+            engine = app.config['ENGINE']
+            with engine.begin() as conn:
+                conn.execute(text(
+                    "INSERT INTO events (id, ownerid, name, date, max_volunteers) "
+                    "VALUES (9998, :ownerid, 'Other Event', '2024-12-31', 20)"
+                ), {"ownerid": test_admin['id']})
+                conn.execute(text(
+                    "INSERT INTO volunteer_skills (volunteer_id, skill_id) VALUES (999, 9991)"
+                ))
+                conn.execute(text(
+                    "INSERT INTO event_requirements (event_id, skill_id) VALUES "
+                    "(999, 9991), (9998, 9991), (9998, 9992)"
+                ))
+
+            response, status = MatchService.find_best_match(test_volunteer['volunteer_id'])
+
+            assert status == 200
+            data = response.get_json()
+            assert data['event']['id'] == test_event['id']
+            assert data['score'] == 100.0
+
+    def test_find_best_match_volunteer_not_found(self, app):
+        """Unknown volunteers return 404"""
+        with app.app_context():
+            response, status = MatchService.find_best_match(123456)
+            assert status == 404
+
+    def test_find_best_matches_batch(self, app, test_volunteer, test_event, test_skills):
+        """The batch path scores several volunteers from one load"""
+        with app.app_context():
+            engine = app.config['ENGINE']
+            with engine.begin() as conn:
+                conn.execute(text(
+                    "INSERT INTO volunteer_skills (volunteer_id, skill_id) VALUES (999, 9991)"
+                ))
+                conn.execute(text(
+                    "INSERT INTO event_requirements (event_id, skill_id) VALUES (999, 9991)"
+                ))
+
+            response, status = MatchService.find_best_matches([test_volunteer['volunteer_id']])
+
+            assert status == 200
+            results = response.get_json()
+            assert len(results) == 1
+            assert results[0]['event']['id'] == test_event['id']
+
+
+class TestLegacyScores:
+    """Default weights reproduce the scores of the original find_best_match loop"""
+
+    def test_default_scores_match_legacy(self, app, test_volunteer, test_user2, test_event, test_admin, test_skills):
+        with app.app_context():
+            engine = app.config['ENGINE']
+            with engine.begin() as conn:
+                conn.execute(text(
+                    "INSERT INTO volunteers (id, user_id, availability) VALUES (998, :user_id, 'Dec 31')"
+                ), {"user_id": test_user2['id']})
+                conn.execute(text(
+                    "INSERT INTO events (id, ownerid, name, date, max_volunteers, time_label) VALUES "
+                    "(9997, :ownerid, 'Weekend Event', '2024-12-28', 20, 'Weekends only'), "
+                    "(9998, :ownerid, 'No Skills', '2024-12-30', 20, NULL)"
+                ), {"ownerid": test_admin['id']})
+                conn.execute(text(
+                    "INSERT INTO volunteer_skills (volunteer_id, skill_id) VALUES (999, 9991), (998, 9992)"
+                ))
+                # Profile skills were never part of the original score
+                conn.execute(text("INSERT INTO user_skills (user_id, skill_id) VALUES (:user_id, 9993)"),
+                             {"user_id": test_volunteer['id']})
+                conn.execute(text(
+                    "INSERT INTO event_requirements (event_id, skill_id) VALUES "
+                    "(999, 9991), (999, 9993), (9997, 9991), (9997, 9992), (9997, 9993)"
+                ))
+
+            with engine.connect() as conn:
+                ctx = ScoringContext.load(conn, [999, 998])
+                for vol_id in (999, 998):
+                    volunteer = conn.execute(text("SELECT * FROM volunteers WHERE id = :id"),
+                                             {"id": vol_id}).mappings().first()
+                    skills = [row[0].lower() for row in conn.execute(text(
+                        "SELECT s.name FROM skills s JOIN volunteer_skills vs ON vs.skill_id = s.id "
+                        "WHERE vs.volunteer_id = :id"), {"id": vol_id})]
+                    expected = [legacy_score(volunteer, skills, event) for event in ctx.events]
+                    # The old loop rounded the skill percentage before adding the bonus
+                    assert np.round(ctx.score_volunteer(vol_id), 2).tolist() == expected
+                assert ctx.score_volunteer(999).tolist() != [0.0] * len(ctx.events)
+
+
+class TestScoringWeights:
+    """Test per-organizer weight configuration"""
+
+    def test_default_weights(self, app, test_admin):
+        """Organizers without overrides get the defaults"""
+        with app.app_context():
+            response, status = MatchService.get_scoring_weights(test_admin['id'])
+            assert status == 200
+            assert response.get_json() == DEFAULT_WEIGHTS
+
+    def test_update_weights(self, app, test_admin):
+        """Overrides are stored and merged with defaults"""
+        with app.app_context():
+            response, status = MatchService.update_scoring_weights(test_admin['id'], {'urgency': 25})
+            assert status == 200
+            assert response.get_json()['urgency'] == 25.0
+            assert response.get_json()['skills'] == DEFAULT_WEIGHTS['skills']
+
+    def test_update_weights_unknown_scorer(self, app, test_admin):
+        """Unknown scorer names are rejected"""
+        with app.app_context():
+            response, status = MatchService.update_scoring_weights(test_admin['id'], {'karma': 1})
+            assert status == 400
+
+    def test_update_weights_requires_admin(self, app, test_user):
+        """Only organizers can set weights"""
+        with app.app_context():
+            response, status = MatchService.update_scoring_weights(test_user['id'], {'urgency': 1})
+            assert status == 403
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
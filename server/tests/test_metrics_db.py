@@ -0,0 +1,211 @@
+"""
+Tests for the Prometheus metrics endpoint
+Run: pytest tests/test_metrics_db.py -v
+"""
+
+import multiprocessing
+import threading
+import urllib.request
+
+import pytest
+from flask import Blueprint, Flask
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+from werkzeug.serving import make_server
+from server.metrics import Counter, Histogram, Metrics, MetricsRegistry
+
+TOKEN = 'scrape-token'
+AUTH = {'Authorization': f'Bearer {TOKEN}'}
+
+
+@pytest.fixture
+def metrics_app(tmp_path):
+    """A small app on a pooled SQLite file database."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'metrics.db'}", poolclass=QueuePool, pool_size=2)
+    app = Flask(__name__)
+    app.config['ENGINE'] = engine
+    app.config['METRICS_TOKEN'] = TOKEN
+    bp = Blueprint('items', __name__)
+
+    @bp.get('/items/<int:item_id>')
+    def get_item(item_id):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        if item_id == 0:
+            return {'message': 'not found'}, 404
+        return {'id': item_id}, 200
+
+    app.register_blueprint(bp, url_prefix='/api')
+    metrics = Metrics(MetricsRegistry()).init_app(app)
+    return app, metrics
+
+
+def _increment_in_child(directory, pid):
+    registry = MetricsRegistry(multiprocess_dir=directory, pid=pid)
+    counter = registry.counter('jobs_total', 'Jobs.', ('kind',))
+    for _ in range(5):
+        counter.inc(('a',))
+    registry.add_collector(lambda: [
+        ('queue_depth', 'Queued jobs.', 'gauge', {(('queue', 'q'),): pid - 1000}),
+        ('retries_total', 'Retries.', 'counter', {(('queue', 'q'),): 2}),
+    ])
+    registry.write_snapshot()
+
+
+class TestPrimitives:
+    """Test counters and histograms without Flask"""
+
+    def test_counter_merges_stripes(self):
+        """Increments from many threads land in different stripes but sum exactly"""
+        counter = Counter('c', 'c', ('k',), stripes=4)
+
+        def work():
+            for _ in range(1000):
+                counter.inc(('x',))
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert counter.collect() == {('x',): 8000}
+
+    def test_histogram_buckets(self):
+        histogram = Histogram('h', 'h', (), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 5.0):
+            histogram.observe((), value)
+        counts, total, count = histogram.collect()[()]
+        assert counts == [2, 1, 1]
+        assert count == 4
+        assert total == pytest.approx(5.65)
+
+    def test_render_histogram_is_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram('latency_seconds', 'Latency.', ('route',), buckets=(0.1, 1.0))
+        histogram.observe(('/a',), 0.05)
+        histogram.observe(('/a',), 0.5)
+        body = registry.render()
+        assert '# TYPE latency_seconds histogram' in body
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in body
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 2' in body
+        assert 'latency_seconds_count{route="/a"} 2' in body
+
+
+class TestMultiProcess:
+    """Test aggregation across worker processes"""
+
+    def test_snapshots_are_summed(self, tmp_path):
+        processes = [multiprocessing.Process(target=_increment_in_child, args=(str(tmp_path), 1000 + i))
+                     for i in range(3)]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+
+        registry = MetricsRegistry(multiprocess_dir=str(tmp_path), pid=2000)
+        registry.counter('jobs_total', 'Jobs.', ('kind',)).inc(('a',))
+        body = registry.render()
+        assert 'jobs_total{kind="a"} 16' in body
+        # Collector counters are summed, collector gauges kept per worker
+        assert '# TYPE retries_total counter' in body
+        assert 'retries_total{queue="q"} 6' in body
+        assert 'queue_depth{queue="q",pid="1001"} 1' in body
+        assert 'queue_depth{queue="q",pid="1002"} 2' in body
+
+    def test_dead_worker_gauges_dropped_counters_kept(self, tmp_path):
+        for pid in (1000, 1001):
+            _increment_in_child(str(tmp_path), pid)
+        registry = MetricsRegistry(multiprocess_dir=str(tmp_path), pid=2000)
+        registry.mark_process_dead(1000)
+        registry.mark_process_dead(1001)
+        assert not (tmp_path / 'metrics-1000.json').exists()
+
+        _increment_in_child(str(tmp_path), 1002)
+        body = registry.render()
+        assert 'jobs_total{kind="a"} 15' in body
+        assert 'retries_total{queue="q"} 6' in body
+        assert 'pid="1000"' not in body and 'pid="1001"' not in body
+        assert 'queue_depth{queue="q",pid="1002"} 2' in body
+
+
+class TestMetricsEndpoint:
+    """Test the Flask integration"""
+
+    def test_request_metrics(self, metrics_app):
+        app, _ = metrics_app
+        client = app.test_client()
+        client.get('/api/items/1')
+        client.get('/api/items/2')
+        client.get('/api/items/0')
+        body = client.get('/metrics', headers=AUTH).get_data(as_text=True)
+        assert ('http_requests_total{blueprint="items",route="/api/items/<int:item_id>",'
+                'method="GET",status="200"} 2') in body
+        assert 'status="404"} 1' in body
+        assert ('http_request_duration_seconds_count{blueprint="items",'
+                'route="/api/items/<int:item_id>",method="GET"} 3') in body
+
+    def test_pool_metrics(self, metrics_app):
+        app, _ = metrics_app
+        client = app.test_client()
+        client.get('/api/items/1')
+        body = client.get('/metrics', headers=AUTH).get_data(as_text=True)
+        assert 'db_pool_checkouts_total{engine="primary",overflow="false"} 1' in body
+        assert 'db_pool_size{engine="primary"} 2' in body
+        assert 'db_pool_checked_out{engine="primary"} 0' in body
+
+    def test_replica_pool_metrics(self, tmp_path):
+        primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}", poolclass=QueuePool, pool_size=2)
+        replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}", poolclass=QueuePool, pool_size=3)
+        app = Flask(__name__)
+        app.config.update(ENGINE=primary, READ_ENGINE=replica, METRICS_TOKEN=TOKEN)
+        Metrics(MetricsRegistry()).init_app(app)
+        with replica.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        body = app.test_client().get('/metrics', headers=AUTH).get_data(as_text=True)
+        assert 'db_pool_checkouts_total{engine="replica",overflow="false"} 1' in body
+        assert 'db_pool_size{engine="primary"} 2' in body
+        assert 'db_pool_size{engine="replica"} 3' in body
+        assert body.count('# TYPE db_pool_size gauge') == 1
+
+    def test_scrape_requires_token(self, metrics_app, monkeypatch):
+        app, _ = metrics_app
+        client = app.test_client()
+        assert client.get('/metrics').status_code == 403
+        assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+
+        monkeypatch.delenv('METRICS_TOKEN', raising=False)
+        unconfigured = Flask(__name__)
+        Metrics(MetricsRegistry()).init_app(unconfigured)
+        assert unconfigured.test_client().get('/metrics').status_code == 404
+
+    def test_cache_hit_ratio(self, metrics_app):
+        app, _ = metrics_app
+
+        class FakeCache:
+            def cache_stats(self):
+                return {'hits': 3, 'misses': 1}
+
+        app.extensions['fake_cache'] = FakeCache()
+        body = app.test_client().get('/metrics', headers=AUTH).get_data(as_text=True)
+        assert 'cache_hit_ratio{cache="fake_cache"} 0.75' in body
+        assert '# TYPE cache_hits_total counter' in body
+        assert 'cache_misses_total{cache="fake_cache"} 1' in body
+
+    def test_scrape_over_http(self, metrics_app):
+        app, _ = metrics_app
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            base = f'http://127.0.0.1:{server.server_port}'
+            urllib.request.urlopen(f'{base}/api/items/1').read()
+            with urllib.request.urlopen(urllib.request.Request(f'{base}/metrics', headers=AUTH)) as response:
+                assert response.headers['Content-Type'].startswith('text/plain')
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+        assert 'http_requests_total{blueprint="items"' in body
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,81 @@
+"""
+Tests for the matching microbenchmarks
+Run: pytest tests/test_micro_bench_db.py -v
+"""
+
+import pytest
+from server.bench import micro
+
+
+@pytest.fixture
+def alternative():
+    """Register a throwaway implementation and remove it afterwards."""
+    added = []
+
+    def register(name, impl_name, fn):
+        micro.implementation(name, impl_name)(fn)
+        added.append((name, impl_name))
+
+    yield register
+    for name, impl_name in added:
+        del micro.BENCHMARKS[name].implementations[impl_name]
+
+
+class TestInputs:
+    """Test the synthetic inputs"""
+
+    @pytest.mark.parametrize('name', sorted(micro.BENCHMARKS))
+    def test_deterministic(self, name):
+        bench = micro.BENCHMARKS[name]
+        assert bench.make_inputs(50, seed=3) == bench.make_inputs(50, seed=3)
+        assert bench.make_inputs(50, seed=3) != bench.make_inputs(50, seed=4)
+
+    def test_find_best_match_finds_an_event(self):
+        inputs = micro.BENCHMARKS['find_best_match'].make_inputs(100, seed=1)
+        event, score = micro.find_best_match_reference(inputs)
+        assert event is not None and score > 0
+
+
+class TestRun:
+    """Test measuring and comparing implementations"""
+
+    def test_run_records_time_and_memory(self):
+        results = micro.run(sizes=[100], repeat=2, min_time=0.001)
+        assert {r['benchmark'] for r in results} == set(micro.BENCHMARKS)
+        for result in results:
+            assert 0 < result['best_s'] <= result['median_s']
+            assert result['peak_bytes'] >= result['retained_bytes'] >= 0
+
+    def test_alternative_checked_against_reference(self, alternative):
+        from server.services.volunteerMatchingService import MatchingHelper
+        alternative('calculate_score', 'sets', lambda pairs: [
+            round(len(set(v) & set(e)) / len(e) * 100, 2) if e else 0 for v, e in pairs])
+        results = micro.run(['calculate_score'], sizes=[200], repeat=1, min_time=0.001)
+        assert [r['implementation'] for r in results] == ['reference', 'sets']
+        assert MatchingHelper.calculate_score(['a', 'b'], ['a', 'c']) == 50.0
+
+    def test_disagreeing_alternative_fails(self, alternative):
+        alternative('calculate_score', 'broken', lambda pairs: [0] * len(pairs))
+        with pytest.raises(AssertionError, match='broken'):
+            micro.run(['calculate_score'], sizes=[100], repeat=1, min_time=0.001)
+
+
+class TestHistory:
+    """Test saving and comparing runs"""
+
+    def test_save_and_compare(self, tmp_path, capsys):
+        path = str(tmp_path / 'history.jsonl')
+        results = micro.run(['upcoming_events'], sizes=[100], repeat=1, min_time=0.001)
+        micro.save(results, path)
+        micro.save(results, path)
+        history = micro.load_history(path)
+        assert len(history) == 2 and history[0]['results'] == results
+
+        slower = [{**r, 'best_s': r['best_s'] * 2} for r in results]
+        assert micro.compare(history[-1], slower) == [('upcoming_events', 'reference', 100)]
+        assert micro.compare(history[-1], results) == []
+        assert 'SLOWER' in capsys.readouterr().out
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
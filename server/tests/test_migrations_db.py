@@ -0,0 +1,150 @@
+"""
+Tests for the versioned migration runner and the indexes it ships
+Run: pytest tests/test_migrations_db.py -v
+"""
+
+import pytest
+from sqlalchemy import text
+from migrate import MigrationRunner, discover, split_statements
+
+RUNNER_TABLE = 'schema_migrations_test'
+
+# Migrations run DDL, which commits implicitly, and seed through test_engine;
+# the migrations and EXPLAIN checks are MySQL's
+pytestmark = [pytest.mark.commits, pytest.mark.mysql]
+
+
+def _explain(conn, sql, params=None):
+    """EXPLAIN rows keyed by table alias."""
+    rows = conn.execute(text("EXPLAIN " + sql), params or {}).mappings().all()
+    return {row['table']: row for row in rows}
+
+
+@pytest.fixture
+def runner(app, test_engine):
+    """A runner recording into its own table so the real one is untouched."""
+    with test_engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {RUNNER_TABLE}"))
+    yield MigrationRunner(test_engine, table=RUNNER_TABLE)
+    with test_engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {RUNNER_TABLE}"))
+
+
+@pytest.fixture
+def seeded_history(app, test_engine, test_admin, test_volunteer, test_event):
+    """Enough tasks and events that the optimizer prefers indexes to scans."""
+    with test_engine.begin() as conn:
+        conn.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
+        conn.execute(text("""
+            INSERT INTO events (id, ownerid, name, date, max_volunteers)
+            VALUES (:id, :ownerid, :name, '2025-01-01', 10)
+        """), [{"id": 10000 + i, "ownerid": 5000 + i % 50, "name": f"Filler {i}"} for i in range(500)])
+        conn.execute(text("""
+            INSERT INTO history_tasks (event_id, volunteer_id, name, score, completed)
+            VALUES (:event_id, :volunteer_id, 'Filler task', 10, :completed)
+        """), [{"event_id": 10000 + i % 500, "volunteer_id": 5000 + i % 200, "completed": i % 2}
+               for i in range(2000)])
+        conn.execute(text("SET FOREIGN_KEY_CHECKS = 1"))
+        conn.execute(text("ANALYZE TABLE events, history_tasks, volunteer_history"))
+    return test_volunteer
+
+
+class TestMigrationFiles:
+    """Test migration discovery and parsing without a database"""
+
+    def test_shipped_migrations_are_ordered(self):
+        """Versions are unique and ascending; legacy unversioned files are skipped"""
+        versions = [m.version for m in discover()]
+        assert versions == sorted(set(versions))
+        assert 4 in versions
+        assert all(m.name != 'add_role_column' for m in discover())
+
+    def test_duplicate_version_rejected(self, tmp_path):
+        """Two files claiming the same version is an error"""
+        (tmp_path / '001_first.sql').write_text('SELECT 1;')
+        (tmp_path / '001_second.sql').write_text('SELECT 2;')
+        with pytest.raises(ValueError):
+            discover(str(tmp_path))
+
+    def test_split_statements(self):
+        """Comments and COMMIT are dropped, statements split on semicolons"""
+        sql = "-- header\nALTER TABLE a ADD INDEX i (x);\n\n-- note\nALTER TABLE b ADD INDEX j (y);\nCOMMIT;\n"
+        assert split_statements(sql) == ['ALTER TABLE a ADD INDEX i (x)', 'ALTER TABLE b ADD INDEX j (y)']
+
+    def test_checksum_tracks_content(self, tmp_path):
+        """Editing a migration changes its checksum"""
+        path = tmp_path / '001_first.sql'
+        path.write_text('SELECT 1;')
+        before = discover(str(tmp_path))[0].checksum
+        path.write_text('SELECT 2;')
+        assert discover(str(tmp_path))[0].checksum != before
+
+
+class TestMigrationRunner:
+    """Test applying migrations to the test database"""
+
+    def test_upgrade_is_idempotent(self, runner):
+        """Indexes already present from the schema file count as applied"""
+        applied = runner.upgrade()
+        assert applied == [m.version for m in discover()]
+        assert runner.pending() == []
+        assert runner.upgrade() == []
+
+    def test_status_reports_pending(self, runner):
+        """A target stops the upgrade part way"""
+        runner.upgrade(target=1)
+        status = {row['version']: row for row in runner.status()}
+        assert status[1]['applied'] is True
+        assert status[4]['applied'] is False
+        assert not any(row['modified'] for row in status.values())
+
+
+class TestIndexUsage:
+    """EXPLAIN the hot queries to check they use the migration's indexes"""
+
+    def test_total_points_uses_index(self, test_engine, seeded_history):
+        with test_engine.connect() as conn:
+            plan = _explain(conn, """
+                SELECT COALESCE(SUM(score), 0) FROM history_tasks
+                WHERE volunteer_id = :volunteer_id AND completed = 1
+            """, {"volunteer_id": seeded_history['volunteer_id']})
+        assert plan['history_tasks']['type'] != 'ALL'
+        assert plan['history_tasks']['key'] is not None
+
+    def test_leaderboard_join_uses_index(self, test_engine, seeded_history):
+        with test_engine.connect() as conn:
+            plan = _explain(conn, """
+                SELECT u.name, v.id, COALESCE(SUM(ht.score), 0) AS total_points
+                FROM volunteers v
+                JOIN users u ON v.user_id = u.id
+                LEFT JOIN history_tasks ht ON ht.volunteer_id = v.id AND ht.completed = 1
+                GROUP BY v.id, u.name
+                ORDER BY total_points DESC
+                LIMIT 10
+            """)
+        assert plan['ht']['type'] != 'ALL'
+
+    def test_volunteer_tasks_uses_index(self, test_engine, seeded_history):
+        with test_engine.connect() as conn:
+            plan = _explain(conn, """
+                SELECT id, name, score, completed FROM history_tasks
+                WHERE volunteer_id = :volunteer_id AND event_id = :event_id
+            """, {"volunteer_id": 5001, "event_id": 10001})
+        assert plan['history_tasks']['type'] != 'ALL'
+        assert plan['history_tasks']['key'] is not None
+
+    def test_attendance_uses_owner_index(self, test_engine, seeded_history, test_admin):
+        with test_engine.connect() as conn:
+            plan = _explain(conn, """
+                SELECT DISTINCT u.id, e.id FROM matches m
+                JOIN events e ON m.event_id = e.id
+                JOIN volunteers v ON m.volunteer_id = v.id
+                JOIN users u ON v.user_id = u.id
+                WHERE e.ownerid = :admin_user_id
+                ORDER BY e.date DESC
+            """, {"admin_user_id": test_admin['id']})
+        assert plan['e']['type'] != 'ALL'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
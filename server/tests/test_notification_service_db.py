@@ -22,7 +22,7 @@ class TestGetNotifications:
                 conn.execute(
                     text(
                     """INSERT INTO notifications (id, user_id, message, type, is_read, created_at)
-                    VALUES (9991, :user_id, 'Test notification', 'info', FALSE, NOW())"""),
+                    VALUES (9991, :user_id, 'Test notification', 'info', FALSE, CURRENT_TIMESTAMP)"""),
                     {"user_id": test_user['id']}
                 )
             
@@ -43,12 +43,12 @@ class TestGetNotifications:
             with engine.begin() as conn:
                 conn.execute(
                     text("""INSERT INTO notifications (id, user_id, message, type, is_read, created_at)
-                         VALUES (9992, :user_id, 'Unread notification', 'warning', FALSE, NOW())"""),
+                         VALUES (9992, :user_id, 'Unread notification', 'warning', FALSE, CURRENT_TIMESTAMP)"""),
                     {"user_id": test_user['id']}
                 )
                 conn.execute(
                     text("""INSERT INTO notifications (id, user_id, message, type, is_read, created_at)
-                         VALUES (9993, :user_id, 'Read notification', 'info', TRUE, NOW())"""),
+                         VALUES (9993, :user_id, 'Read notification', 'info', TRUE, CURRENT_TIMESTAMP)"""),
                     {"user_id": test_user['id']}
                 )
 
@@ -160,7 +160,7 @@ class TestMarkAsRead:
             with engine.begin() as conn:
                 conn.execute(text("""
                     INSERT INTO notifications (id, user_id, message, type, is_read, created_at) 
-                    VALUES (9994, :user_id, 'Unread notification', 'info', FALSE, NOW())
+                    VALUES (9994, :user_id, 'Unread notification', 'info', FALSE, CURRENT_TIMESTAMP)
                 """), {"user_id": test_user['id']})
 
             response, status = NotificationService.mark_as_read(9994, test_user['id'])
@@ -187,7 +187,7 @@ class TestMarkAsRead:
             with engine.begin() as conn:
                 conn.execute(
                     text("""INSERT INTO notifications (id, user_id, message, type, is_read, created_at) 
-                    VALUES (9995, :other_user_id, 'Other user notification', 'info', FALSE, NOW())"""),
+                    VALUES (9995, :other_user_id, 'Other user notification', 'info', FALSE, CURRENT_TIMESTAMP)"""),
                     {"other_user_id": test_user2['id']}
                 )
             
@@ -210,7 +210,7 @@ class TestDeleteNotification:
             with engine.begin() as conn:
                 conn.execute(
                     text("""INSERT INTO notifications (id, user_id, message, type, is_read, created_at) 
-                    VALUES (9996, :user_id, 'To be deleted', 'info', FALSE, NOW())"""),
+                    VALUES (9996, :user_id, 'To be deleted', 'info', FALSE, CURRENT_TIMESTAMP)"""),
                     {"user_id": test_user['id']}
                 )
             
@@ -238,7 +238,7 @@ class TestDeleteNotification:
             with engine.begin() as conn:
                 conn.execute(
                     text("""INSERT INTO notifications (id, user_id, message, type, is_read, created_at) 
-                    VALUES (9997, :other_user_id, 'Other user notification', 'info', FALSE, NOW())"""),
+                    VALUES (9997, :other_user_id, 'Other user notification', 'info', FALSE, CURRENT_TIMESTAMP)"""),
                     {"other_user_id": test_user2['id']}
                 )
             
@@ -261,8 +261,8 @@ class TestBulkOperations:
             with engine.begin() as conn:
                 conn.execute(
                     text("""INSERT INTO notifications (user_id, message, type, is_read, created_at) 
-                    VALUES (:user_id, 'Notification 1', 'info', FALSE, NOW()), 
-                           (:user_id, 'Notification 2', 'info', FALSE, NOW())"""),
+                    VALUES (:user_id, 'Notification 1', 'info', FALSE, CURRENT_TIMESTAMP), 
+                           (:user_id, 'Notification 2', 'info', FALSE, CURRENT_TIMESTAMP)"""),
                     {"user_id": test_user['id']}
                 )
             
@@ -281,8 +281,8 @@ class TestBulkOperations:
             with engine.begin() as conn:
                 conn.execute(
                     text("""INSERT INTO notifications (user_id, message, type, is_read, created_at) 
-                    VALUES (:user_id, 'Read notification', 'info', TRUE, NOW()), 
-                           (:user_id, 'Unread notification', 'info', FALSE, NOW())"""),
+                    VALUES (:user_id, 'Read notification', 'info', TRUE, CURRENT_TIMESTAMP), 
+                           (:user_id, 'Unread notification', 'info', FALSE, CURRENT_TIMESTAMP)"""),
                     {"user_id": test_user['id']}
                 )
 
@@ -0,0 +1,138 @@
+"""
+Tests for the on-demand sampling profiler
+Run: pytest tests/test_profiling_db.py -v
+"""
+
+import os
+import threading
+import time
+
+import pytest
+from server import profiling
+from server.profiling import Profiler, StackSampler
+
+TOKEN = 'secret-token'
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+@pytest.fixture
+def profiled_app(app, test_admin):
+    app.config['PROFILER_TOKEN'] = TOKEN
+
+    @app.get('/slow')
+    def slow():
+        spin(0.05)
+        return 'done', 201
+
+    Profiler(hz=500).init_app(app)
+    return app
+
+
+@pytest.fixture
+def admin_headers(test_admin):
+    return {'X-Profile-Token': TOKEN, 'X-Profile-Admin': str(test_admin['id'])}
+
+
+class TestSampler:
+    """Test stack sampling"""
+
+    def test_samples_busy_thread(self):
+        worker = threading.Thread(target=spin, args=(0.3,))
+        sampler = StackSampler(interval=0.002).start()
+        worker.start()
+        worker.join()
+        profile = sampler.stop()
+        assert profile.samples > 10
+        spinning = sum(n for stack, n in profile.counts.items() if ':spin:' in stack.rsplit(';', 1)[-1])
+        assert spinning > 10
+        line = profile.collapsed().splitlines()[0]
+        stack, count = line.rsplit(' ', 1)
+        assert ' ' not in stack and int(count) > 0
+
+    def test_idle_threads_skipped(self):
+        done = threading.Event()
+        parked = threading.Thread(target=done.wait, daemon=True)
+        parked.start()
+        sampler = StackSampler(interval=0.001, thread_ids={parked.ident})
+        sampler.sample()
+        assert not sampler.counts
+        sampler.include_idle = True
+        sampler.sample()
+        (stack,) = sampler.counts
+        assert 'threading:Condition.wait:' in stack
+        done.set()
+        parked.join()
+
+
+class TestEndpoints:
+    """Test the gated profiling endpoints"""
+
+    def test_disabled_without_token(self, app, monkeypatch):
+        monkeypatch.delenv('PROFILER_TOKEN', raising=False)
+        wsgi_app = app.wsgi_app
+        Profiler().init_app(app)
+        assert app.wsgi_app == wsgi_app
+        assert 'profiler' not in app.extensions
+        assert app.test_client().post('/debug/profile').status_code == 404
+
+    @pytest.mark.parametrize('headers', [{}, {'X-Profile-Token': 'wrong', 'X-Profile-Admin': '999'},
+                                         {'X-Profile-Token': TOKEN, 'X-Profile-Admin': '12345'},
+                                         {'X-Profile-Token': TOKEN}])
+    def test_forbidden(self, profiled_app, headers):
+        client = profiled_app.test_client()
+        assert client.post('/debug/profile?seconds=0.01', headers=headers).status_code == 403
+        if headers:
+            assert client.get('/slow', headers=headers).status_code == 403
+
+    def test_unprofiled_request_untouched(self, profiled_app):
+        response = profiled_app.test_client().get('/slow')
+        assert response.status_code == 201 and response.data == b'done'
+
+    def test_profile_worker(self, profiled_app, admin_headers):
+        worker = threading.Thread(target=spin, args=(0.3,))
+        worker.start()
+        response = profiled_app.test_client().post('/debug/profile?seconds=0.2&format=json', headers=admin_headers)
+        worker.join()
+        assert response.status_code == 200
+        assert response.json['pid'] == os.getpid()
+        assert any(':spin:' in stack for stack in response.json['stacks'])
+        # The requesting thread is left out
+        assert not any('_profile_view' in stack for stack in response.json['stacks'])
+
+    def test_profile_single_request(self, profiled_app, admin_headers):
+        response = profiled_app.test_client().get('/slow', headers=admin_headers)
+        assert response.status_code == 200
+        assert response.headers['X-Profiled-Status'] == '201 CREATED'
+        assert response.mimetype == 'text/plain'
+        stacks = response.get_data(as_text=True)
+        assert 'slow' in stacks and ':spin:' in stacks
+
+    def test_one_session_per_process(self, profiled_app, admin_headers):
+        busy = profiled_app.extensions['profiler'].session(0.01)
+        try:
+            client = profiled_app.test_client()
+            assert client.post('/debug/profile?seconds=0.01', headers=admin_headers).status_code == 409
+            assert client.get('/slow', headers=admin_headers).status_code == 409
+        finally:
+            profiled_app.extensions['profiler'].finish(busy)
+        assert client.post('/debug/profile?seconds=0.01', headers=admin_headers).status_code == 200
+
+    def test_forked_child_starts_without_session(self, profiled_app):
+        busy = profiled_app.extensions['profiler'].session(0.01)
+        try:
+            pid = os.fork()
+            if pid == 0:
+                os._exit(0 if profiling._session_lock.acquire(blocking=False) else 1)
+            _, status = os.waitpid(pid, 0)
+        finally:
+            profiled_app.extensions['profiler'].finish(busy)
+        assert os.WEXITSTATUS(status) == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,171 @@
+"""
+Tests for the recommendation materializer and its read path
+Run: pytest tests/test_recommendation_service_db.py -v
+"""
+
+import pytest
+from sqlalchemy import text
+from services.recommendationService import RecommendationMaterializer, RecommendationService
+from services.volunteerMatchingService import MatchService
+
+
+@pytest.fixture
+def materializer(app):
+    """A materializer driven synchronously by the test."""
+    return RecommendationMaterializer(autostart=False).init_app(app)
+
+
+@pytest.fixture
+def skilled_volunteer(app, test_volunteer, test_event, test_skills):
+    """test_volunteer holds Test Skill 1, which test_event requires."""
+    with app.app_context():
+        with app.config['ENGINE'].begin() as conn:
+            conn.execute(text("INSERT INTO user_skills (user_id, skill_id) VALUES (999, 9991)"))
+            conn.execute(text("INSERT INTO event_requirements (event_id, skill_id) VALUES (999, 9991)"))
+    return test_volunteer
+
+
+def _recommended_event_ids(app, user_id):
+    response, status = RecommendationService.get_recommended_events(user_id)
+    assert status == 200
+    return [row['id'] for row in response.get_json()]
+
+
+class TestMaterializerQueue:
+    """Test delta queueing without a database"""
+
+    def test_duplicate_deltas_collapse(self):
+        """Repeated changes to the same entity are processed once"""
+        materializer = RecommendationMaterializer(autostart=False)
+        materializer.notify('event', 1)
+        materializer.notify('event', '1')
+        materializer.notify('volunteer', 1)
+        assert materializer.stats()['pending'] == 2
+
+    def test_unknown_kind_rejected(self):
+        """Only known delta kinds are accepted"""
+        materializer = RecommendationMaterializer(autostart=False)
+        with pytest.raises(ValueError):
+            materializer.notify('weather', 1)
+
+    def test_empty_queue_stats(self):
+        """An idle materializer reports zero lag"""
+        stats = RecommendationMaterializer(autostart=False).stats()
+        assert stats['lag_seconds'] == 0.0
+        assert stats['batches'] == 0
+        assert stats['running'] is False
+
+
+class TestMaterializerRefresh:
+    """Test recomputation of affected volunteers"""
+
+    def test_volunteer_change_materializes_recommendations(self, app, materializer, skilled_volunteer, test_event):
+        """A volunteer delta writes their top-N rows"""
+        with app.app_context():
+            materializer.notify('user', skilled_volunteer['user_id'])
+            assert materializer.process_all() == 1
+
+            assert _recommended_event_ids(app, skilled_volunteer['user_id']) == [test_event['id']]
+            stats = materializer.stats()
+            assert stats['volunteers_recomputed'] == 1
+            assert stats['pending'] == 0
+
+    def test_event_change_reaches_skill_holders(self, app, materializer, skilled_volunteer, test_admin):
+        """A new event requiring a volunteer's skill is added to their list"""
+        with app.app_context():
+            with app.config['ENGINE'].begin() as conn:
+                conn.execute(text(
+                    "INSERT INTO events (id, ownerid, name, date, max_volunteers) "
+                    "VALUES (9998, :ownerid, 'New Event', '2024-12-30', 20)"
+                ), {"ownerid": test_admin['id']})
+                conn.execute(text("INSERT INTO event_requirements (event_id, skill_id) VALUES (9998, 9991)"))
+
+            materializer.notify('event', 9998)
+            materializer.process_all()
+
+            assert set(_recommended_event_ids(app, skilled_volunteer['user_id'])) == {999, 9998}
+
+    def test_registration_removes_event(self, app, materializer, skilled_volunteer, test_event):
+        """Registering drops the event from the volunteer's recommendations"""
+        with app.app_context():
+            materializer.notify('volunteer', skilled_volunteer['volunteer_id'])
+            materializer.process_all()
+            assert _recommended_event_ids(app, skilled_volunteer['user_id']) == [test_event['id']]
+
+            response, status = MatchService.create_match(skilled_volunteer['volunteer_id'], test_event['id'])
+            assert status == 201
+            assert materializer.stats()['pending'] == 1
+            materializer.process_all()
+
+            with app.config['ENGINE'].connect() as conn:
+                count = conn.execute(text(
+                    "SELECT COUNT(*) FROM volunteer_recommendations WHERE volunteer_id = 999"
+                )).scalar()
+            assert count == 0
+
+    def test_full_event_dropped_for_holders(self, app, materializer, skilled_volunteer, test_event):
+        """An event filling up is removed from every list holding it"""
+        with app.app_context():
+            materializer.notify('volunteer', skilled_volunteer['volunteer_id'])
+            materializer.process_all()
+
+            with app.config['ENGINE'].begin() as conn:
+                conn.execute(text("UPDATE events SET max_volunteers = 0 WHERE id = 999"))
+            materializer.notify('event_full', test_event['id'])
+            materializer.process_all()
+
+            with app.config['ENGINE'].connect() as conn:
+                count = conn.execute(text(
+                    "SELECT COUNT(*) FROM volunteer_recommendations WHERE event_id = 999"
+                )).scalar()
+            assert count == 0
+
+
+class TestRecommendationRead:
+    """Test the read endpoint service"""
+
+    def test_cold_start_computed_and_queued(self, app, materializer, skilled_volunteer, test_event):
+        """A volunteer with no rows yet is computed on read and left to the materializer to store"""
+        with app.app_context():
+            assert _recommended_event_ids(app, skilled_volunteer['user_id']) == [test_event['id']]
+            with app.config['ENGINE'].connect() as conn:
+                assert conn.execute(text("SELECT COUNT(*) FROM volunteer_recommendations")).scalar() == 0
+            assert materializer.stats()['pending'] == 1
+
+            materializer.process_all()
+            assert _recommended_event_ids(app, skilled_volunteer['user_id']) == [test_event['id']]
+            with app.config['ENGINE'].connect() as conn:
+                assert conn.execute(text("SELECT COUNT(*) FROM volunteer_recommendations")).scalar() == 1
+
+    def test_empty_result_not_recomputed(self, app, materializer, test_volunteer, monkeypatch):
+        """Once materialized, an empty list is served without recomputing"""
+        with app.app_context():
+            assert _recommended_event_ids(app, test_volunteer['user_id']) == []
+            materializer.process_all()
+            with app.config['ENGINE'].connect() as conn:
+                assert conn.execute(text(
+                    "SELECT COUNT(*) FROM volunteer_recommendation_state WHERE volunteer_id = 999"
+                )).scalar() == 1
+
+            def fail(*args):
+                raise AssertionError('recomputed on read')
+            monkeypatch.setattr(materializer, 'recommend', fail)
+            assert _recommended_event_ids(app, test_volunteer['user_id']) == []
+            assert materializer.stats()['pending'] == 0
+
+    def test_unknown_user(self, app, materializer):
+        """Users without a volunteer record get 404"""
+        with app.app_context():
+            response, status = RecommendationService.get_recommended_events(123456)
+            assert status == 404
+
+    def test_metrics(self, app, materializer):
+        """Metrics are served when the materializer is installed"""
+        with app.app_context():
+            response, status = RecommendationService.get_metrics()
+            assert status == 200
+            assert 'lag_seconds' in response.get_json()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
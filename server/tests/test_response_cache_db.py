@@ -0,0 +1,235 @@
+"""
+Tests for the tag-based response cache
+Run: pytest tests/test_response_cache_db.py -v
+"""
+
+import time
+
+import pytest
+from flask import Flask, jsonify, request
+from sqlalchemy import create_engine, text
+from services.engineRouting import EngineRouter, get_engine, read_only
+from services.recommendationService import RecommendationMaterializer
+from services.responseCache import CacheEntry, LRUBackend, ResponseCache, cached, invalidate_tags
+from services.taskService import TaskService
+from services.volunteerMatchingService import MatchService
+
+
+def _entry(body, tags=()):
+    return CacheEntry(body, 200, 'application/json', tags)
+
+
+@pytest.fixture
+def cache_app():
+    """An app with a counter view so cache hits are observable."""
+    app = Flask(__name__)
+    cache = ResponseCache(LRUBackend()).init_app(app)
+    calls = {'count': 0}
+
+    @app.get('/items/<int:item_id>')
+    @cached(lambda item_id: [f'item:{item_id}', 'items'], unless=lambda: request.args.get('user_id'))
+    def get_item(item_id):
+        calls['count'] += 1
+        return jsonify({'id': item_id, 'call': calls['count']})
+
+    @app.get('/missing')
+    @cached(['items'])
+    def missing():
+        return jsonify({'message': 'Not found'}), 404
+
+    return app, cache, calls
+
+
+class TestLRUBackend:
+    """Test the in-process store"""
+
+    def test_evicts_least_recently_used_by_size(self):
+        backend = LRUBackend(max_bytes=10)
+        backend.set('a', _entry(b'aaaa'))
+        backend.set('b', _entry(b'bbbb'))
+        backend.get('a')
+        backend.set('c', _entry(b'cccc'))
+        assert backend.get('b') is None
+        assert backend.get('a') is not None
+        assert backend.bytes == 8
+        assert backend.evictions == 1
+
+    def test_oversized_entry_not_stored(self):
+        backend = LRUBackend(max_bytes=3)
+        backend.set('a', _entry(b'aaaa'))
+        assert len(backend) == 0
+
+    def test_invalidate_by_tag(self):
+        backend = LRUBackend()
+        backend.set('e1', _entry(b'1', ['event:1', 'events']))
+        backend.set('e2', _entry(b'2', ['event:2', 'events']))
+        backend.set('s', _entry(b's', ['skills']))
+        assert backend.invalidate(['event:1']) == 1
+        assert backend.get('e2') is not None
+        assert backend.invalidate(['events']) == 1
+        assert len(backend) == 1
+
+
+class TestCachedView:
+    """Test the view decorator"""
+
+    def test_hit_after_miss(self, cache_app):
+        app, cache, calls = cache_app
+        client = app.test_client()
+        first = client.get('/items/1')
+        second = client.get('/items/1')
+        assert first.headers['X-Cache'] == 'MISS'
+        assert second.headers['X-Cache'] == 'HIT'
+        assert second.get_json() == first.get_json()
+        assert calls['count'] == 1
+        assert cache.cache_stats()['hits'] == 1
+
+    def test_query_order_shares_entry(self, cache_app):
+        app, _, calls = cache_app
+        client = app.test_client()
+        client.get('/items/1?a=1&b=2')
+        client.get('/items/1?b=2&a=1')
+        assert calls['count'] == 1
+
+    def test_invalidation_is_precise(self, cache_app):
+        app, _, calls = cache_app
+        client = app.test_client()
+        client.get('/items/1')
+        client.get('/items/2')
+        with app.app_context():
+            invalidate_tags('item:1')
+        assert client.get('/items/1').headers['X-Cache'] == 'MISS'
+        assert client.get('/items/2').headers['X-Cache'] == 'HIT'
+        assert calls['count'] == 3
+
+    def test_personalized_requests_bypass(self, cache_app):
+        app, _, calls = cache_app
+        client = app.test_client()
+        client.get('/items/1?user_id=5')
+        client.get('/items/1?user_id=5')
+        assert calls['count'] == 2
+
+    def test_errors_not_cached(self, cache_app):
+        app, _, _ = cache_app
+        client = app.test_client()
+        client.get('/missing')
+        assert client.get('/missing').headers['X-Cache'] == 'MISS'
+
+    def test_store_skipped_after_racing_invalidation(self, cache_app):
+        """A response rendered before an invalidation is not stored"""
+        app, cache, _ = cache_app
+        generation = cache.generation
+        with app.app_context():
+            invalidate_tags('items')
+        with app.test_request_context('/items/1'):
+            cache.store('GET:/items/1?', jsonify({'stale': True}), ['items'], generation)
+        assert cache.lookup('GET:/items/1?') is None
+
+
+    def test_entries_expire_by_default(self, cache_app):
+        """The in-process backend bounds staleness without any invalidation"""
+        app, cache, _ = cache_app
+        assert cache.ttl == 300
+        app.test_client().get('/items/1')
+        entry = cache.lookup('GET:/items/1?')
+        assert 0 < entry.expires_at - time.monotonic() <= 300
+
+
+def _make_db(path, label):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE source (label TEXT)"))
+        conn.execute(text("INSERT INTO source (label) VALUES (:label)"), {"label": label})
+    return engine
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    """A cached read-only view over primary and replica stand-ins."""
+    app = Flask(__name__)
+    app.config.update(ENGINE=_make_db(tmp_path / 'primary.db', 'primary'), SECRET_KEY='test-secret')
+    EngineRouter(read_engine=_make_db(tmp_path / 'replica.db', 'replica')).init_app(app)
+    cache = ResponseCache(LRUBackend(), primary_fill_seconds=0.2).init_app(app)
+
+    @app.get('/label')
+    @cached(['labels'])
+    @read_only
+    def label():
+        with get_engine().connect() as conn:
+            return jsonify(conn.execute(text("SELECT label FROM source")).scalar())
+
+    return app, cache
+
+
+class TestPrimaryFill:
+    """Test that misses right after an invalidation skip the replica"""
+
+    def test_fill_after_invalidation_reads_primary(self, replica_app):
+        app, cache = replica_app
+        client = app.test_client()
+        assert client.get('/label').get_json() == 'replica'
+        with app.app_context():
+            invalidate_tags('labels')
+        response = client.get('/label')
+        assert response.headers['X-Cache'] == 'MISS'
+        assert response.get_json() == 'primary'
+        assert client.get('/label').get_json() == 'primary'
+
+    def test_fill_window_passes(self, replica_app):
+        app, cache = replica_app
+        with app.app_context():
+            invalidate_tags('labels')
+        time.sleep(0.25)
+        assert app.test_client().get('/label').get_json() == 'replica'
+
+    def test_other_tags_unaffected(self, replica_app):
+        app, cache = replica_app
+        with app.app_context():
+            invalidate_tags('events')
+        assert app.test_client().get('/label').get_json() == 'replica'
+
+
+class TestWriteInvalidation:
+    """Test that service writes drop dependent entries"""
+
+    def test_create_match_invalidates_event(self, app, test_volunteer, test_event):
+        with app.app_context():
+            cache = ResponseCache(LRUBackend()).init_app(app)
+            cache.backend.set('event', _entry(b'{}', [f"matches:{test_event['id']}"]))
+            cache.backend.set('other', _entry(b'{}', ['matches:12345']))
+
+            response, status = MatchService.create_match(test_volunteer['volunteer_id'], test_event['id'])
+            assert status == 201
+            assert cache.backend.get('event') is None
+            assert cache.backend.get('other') is not None
+
+    def test_status_update_invalidates_event(self, app, test_volunteer, test_event):
+        """Cancelling drops cached pages and queues the recommendation refresh"""
+        with app.app_context():
+            cache = ResponseCache(LRUBackend()).init_app(app)
+            materializer = RecommendationMaterializer(autostart=False).init_app(app)
+            MatchService.create_match(test_volunteer['volunteer_id'], test_event['id'])
+            with app.config['ENGINE'].connect() as conn:
+                match_id = conn.execute(text("SELECT id FROM matches WHERE event_id = :event_id"),
+                                        {"event_id": test_event['id']}).scalar()
+            materializer.process_all()
+            cache.backend.set('event', _entry(b'{}', [f"matches:{test_event['id']}"]))
+
+            response, status = MatchService.update_status(match_id, 'cancelled')
+            assert status == 200
+            assert cache.backend.get('event') is None
+            assert materializer.stats()['pending'] == 2
+
+    def test_task_update_invalidates_leaderboard(self, app, test_event):
+        with app.app_context():
+            cache = ResponseCache(LRUBackend()).init_app(app)
+            response, status = TaskService.create_task({'event_id': test_event['id'], 'name': 'Setup', 'score': 10})
+            task_id = response.get_json()['task_id']
+            cache.backend.set('leaderboard', _entry(b'[]', ['leaderboard']))
+
+            TaskService.update_task(task_id, {'completed': True})
+            assert cache.backend.get('leaderboard') is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,162 @@
+"""
+Tests for the fast JSON serialization layer
+Run: pytest tests/test_serialization_db.py -v
+"""
+
+import datetime
+import decimal
+import json
+
+import pytest
+from flask import Flask, jsonify, request
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from services import serialization
+from services.serialization import FastJSONProvider, encode, json_rows
+from services.taskService import TaskService
+from services.volunteerMatchingService import EventService
+
+
+@pytest.fixture
+def fast_app():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    return app
+
+
+@pytest.fixture
+def rows_engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER, name TEXT, price NUMERIC)"))
+        conn.execute(text("INSERT INTO items VALUES (:id, :name, :price)"),
+                     [{"id": i, "name": f"item {i}", "price": i * 1.5} for i in range(1, 13)])
+    return engine
+
+
+class TestEncode:
+    """Test value handling"""
+
+    def test_dates_and_decimals(self):
+        body = encode({
+            'day': datetime.date(2024, 12, 31),
+            'at': datetime.datetime(2024, 12, 31, 9, 30),
+            'amount': decimal.Decimal('10.50'),
+            'time': datetime.timedelta(hours=2),
+        })
+        assert json.loads(body) == {
+            'day': 'Tue, 31 Dec 2024 00:00:00 GMT',
+            'at': 'Tue, 31 Dec 2024 09:30:00 GMT',
+            'amount': '10.50',
+            'time': '2:00:00',
+        }
+
+    def test_unknown_type_raises(self):
+        with pytest.raises(TypeError):
+            encode({'x': object()})
+
+    def test_stdlib_fallback_matches(self, monkeypatch):
+        value = {'day': datetime.date(2024, 1, 2), 'n': [1, 2], 'name': 'Zoë'}
+        fast = encode(value)
+        monkeypatch.setattr(serialization, 'orjson', None)
+        assert json.loads(encode(value)) == json.loads(fast)
+
+
+class TestProvider:
+    """Test jsonify through the provider"""
+
+    def test_jsonify_uses_provider(self, fast_app):
+        with fast_app.app_context():
+            response = jsonify({'day': datetime.date(2024, 5, 1)})
+            assert response.get_data() == b'{"day":"Wed, 01 May 2024 00:00:00 GMT"}\n'
+            assert response.get_json() == {'day': 'Wed, 01 May 2024 00:00:00 GMT'}
+
+    def test_dates_match_flask_provider(self, fast_app):
+        """The client parses Flask's RFC 822 dates; the fast provider must not change them"""
+        value = {
+            'day': datetime.date(2024, 12, 31),
+            'at': datetime.datetime(2024, 12, 31, 9, 30, 15),
+            'aware': datetime.datetime(2024, 12, 31, 9, 30, tzinfo=datetime.timezone.utc),
+        }
+        plain = Flask(__name__)
+        with plain.app_context():
+            expected = jsonify(value).get_json()
+        with fast_app.app_context():
+            assert jsonify(value).get_json() == expected
+            assert json_rows([value]).get_json() == [expected]
+        assert expected['day'] == 'Tue, 31 Dec 2024 00:00:00 GMT'
+
+    def test_request_bodies_parse(self, fast_app):
+        @fast_app.post('/echo')
+        def echo():
+            return jsonify(request.get_json())
+
+        response = fast_app.test_client().post('/echo', json={'a': [1, 2]})
+        assert response.get_json() == {'a': [1, 2]}
+
+    def test_rows_serialize_without_conversion(self, fast_app, rows_engine):
+        with fast_app.app_context(), rows_engine.connect() as conn:
+            row = conn.execute(text("SELECT id, name FROM items WHERE id = 1")).first()
+            mapping = conn.execute(text("SELECT id, name FROM items WHERE id = 2")).mappings().first()
+            assert jsonify([row, mapping]).get_json() == [
+                {'id': 1, 'name': 'item 1'}, {'id': 2, 'name': 'item 2'}]
+
+
+class TestJsonRows:
+    """Test building responses from result rows"""
+
+    def test_result_and_row_lists_agree(self, fast_app, rows_engine):
+        with fast_app.app_context(), rows_engine.connect() as conn:
+            query = text("SELECT id, name FROM items ORDER BY id")
+            from_result = json_rows(conn.execute(query)).get_json()
+            from_rows = json_rows(conn.execute(query).all()).get_json()
+            from_mappings = json_rows(conn.execute(query).mappings().all()).get_json()
+        assert from_result == from_rows == from_mappings
+        assert from_result[0] == {'id': 1, 'name': 'item 1'}
+        assert len(from_result) == 12
+
+    def test_empty(self, fast_app):
+        with fast_app.app_context():
+            assert json_rows([]).get_json() == []
+
+    def test_large_results_stream(self, fast_app, rows_engine, monkeypatch):
+        monkeypatch.setattr(serialization, 'CHUNK_ROWS', 5)
+        with fast_app.app_context(), rows_engine.connect() as conn:
+            query = text("SELECT id, name FROM items ORDER BY id")
+            streamed = json_rows(conn.execute(query), stream_rows=10)
+            whole = json_rows(conn.execute(query), stream_rows=None)
+        assert streamed.is_streamed
+        assert not whole.is_streamed
+        assert json.loads(b''.join(streamed.response)) == whole.get_json()
+
+
+class TestServiceResponses:
+    """Test service list endpoints after the switch to json_rows"""
+
+    def test_tasks_by_event(self, app, test_event):
+        with app.app_context():
+            TaskService.create_task({'event_id': test_event['id'], 'name': 'Setup', 'score': 10})
+            response, status = TaskService.get_tasks_by_event(test_event['id'])
+            assert status == 200
+            tasks = response.get_json()
+            assert tasks[0]['name'] == 'Setup'
+            assert tasks[0]['event_id'] == test_event['id']
+
+    def test_app_fixture_uses_fast_provider(self, app):
+        """DB tests run against the production encoder"""
+        with app.app_context():
+            assert type(app.json).__name__ == 'FastJSONProvider'
+            assert jsonify(datetime.date(2024, 12, 31)).get_data() == b'"Tue, 31 Dec 2024 00:00:00 GMT"\n'
+
+    @pytest.mark.mysql
+    def test_event_dates_on_the_wire(self, app, test_event):
+        """DATE columns reach the client as RFC 822 strings"""
+        with app.app_context():
+            response, status = EventService.get_all()
+            assert status == 200
+            event = next(e for e in response.get_json() if e['id'] == test_event['id'])
+            assert event['date'] == 'Tue, 31 Dec 2024 00:00:00 GMT'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,90 @@
+"""
+Tests for the preforking launcher's lifecycle hooks
+Run: pytest tests/test_serve_db.py -v
+"""
+
+import multiprocessing
+import os
+
+import pytest
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+from server.metrics import Metrics, MetricsRegistry
+from server.serve import MemoryWatch, after_fork, warm
+
+
+@pytest.fixture
+def served_app(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'serve.db'}", poolclass=QueuePool, pool_size=2)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE skills (name TEXT)"))
+        conn.execute(text("INSERT INTO skills VALUES ('first aid')"))
+    app = Flask(__name__)
+    app.config['ENGINE'] = engine
+    metrics = Metrics(MetricsRegistry(multiprocess_dir=str(tmp_path / 'metrics'), flush_interval=60)).init_app(app)
+    calls = []
+
+    @app.get('/api/skills')
+    def skills():
+        calls.append(1)
+        with engine.connect() as conn:
+            return jsonify([row[0] for row in conn.execute(text("SELECT name FROM skills"))])
+
+    return app, metrics, calls
+
+
+def _child(app, queue):
+    after_fork(app)
+    registry = app.extensions['metrics'].registry
+    with app.config['ENGINE'].connect() as conn:
+        count = conn.execute(text("SELECT COUNT(*) FROM skills")).scalar()
+    queue.put((registry.pid == os.getpid(), registry.snapshot()['http_requests_total']['samples'], count))
+
+
+class TestMemoryWatch:
+    """Test memory-based recycling decisions"""
+
+    def test_recycles_after_growth(self):
+        rss = [100]
+        watch = MemoryWatch(50, check_every=2, rss=lambda: rss[0])
+        watch.start()
+        rss[0] = 140
+        assert [watch.exceeded(), watch.exceeded()] == [False, False]
+        rss[0] = 151
+        assert [watch.exceeded(), watch.exceeded()] == [False, True]
+
+    def test_disabled(self):
+        watch = MemoryWatch(0, check_every=1, rss=lambda: 10 ** 12)
+        watch.start()
+        assert watch.exceeded() is False
+
+
+class TestLifecycle:
+    """Test warm-up in the master and reset in forked workers"""
+
+    def test_warm_fills_caches_and_closes_pool(self, served_app):
+        app, metrics, calls = served_app
+        warm(app, paths=['/api/skills'])
+        assert calls == [1]
+        assert metrics.registry.snapshot()['http_requests_total']['samples'] == []
+        assert app.config['ENGINE'].pool.checkedin() == 0
+
+    def test_forked_worker_starts_fresh(self, served_app):
+        app, metrics, _ = served_app
+        app.test_client().get('/api/skills')
+        ctx = multiprocessing.get_context('fork')
+        queue = ctx.Queue()
+        child = ctx.Process(target=_child, args=(app, queue))
+        child.start()
+        own_pid, samples, count = queue.get(timeout=10)
+        child.join(10)
+        assert own_pid and samples == [] and count == 1
+        # The parent's pooled connection survived the child's dispose
+        with app.config['ENGINE'].connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM skills")).scalar() == 1
+        assert metrics.registry.pid == os.getpid()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
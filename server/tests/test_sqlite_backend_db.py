@@ -0,0 +1,82 @@
+"""
+Tests for the embedded SQLite backend and the dialect helpers
+Run: pytest tests/test_sqlite_backend_db.py -v
+(TEST_DB_BACKEND=sqlite runs the whole suite on SQLite)
+"""
+
+import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+from server.db import make_engine_from_env
+from services.sqlDialect import insert_ignore, upsert
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path, monkeypatch):
+    monkeypatch.setenv('DB_BACKEND', 'sqlite')
+    monkeypatch.setenv('DB_SQLITE_PATH', str(tmp_path / 'embedded.db'))
+    monkeypatch.setenv('DB_SQLITE_MMAP_MB', '64')
+    engine = make_engine_from_env()
+    yield engine
+    engine.dispose()
+
+
+class TestEngine:
+    """Test engine construction from the environment"""
+
+    def test_pragmas(self, sqlite_engine):
+        with sqlite_engine.connect() as conn:
+            pragma = lambda name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            assert pragma('journal_mode') == 'wal'
+            assert pragma('mmap_size') == 64 * 1024 * 1024
+            assert pragma('foreign_keys') == 1
+            assert pragma('busy_timeout') == 5000
+
+    def test_schema_created_with_native_types(self, sqlite_engine):
+        with sqlite_engine.begin() as conn:
+            conn.execute(text("INSERT INTO users (id, name, email, password_hash) VALUES (1, 'A', 'a@x', 'h')"))
+            conn.execute(text("INSERT INTO events (id, ownerid, name, date) VALUES (1, 1, 'E', :day)"),
+                         {"day": datetime.date(2030, 1, 2)})
+            event = conn.execute(text("SELECT date, created_at FROM events")).one()
+        assert event.date == datetime.date(2030, 1, 2)
+        assert isinstance(event.created_at, datetime.datetime)
+
+    def test_profile_updated_at_trigger(self, sqlite_engine):
+        with sqlite_engine.begin() as conn:
+            conn.execute(text("INSERT INTO users (id, name, email, password_hash) VALUES (1, 'A', 'a@x', 'h')"))
+            conn.execute(text("INSERT INTO profiles (user_id, full_name, address1, city, state, zip, updated_at) "
+                              "VALUES (1, 'A', 'x', 'y', 'TX', '1', '2000-01-01 00:00:00')"))
+            conn.execute(text("UPDATE profiles SET city = 'z' WHERE user_id = 1"))
+            updated = conn.execute(text("SELECT updated_at FROM profiles")).scalar()
+        assert updated.year > 2000
+
+
+class TestDialectHelpers:
+    """Test the per-dialect spellings"""
+
+    def test_mysql_spelling(self):
+        mysql = create_engine('mysql+pymysql://u:p@localhost/db')
+        assert str(insert_ignore(mysql, 'user_skills', ('user_id', 'skill_id'))) == \
+            "INSERT IGNORE INTO user_skills (user_id, skill_id) VALUES (:user_id, :skill_id)"
+        assert str(upsert(mysql, 'scoring_weights', ('owner_id', 'scorer', 'weight'), keys=('owner_id', 'scorer'))) \
+            .endswith("ON DUPLICATE KEY UPDATE weight = VALUES(weight)")
+
+    def test_sqlite_behaviour(self, sqlite_engine):
+        with sqlite_engine.begin() as conn:
+            conn.execute(text("INSERT INTO users (id, name, email, password_hash) VALUES (1, 'A', 'a@x', 'h')"))
+            skip = insert_ignore(conn, 'skills', ('name',))
+            conn.execute(skip, [{"name": "First Aid"}, {"name": "First Aid"}, {"name": "Cooking"}])
+            assert conn.execute(text("SELECT COUNT(*) FROM skills")).scalar() == 2
+
+            weights = upsert(conn, 'scoring_weights', ('owner_id', 'scorer', 'weight'), keys=('owner_id', 'scorer'))
+            conn.execute(weights, {"owner_id": 1, "scorer": "skills", "weight": 1.0})
+            conn.execute(weights, {"owner_id": 1, "scorer": "skills", "weight": 2.5})
+            assert conn.execute(text("SELECT weight FROM scoring_weights")).scalars().all() == [2.5]
+
+    def test_statements_cached(self, sqlite_engine):
+        assert insert_ignore(sqlite_engine, 'skills', ['name']) is insert_ignore(sqlite_engine, 'skills', ('name',))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -5,6 +5,8 @@ Run: pytest tests/new_tests/test_volunteer_matching_service_db.py -v
 
 import pytest
 from services.volunteerMatchingService import VolunteerMatchingService
+from services.changeEvents import notify_change
+from services.matchScoring import availability_days
 from flask import json
 from sqlalchemy import text
 
@@ -299,7 +301,7 @@ class TestSkillMatching:
             with engine.begin() as conn:
                 conn.execute(
                     text("INSERT INTO users (id, name, email, password_hash, created_at) "
-                    "VALUES (9992, 'Skilled Volunteer', 'skilled@example.com', 'hash', NOW())")
+                    "VALUES (9992, 'Skilled Volunteer', 'skilled@example.com', 'hash', CURRENT_TIMESTAMP)")
                 )
                 conn.execute(
                     text("INSERT INTO volunteers (id, user_id, phone, availability) "
@@ -368,7 +370,7 @@ class TestAvailabilityMatching:
             with engine.begin() as conn:
                 conn.execute(
                     text("INSERT INTO users (id, name, email, password_hash, created_at) "
-                    "VALUES (9993, 'Available Volunteer', 'available@example.com', 'hash', NOW())")
+                    "VALUES (9993, 'Available Volunteer', 'available@example.com', 'hash', CURRENT_TIMESTAMP)")
                 )
                 conn.execute(
                     text("INSERT INTO volunteers (id, user_id, phone, availability) "
@@ -383,5 +385,138 @@ class TestAvailabilityMatching:
             assert isinstance(volunteers, list)
 
 
+    def test_available_volunteers_by_date_range(self, app, test_volunteer):
+        """Only volunteers free on a weekday in the range are returned"""
+        with app.app_context():
+            # test_volunteer is available on weekends; 2024-12-28 is a Saturday
+            response, status = VolunteerMatchingService.find_available_volunteers('2024-12-28', '2024-12-28')
+            assert status == 200
+            assert [v['id'] for v in response.get_json()] == [test_volunteer['volunteer_id']]
+
+            response, status = VolunteerMatchingService.find_available_volunteers('2024-12-30', '2024-12-31')
+            assert status == 200
+            assert response.get_json() == []
+
+    def test_availability_filter_matches_python_rules(self, app):
+        """The SQL date filter agrees with availability_days() for labels and profile days"""
+        cases = [
+            ('weekends', None), ('Weekdays', None), ('saturday', None), ('flexible', None), ('', None),
+            ('weekends', '["Monday", "Wednesday"]'), ('weekdays', '[]'), ('weekdays', '["someday"]'),
+        ]
+        with app.app_context():
+            with app.config['ENGINE'].begin() as conn:
+                for i, (label, days) in enumerate(cases):
+                    conn.execute(text(
+                        "INSERT INTO users (id, name, email, password_hash) VALUES (:id, 'A', :email, 'hash')"
+                    ), {"id": 9960 + i, "email": f"avail{i}@example.com"})
+                    conn.execute(text("INSERT INTO volunteers (id, user_id, availability) VALUES (:id, :id, :label)"),
+                                 {"id": 9960 + i, "label": label})
+                    if days is not None:
+                        conn.execute(text(
+                            "INSERT INTO profiles (user_id, full_name, address1, city, state, zip, availability) "
+                            "VALUES (:id, 'A', '1 Main St', 'Houston', 'TX', '77001', :days)"
+                        ), {"id": 9960 + i, "days": days})
+
+            # 2024-12-23 is a Monday
+            for day in range(7):
+                date = f'2024-12-{23 + day}'
+                response, status = VolunteerMatchingService.find_available_volunteers(date, date)
+                assert status == 200
+                found = {v['id'] for v in response.get_json()}
+                expected = {9960 + i for i, (label, days) in enumerate(cases) if availability_days(label, days)[day]}
+                assert found == expected, date
+
+    def test_available_volunteers_invalid_dates(self, app):
+        """Malformed or reversed ranges are rejected"""
+        with app.app_context():
+            response, status = VolunteerMatchingService.find_available_volunteers('12/28/2024')
+            assert status == 400
+            response, status = VolunteerMatchingService.find_available_volunteers('2024-12-31', '2024-12-01')
+            assert status == 400
+
+
+class TestCandidateRanking:
+    """Test reverse matching through the skill index"""
+
+    @pytest.fixture
+    def candidates(self, app, test_event, test_skills):
+        """Three volunteers with different coverage of test_event's two required skills"""
+        with app.app_context():
+            with app.config['ENGINE'].begin() as conn:
+                for i in range(3):
+                    conn.execute(text(
+                        "INSERT INTO users (id, name, email, password_hash) "
+                        "VALUES (:id, :name, :email, 'hash')"
+                    ), {"id": 9980 + i, "name": f"Candidate {i}", "email": f"candidate{i}@example.com"})
+                    conn.execute(text(
+                        "INSERT INTO volunteers (id, user_id, availability) VALUES (:id, :id, 'flexible')"
+                    ), {"id": 9980 + i})
+                conn.execute(text(
+                    "INSERT INTO volunteer_skills (volunteer_id, skill_id) VALUES "
+                    "(9980, 9991), (9980, 9992), (9981, 9991)"
+                ))
+                conn.execute(text("INSERT INTO user_skills (user_id, skill_id) VALUES (9982, 9993)"))
+                conn.execute(text(
+                    "INSERT INTO event_requirements (event_id, skill_id) VALUES (999, 9991), (999, 9992)"
+                ))
+        return [9980, 9981, 9982]
+
+    def test_ranks_by_score(self, app, test_event, candidates):
+        """Full coverage ranks above partial; volunteers without a required skill are not candidates"""
+        with app.app_context():
+            response, status = VolunteerMatchingService.find_matching_candidates(test_event['id'])
+            assert status == 200
+            ranked = response.get_json()
+            assert [r['volunteer_id'] for r in ranked] == [9980, 9981]
+            assert ranked[0]['score'] > ranked[1]['score']
+            assert ranked[0]['name'] == 'Candidate 0'
+
+    def test_excludes_matched_volunteers(self, app, test_event, candidates):
+        """Volunteers already registered for the event are skipped"""
+        with app.app_context():
+            with app.config['ENGINE'].begin() as conn:
+                conn.execute(text("INSERT INTO matches (volunteer_id, event_id) VALUES (9980, 999)"))
+            response, status = VolunteerMatchingService.find_matching_candidates(test_event['id'])
+            assert [r['volunteer_id'] for r in response.get_json()] == [9981]
+
+    def test_limit(self, app, test_event, candidates):
+        """Only the requested number of candidates is returned"""
+        with app.app_context():
+            response, status = VolunteerMatchingService.find_matching_candidates(test_event['id'], limit=1)
+            assert [r['volunteer_id'] for r in response.get_json()] == [9980]
+
+    def test_index_follows_skill_changes(self, app, test_event, candidates):
+        """Reported skill changes are picked up without rebuilding the index"""
+        with app.app_context():
+            VolunteerMatchingService.find_matching_candidates(test_event['id'])
+            with app.config['ENGINE'].begin() as conn:
+                conn.execute(text("INSERT INTO user_skills (user_id, skill_id) VALUES (9982, 9991)"))
+            notify_change('user', 9982)
+
+            response, status = VolunteerMatchingService.find_matching_candidates(test_event['id'])
+            assert 9982 in [r['volunteer_id'] for r in response.get_json()]
+
+    def test_event_without_requirements(self, app, test_event, candidates):
+        """With no required skills every volunteer available on the event's weekday is a candidate"""
+        with app.app_context():
+            with app.config['ENGINE'].begin() as conn:
+                conn.execute(text("DELETE FROM event_requirements WHERE event_id = 999"))
+                # test_event is on Tuesday 2024-12-31
+                conn.execute(text("UPDATE volunteers SET availability = 'weekends' WHERE id = 9982"))
+            response, status = VolunteerMatchingService.find_matching_candidates(test_event['id'])
+            assert status == 200
+            assert sorted(r['volunteer_id'] for r in response.get_json()) == [9980, 9981]
+
+            response, status = VolunteerMatchingService.find_matching_candidates(test_event['id'],
+                                                                                 available_only=False)
+            assert sorted(r['volunteer_id'] for r in response.get_json()) == [9980, 9981, 9982]
+
+    def test_unknown_event(self, app):
+        """Ranking an unknown event returns 404"""
+        with app.app_context():
+            response, status = VolunteerMatchingService.find_matching_candidates(123456)
+            assert status == 404
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
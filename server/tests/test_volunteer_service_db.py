@@ -42,12 +42,12 @@ class TestGetVolunteerHistory:
                 # Create history records
                 conn.execute(text("""
                     INSERT INTO volunteer_history (volunteer_id, event_id, created_at) 
-                    VALUES (:volunteer_id, 9991, NOW())
+                    VALUES (:volunteer_id, 9991, CURRENT_TIMESTAMP)
                 """), {"volunteer_id": test_volunteer['volunteer_id']})
                 
                 conn.execute(text("""
                     INSERT INTO volunteer_history (volunteer_id, event_id, created_at) 
-                    VALUES (:volunteer_id, 9992, NOW())
+                    VALUES (:volunteer_id, 9992, CURRENT_TIMESTAMP)
                 """), {"volunteer_id": test_volunteer['volunteer_id']})
             
             response = VolunteerService.get_volunteer_history_user(test_volunteer['volunteer_id'])
@@ -92,7 +92,7 @@ class TestGetVolunteerHistory:
                 
                 conn.execute(text("""
                     INSERT INTO volunteer_history (volunteer_id, event_id, created_at) 
-                    VALUES (:volunteer_id, 9993, NOW())
+                    VALUES (:volunteer_id, 9993, CURRENT_TIMESTAMP)
                 """), {"volunteer_id": test_volunteer['volunteer_id']})
                 
                 # Event with confirmed match
@@ -108,7 +108,7 @@ class TestGetVolunteerHistory:
                 
                 conn.execute(text("""
                     INSERT INTO volunteer_history (volunteer_id, event_id, created_at) 
-                    VALUES (:volunteer_id, 9994, NOW())
+                    VALUES (:volunteer_id, 9994, CURRENT_TIMESTAMP)
                 """), {"volunteer_id": test_volunteer['volunteer_id']})
                 
                 # Event with cancelled match
@@ -124,7 +124,7 @@ class TestGetVolunteerHistory:
                 
                 conn.execute(text("""
                     INSERT INTO volunteer_history (volunteer_id, event_id, created_at) 
-                    VALUES (:volunteer_id, 9995, NOW())
+                    VALUES (:volunteer_id, 9995, CURRENT_TIMESTAMP)
                 """), {"volunteer_id": test_volunteer['volunteer_id']})
             
             response = VolunteerService.get_volunteer_history_user(test_volunteer['volunteer_id'])
@@ -210,7 +210,7 @@ class TestGetVolunteerHistory:
                 
                 conn.execute(text("""
                     INSERT INTO volunteer_history (volunteer_id, event_id, created_at) 
-                    VALUES (:volunteer_id, 9999, NOW())
+                    VALUES (:volunteer_id, 9999, CURRENT_TIMESTAMP)
                 """), {"volunteer_id": test_volunteer['volunteer_id']})
             
             response = VolunteerService.get_volunteer_history_user(test_volunteer['volunteer_id'])
@@ -259,13 +259,13 @@ class TestGetVolunteerHistory:
                 # Create history for test volunteer
                 conn.execute(text("""
                     INSERT INTO volunteer_history (volunteer_id, event_id, created_at) 
-                    VALUES (:volunteer_id, 10001, NOW())
+                    VALUES (:volunteer_id, 10001, CURRENT_TIMESTAMP)
                 """), {"volunteer_id": test_volunteer['volunteer_id']})
                 
                 # Create history for another volunteer
                 conn.execute(text("""
                     INSERT INTO volunteer_history (volunteer_id, event_id, created_at) 
-                    VALUES (8888, 10002, NOW())
+                    VALUES (8888, 10002, CURRENT_TIMESTAMP)
                 """))
             
             response = VolunteerService.get_volunteer_history_user(test_volunteer['volunteer_id'])
@@ -295,7 +295,7 @@ class TestGetVolunteerHistory:
                     
                     conn.execute(text("""
                         INSERT INTO volunteer_history (volunteer_id, event_id, created_at) 
-                        VALUES (:volunteer_id, :event_id, NOW())
+                        VALUES (:volunteer_id, :event_id, CURRENT_TIMESTAMP)
                     """), {
                         "volunteer_id": test_volunteer['volunteer_id'],
                         "event_id": event_id